@@ -75,8 +75,7 @@ def cli(env, sortby, columns, datacenter, username, storage_type):
     table = formatting.Table(columns.columns)
     table.sortby = sortby
 
-    for block_volume in block_volumes:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(block_volume)])
+    for row in columns.rows(block_volumes):
+        table.add_row(row)
 
     env.fout(table)
@@ -46,8 +46,7 @@ def cli(env, volume_id, sortby, columns):
     table = formatting.Table(columns.columns)
     table.sortby = sortby
 
-    for snapshot in snapshots:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(snapshot)])
+    for row in columns.rows(snapshots):
+        table.add_row(row)
 
     env.fout(table)
@@ -7,11 +7,57 @@
 """
 import click
 
+from SoftLayer.CLI import formatting
 from SoftLayer import utils
 
 # pylint: disable=unused-argument
 
 
+def compile_path(path):
+    """Compiles a column path into a function that fetches it from a dict.
+
+    The returned function behaves like utils.lookup(data, *path), except that
+    a missing key or a None value anywhere along the path returns None instead
+    of raising. Callable paths are wrapped the same way, so a lambda column
+    that trips over missing data displays a blank value.
+
+    :param path: a tuple/list of keys, or a callable taking the data dict
+    """
+    if callable(path):
+        def call(data):
+            try:
+                return path(data)
+            except (KeyError, AttributeError, TypeError):
+                return None
+        return call
+
+    keys = tuple(path)
+    if len(keys) == 1:
+        key = keys[0]
+
+        def get(data):
+            return data.get(key)
+        return get
+
+    if len(keys) == 2:
+        first, second = keys
+
+        def get_nested(data):
+            value = data.get(first)
+            if isinstance(value, dict):
+                return value.get(second)
+            return None
+        return get_nested
+
+    def get_deep(data):
+        for key in keys:
+            if not isinstance(data, dict):
+                return None
+            data = data.get(key)
+        return data
+    return get_deep
+
+
 class Column(object):
     """Column desctribes an attribute and how to fetch/display it."""
 
@@ -19,6 +65,7 @@ class Column(object):
         self.name = name
         self.path = path
         self.mask = mask
+        self.accessor = compile_path(path)
 
         # If the mask is not set explicitly, infer it from the path
         if self.mask is None and isinstance(path, (tuple, list)):
@@ -31,27 +78,46 @@ class ColumnFormatter(object):
     def __init__(self):
         self.columns = []
         self.column_funcs = []
-        self.mask_parts = set()
+        self.mask_parts = []
 
     def add_column(self, column):
         """Add a new column along with a formatting function."""
         self.columns.append(column.name)
-        self.column_funcs.append(column.path)
+        self.column_funcs.append(column.accessor)
 
         if column.mask is not None:
-            self.mask_parts.add(column.mask)
+            self.mask_parts.append(column.mask)
 
     def row(self, data):
         """Return a formatted row for the given data."""
         for column in self.column_funcs:
-            if callable(column):
-                yield column(data)
-            else:
-                yield utils.lookup(data, *column)
+            yield column(data)
+
+    def rows(self, data):
+        """Return table rows for a list of results, in one pass.
+
+        Missing and empty string values are replaced by formatting.blank(),
+        while zero counts are kept.
+
+        :param list data: API results, one dict per row
+        """
+        funcs = self.column_funcs
+        blank = formatting.blank()
+        return [[_blank_if_empty(func(item), blank) for func in funcs] for item in data]
 
     def mask(self):
-        """Returns a SoftLayer mask to fetch data needed for each column."""
-        return ','.join(self.mask_parts)
+        """Returns a SoftLayer mask to fetch data needed for each column.
+
+        Properties needed by several columns are only requested once.
+        """
+        return utils.merge_masks(*self.mask_parts)
+
+
+def _blank_if_empty(value, blank):
+    """Returns blank for a missing or empty string value, else the value."""
+    if value is None or value == '':
+        return blank
+    return value
 
 
 def get_formatter(columns):
@@ -63,8 +63,7 @@ def cli(env, sortby, cpu, columns, datacenter, name, memory, disk, tag):
     table = formatting.Table(columns.columns)
     table.sortby = sortby
 
-    for host in hosts:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(host)])
+    for row in columns.rows(hosts):
+        table.add_row(row)
 
     env.fout(table)
@@ -69,8 +69,7 @@ def cli(env, identifier, sortby, cpu, domain, hostname, memory, tag, columns):
     table = formatting.Table(columns.columns)
     table.sortby = sortby
 
-    for guest in guests:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(guest)])
+    for row in columns.rows(guests):
+        table.add_row(row)
 
     env.fout(table)
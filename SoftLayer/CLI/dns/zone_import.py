@@ -7,111 +7,389 @@ import click
 import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
+from SoftLayer.managers import dns
 
-RECORD_REGEX = re.compile(r"""^((?P<domain>(([\w-]+|\*)(\.)?)*|\@)?\s+
-                               (?P<ttl>\d+)?\s+
-                               (?P<class>\w+)?)?\s+
-                               (?P<type>\w+)\s+
-                               (?P<data>.*)""", re.X)
 RECORD_FMT = "type={type}, record={record}, data={data}, ttl={ttl}"
+ACTION_NAMES = {'create': 'Created', 'edit': 'Edited', 'delete': 'Deleted'}
+
+# Keys of parsed records that have another name in DNSManager.plan_zone_sync()
+SYNC_KEYS = {'record': 'host'}
 
 
 @click.command()
 @click.argument('zonefile',
                 type=click.Path(exists=True, readable=True, resolve_path=True))
-@click.option('--dry-run', is_flag=True, help="Don't actually create records")
+@click.option('--dry-run', is_flag=True, help="Don't actually create records, only show the changes")
+@click.option('--prune', is_flag=True,
+              help="Edit or delete records of the zone that are not in the zone file")
+@click.option('--workers', type=click.IntRange(1, 16), default=dns.ZONE_SYNC_WORKERS, show_default=True,
+              help="How many batches of records to send at the same time")
+@click.option('--zone', help="The zone name, defaults to the first $ORIGIN or the SOA record of the file")
 @environment.pass_env
-def cli(env, zonefile, dry_run):
-    """Import zone based off a BIND zone file."""
+def cli(env, zonefile, dry_run, prune, workers, zone):
+    """Import zone based off a BIND zone file.
+
+    The records of the zone file are compared to the ones the zone already
+    has, and only the missing or changed records are sent, in batches.
+    """
 
     manager = SoftLayer.DNSManager(env.client)
+    parser = ZoneFileParser(zone)
+    wanted = []
     with open(zonefile) as zone_f:
-        zone_contents = zone_f.read()
+        for record in parser.parse(zone_f):
+            env.out("Parsed: %s" % RECORD_FMT.format(**record))
+            wanted.append(dict((SYNC_KEYS.get(key, key), value) for key, value in record.items()))
 
-    zone, records, bad_lines = parse_zone_details(zone_contents)
+    for line in parser.bad_lines:
+        env.out("Unparsed: line %(line)d: %(text)s (%(error)s)" % line)
 
+    zone = parser.zone_name
+    if zone is None:
+        raise exceptions.CLIAbort("Unable to find the zone name, add $ORIGIN to the file or use --zone")
     env.out("Parsed: zone=%s" % zone)
-    for record in records:
-        env.out("Parsed: %s" % RECORD_FMT.format(**record))
-
-    for line in bad_lines:
-        env.out("Unparsed: %s" % line)
-
-    if dry_run:
-        return
 
     # Find zone id or create the zone if it doesn't exist
     try:
         zone_id = helpers.resolve_id(manager.resolve_ids, zone,
                                      name='zone')
     except exceptions.CLIAbort:
-        zone_id = manager.create_zone(zone)['id']
-        env.out(click.style("Created: %s" % zone, fg='green'))
-
-    # Attempt to create each record
-    for record in records:
-        try:
-            manager.create_record(zone_id,
-                                  record['record'],
-                                  record['type'],
-                                  record['data'],
-                                  record['ttl'])
-
-            env.out(click.style("Created: %s" % RECORD_FMT.format(**record),
-                                fg='green'))
-        except SoftLayer.SoftLayerAPIError as ex:
-            env.out(click.style("Failed: %s" % RECORD_FMT.format(**record),
-                                fg='red'))
-            env.out(click.style(str(ex), fg='red'))
+        zone_id = None
+        if not dry_run:
+            zone_id = manager.create_zone(zone)['id']
+            env.out(click.style("Created: %s" % zone, fg='green'))
+
+    plan = manager.plan_zone_sync(zone_id, wanted, prune=prune)
+    env.fout(_plan_table(plan))
+    env.out("Plan: %d to create, %d to edit, %d to delete, %d unchanged"
+            % (len(plan['create']), len(plan['edit']), len(plan['delete']), len(plan['unchanged'])))
+
+    if dry_run:
+        return
 
+    failed = 0
+    for result in manager.apply_zone_sync(plan, max_workers=workers):
+        action = ACTION_NAMES[result['action']]
+        if result['error']:
+            failed += len(result['records'])
+            env.out(click.style("Failed: %s %d records" % (result['action'], len(result['records'])), fg='red'))
+            env.out(click.style(result['error'], fg='red'))
+        else:
+            env.out(click.style("%s: %d records" % (action, len(result['records'])), fg='green'))
+
+    if failed:
+        raise exceptions.CLIAbort("%d records failed to sync" % failed)
     env.out(click.style("Finished", fg='green'))
 
 
-def parse_zone_details(zone_contents):
-    """Parses a zone file into python data-structures."""
-    records = []
-    bad_lines = []
-    zone_lines = [line.strip() for line in zone_contents.split('\n')]
+def _plan_table(plan):
+    table = formatting.Table(['action', 'host', 'type', 'data', 'ttl'], title='Changes')
+    for action in ('delete', 'edit', 'create'):
+        for record in plan[action]:
+            table.add_row([action, record.get('host'), str(record.get('type')).upper(),
+                           record.get('data'), record.get('ttl', formatting.blank())])
+    return table
 
-    zone_search = re.search(r'^\$ORIGIN (?P<zone>.*)\.', zone_lines[0])
-    zone = zone_search.group('zone')
 
-    for line in zone_lines[1:]:
-        record_search = re.search(RECORD_REGEX, line)
-        if record_search is None:
-            bad_lines.append(line)
-            continue
+def parse_zone_details(zone_contents, zone=None):
+    """Parses a zone file into python data-structures.
 
-        name = record_search.group('domain')
-        # The API requires we send a host, although bind allows a blank
-        # entry. @ is the same thing as blank
-        if name is None:
-            name = "@"
-
-        ttl = record_search.group('ttl')
-        # we don't do anything with the class
-        # domain_class = domainSearch.group('class')
-        record_type = record_search.group('type').upper()
-        data = record_search.group('data')
-
-        # the dns class doesn't support weighted MX records yet, so we chomp
-        # that part out.
-        if record_type == "MX":
-            record_search = re.search(r'(?P<weight>\d+)\s+(?P<data>.*)', data)
-            data = record_search.group('data')
-
-        # This will skip the SOA record bit. And any domain that gets
-        # parsed oddly.
-        if record_type == 'IN':
-            bad_lines.append(line)
-            continue
+    :param str zone_contents: the zone file
+    :param str zone: the zone name, defaults to the first $ORIGIN or the SOA owner
+    :returns: the zone, the list of records and the list of lines that were not parsed
+    """
+    parser = ZoneFileParser(zone)
+    records = list(parser.parse(zone_contents.splitlines()))
+    return parser.zone_name, records, parser.bad_lines
+
+
+class ZoneFileParser(object):
+    """Streaming parser of BIND (RFC 1035) zone files.
+
+    Records are yielded as soon as they are read, so a large zone file is
+    never held in memory. Multi-line records in parentheses, comments,
+    quoted strings, $ORIGIN, $TTL, relative and blank owner names and TTLs
+    with units (1h30m) are understood. Names are made relative to the zone,
+    the way the API stores them.
+
+    Lines that can't be parsed are skipped and kept in bad_lines, as
+    {'line', 'text', 'error'} with the line number the record started on.
+
+    ::
+
+        parser = ZoneFileParser()
+        with open('example.com.zone') as zone_f:
+            for record in parser.parse(zone_f):
+                print(record['record'], record['type'], record['data'])
+
+    :param str zone: the zone name, defaults to the first $ORIGIN or the SOA owner
+    :param int default_ttl: TTL of records before a $TTL, when they have none
+    """
+
+    def __init__(self, zone=None, default_ttl=None):
+        self.zone = _absolute(zone) if zone else None
+        self.origin = self.zone
+        self.ttl = default_ttl
+        self.last_ttl = None
+        self.owner = None
+        self.bad_lines = []
+
+    @property
+    def zone_name(self):
+        """The zone name without the trailing dot, None until it is known."""
+        return self.zone.rstrip('.') if self.zone else None
+
+    def parse(self, lines):
+        """Yields the records of lines, dicts with record, type, data, ttl and the MX and SRV keys.
+
+        :param lines: the lines of the zone file, like an open file
+        """
+        for line_number, text, tokens, error in _logical_lines(lines):
+            if error:
+                self._bad(line_number, text, error)
+                continue
+            if not tokens:
+                continue
+            try:
+                record = self._parse_tokens(tokens)
+            except ValueError as ex:
+                self._bad(line_number, text, str(ex))
+                continue
+            if record is not None:
+                yield record
+
+    def _bad(self, line_number, text, error):
+        self.bad_lines.append({'line': line_number, 'text': text.strip(), 'error': error})
+
+    def _parse_tokens(self, tokens):
+        first = tokens[0]
+        if first.startswith('$'):
+            self._parse_directive(first.upper(), tokens[1:])
+            return None
+
+        if getattr(first, 'owner', False):
+            self.owner = self._name(first)
+            tokens = tokens[1:]
+        elif self.owner is None:
+            raise ValueError("record without an owner name")
+
+        ttl = None
+        while tokens and tokens[0].upper() not in RECORD_TYPES:
+            if tokens[0].upper() in CLASSES:
+                if tokens[0].upper() != 'IN':
+                    raise ValueError("unsupported class %s" % tokens[0])
+            elif ttl is None and TTL_REGEX.match(tokens[0]):
+                ttl = parse_ttl(tokens[0])
+            else:
+                raise ValueError("unsupported record type %s" % tokens[0])
+            tokens = tokens[1:]
+        if not tokens:
+            raise ValueError("record without a type")
+
+        record_type = tokens[0].upper()
+        rdata = tokens[1:]
+        if len(rdata) < RECORD_TYPES[record_type]:
+            raise ValueError("%s record needs %d values" % (record_type, RECORD_TYPES[record_type]))
+
+        if self.zone is None:
+            if record_type != 'SOA' or self.owner == '.':
+                raise ValueError("record before the zone is known, add $ORIGIN")
+            self.zone = self.owner
+            self.origin = self.origin or self.zone
+
+        if ttl is not None:
+            self.last_ttl = ttl
+        elif self.ttl is not None:
+            ttl = self.ttl
+        else:
+            ttl = self.last_ttl
 
-        records.append({
-            'record': name,
-            'type': record_type,
-            'data': data,
-            'ttl': ttl,
-        })
+        record = {'record': self._relative(self.owner), 'type': record_type, 'data': None, 'ttl': ttl}
+        if record_type == 'MX':
+            record['mxPriority'] = _integer(rdata[0])
+            record['data'] = self._target(rdata[1])
+        elif record_type == 'SRV':
+            self._parse_srv(record, rdata)
+        elif record_type in ('CNAME', 'NS', 'PTR'):
+            record['data'] = self._target(rdata[0])
+        elif record_type == 'SOA':
+            record['data'] = ' '.join([self._target(rdata[0]), self._target(rdata[1])] + rdata[2:])
+        else:
+            record['data'] = ' '.join(rdata)
+        return record
 
-    return zone, records, bad_lines
+    def _parse_directive(self, directive, args):
+        if directive == '$ORIGIN' and len(args) == 1:
+            self.origin = self._name(args[0])
+            if self.zone is None:
+                self.zone = self.origin
+        elif directive == '$TTL' and len(args) == 1:
+            self.ttl = parse_ttl(args[0])
+        elif directive in ('$ORIGIN', '$TTL'):
+            raise ValueError("%s takes one value" % directive)
+        else:
+            raise ValueError("unsupported directive %s" % directive)
+
+    def _parse_srv(self, record, rdata):
+        # _service._protocol[.host], the API keeps the service and protocol apart from the host
+        labels = record['record'].split('.', 2)
+        if len(labels) < 2 or not labels[0].startswith('_') or not labels[1].startswith('_'):
+            raise ValueError("SRV owner must start with _service._protocol")
+        record['service'] = labels[0]
+        record['protocol'] = labels[1][1:].lower()
+        record['record'] = labels[2] if len(labels) == 3 else '@'
+        record['priority'] = _integer(rdata[0])
+        record['weight'] = _integer(rdata[1])
+        record['port'] = _integer(rdata[2])
+        record['data'] = self._target(rdata[3])
+
+    def _name(self, name):
+        """Returns name as an absolute name, ending with a dot."""
+        if name == '@':
+            if self.origin is None:
+                raise ValueError("@ used before $ORIGIN")
+            return self.origin
+        if name.endswith('.'):
+            return name.lower()
+        if self.origin is None:
+            raise ValueError("relative name %s used before $ORIGIN" % name)
+        return '%s.%s' % (name.lower(), self.origin) if self.origin != '.' else name.lower() + '.'
+
+    def _relative(self, name):
+        """Returns an absolute name relative to the zone, @ for the zone itself."""
+        if name == self.zone:
+            return '@'
+        if name.endswith('.' + self.zone):
+            return name[:-len(self.zone) - 1]
+        raise ValueError("%s is not in %s" % (name, self.zone))
+
+    def _target(self, name):
+        """Returns a name in record data as written, or absolute if it is relative to another $ORIGIN."""
+        if name.endswith('.') or (name != '@' and self.origin == self.zone):
+            return name
+        return self._name(name)
+
+
+# Record types the API supports, and how many values they need
+RECORD_TYPES = {'A': 1, 'AAAA': 1, 'CNAME': 1, 'MX': 2, 'NS': 1, 'PTR': 1, 'SOA': 7, 'SPF': 1, 'SRV': 4, 'TXT': 1}
+
+CLASSES = ('IN', 'CH', 'HS', 'CS')
+
+TTL_REGEX = re.compile(r'^(\d+[smhdw]?)+$', re.I)
+
+TTL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+# Characters that make a line go through the slower tokenizer
+SPECIAL_CHARS = re.compile(r'[;"()\\]')
+
+
+def parse_ttl(value):
+    """Returns a TTL like 3600 or 1h30m in seconds."""
+    if not TTL_REGEX.match(value):
+        raise ValueError("invalid TTL %s" % value)
+    if value.isdigit():
+        return int(value)
+    seconds = 0
+    for number, unit in re.findall(r'(\d+)([smhdw]?)', value.lower()):
+        seconds += int(number) * TTL_UNITS[unit or 's']
+    return seconds
+
+
+def _integer(value):
+    if not value.isdigit():
+        raise ValueError("%s is not a number" % value)
+    return int(value)
+
+
+def _absolute(name):
+    name = name.lower()
+    return name if name.endswith('.') else name + '.'
+
+
+class _Token(str):
+    """A token of a zone file, owner is True if it is the owner name at the start of a line."""
+    owner = False
+
+
+def _logical_lines(lines):
+    """Joins the physical lines of a zone file into records.
+
+    Yields (line number, text, tokens, error) for each record, where text
+    is the first physical line and tokens the words of the whole record.
+    Quoted strings are one token, with their quotes.
+    """
+    tokens = []
+    start = None
+    depth = 0
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if depth == 0:
+            start = (line_number, line)
+            tokens = []
+
+        if SPECIAL_CHARS.search(line) is None:
+            words = line.split()
+        else:
+            try:
+                words, depth = _tokenize(line, depth)
+            except ValueError as ex:
+                yield start[0], start[1], None, str(ex)
+                depth = 0
+                continue
+
+        if words and not tokens and line_number == start[0] and not line[:1].isspace():
+            words[0] = _Token(words[0])
+            words[0].owner = True
+        tokens.extend(words)
+
+        if depth == 0:
+            yield start[0], start[1], tokens, None
+
+    if depth:
+        yield start[0], start[1], None, "unbalanced parentheses"
+
+
+def _tokenize(line, depth):
+    """Splits a line with comments, quotes or parentheses into words.
+
+    :returns: the words and the parentheses depth at the end of the line
+    """
+    words = []
+    word = []
+    index = 0
+    length = len(line)
+    while index < length:
+        char = line[index]
+        if char == ';':
+            break
+        if char == '"':
+            end = index + 1
+            while end < length and line[end] != '"':
+                end += 2 if line[end] == '\\' else 1
+            if end >= length:
+                raise ValueError("unterminated quoted string")
+            word.append(line[index:end + 1])
+            index = end + 1
+            continue
+        if char == '\\':
+            word.append(line[index:index + 2])
+            index += 2
+            continue
+        if char in '()' or char.isspace():
+            if word:
+                words.append(''.join(word))
+                word = []
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                if depth == 0:
+                    raise ValueError("unbalanced parentheses")
+                depth -= 1
+        else:
+            word.append(char)
+        index += 1
+    if word:
+        words.append(''.join(word))
+    return words, depth
@@ -56,6 +56,12 @@ class Environment(object):
         """Format the input and output to the console (stdout)."""
         if output is not None:
             try:
+                # Large tables are written out as they are rendered
+                if self.format in ('table', 'raw') and isinstance(output, formatting.Table):
+                    for chunk in formatting.iter_render_table(output, fmt=self.format):
+                        self.out(chunk, newline=False)
+                    self.out('', newline=newline)
+                    return
                 self.out(self.fmt(output), newline=newline)
             except UnicodeEncodeError:
                 # If we hit an undecodeable entry, just try outputting as json.
@@ -0,0 +1,65 @@
+"""Export Event Logs."""
+# :license: MIT, see LICENSE for more details.
+
+import gzip
+import json
+
+import click
+
+import SoftLayer
+from SoftLayer.CLI import environment
+from SoftLayer.CLI import exceptions
+from SoftLayer.managers import event_log
+
+
+@click.command()
+@click.option('--date-min', '-d', required=True,
+              help='The earliest date we want to export event logs for in mm/dd/yyyy format.')
+@click.option('--date-max', '-D', required=True,
+              help='The latest date we want to export event logs for in mm/dd/yyyy format.')
+@click.option('--obj-event', '-e',
+              help="The event we want to export event logs for")
+@click.option('--obj-id', '-i',
+              help="The id of the object we want to export event logs for")
+@click.option('--obj-type', '-t',
+              help="The type of the object we want to export event logs for")
+@click.option('--utc-offset', '-z', default='-0000', show_default=True,
+              help="UTC Offset for searching with dates. +/-HHMM format")
+@click.option('--output', '-o', type=click.Path(dir_okay=False), required=True,
+              help="Gzip compressed file the event logs are written to, one JSON object per line")
+@click.option('--slice-days', type=click.IntRange(1, 366), default=1, show_default=True,
+              help="Days of event logs to fetch with one filter")
+@click.option('--workers', type=click.IntRange(1, 32), default=event_log.EXPORT_WORKERS, show_default=True,
+              help="How many slices to fetch at the same time")
+@environment.pass_env
+def cli(env, date_min, date_max, obj_event, obj_id, obj_type, utc_offset, output, slice_days, workers):
+    """Export the event logs of a date range to a compressed JSON lines file.
+
+    The range is split into slices of --slice-days that are fetched at the
+    same time, each with its own paging, and written oldest first. A slice
+    that fails is tried again a few times before the export gives up on it.
+
+    Example:
+        slcli event-log export -d 01/01/2019 -D 04/01/2019 -o events.ndjson.gz
+    """
+    event_mgr = SoftLayer.EventLogManager(env.client)
+
+    def progress(time_slice):
+        """Reports a finished slice on stderr."""
+        if time_slice['status'] == 'failed':
+            env.err('%s - %s: failed after %d attempts: %s' % (time_slice['start'], time_slice['end'],
+                                                               time_slice['attempts'], time_slice['error']))
+        else:
+            env.err('%s - %s: %d event logs' % (time_slice['start'], time_slice['end'], time_slice['count']))
+
+    count = 0
+    try:
+        with gzip.open(output, 'wt') as output_file:
+            for log in event_mgr.export_event_logs(date_min, date_max, obj_event, obj_id, obj_type, utc_offset,
+                                                   slice_days=slice_days, max_workers=workers, progress=progress):
+                output_file.write(json.dumps(log, sort_keys=True) + '\n')
+                count += 1
+    except SoftLayer.SoftLayerError as ex:
+        raise exceptions.CLIAbort('Exported %d event logs to %s. %s' % (count, output, ex))
+
+    env.err('Exported %d event logs to %s' % (count, output))
@@ -1,10 +1,15 @@
 """Get Event Logs."""
 # :license: MIT, see LICENSE for more details.
 
+import datetime
+import json
+
 import click
 
 import SoftLayer
 from SoftLayer.CLI import environment
+from SoftLayer.CLI import exceptions
+from SoftLayer.managers import event_log
 from SoftLayer import utils
 
 
@@ -25,19 +30,64 @@ from SoftLayer import utils
               help="Display metadata if present")
 @click.option('--limit', '-l', type=click.INT, default=50, show_default=True,
               help="Total number of result to return. -1 to return ALL, there may be a LOT of these.")
+@click.option('--follow', is_flag=True, default=False,
+              help="Keep printing new event logs as JSON lines, starting after --date-min or now")
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help="With --follow, file the newest printed event log is saved in, following resumes from it")
+@click.option('--poll-interval', type=click.IntRange(1, 86400), default=60, show_default=True,
+              help="With --follow, seconds to wait between looking for new event logs")
+@click.option('--local', is_flag=True, default=False,
+              help="Search the local index filled by event-log index instead of the API")
+@click.option('--search', '-s',
+              help="With --local, full-text search of the metadata, like 'password OR sshkey'")
 @environment.pass_env
-def cli(env, date_min, date_max, obj_event, obj_id, obj_type, utc_offset, metadata, limit):
+def cli(env, date_min, date_max, obj_event, obj_id, obj_type, utc_offset, metadata, limit,
+        follow, checkpoint, poll_interval, local, search):
     """Get Event Logs
 
+    With --follow, new event logs are printed as one JSON object per line
+    until the command is interrupted, oldest first. Each poll only asks for
+    event logs newer than the last one printed. With --checkpoint, a
+    follow that was stopped resumes after the last event log it printed.
+
+    With --local, the event logs come from the index kept by
+    event-log index, without any API call.
+
     Example:
         slcli event-log get -d 01/01/2019 -D 02/01/2019 -t User -l 10
+        slcli event-log get -t User --follow --checkpoint events.json >> events.ndjson
+        slcli event-log get --local -e "Login Failed" --search "password" --metadata
     """
+    if search and not local:
+        raise exceptions.ArgumentError("--search can only be used with --local")
+    if follow:
+        if date_max:
+            raise exceptions.ArgumentError("--date-max can not be used with --follow")
+        if local:
+            raise exceptions.ArgumentError("--local can not be used with --follow")
+        _follow(env, date_min, obj_event, obj_id, obj_type, utc_offset, checkpoint, poll_interval)
+        return
+    if checkpoint:
+        raise exceptions.ArgumentError("--checkpoint can only be used with --follow")
+
     columns = ['Event', 'Object', 'Type', 'Date', 'Username']
 
     event_mgr = SoftLayer.EventLogManager(env.client)
     user_mgr = SoftLayer.UserManager(env.client)
     request_filter = event_mgr.build_filter(date_min, date_max, obj_event, obj_id, obj_type, utc_offset)
-    logs = event_mgr.get_event_logs(request_filter)
+    if local:
+        index = event_log.EventLogIndex()
+        try:
+            logs = index.get_event_logs(request_filter, search, limit if limit != -1 else None)
+        except SoftLayer.SoftLayerError as ex:
+            raise exceptions.CLIAbort(str(ex))
+        finally:
+            index.close()
+        if not logs:
+            click.secho('No logs available in %s for filter %s.' % (index.path, request_filter), fg='red')
+            return
+    else:
+        logs = event_mgr.get_event_logs(request_filter)
     log_time = "%Y-%m-%dT%H:%M:%S.%f%z"
     user_data = {}
 
@@ -53,7 +103,9 @@ def cli(env, date_min, date_max, obj_event, obj_id, obj_type, utc_offset, metada
 
         user = log['userType']
         label = log.get('label', '')
-        if user == "CUSTOMER":
+        if user == "CUSTOMER" and local:
+            user = log.get('username') or log['userId']
+        elif user == "CUSTOMER":
             username = user_data.get(log['userId'])
             if username is None:
                 username = user_mgr.get_user(log['userId'], "mask[username]")['username']
@@ -81,3 +133,24 @@ def cli(env, date_min, date_max, obj_event, obj_id, obj_type, utc_offset, metada
         row_count = row_count + 1
         if row_count >= limit and limit != -1:
             return
+
+
+def _follow(env, date_min, obj_event, obj_id, obj_type, utc_offset, checkpoint, poll_interval):
+    """Prints event logs as JSON lines as they are created."""
+    event_mgr = SoftLayer.EventLogManager(env.client)
+    request_filter = event_mgr.build_filter(date_min, None, obj_event, obj_id, obj_type, utc_offset)
+    saved = event_log.EventLogCheckpoint(checkpoint)
+    since = None
+    if saved.since:
+        env.err('Resuming after the event logs of %s' % saved.since)
+    elif not date_min:
+        since = datetime.datetime.now(utils.UTC()).strftime('%Y-%m-%dT%H:%M:%S.000000+00:00')
+
+    logs = event_mgr.follow_event_logs(request_filter, saved, since=since, poll_interval=poll_interval)
+    try:
+        for log in logs:
+            env.out(json.dumps(log, sort_keys=True))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logs.close()
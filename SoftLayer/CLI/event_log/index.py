@@ -0,0 +1,64 @@
+"""Sync the local Event Log index."""
+# :license: MIT, see LICENSE for more details.
+
+import datetime
+
+import click
+
+import SoftLayer
+from SoftLayer.CLI import environment
+from SoftLayer.CLI import exceptions
+from SoftLayer.managers import event_log
+
+
+@click.command()
+@click.option('--date-min', '-d',
+              help='Index the event logs from this date in mm/dd/yyyy format, instead of the ones newer '
+                   'than the index')
+@click.option('--date-max', '-D',
+              help='With --date-min, index the event logs up to this date in mm/dd/yyyy format')
+@click.option('--utc-offset', '-z', default='-0000', show_default=True,
+              help="UTC Offset for searching with dates. +/-HHMM format")
+@click.option('--workers', type=click.IntRange(1, 32), default=event_log.EXPORT_WORKERS, show_default=True,
+              help="With --date-min, how many days to fetch at the same time")
+@environment.pass_env
+def cli(env, date_min, date_max, utc_offset, workers):
+    """Copy event logs into a local index that event-log get --local searches.
+
+    The first sync needs --date-min, later ones only fetch the event logs
+    newer than the newest one in the index. The index is kept in
+    ~/.softlayer_event_log.db, or the SL_EVENT_LOG_DB environment variable.
+
+    Example:
+        slcli event-log index -d 01/01/2019
+        slcli event-log get --local -t User --search "password"
+    """
+    if date_max and not date_min:
+        raise exceptions.ArgumentError("--date-max can only be used with --date-min")
+
+    event_mgr = SoftLayer.EventLogManager(env.client)
+    index = event_log.EventLogIndex()
+    failed = []
+
+    def progress(time_slice):
+        """Reports a finished day on stderr."""
+        if time_slice['status'] == 'failed':
+            failed.append(time_slice)
+            env.err('%s - %s: failed: %s' % (time_slice['start'], time_slice['end'], time_slice['error']))
+        else:
+            env.err('%s - %s: %d event logs' % (time_slice['start'], time_slice['end'], time_slice['count']))
+
+    try:
+        added = event_mgr.sync_index(index, date_min, date_max, utc_offset, max_workers=workers,
+                                     progress=progress)
+        env.err('Indexed %d new event logs, %d in %s' % (added, index.count(), index.path))
+    except SoftLayer.SoftLayerError as ex:
+        message = 'Unable to sync the event log index %s: %s' % (index.path, ex)
+        if failed:
+            # The days after the failed ones were added, so a sync without dates would skip the failed ones
+            days = sorted(failed, key=lambda time_slice: datetime.datetime.strptime(time_slice['start'], '%m/%d/%Y'))
+            message += ('\nIndex the missing days with: slcli event-log index --date-min %s --date-max %s'
+                        % (days[0]['start'], days[-1]['end']))
+        raise exceptions.CLIAbort(message) from ex
+    finally:
+        index.close()
@@ -74,8 +74,7 @@ def cli(env, sortby, columns, datacenter, username, storage_type):
     table = formatting.Table(columns.columns)
     table.sortby = sortby
 
-    for file_volume in file_volumes:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(file_volume)])
+    for row in columns.rows(file_volumes):
+        table.add_row(row)
 
     env.fout(table)
@@ -42,8 +42,7 @@ def cli(env, columns, sortby, volume_id):
     else:
         table = formatting.KeyValueTable(columns.columns)
         table.sortby = sortby
-        for legal_center in legal_centers:
-            table.add_row([value or formatting.blank()
-                           for value in columns.row(legal_center)])
+        for row in columns.rows(legal_centers):
+            table.add_row(row)
 
         env.fout(table)
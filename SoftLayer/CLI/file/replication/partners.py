@@ -53,8 +53,7 @@ def cli(env, columns, sortby, volume_id):
         table = formatting.Table(columns.columns)
         table.sortby = sortby
 
-        for legal_volume in legal_volumes:
-            table.add_row([value or formatting.blank()
-                           for value in columns.row(legal_volume)])
+        for row in columns.rows(legal_volumes):
+            table.add_row(row)
 
         env.fout(table)
@@ -0,0 +1,169 @@
+"""
+    SoftLayer.CLI.fleet
+    ~~~~~~~~~~~~~~~~~~~
+    --bulk mode for commands that act on one server
+
+    :license: MIT, see LICENSE for more details.
+"""
+import click
+
+from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import formatting
+from SoftLayer import exceptions as sl_exceptions
+from SoftLayer.managers import dns
+from SoftLayer.managers import fleet
+from SoftLayer import utils
+
+# Selector terms that are passed to list_instances/list_hardware
+FILTER_KEYS = ('tag', 'datacenter', 'domain')
+
+
+def bulk_options(func):
+    """Adds the --bulk, --checkpoint and --workers options to a command."""
+    options = [
+        click.option('--bulk', is_flag=True,
+                     help="IDENTIFIER selects many servers: comma separated IDs, hostname globs, "
+                          "tag:NAME, datacenter:NAME or domain:NAME"),
+        click.option('--checkpoint', type=click.Path(dir_okay=False),
+                     help="With --bulk, file recording the servers that are done, to resume an interrupted run"),
+        click.option('--workers', type=click.IntRange(1, 64), default=fleet.DEFAULT_WORKERS, show_default=True,
+                     help="With --bulk, how many servers to act on at the same time"),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def parse_selector(selector):
+    """Parses a --bulk selector into select_resources() arguments.
+
+    Terms are separated by commas. Numbers are IDs, tag:, datacenter: and
+    domain: terms filter the listed servers, and anything else is a
+    hostname glob. Servers have to match every filter and one of the globs.
+
+    :returns: a dict of ids, hostnames and filters
+    """
+    ids = []
+    hostnames = []
+    filters = {}
+    for term in [term.strip() for term in selector.split(',') if term.strip()]:
+        key, _, value = term.partition(':')
+        if term.isdigit():
+            ids.append(int(term))
+        elif value and key in FILTER_KEYS:
+            if key == 'tag':
+                filters.setdefault('tags', []).append(value)
+            else:
+                filters[key] = value
+        else:
+            hostnames.append(term)
+    return dict(filters, ids=ids, hostnames=hostnames)
+
+
+def run_bulk(env, list_func, selector, operation, action, checkpoint=None, workers=fleet.DEFAULT_WORKERS,
+             destructive=False):
+    """Runs operation on every server selected by selector and prints the results.
+
+    The selected servers are listed before asking for confirmation. A
+    destructive operation has to be confirmed by typing the number of
+    selected servers, like formatting.no_going_back().
+
+    :param env: the CLI environment
+    :param list_func: function listing the servers, like VSManager.list_instances
+    :param str selector: the --bulk selector, see parse_selector()
+    :param operation: function taking a server ID
+    :param str action: what the operation does, used in the confirmation and checkpoint
+    :param str checkpoint: path of the checkpoint file
+    :param int workers: how many servers to act on at the same time
+    :param bool destructive: True if the operation cannot be undone
+    """
+    servers = fleet.select_resources(list_func, **parse_selector(selector))
+    if not servers:
+        raise exceptions.CLIAbort("No servers match %s" % selector)
+
+    if not env.skip_confirmations:
+        table = formatting.Table(['id', 'hostname'], title='Selected servers')
+        for server in servers:
+            table.add_row([server['id'], server['hostname'] or formatting.blank()])
+        env.fout(table)
+        if destructive:
+            env.out("This will %s %d servers." % (action, len(servers)))
+            confirmed = formatting.no_going_back(len(servers))
+        else:
+            confirmed = formatting.confirm("This will %s %d servers. Continue?" % (action, len(servers)))
+        if not confirmed:
+            raise exceptions.CLIAbort('Aborted.')
+
+    try:
+        tracker = fleet.Checkpoint(checkpoint, action) if checkpoint else None
+    except sl_exceptions.SoftLayerError as ex:
+        raise exceptions.CLIAbort(str(ex))
+    results = fleet.FleetExecutor(max_workers=workers, checkpoint=tracker).run(
+        operation, [server['id'] for server in servers])
+
+    table = formatting.Table(['id', 'hostname', 'status', 'error'])
+    for server, result in zip(servers, results):
+        table.add_row([server['id'], server['hostname'] or formatting.blank(), result['status'],
+                       result['error'] or formatting.blank()])
+    env.fout(table)
+
+    failed = [result for result in results if result['status'] == 'failed']
+    if failed:
+        raise exceptions.CLIAbort("%s failed on %d of %d servers" % (action, len(failed), len(results)))
+
+
+def run_bulk_dns_sync(env, list_func, object_key, service, selector, a_record=True, aaaa_record=False, ptr=True,
+                      ttl=7200, workers=dns.ZONE_SYNC_WORKERS):
+    """Syncs the DNS records of every server selected by selector and prints the results.
+
+    The servers are loaded with one list call, and the zones they need once
+    each, see DNSManager.plan_server_sync(). The changes are shown and
+    confirmed before they are sent, in batches.
+
+    :param env: the CLI environment
+    :param list_func: function listing the servers, like VSManager.list_instances
+    :param str object_key: the property of the account the servers are in, like virtualGuests
+    :param str service: Virtual_Guest or Hardware_Server
+    :param str selector: the --bulk selector, see parse_selector()
+    :param int workers: how many zones to fetch, or batches to send, at the same time
+    """
+    selected = fleet.select_resources(list_func, **parse_selector(selector))
+    if not selected:
+        raise exceptions.CLIAbort("No servers match %s" % selector)
+
+    ids = [server['id'] for server in selected]
+    servers = list_func(mask=dns.SERVER_SYNC_MASK, filter={object_key: {'id': utils.query_filter_in(ids)}})
+    manager = dns.DNSManager(env.client)
+    plan = manager.plan_server_sync(servers, service, a_record=a_record, aaaa_record=aaaa_record, ptr=ptr,
+                                    ttl=ttl, max_workers=workers)
+
+    if plan['errors']:
+        table = formatting.Table(['id', 'name', 'error'], title='Not synced')
+        for error in plan['errors']:
+            table.add_row([error['id'], error['name'], error['error']])
+        env.fout(table)
+
+    changes = len(plan['create']) + len(plan['edit'])
+    env.out("Plan: %d to create, %d to edit, %d unchanged, for %d servers"
+            % (len(plan['create']), len(plan['edit']), len(plan['unchanged']), len(servers) - len(plan['errors'])))
+    if changes:
+        if not (env.skip_confirmations or
+                formatting.confirm("This will update %d DNS records. Continue?" % changes)):
+            raise exceptions.CLIAbort("Aborting DNS sync")
+
+        done = [0]
+
+        def progress(result):
+            done[0] += len(result['records'])
+            env.err("Synced %d of %d records" % (done[0], changes))
+
+        failed = 0
+        for result in manager.apply_zone_sync(plan, max_workers=workers, progress=progress):
+            if result['error']:
+                failed += len(result['records'])
+                env.err("Failed to %s %d records: %s" % (result['action'], len(result['records']), result['error']))
+        if failed:
+            raise exceptions.CLIAbort("%d of %d DNS records failed to sync" % (failed, changes))
+
+    if plan['errors']:
+        raise exceptions.CLIAbort("DNS sync failed on %d of %d servers" % (len(plan['errors']), len(servers)))
@@ -7,7 +7,10 @@
 # pylint: disable=E0202, consider-merging-isinstance, arguments-differ, keyword-arg-before-vararg
 import collections
 import json
+import math
 import os
+import re
+import unicodedata
 
 import click
 
@@ -22,6 +25,14 @@ from SoftLayer import utils
 
 FALSE_VALUES = ['0', 'false', 'FALSE', 'no', 'False']
 
+# Number of table rows rendered into a single chunk of output
+TABLE_CHUNK_ROWS = 1000
+
+ANSI_ESCAPE_RE = re.compile("\033\\[[0-9;]*m")
+
+# Text whose display width is its length, printable ASCII only
+PLAIN_TEXT_RE = re.compile(r'[\x20-\x7e]*\Z')
+
 
 def format_output(data, fmt='table'):  # pylint: disable=R0911,R0912
     """Given some data, will format it for console output.
@@ -37,10 +48,8 @@ def format_output(data, fmt='table'):  # pylint: disable=R0911,R0912
 
     # responds to .prettytable()
     if hasattr(data, 'prettytable'):
-        if fmt == 'table':
-            return str(format_prettytable(data))
-        elif fmt == 'raw':
-            return str(format_no_tty(data))
+        if fmt in ('table', 'raw'):
+            return render_table(data, fmt=fmt)
 
     # responds to .to_python()
     if hasattr(data, 'to_python'):
@@ -76,6 +85,28 @@ def format_output(data, fmt='table'):  # pylint: disable=R0911,R0912
     return data
 
 
+def render_table(table, fmt='table'):
+    """Renders a SoftLayer.CLI.formatting.Table instance to a string.
+
+    The output is identical to str(format_prettytable(table)) for the 'table'
+    format and str(format_no_tty(table)) for the 'raw' format.
+
+    :param table: Table instance to render
+    :param string fmt (optional): One of: table, raw
+    """
+    return ''.join(TableRenderer(table, fmt=fmt).iter_chunks())
+
+
+def iter_render_table(table, fmt='table', chunk_rows=TABLE_CHUNK_ROWS):
+    """Renders a SoftLayer.CLI.formatting.Table instance in chunks.
+
+    :param table: Table instance to render
+    :param string fmt (optional): One of: table, raw
+    :param int chunk_rows (optional): number of rows to render per chunk
+    """
+    return TableRenderer(table, fmt=fmt).iter_chunks(chunk_rows)
+
+
 def format_prettytable(table):
     """Converts SoftLayer.CLI.formatting.Table instance to a prettytable."""
     for i, row in enumerate(table.rows):
@@ -380,6 +411,231 @@ class FormattedItem(object):
         return self >= other
 
 
+class TableRenderer(object):
+    """Columnar renderer for Table instances.
+
+    Draws the same output as prettytable with the styles set up by
+    format_prettytable() and format_no_tty(), but measures every cell once,
+    computes sort keys once and never copies or mutates the table rows.
+
+    :param table: Table instance to render
+    :param string fmt: 'table' for the bordered output, 'raw' for no-tty output
+    """
+
+    def __init__(self, table, fmt='table'):
+        self.table = table
+        self.fmt = fmt
+        self.border = fmt == 'table'
+        self.widths = []
+        self.tall_rows = set()
+        if self.border:
+            self.padding = (1, 1)
+            self.aligns = [table.align.get(column, 'c') for column in table.columns]
+        else:
+            self.padding = (0, 2)
+            self.aligns = ['l'] * len(table.columns)
+
+    def _sorted_rows(self):
+        """Returns the rows to render, sorted by table.sortby if needed.
+
+        Sorting compares the formatted value of the sort column first and the
+        rest of the row second, exactly like prettytable does.
+        """
+        table = self.table
+        if not table.sortby:
+            return table.rows
+
+        if table.sortby not in table.columns:
+            msg = "Column (%s) doesn't exist to sort by" % table.sortby
+            raise exceptions.CLIAbort(msg)
+
+        index = table.columns.index(table.sortby)
+        rows = [[format_output(item, fmt=self.fmt) for item in row] for row in table.rows]
+        rows.sort(key=lambda row: [row[index]] + row)
+        return rows
+
+    def _format_columns(self, rows):
+        """Formats every cell into text, one column at a time.
+
+        Sets the column widths and the indexes of the rows spanning several
+        lines. Returns a list of (texts, widths) tuples, one per column.
+        """
+        columns = self.table.columns
+        for row in rows:
+            if len(row) != len(columns):
+                raise ValueError("Row has incorrect number of values, (actual) %d!=%d (expected)"
+                                 % (len(row), len(columns)))
+
+        # rows that were sorted are already passed through format_output()
+        formatted = bool(self.table.sortby)
+        fmt = self.fmt
+        formatted_columns = []
+        for index, column in enumerate(columns):
+            if formatted:
+                texts = [item if item.__class__ is str else str(item) for item in (row[index] for row in rows)]
+            else:
+                texts = [item if item.__class__ is str else str(format_output(item, fmt=fmt))
+                         for item in (row[index] for row in rows)]
+            widths = [len(text) if PLAIN_TEXT_RE.match(text) else -1 for text in texts]
+            for row_index, width in enumerate(widths):
+                if width < 0:
+                    text = texts[row_index]
+                    widths[row_index] = _text_width(text)
+                    if '\n' in text:
+                        self.tall_rows.add(row_index)
+
+            column_width = _text_width(str(column)) if self.border else 0
+            self.widths.append(max(widths + [column_width]))
+            formatted_columns.append((texts, widths))
+
+        self._fit_title()
+        return formatted_columns
+
+    def _fit_title(self):
+        """Grows the column widths so the title fits, like prettytable."""
+        title = self.table.title
+        if not title or not self.widths:
+            return
+
+        padding = sum(self.padding)
+        title_width = len(title) + padding + 2
+        table_width = 2 + sum(width + padding for width in self.widths)
+        if table_width < title_width:
+            scale = 1.0 * title_width / table_width
+            self.widths = [int(math.ceil(width * scale)) for width in self.widths]
+
+    def _hrule(self):
+        if not self.border:
+            return ''
+        padding = sum(self.padding)
+        return ':' + ':'.join('.' * (width + padding) for width in self.widths) + ':'
+
+    def _title_lines(self, hrule):
+        lines = []
+        # prettytable keeps its default '|' edges for titles of no-tty tables
+        edge = '|'
+        if self.border:
+            edge = ':'
+            lines.append(':' + '.' * (len(hrule) - 2) + ':')
+        title = ' ' * self.padding[0] + self.table.title + ' ' * self.padding[1]
+        lines.append(edge + _justify(title, len(hrule) - 2, 'c') + edge)
+        return lines
+
+    def _header_lines(self, hrule):
+        header = [' ' + _justify(str(column), width, self.table.align.get(column, 'c')) + ' '
+                  for column, width in zip(self.table.columns, self.widths)]
+        return [hrule, ':' + ':'.join(header) + ':', hrule]
+
+    def _edges(self):
+        """Returns the strings drawn before, between and after the cells of a line."""
+        left, right = (' ' * pad for pad in self.padding)
+        if self.border:
+            return ':' + left, right + ':' + left, right + ':'
+        return left, right + left, right
+
+    def _tall_row_lines(self, texts):
+        """Returns the output lines for a row with cells spanning several lines."""
+        start, separator, end = self._edges()
+        cell_lines = [text.split('\n') for text in texts]
+        height = max(len(lines) for lines in cell_lines)
+        output = []
+        for line_index in range(height):
+            cells = []
+            for lines, width, align in zip(cell_lines, self.widths, self.aligns):
+                text = lines[line_index] if line_index < len(lines) else ''
+                cells.append(_justify(text, width, align))
+            output.append(start + separator.join(cells) + end)
+        return '\n'.join(output)
+
+    def iter_chunks(self, chunk_rows=TABLE_CHUNK_ROWS):
+        """Yields the rendered table as strings of up to chunk_rows rows each."""
+        table = self.table
+        if not table.rows and not self.border:
+            return
+
+        formatted_columns = self._format_columns(self._sorted_rows())
+        padded_columns = [_pad_column(texts, widths, width, align)
+                          for (texts, widths), width, align
+                          in zip(formatted_columns, self.widths, self.aligns)]
+
+        hrule = self._hrule()
+        lines = []
+        if table.title:
+            lines.extend(self._title_lines(hrule))
+        if self.border:
+            lines.extend(self._header_lines(hrule))
+
+        start, separator, end = self._edges()
+        first = True
+        for offset in range(0, len(table.rows), chunk_rows):
+            chunk = [start + separator.join(cells) + end
+                     for cells in zip(*[column[offset:offset + chunk_rows] for column in padded_columns])]
+            for row_index in self.tall_rows:
+                if offset <= row_index < offset + chunk_rows:
+                    chunk[row_index - offset] = self._tall_row_lines(
+                        [texts[row_index] for texts, _ in formatted_columns])
+            lines.extend(chunk)
+            yield ('' if first else '\n') + '\n'.join(lines)
+            first = False
+            lines = []
+
+        if self.border:
+            lines.append(hrule)
+        if lines:
+            yield ('' if first else '\n') + '\n'.join(lines)
+
+
+def _pad_column(texts, widths, width, align):
+    """Pads each text of a column to width, given the width of each text."""
+    if align == 'l':
+        return [text + ' ' * (width - text_width) for text, text_width in zip(texts, widths)]
+    if align == 'r':
+        return [' ' * (width - text_width) + text for text, text_width in zip(texts, widths)]
+    return [_justify(text, width, align, text_width) for text, text_width in zip(texts, widths)]
+
+
+def _char_width(char):
+    """Returns the display width of a single character, like prettytable."""
+    code = ord(char)
+    if 0x0021 <= code <= 0x007e:
+        return 1
+    # CJK ideographs and Hangul are checked before combining characters, the
+    # remaining wide ranges (kana, punctuation and full-width Latin) after.
+    if 0x4e00 <= code <= 0x9fff or 0xac00 <= code <= 0xd7af:
+        return 2
+    if unicodedata.combining(char) or code in (0x0000, 0x000f, 0x001f):
+        return 0
+    if 0x3000 <= code <= 0x303e or 0x3040 <= code <= 0x30ff or 0xff01 <= code <= 0xff60:
+        return 2
+    if code in (0x0008, 0x007f):
+        return -1
+    return 1
+
+
+def _text_width(text):
+    """Returns the display width of the widest line of text."""
+    if PLAIN_TEXT_RE.match(text):
+        return len(text)
+    return max(sum(_char_width(char) for char in ANSI_ESCAPE_RE.sub('', line))
+               for line in text.split('\n'))
+
+
+def _justify(text, width, align, text_width=None):
+    """Pads a line of text to width, centering the same way prettytable does."""
+    if text_width is None:
+        text_width = _text_width(text)
+    excess = width - text_width
+    if align == 'l':
+        return text + excess * ' '
+    if align == 'r':
+        return excess * ' ' + text
+    if excess % 2:
+        if text_width % 2:
+            return (excess // 2) * ' ' + text + (excess // 2 + 1) * ' '
+        return (excess // 2 + 1) * ' ' + text + (excess // 2) * ' '
+    return (excess // 2) * ' ' + text + (excess // 2) * ' '
+
+
 def _format_python_value(value):
     """If the value has to_python() defined then return that."""
     if hasattr(value, 'to_python'):
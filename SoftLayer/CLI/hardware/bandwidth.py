@@ -7,6 +7,7 @@ import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import helpers
 from SoftLayer.CLI.virt.bandwidth import create_bandwidth_table
+from SoftLayer.managers import metrics
 
 
 @click.command()
@@ -19,10 +20,15 @@ from SoftLayer.CLI.virt.bandwidth import create_bandwidth_table
               help="300, 600, 1800, 3600, 43200 or 86400 seconds")
 @click.option('--quite_summary', '-q', is_flag=True, default=False, show_default=True,
               help="Only show the summary table")
+@click.option('--cache', is_flag=True, default=False,
+              help="Keep the data in the local metric store (SL_METRICS_DB or ~/.softlayer_metrics.db) and only "
+                   "download the time ranges it is missing. Dates without a timezone are read as UTC.")
 @environment.pass_env
-def cli(env, identifier, start_date, end_date, summary_period, quite_summary):
+def cli(env, identifier, start_date, end_date, summary_period, quite_summary, cache):
     """Bandwidth data over date range. Bandwidth is listed in GB
 
+    The Average MBps and P95 MBps summary columns are in MB per second.
+
     Using just a date might get you times off by 1 hour, use T00:01 to get just the specific days data
     Timezones can also be included with the YYYY-MM-DDTHH:mm:ss.00000-HH:mm format.
 
@@ -35,7 +41,12 @@ def cli(env, identifier, start_date, end_date, summary_period, quite_summary):
     """
     hardware = SoftLayer.HardwareManager(env.client)
     hardware_id = helpers.resolve_id(hardware.resolve_ids, identifier, 'hardware')
-    data = hardware.get_bandwidth_data(hardware_id, start_date, end_date, None, summary_period)
+    store = metrics.MetricStore() if cache else None
+    try:
+        data = hardware.get_bandwidth_data(hardware_id, start_date, end_date, None, summary_period, store=store)
+    finally:
+        if store:
+            store.close()
 
     title = "Bandwidth Report: %s - %s" % (start_date, end_date)
     table, sum_table = create_bandwidth_table(data, summary_period, title)
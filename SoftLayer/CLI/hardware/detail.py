@@ -25,9 +25,9 @@ def cli(env, identifier, passwords, price):
     table.align['value'] = 'l'
 
     hardware_id = helpers.resolve_id(hardware.resolve_ids, identifier, 'hardware')
-    result = hardware.get_hardware(hardware_id)
+    result, extras = hardware.get_hardware_details(hardware_id)
     result = utils.NestedDict(result)
-    hard_drives = hardware.get_hard_drives(hardware_id)
+    hard_drives = extras['hard_drives']
 
     operating_system = utils.lookup(result, 'operatingSystem', 'softwareLicense', 'softwareDescription') or {}
     memory = formatting.gb(result.get('memoryCapacity', 0))
@@ -68,8 +68,7 @@ def cli(env, identifier, passwords, price):
 
     table.add_row(['vlans', vlan_table])
 
-    bandwidth = hardware.get_bandwidth_allocation(hardware_id)
-    bw_table = _bw_table(bandwidth)
+    bw_table = _bw_table(extras['bandwidth'])
     table.add_row(['Bandwidth', bw_table])
 
     if result.get('notes'):
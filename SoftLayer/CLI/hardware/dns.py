@@ -7,6 +7,7 @@ import click
 import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import fleet
 from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
 
@@ -14,22 +15,38 @@ from SoftLayer.CLI import helpers
 @click.command(epilog="""If you don't specify any
 arguments, it will attempt to update both the A and PTR records. If you don't
 want to update both records, you may use the -a or --ptr arguments to limit
-the records updated.""")
+the records updated.
+
+With --bulk, IDENTIFIER selects many servers, like 'web*,tag:prod'. Their
+zones are loaded once and the changed records sent in batches.""")
 @click.argument('identifier')
 @click.option('--a-record', '-a', is_flag=True, help="Sync the A record for the host")
 @click.option('--aaaa-record', is_flag=True, help="Sync the AAAA record for the host")
 @click.option('--ptr', is_flag=True, help="Sync the PTR record for the host")
 @click.option('--ttl', default=7200, show_default=True, type=click.INT,
               help="Sets the TTL for the A and/or PTR records")
+@click.option('--bulk', is_flag=True,
+              help="IDENTIFIER selects many servers: comma separated IDs, hostname globs, "
+                   "tag:NAME, datacenter:NAME or domain:NAME")
+@click.option('--workers', type=click.IntRange(1, 16), default=4, show_default=True,
+              help="With --bulk, how many zones to load or batches of records to send at the same time")
 @environment.pass_env
-def cli(env, identifier, a_record, aaaa_record, ptr, ttl):
+def cli(env, identifier, a_record, aaaa_record, ptr, ttl, bulk, workers):
     """Sync DNS records."""
 
+    # both will be true only if no options are passed in, basically.
+    both = (not ptr) and (not a_record) and (not aaaa_record)
+
     mask = """mask[id, globalIdentifier, fullyQualifiedDomainName, hostname, domain,
               primaryBackendIpAddress,primaryIpAddress,
               primaryNetworkComponent[id,primaryIpAddress,primaryVersion6IpAddressRecord[ipAddress]]]"""
     dns = SoftLayer.DNSManager(env.client)
     server = SoftLayer.HardwareManager(env.client)
+    if bulk:
+        fleet.run_bulk_dns_sync(env, server.list_hardware, 'hardware', 'Hardware_Server', identifier,
+                                a_record=both or a_record, aaaa_record=aaaa_record, ptr=both or ptr,
+                                ttl=ttl, workers=workers)
+        return
 
     server_id = helpers.resolve_id(server.resolve_ids, identifier, 'VS')
     instance = server.get_hardware(server_id, mask=mask)
@@ -44,9 +61,6 @@ def cli(env, identifier, a_record, aaaa_record, ptr, ttl):
     if not go_for_it:
         raise exceptions.CLIAbort("Aborting DNS sync")
 
-    # both will be true only if no options are passed in, basically.
-    both = (not ptr) and (not a_record) and (not aaaa_record)
-
     if both or a_record:
         dns.sync_host_record(zone_id, instance['hostname'], instance['primaryIpAddress'], 'a', ttl)
 
@@ -76,8 +76,7 @@ def cli(env, sortby, cpu, domain, datacenter, hostname, memory, network, tag, co
     table = formatting.Table(columns.columns)
     table.sortby = sortby
 
-    for server in servers:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(server)])
+    for row in columns.rows(servers):
+        table.add_row(row)
 
     env.fout(table)
@@ -6,17 +6,25 @@ import click
 import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import fleet
 from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
 
 
 @click.command()
 @click.argument('identifier')
+@fleet.bulk_options
 @environment.pass_env
-def power_off(env, identifier):
+def power_off(env, identifier, bulk, checkpoint, workers):
     """Power off an active server."""
 
     mgr = SoftLayer.HardwareManager(env.client)
+    if bulk:
+        fleet.run_bulk(env, mgr.list_hardware, identifier,
+                       lambda hw_id: env.client['Hardware_Server'].powerOff(id=hw_id), 'power off',
+                       checkpoint, workers)
+        return
+
     hw_id = helpers.resolve_id(mgr.resolve_ids, identifier, 'hardware')
     if not (env.skip_confirmations or
             formatting.confirm('This will power off the server with id %s '
@@ -31,12 +39,24 @@ def power_off(env, identifier):
 @click.option('--hard/--soft',
               default=None,
               help="Perform a hard or soft reboot")
+@fleet.bulk_options
 @environment.pass_env
-def reboot(env, identifier, hard):
+def reboot(env, identifier, hard, bulk, checkpoint, workers):
     """Reboot an active server."""
 
     hardware_server = env.client['Hardware_Server']
     mgr = SoftLayer.HardwareManager(env.client)
+    if bulk:
+        if hard is True:
+            operation = hardware_server.rebootHard
+        elif hard is False:
+            operation = hardware_server.rebootSoft
+        else:
+            operation = hardware_server.rebootDefault
+        fleet.run_bulk(env, mgr.list_hardware, identifier, lambda hw_id: operation(id=hw_id), 'reboot',
+                       checkpoint, workers)
+        return
+
     hw_id = helpers.resolve_id(mgr.resolve_ids, identifier, 'hardware')
     if not (env.skip_confirmations or
             formatting.confirm('This will power off the server with id %s. '
@@ -53,22 +73,36 @@ def reboot(env, identifier, hard):
 
 @click.command()
 @click.argument('identifier')
+@fleet.bulk_options
 @environment.pass_env
-def power_on(env, identifier):
+def power_on(env, identifier, bulk, checkpoint, workers):
     """Power on a server."""
 
     mgr = SoftLayer.HardwareManager(env.client)
+    if bulk:
+        fleet.run_bulk(env, mgr.list_hardware, identifier,
+                       lambda hw_id: env.client['Hardware_Server'].powerOn(id=hw_id), 'power on',
+                       checkpoint, workers)
+        return
+
     hw_id = helpers.resolve_id(mgr.resolve_ids, identifier, 'hardware')
     env.client['Hardware_Server'].powerOn(id=hw_id)
 
 
 @click.command()
 @click.argument('identifier')
+@fleet.bulk_options
 @environment.pass_env
-def power_cycle(env, identifier):
+def power_cycle(env, identifier, bulk, checkpoint, workers):
     """Power cycle a server."""
 
     mgr = SoftLayer.HardwareManager(env.client)
+    if bulk:
+        fleet.run_bulk(env, mgr.list_hardware, identifier,
+                       lambda hw_id: env.client['Hardware_Server'].powerCycle(id=hw_id), 'power cycle',
+                       checkpoint, workers)
+        return
+
     hw_id = helpers.resolve_id(mgr.resolve_ids, identifier, 'hardware')
 
     if not (env.skip_confirmations or
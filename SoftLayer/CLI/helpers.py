@@ -51,3 +51,27 @@ def resolve_id(resolver, identifier, name='object'):
             (name, identifier, ', '.join([str(_id) for _id in ids])))
 
     return ids[0]
+
+
+def resolve_many_ids(resolver, identifiers, name='object'):
+    """Resolves many ids at once using a batch resolver function.
+
+    :param resolver: function that resolves many ids, like VSManager.resolve_many_ids.
+                     Should return a dict of identifier to its list of ids.
+    :param list identifiers: string identifiers used to resolve ids
+    :param string name: the object type, to be used in error messages
+    :returns: a list of ids, in the order of identifiers
+    """
+    resolved = resolver(identifiers)
+    missing = [str(identifier) for identifier in identifiers if not resolved.get(identifier)]
+    if missing:
+        raise exceptions.CLIAbort("Error: Unable to find %s '%s'" % (name, "', '".join(missing)))
+
+    ids = []
+    for identifier in identifiers:
+        if len(resolved[identifier]) > 1:
+            raise exceptions.CLIAbort(
+                "Error: Multiple %s found for '%s': %s" %
+                (name, identifier, ', '.join([str(_id) for _id in resolved[identifier]])))
+        ids.append(resolved[identifier][0])
+    return ids
@@ -0,0 +1,133 @@
+"""Verify and place the orders of a manifest."""
+# :license: MIT, see LICENSE for more details.
+
+import click
+
+from SoftLayer.CLI import environment
+from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import formatting
+from SoftLayer import exceptions as sl_exceptions
+from SoftLayer.managers import bulk_order
+from SoftLayer.managers import catalog
+from SoftLayer.managers import ordering
+
+VERIFY_COLUMNS = ['name', 'package', 'location', 'hourly', 'monthly', 'setup', 'status']
+PLACE_COLUMNS = ['name', 'orderId', 'status', 'tags', 'dns']
+
+
+@click.command()
+@click.argument('manifest', type=click.Path(exists=True, dir_okay=False))
+@click.option('--verify', is_flag=True,
+              help="Only verify the orders, do not place them")
+@click.option('--skip-failed', is_flag=True,
+              help="Place the orders that verified even if others failed")
+@click.option('--workers', type=click.IntRange(1, 64), default=bulk_order.DEFAULT_WORKERS, show_default=True,
+              help="How many orders to verify or place at the same time")
+@click.option('--wait', type=int, default=0, show_default=True,
+              help="Seconds to wait for servers without an IP address before adding their DNS records")
+@click.option('--offline', is_flag=True,
+              help="Read the packages from the local catalog snapshot, see `slcli order catalog sync`")
+@environment.pass_env
+def cli(env, manifest, verify, skip_failed, workers, wait, offline):
+    """Verify and place many orders from a manifest file.
+
+    The manifest is a JSON or YAML file with a list of orders
+    and the defaults they share. An order with a count is repeated, with
+    {index} in its hostname replaced by 1..count. Every order is verified
+    first, and only placed once all of them passed.
+
+    YAML manifests need PyYAML: pip install 'SoftLayer[bulk-yaml]'
+
+    Example manifest::
+
+        defaults:
+          package: PUBLIC_CLOUD_SERVER
+          location: DALLAS13
+          complex_type: SoftLayer_Container_Product_Order_Virtual_Guest
+          billing: hourly
+          domain: example.com
+          items: [GUEST_CORE_2, RAM_4_GB, GUEST_DISK_100_GB_SAN, ...]
+        orders:
+          - count: 10
+            hostname: "web{index:02d}"
+            tags: web
+            dns: true
+
+    Example::
+
+        slcli order bulk fleet.yaml --verify
+        slcli order bulk fleet.yaml --wait 1800
+    """
+    try:
+        orders = bulk_order.expand_manifest(bulk_order.load_manifest(manifest))
+    except sl_exceptions.SoftLayerError as ex:
+        raise exceptions.CLIAbort(str(ex))
+
+    snapshot = catalog.CatalogSnapshot() if offline else None
+    ordering_manager = ordering.OrderingManager(env.client, catalog=snapshot, offline=offline)
+    manager = bulk_order.BulkOrderManager(env.client, ordering_manager, max_workers=workers)
+    results = manager.verify_orders(manager.generate_orders(orders))
+    env.fout(_verify_table(results))
+
+    failed = [result for result in results if result['error']]
+    if verify:
+        if failed:
+            raise exceptions.CLIHalt(code=1)
+        return
+    if failed and not skip_failed:
+        raise exceptions.CLIAbort("%d of %d orders failed to verify, fix them or use --skip-failed"
+                                  % (len(failed), len(results)))
+
+    approved = [result for result in results if not result['error']]
+    if not approved:
+        raise exceptions.CLIAbort("No orders to place")
+    if not (env.skip_confirmations or formatting.confirm(
+            "This will place %d orders and incur charges on your account. Continue?" % len(approved))):
+        raise exceptions.CLIAbort("Aborting order.")
+
+    manager.finish_orders(manager.place_orders(approved), wait=wait)
+    env.fout(_place_table(approved))
+    if any(result['error'] for result in approved):
+        raise exceptions.CLIHalt(code=1)
+
+
+def _verify_table(results):
+    table = formatting.Table(VERIFY_COLUMNS, title='verifyOrder')
+    totals = {'hourly': 0, 'monthly': 0, 'setup': 0}
+    for result in results:
+        order = result['order']
+        cost = result.get('cost') or {}
+        for key in totals:
+            totals[key] += cost.get(key, 0)
+        table.add_row([order['name'], order['package'], order['location'],
+                       cost.get('hourly', formatting.blank()),
+                       cost.get('monthly', formatting.blank()),
+                       cost.get('setup', formatting.blank()),
+                       result['error'] or 'verified'])
+    table.add_row(['Total', formatting.blank(), formatting.blank(), round(totals['hourly'], 6),
+                   round(totals['monthly'], 6), round(totals['setup'], 6),
+                   '%d of %d verified' % (len([result for result in results if not result['error']]), len(results))])
+    return table
+
+
+def _place_table(results):
+    table = formatting.Table(PLACE_COLUMNS, title='placeOrder')
+    for result in results:
+        placed = result.get('placed') or {}
+        tasks = result.get('tasks') or []
+        table.add_row([result['order']['name'],
+                       placed.get('orderId', formatting.blank()),
+                       result['error'] or 'placed',
+                       _task_status(tasks, 'tags'),
+                       _task_status(tasks, 'dns')])
+    return table
+
+
+def _task_status(tasks, name):
+    matching = [task for task in tasks if task['task'] == name]
+    if not matching:
+        return formatting.blank()
+    errors = [task['error'] for task in matching if task['error']]
+    if errors:
+        return formatting.listing(errors, separator='; ')
+    return 'done'
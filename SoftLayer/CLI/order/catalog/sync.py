@@ -0,0 +1,44 @@
+"""Sync the local catalog snapshot."""
+# :license: MIT, see LICENSE for more details.
+
+import click
+
+from SoftLayer.CLI import environment
+from SoftLayer.CLI import formatting
+from SoftLayer.managers import catalog
+
+COLUMNS = ['keyName', 'status', 'items']
+
+
+@click.command()
+@click.argument('package_keynames', nargs=-1)
+@click.option('--all', 'all_packages', is_flag=True, help="Sync every active package")
+@click.option('--force', is_flag=True, help="Download packages even if they did not change")
+@environment.pass_env
+def cli(env, package_keynames, all_packages, force):
+    """Sync packages into the local catalog snapshot.
+
+    Only packages whose item count or modify date changed since the last
+    sync are downloaded again. Without PACKAGE_KEYNAMES the packages already
+    in the snapshot are refreshed. The snapshot is stored in ~/.softlayer_catalog,
+    or the directory set in SL_CATALOG_DIR, and is read by the order list
+    commands with --offline.
+
+    ::
+
+        # Add the Bare Metal and VSI packages to the snapshot
+        slcli order catalog sync BARE_METAL_SERVER PUBLIC_CLOUD_SERVER
+
+        # Refresh the packages already in the snapshot
+        slcli order catalog sync
+
+        # List the Bare Metal presets without calling the API
+        slcli order preset-list BARE_METAL_SERVER --offline
+    """
+    manager = catalog.CatalogManager(env.client)
+    results = manager.sync(package_keynames, all_packages=all_packages, force=force)
+
+    table = formatting.Table(COLUMNS, title=manager.snapshot.path)
+    for result in results:
+        table.add_row([result['keyName'], result['status'], result['items']])
+    env.fout(table)
@@ -5,6 +5,7 @@ import click
 
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
+from SoftLayer.managers import catalog
 from SoftLayer.managers import ordering
 
 COLUMNS = ['name', 'categoryCode', 'isRequired']
@@ -15,8 +16,10 @@ COLUMNS = ['name', 'categoryCode', 'isRequired']
 @click.option('--required',
               is_flag=True,
               help="List only the required categories for the package")
+@click.option('--offline', is_flag=True,
+              help="Read the package from the local catalog snapshot, see `slcli order catalog sync`")
 @environment.pass_env
-def cli(env, package_keyname, required):
+def cli(env, package_keyname, required, offline):
     """List the categories of a package.
 
     ::
@@ -29,7 +32,8 @@ def cli(env, package_keyname, required):
 
     """
     client = env.client
-    manager = ordering.OrderingManager(client)
+    snapshot = catalog.CatalogSnapshot() if offline else None
+    manager = ordering.OrderingManager(client, catalog=snapshot, offline=offline)
     table = formatting.Table(COLUMNS)
 
     categories = manager.list_categories(package_keyname)
@@ -4,6 +4,7 @@ import click
 
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
+from SoftLayer.managers import catalog
 from SoftLayer.managers import ordering
 from SoftLayer.utils import lookup
 
@@ -14,8 +15,10 @@ COLUMNS = ['category', 'keyName', 'description', 'priceId']
 @click.argument('package_keyname')
 @click.option('--keyword', help="A word (or string) used to filter item names.")
 @click.option('--category', help="Category code to filter items by")
+@click.option('--offline', is_flag=True,
+              help="Read the package from the local catalog snapshot, see `slcli order catalog sync`")
 @environment.pass_env
-def cli(env, package_keyname, keyword, category):
+def cli(env, package_keyname, keyword, category, offline):
     """List package items used for ordering.
 
     The item keyNames listed can be used with `slcli order place` to specify
@@ -35,7 +38,8 @@ def cli(env, package_keyname, keyword, category):
 
     """
     table = formatting.Table(COLUMNS)
-    manager = ordering.OrderingManager(env.client)
+    snapshot = catalog.CatalogSnapshot() if offline else None
+    manager = ordering.OrderingManager(env.client, catalog=snapshot, offline=offline)
 
     _filter = {'items': {}}
     if keyword:
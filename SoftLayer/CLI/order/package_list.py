@@ -5,6 +5,7 @@ import click
 
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
+from SoftLayer.managers import catalog
 from SoftLayer.managers import ordering
 
 COLUMNS = ['id',
@@ -16,8 +17,10 @@ COLUMNS = ['id',
 @click.command()
 @click.option('--keyword', help="A word (or string) used to filter package names.")
 @click.option('--package_type', help="The keyname for the type of package. BARE_METAL_CPU for example")
+@click.option('--offline', is_flag=True,
+              help="List the packages stored in the local catalog snapshot, see `slcli order catalog sync`")
 @environment.pass_env
-def cli(env, keyword, package_type):
+def cli(env, keyword, package_type, offline):
     """List packages that can be ordered via the placeOrder API.
 
 
@@ -32,7 +35,8 @@ def cli(env, keyword, package_type):
         # Select only specifict package types
         slcli order package-list --package_type BARE_METAL_CPU
     """
-    manager = ordering.OrderingManager(env.client)
+    snapshot = catalog.CatalogSnapshot() if offline else None
+    manager = ordering.OrderingManager(env.client, catalog=snapshot, offline=offline)
     table = formatting.Table(COLUMNS)
 
     _filter = {'type': {'keyName': {'operation': '!= BLUEMIX_SERVICE'}}}
@@ -4,6 +4,7 @@ import click
 
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
+from SoftLayer.managers import catalog
 from SoftLayer.managers import ordering
 
 COLUMNS = ['id', 'dc', 'description', 'keyName']
@@ -11,13 +12,16 @@ COLUMNS = ['id', 'dc', 'description', 'keyName']
 
 @click.command()
 @click.argument('package_keyname')
+@click.option('--offline', is_flag=True,
+              help="Read the package from the local catalog snapshot, see `slcli order catalog sync`")
 @environment.pass_env
-def cli(env, package_keyname):
+def cli(env, package_keyname, offline):
     """List Datacenters a package can be ordered in.
 
     Use the location Key Name to place orders
     """
-    manager = ordering.OrderingManager(env.client)
+    snapshot = catalog.CatalogSnapshot() if offline else None
+    manager = ordering.OrderingManager(env.client, catalog=snapshot, offline=offline)
     table = formatting.Table(COLUMNS)
 
     locations = manager.package_locations(package_keyname)
@@ -5,6 +5,7 @@ import click
 
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
+from SoftLayer.managers import catalog
 from SoftLayer.managers import ordering
 
 COLUMNS = ['name',
@@ -16,8 +17,10 @@ COLUMNS = ['name',
 @click.argument('package_keyname')
 @click.option('--keyword',
               help="A word (or string) used to filter preset names.")
+@click.option('--offline', is_flag=True,
+              help="Read the package from the local catalog snapshot, see `slcli order catalog sync`")
 @environment.pass_env
-def cli(env, package_keyname, keyword):
+def cli(env, package_keyname, keyword, offline):
     """List package presets.
 
     .. Note::
@@ -34,7 +37,8 @@ def cli(env, package_keyname, keyword):
 
     """
     table = formatting.Table(COLUMNS)
-    manager = ordering.OrderingManager(env.client)
+    snapshot = catalog.CatalogSnapshot() if offline else None
+    manager = ordering.OrderingManager(env.client, catalog=snapshot, offline=offline)
 
     _filter = {}
     if keyword:
@@ -0,0 +1,108 @@
+"""Compare the cost of orders without verifying them."""
+# :license: MIT, see LICENSE for more details.
+
+import itertools
+import json
+
+import click
+
+from SoftLayer.CLI import environment
+from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import formatting
+from SoftLayer.managers import catalog
+from SoftLayer.managers import ordering
+
+COLUMNS = ['rank', 'hourly', 'monthly', 'setup', 'items']
+PRICE_COLUMNS = ['keyName', 'priceId', 'hourly', 'monthly', 'setup']
+
+
+@click.command()
+@click.argument('package_keyname')
+@click.argument('location')
+@click.argument('order_items', nargs=-1)
+@click.option('--choice', '-c', multiple=True,
+              help="Comma separated items to choose one of. Every combination of the choices is priced")
+@click.option('--preset',
+              help="The order preset (if required by the package)")
+@click.option('--billing',
+              type=click.Choice(['hourly', 'monthly']),
+              default='hourly',
+              show_default=True,
+              help="Rank orders by their hourly or monthly cost")
+@click.option('--limit', type=int, default=10, show_default=True,
+              help="How many of the cheapest orders to show")
+@click.option('--verify', is_flag=True,
+              help="Verify the cheapest order with the API, needs --complex-type")
+@click.option('--complex-type',
+              help="The complex type of the order. Starts with 'SoftLayer_Container_Product_Order'.")
+@click.option('--extras',
+              help="JSON string denoting extra data that needs to be sent with the order")
+@click.option('--offline', is_flag=True,
+              help="Read the package from the local catalog snapshot, see `slcli order catalog sync`")
+@environment.pass_env
+def cli(env, package_keyname, location, order_items, choice, preset, billing, limit, verify,
+        complex_type, extras, offline):
+    """Compute the cost of orders from the package prices.
+
+    Costs are worked out locally from the item prices of the package in the
+    location, so comparing many configurations does not need a verifyOrder
+    call for each. Taxes and promotions are not included, use --verify to
+    check the cheapest order with the API.
+
+    Example::
+
+        # Cost of an hourly VSI in dal13
+        slcli order price CLOUD_SERVER DALLAS13 GUEST_CORES_4 RAM_16_GB ...
+
+        # The 5 cheapest combinations of RAM and disk, verifying the cheapest one
+        slcli order price BARE_METAL_SERVER DALLAS13 BANDWIDTH_0_GB_2 ... \\
+            --choice RAM_32_GB_DDR4_2133_ECC_NON_REG,RAM_64_GB_DDR4_2133_ECC_NON_REG \\
+            --choice HARD_DRIVE_1_00_TB_SATA_2,HARD_DRIVE_2_00_TB_SATA_2 \\
+            --limit 5 --verify --complex-type SoftLayer_Container_Product_Order_Hardware_Server \\
+            --extras '{"hardware": [{"hostname": "test", "domain": "softlayer.com"}]}'
+    """
+    if verify and not complex_type:
+        raise exceptions.ArgumentError("--complex-type is required with --verify")
+    if extras:
+        try:
+            extras = json.loads(extras)
+        except ValueError as err:
+            raise exceptions.CLIAbort("There was an error when parsing the --extras value: {}".format(err))
+
+    snapshot = catalog.CatalogSnapshot() if offline else None
+    manager = ordering.OrderingManager(env.client, catalog=snapshot, offline=offline)
+
+    choices = [[keyname.strip() for keyname in option.split(',') if keyname.strip()] for option in choice]
+    candidates = [list(order_items) + list(chosen) for chosen in itertools.product(*choices)]
+
+    if len(candidates) == 1:
+        results = [manager.price_order(package_keyname, location, candidates[0], preset_keyname=preset)]
+        table = formatting.Table(PRICE_COLUMNS)
+        for price in results[0]['prices']:
+            table.add_row([price['keyName'], price['priceId'], price['hourly'], price['monthly'], price['setup']])
+        table.add_row(['Total', formatting.blank(), results[0]['hourly'], results[0]['monthly'],
+                       results[0]['setup']])
+    else:
+        results = manager.price_orders(package_keyname, location, candidates, preset_keyname=preset,
+                                       hourly=billing == 'hourly', limit=limit)
+        table = formatting.Table(COLUMNS)
+        for rank, result in enumerate(results, start=1):
+            table.add_row([rank, result['hourly'], result['monthly'], result['setup'],
+                           formatting.listing(result['items'][len(order_items):])])
+    env.fout(table)
+
+    if verify:
+        order = manager.verify_order(package_keyname, location, results[0]['items'], complex_type=complex_type,
+                                     hourly=billing == 'hourly', preset_keyname=preset, extras=extras)
+        prices = order['orderContainers'][0]['prices']
+        verified = formatting.KeyValueTable(['name', 'value'], title='verifyOrder')
+        verified.align['name'] = 'r'
+        verified.align['value'] = 'l'
+        verified.add_row(['hourly', _total(prices, 'hourlyRecurringFee')])
+        verified.add_row(['monthly', _total(prices, 'recurringFee')])
+        verified.add_row(['setup', _total(prices, 'setupFee')])
+        env.fout(verified)
+
+
+def _total(prices, key):
+    return round(sum(float(price.get(key) or 0) for price in prices), 6)
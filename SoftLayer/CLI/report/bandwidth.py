@@ -1,14 +1,23 @@
 """Metric Utilities"""
+import collections
 import datetime
 import itertools
-import sys
+import json
+import os
+import time
 
 import click
 
 from SoftLayer.CLI import environment
+from SoftLayer.CLI import exceptions
 from SoftLayer.CLI import formatting
+from SoftLayer.managers import fleet
+from SoftLayer.managers import metrics
 from SoftLayer import utils
 
+# Progress is reported on stderr after this many pools or servers
+PROGRESS_EVERY = 100
+
 
 # pylint: disable=unused-argument
 def _validate_datetime(ctx, param, value):
@@ -24,7 +33,7 @@ def _validate_datetime(ctx, param, value):
             "not in the format 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'")
 
 
-def _get_pooled_bandwidth(env, start, end):
+def _get_pooled_bandwidth(env):
     call = env.client.call('Account', 'getVirtualDedicatedRacks',
                            iter=True,
                            mask='id,name,metricTrackingObjectId')
@@ -43,30 +52,21 @@ def _get_pooled_bandwidth(env, start, end):
          'summaryType': 'sum'},
     ]
 
-    with click.progressbar(list(call),
-                           label='Calculating for bandwidth pools',
-                           file=sys.stderr) as pools:
-        for pool in pools:
-            if not pool.get('metricTrackingObjectId'):
-                continue
-
-            yield {
-                'id': pool['id'],
-                'type': 'pool',
-                'name': pool['name'],
-                'data': env.client.call(
-                    'Metric_Tracking_Object',
-                    'getSummaryData',
-                    start.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                    end.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                    types,
-                    300,
-                    id=pool['metricTrackingObjectId'],
-                ),
-            }
-
-
-def _get_hardware_bandwidth(env, start, end):
+    for pool in call:
+        if not pool.get('metricTrackingObjectId'):
+            continue
+
+        yield {
+            'id': pool['id'],
+            'type': 'pool',
+            'name': pool['name'],
+            'tracking_id': pool['metricTrackingObjectId'],
+            'types': types,
+            'interval': 300,
+        }
+
+
+def _get_hardware_bandwidth(env):
     hw_call = env.client.call(
         'Account', 'getHardware',
         iter=True,
@@ -87,37 +87,28 @@ def _get_hardware_bandwidth(env, start, end):
          'summaryType': 'counter'},
     ]
 
-    with click.progressbar(list(hw_call),
-                           label='Calculating for hardware',
-                           file=sys.stderr) as hws:
-        for instance in hws:
-            if not utils.lookup(instance, 'metricTrackingObject', 'id'):
-                continue
-
-            pool_name = None
-            if utils.lookup(instance,
-                            'virtualRack',
-                            'bandwidthAllotmentTypeId') == 2:
-                pool_name = utils.lookup(instance, 'virtualRack', 'name')
-
-            yield {
-                'id': instance['id'],
-                'type': 'hardware',
-                'name': instance['hostname'],
-                'pool': pool_name,
-                'data': env.client.call(
-                    'Metric_Tracking_Object',
-                    'getSummaryData',
-                    start.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                    end.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                    types,
-                    3600,
-                    id=instance['metricTrackingObject']['id'],
-                ),
-            }
-
-
-def _get_virtual_bandwidth(env, start, end):
+    for instance in hw_call:
+        if not utils.lookup(instance, 'metricTrackingObject', 'id'):
+            continue
+
+        pool_name = None
+        if utils.lookup(instance,
+                        'virtualRack',
+                        'bandwidthAllotmentTypeId') == 2:
+            pool_name = utils.lookup(instance, 'virtualRack', 'name')
+
+        yield {
+            'id': instance['id'],
+            'type': 'hardware',
+            'name': instance['hostname'],
+            'pool': pool_name,
+            'tracking_id': instance['metricTrackingObject']['id'],
+            'types': types,
+            'interval': 3600,
+        }
+
+
+def _get_virtual_bandwidth(env):
     call = env.client.call(
         'Account', 'getVirtualGuests',
         iter=True,
@@ -138,37 +129,83 @@ def _get_virtual_bandwidth(env, start, end):
          'summaryType': 'sum'},
     ]
 
-    with click.progressbar(list(call),
-                           label='Calculating for virtual',
-                           file=sys.stderr) as vms:
-        for instance in vms:
-            metric_tracking_id = utils.lookup(instance,
-                                              'metricTrackingObjectId')
-
-            if metric_tracking_id is None:
-                continue
-
-            pool_name = None
-            if utils.lookup(instance,
-                            'virtualRack',
-                            'bandwidthAllotmentTypeId') == 2:
-                pool_name = utils.lookup(instance, 'virtualRack', 'id')
-
-            yield {
-                'id': instance['id'],
-                'type': 'virtual',
-                'name': instance['hostname'],
-                'pool': pool_name,
-                'data': env.client.call(
-                    'Metric_Tracking_Object',
-                    'getSummaryData',
-                    start.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                    end.strftime('%Y-%m-%d %H:%M:%S %Z'),
-                    types,
-                    3600,
-                    id=metric_tracking_id,
-                ),
-            }
+    for instance in call:
+        metric_tracking_id = utils.lookup(instance,
+                                          'metricTrackingObjectId')
+
+        if metric_tracking_id is None:
+            continue
+
+        pool_name = None
+        if utils.lookup(instance,
+                        'virtualRack',
+                        'bandwidthAllotmentTypeId') == 2:
+            pool_name = utils.lookup(instance, 'virtualRack', 'id')
+
+        yield {
+            'id': instance['id'],
+            'type': 'virtual',
+            'name': instance['hostname'],
+            'pool': pool_name,
+            'tracking_id': metric_tracking_id,
+            'types': types,
+            'interval': 3600,
+        }
+
+
+def _get_summary_data(env, item, start, end, store=None):
+    """Fetches the metric data of a pool or server returned by the _get_*_bandwidth functions."""
+    if store is not None:
+        return store.get_summary_data(env.client, item['tracking_id'], start, end, item['types'], item['interval'])
+    return env.client.call(
+        'Metric_Tracking_Object',
+        'getSummaryData',
+        start.strftime('%Y-%m-%d %H:%M:%S %Z'),
+        end.strftime('%Y-%m-%d %H:%M:%S %Z'),
+        item['types'],
+        item['interval'],
+        id=item['tracking_id'],
+    )
+
+
+class _ReportCheckpoint(object):
+    """Rows of a report that are done, appended to a JSON lines file as they come in.
+
+    The first line records the date range, a checkpoint of another range is not resumed.
+    A last line cut short by an interrupted report is dropped.
+    """
+
+    def __init__(self, path, start, end):
+        self.path = path
+        self.rows = {}
+        header = {'report': 'bandwidth', 'start': str(start), 'end': str(end)}
+        if not os.path.exists(path):
+            with open(path, 'w') as checkpoint_file:
+                checkpoint_file.write(json.dumps(header) + '\n')
+            return
+
+        with open(path, 'rb') as checkpoint_file:
+            data = checkpoint_file.read()
+        lines = data.split(b'\n')
+        # Every complete line ends with a newline, so the last one is empty unless it was cut short
+        partial = lines.pop()
+        try:
+            lines = [json.loads(line.decode('utf-8')) for line in lines if line.strip()]
+        except ValueError as ex:
+            raise exceptions.CLIAbort("Unable to read checkpoint %s: %s" % (path, ex)) from ex
+        if not lines or lines[0] != header:
+            raise exceptions.CLIAbort("Checkpoint %s is not for a bandwidth report from %s to %s"
+                                      % (path, start, end))
+        self.rows = dict((line['key'], line['row']) for line in lines[1:])
+        if partial:
+            with open(path, 'rb+') as checkpoint_file:
+                checkpoint_file.truncate(len(data) - len(partial))
+
+    def add(self, key, row):
+        """Records the row of a pool or server."""
+        self.rows[key] = row
+        with open(self.path, 'a') as checkpoint_file:
+            checkpoint_file.write(json.dumps({'key': key, 'row': row}) + '\n')
 
 
 @click.command(short_help="Bandwidth report for every pool/server")
@@ -187,12 +224,28 @@ def _get_virtual_bandwidth(env, start, end):
 @click.option('--sortby', help='Column to sort by',
               default='hostname',
               show_default=True)
+@click.option('--workers', type=click.IntRange(1, 64), default=fleet.DEFAULT_WORKERS, show_default=True,
+              help="How many pools or servers to get the data of at the same time")
+@click.option('--rate', type=click.FloatRange(0.1, 1000), default=None,
+              help="The most metric calls to start per second, no limit by default")
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help="File the finished rows are written to, an interrupted report is resumed from it")
+@click.option('--cache', is_flag=True, default=False,
+              help="Keep the data in the local metric store (SL_METRICS_DB or ~/.softlayer_metrics.db) and only "
+                   "download the time ranges it is missing. Dates are read as UTC.")
 @environment.pass_env
-def cli(env, start, end, sortby):
+def cli(env, start, end, sortby, workers, rate, checkpoint, cache):
     """Bandwidth report for every pool/server.
 
     This reports on the total data transfered for each virtual sever, hardware
     server and bandwidth pool.
+
+    The data of several pools or servers is fetched at the same time. With
+    --checkpoint, rows are saved as they come in, and running the report
+    again with the same checkpoint only fetches the missing ones.
+
+    With --cache, the metric data is kept in a local store and a daily
+    report only downloads the day that is new since the last run.
     """
 
     env.err('Generating bandwidth report for %s to %s' % (start, end))
@@ -213,24 +266,61 @@ def cli(env, start, end, sortby):
         return (result['counter'] for result in results
                 if result['type'] == key)
 
+    def make_row(item, data):
+        pub_in = int(sum(f_type('publicIn_net_octet', data)))
+        pub_out = int(sum(f_type('publicOut_net_octet', data)))
+        pri_in = int(sum(f_type('privateIn_net_octet', data)))
+        pri_out = int(sum(f_type('privateOut_net_octet', data)))
+        return [item['type'], item['name'], pub_in, pub_out, pri_in, pri_out, item.get('pool')]
+
+    saved = _ReportCheckpoint(checkpoint, start, end) if checkpoint else None
+    items = collections.OrderedDict()
+    for item in itertools.chain(_get_pooled_bandwidth(env),
+                                _get_virtual_bandwidth(env),
+                                _get_hardware_bandwidth(env)):
+        items['%s:%s' % (item['type'], item['id'])] = item
+    rows = dict(saved.rows) if saved else {}
+    pending = [key for key in items if key not in rows]
+    if rows:
+        env.err('Resuming with %d of %d rows from %s' % (len(items) - len(pending), len(items), checkpoint))
+
+    store = metrics.MetricStore() if cache else None
+    executor = fleet.FleetExecutor(max_workers=workers, rate=rate)
+    started = time.time()
+    failed = 0
     try:
-        for item in itertools.chain(_get_pooled_bandwidth(env, start, end),
-                                    _get_virtual_bandwidth(env, start, end),
-                                    _get_hardware_bandwidth(env, start, end)):
-            pub_in = int(sum(f_type('publicIn_net_octet', item['data'])))
-            pub_out = int(sum(f_type('publicOut_net_octet', item['data'])))
-            pri_in = int(sum(f_type('privateIn_net_octet', item['data'])))
-            pri_out = int(sum(f_type('privateOut_net_octet', item['data'])))
+        for count, result in enumerate(executor.iter_run(
+                lambda key: _get_summary_data(env, items[key], start, end, store), pending), 1):
+            if result['status'] == 'failed':
+                failed += 1
+                env.err('Unable to get the bandwidth of %s %s: %s'
+                        % (items[result['id']]['type'], items[result['id']]['name'], result['error']))
+            else:
+                rows[result['id']] = make_row(items[result['id']], result['result'])
+                if saved:
+                    saved.add(result['id'], rows[result['id']])
+            if count % PROGRESS_EVERY == 0 or count == len(pending):
+                env.err('Collected %d of %d, %.1f objects/s'
+                        % (count, len(pending), count / max(time.time() - started, 0.001)))
+    except KeyboardInterrupt:
+        env.err("Printing collected results and then aborting.")
+    finally:
+        if store:
+            store.close()
+
+    for key in items:
+        if key in rows:
+            row_type, name, pub_in, pub_out, pri_in, pri_out, pool = rows[key]
             table.add_row([
-                item['type'],
-                item['name'],
+                row_type,
+                name,
                 formatting.b_to_gb(pub_in),
                 formatting.b_to_gb(pub_out),
                 formatting.b_to_gb(pri_in),
                 formatting.b_to_gb(pri_out),
-                item.get('pool') or formatting.blank(),
+                pool or formatting.blank(),
             ])
-    except KeyboardInterrupt:
-        env.err("Printing collected results and then aborting.")
 
     env.out(env.fmt(table))
+    if failed:
+        env.err('Unable to get the bandwidth of %d pools or servers' % failed)
@@ -116,6 +116,8 @@ ALL_ROUTES = [
 
     ('event-log', 'SoftLayer.CLI.event_log'),
     ('event-log:get', 'SoftLayer.CLI.event_log.get:cli'),
+    ('event-log:export', 'SoftLayer.CLI.event_log.export:cli'),
+    ('event-log:index', 'SoftLayer.CLI.event_log.index:cli'),
     ('event-log:types', 'SoftLayer.CLI.event_log.types:cli'),
 
     ('file', 'SoftLayer.CLI.file'),
@@ -212,11 +214,14 @@ ALL_ROUTES = [
     ('object-storage:credential', 'SoftLayer.CLI.object_storage.credential:cli'),
 
     ('order', 'SoftLayer.CLI.order'),
+    ('order:bulk', 'SoftLayer.CLI.order.bulk:cli'),
+    ('order:catalog', 'SoftLayer.CLI.order.catalog:cli'),
     ('order:category-list', 'SoftLayer.CLI.order.category_list:cli'),
     ('order:item-list', 'SoftLayer.CLI.order.item_list:cli'),
     ('order:package-list', 'SoftLayer.CLI.order.package_list:cli'),
     ('order:place', 'SoftLayer.CLI.order.place:cli'),
     ('order:preset-list', 'SoftLayer.CLI.order.preset_list:cli'),
+    ('order:price', 'SoftLayer.CLI.order.price:cli'),
     ('order:package-locations', 'SoftLayer.CLI.order.package_locations:cli'),
     ('order:place-quote', 'SoftLayer.CLI.order.place_quote:cli'),
     ('order:quote-list', 'SoftLayer.CLI.order.quote_list:cli'),
@@ -37,61 +37,61 @@ COLUMNS = [
 allowedVirtualGuests[hostname,domain],
 allowedHardware[hostname,domain],
 allowedSubnets[networkIdentifier,cidr,note],
-allowedIpAddresses[ipAddress,note],
+allowedIpAddresses[ipAddress,note]
 """),
     column_helper.Column('type', ('type',)),
     column_helper.Column(
         'private_ip_address',
         ('primaryBackendIpAddress',),
         """
-allowedVirtualGuests.primaryBackendIpAddress
-allowedHardware.primaryBackendIpAddress
-allowedSubnets.primaryBackendIpAddress
+allowedVirtualGuests.primaryBackendIpAddress,
+allowedHardware.primaryBackendIpAddress,
+allowedSubnets.primaryBackendIpAddress,
 allowedIpAddresses.primaryBackendIpAddress
 """),
     column_helper.Column(
         'source_subnet',
         ('allowedHost', 'sourceSubnet',),
         """
-allowedVirtualGuests.allowedHost.sourceSubnet
-allowedHardware.allowedHost.sourceSubnet
-allowedSubnets.allowedHost.sourceSubnet
+allowedVirtualGuests.allowedHost.sourceSubnet,
+allowedHardware.allowedHost.sourceSubnet,
+allowedSubnets.allowedHost.sourceSubnet,
 allowedIpAddresses.allowedHost.sourceSubnet
 """),
     column_helper.Column(
         'host_iqn',
         ('allowedHost', 'name',),
         """
-allowedVirtualGuests.allowedHost.name
-allowedHardware.allowedHost.name
-allowedSubnets.allowedHost.name
+allowedVirtualGuests.allowedHost.name,
+allowedHardware.allowedHost.name,
+allowedSubnets.allowedHost.name,
 allowedIpAddresses.allowedHost.name
 """),
     column_helper.Column(
         'username',
         ('allowedHost', 'credential', 'username',),
         """
-allowedVirtualGuests.allowedHost.credential.username
-allowedHardware.allowedHost.credential.username
-allowedSubnets.allowedHost.credential.username
+allowedVirtualGuests.allowedHost.credential.username,
+allowedHardware.allowedHost.credential.username,
+allowedSubnets.allowedHost.credential.username,
 allowedIpAddresses.allowedHost.credential.username
 """),
     column_helper.Column(
         'password',
         ('allowedHost', 'credential', 'password',),
         """
-allowedVirtualGuests.allowedHost.credential.password
-allowedHardware.allowedHost.credential.password
-allowedSubnets.allowedHost.credential.password
+allowedVirtualGuests.allowedHost.credential.password,
+allowedHardware.allowedHost.credential.password,
+allowedSubnets.allowedHost.credential.password,
 allowedIpAddresses.allowedHost.credential.password
 """),
     column_helper.Column(
         'allowed_host_id',
         ('allowedHost', 'id',),
         """
-allowedVirtualGuests.allowedHost.id
-allowedHardware.allowedHost.id
-allowedSubnets.allowedHost.id
+allowedVirtualGuests.allowedHost.id,
+allowedHardware.allowedHost.id,
+allowedSubnets.allowedHost.id,
 allowedIpAddresses.allowedHost.id
 """),
 ]
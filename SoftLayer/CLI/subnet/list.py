@@ -4,23 +4,34 @@
 import click
 
 import SoftLayer
+from SoftLayer.CLI import columns as column_helper
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
-from SoftLayer import utils
+
+COLUMNS = [
+    column_helper.Column('id', ('id',)),
+    column_helper.Column('identifier',
+                         lambda subnet: '%s/%s' % (subnet['networkIdentifier'], str(subnet['cidr'])),
+                         mask='networkIdentifier,cidr'),
+    column_helper.Column('type', lambda subnet: subnet.get('subnetType', formatting.blank()),
+                         mask='subnetType'),
+    column_helper.Column('network_space',
+                         lambda subnet: (subnet.get('networkVlan') or {}).get('networkSpace') or formatting.blank(),
+                         mask='networkVlan.networkSpace'),
+    column_helper.Column('datacenter',
+                         lambda subnet: (subnet.get('datacenter') or {}).get('name') or formatting.blank(),
+                         mask='datacenter.name'),
+    column_helper.Column('vlan_id', ('networkVlanId',)),
+    column_helper.Column('IPs', ('ipAddressCount',)),
+    column_helper.Column('hardware', lambda subnet: len(subnet.get('hardware') or []), mask='hardware.id'),
+    column_helper.Column('vs', lambda subnet: len(subnet.get('virtualGuests') or []), mask='virtualGuests.id'),
+]
 
 
 @click.command()
 @click.option('--sortby',
               help='Column to sort by',
-              type=click.Choice(['id',
-                                 'identifier',
-                                 'type',
-                                 'network_space',
-                                 'datacenter',
-                                 'vlan_id',
-                                 'IPs',
-                                 'hardware',
-                                 'vs']))
+              type=click.Choice([column.name for column in COLUMNS]))
 @click.option('--datacenter', '-d',
               help="Filter by datacenter shortname (sng01, dal05, ...)")
 @click.option('--identifier', help="Filter by network identifier")
@@ -28,16 +39,19 @@ from SoftLayer import utils
 @click.option('--network-space', help="Filter by network space")
 @click.option('--ipv4', '--v4', is_flag=True, help="Display only IPv4 subnets")
 @click.option('--ipv6', '--v6', is_flag=True, help="Display only IPv6 subnets")
+@click.option('--columns',
+              callback=column_helper.get_formatter(COLUMNS),
+              help='Columns to display. [options: %s]'
+              % ', '.join(column.name for column in COLUMNS),
+              default=','.join(column.name for column in COLUMNS),
+              show_default=True)
 @environment.pass_env
-def cli(env, sortby, datacenter, identifier, subnet_type, network_space, ipv4, ipv6):
+def cli(env, sortby, datacenter, identifier, subnet_type, network_space, ipv4, ipv6, columns):
     """List subnets."""
 
     mgr = SoftLayer.NetworkManager(env.client)
 
-    table = formatting.Table([
-        'id', 'identifier', 'type', 'network_space', 'datacenter', 'vlan_id',
-        'IPs', 'hardware', 'vs',
-    ])
+    table = formatting.Table(columns.columns)
     table.sortby = sortby
 
     version = 0
@@ -52,21 +66,10 @@ def cli(env, sortby, datacenter, identifier, subnet_type, network_space, ipv4, i
         identifier=identifier,
         subnet_type=subnet_type,
         network_space=network_space,
+        mask=columns.mask(),
     )
 
-    for subnet in subnets:
-        table.add_row([
-            subnet['id'],
-            '%s/%s' % (subnet['networkIdentifier'], str(subnet['cidr'])),
-            subnet.get('subnetType', formatting.blank()),
-            utils.lookup(subnet,
-                         'networkVlan',
-                         'networkSpace') or formatting.blank(),
-            utils.lookup(subnet, 'datacenter', 'name',) or formatting.blank(),
-            subnet['networkVlanId'],
-            subnet['ipAddressCount'],
-            len(subnet['hardware']),
-            len(subnet['virtualGuests']),
-        ])
+    for row in columns.rows(subnets):
+        table.add_row(row)
 
     env.fout(table)
@@ -41,8 +41,7 @@ def cli(env, columns):
     users = mgr.list_users()
 
     table = formatting.Table(columns.columns)
-    for user in users:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(user)])
+    for row in columns.rows(users):
+        table.add_row(row)
 
     env.fout(table)
@@ -1,14 +1,26 @@
 """Get details for a hardware device."""
 # :license: MIT, see LICENSE for more details.
 
+import array
+import math
+
 import click
 
 import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
+from SoftLayer.managers import metrics
 from SoftLayer import utils
 
+# Required to specify keyName because getBandwidthData returns other counter types for some reason.
+BANDWIDTH_TYPES = [
+    ('publicIn_net_octet', 'Pub In'),
+    ('publicOut_net_octet', 'Pub Out'),
+    ('privateIn_net_octet', 'Pri In'),
+    ('privateOut_net_octet', 'Pri Out'),
+]
+
 
 @click.command()
 @click.argument('identifier')
@@ -20,10 +32,15 @@ from SoftLayer import utils
               help="300, 600, 1800, 3600, 43200 or 86400 seconds")
 @click.option('--quite_summary', '-q', is_flag=True, default=False, show_default=True,
               help="Only show the summary table")
+@click.option('--cache', is_flag=True, default=False,
+              help="Keep the data in the local metric store (SL_METRICS_DB or ~/.softlayer_metrics.db) and only "
+                   "download the time ranges it is missing. Dates without a timezone are read as UTC.")
 @environment.pass_env
-def cli(env, identifier, start_date, end_date, summary_period, quite_summary):
+def cli(env, identifier, start_date, end_date, summary_period, quite_summary, cache):
     """Bandwidth data over date range. Bandwidth is listed in GB
 
+    The Average MBps and P95 MBps summary columns are in MB per second.
+
     Using just a date might get you times off by 1 hour, use T00:01 to get just the specific days data
     Timezones can also be included with the YYYY-MM-DDTHH:mm:ss.00000-HH:mm format.
 
@@ -36,7 +53,12 @@ def cli(env, identifier, start_date, end_date, summary_period, quite_summary):
     """
     vsi = SoftLayer.VSManager(env.client)
     vsi_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
-    data = vsi.get_bandwidth_data(vsi_id, start_date, end_date, None, summary_period)
+    store = metrics.MetricStore() if cache else None
+    try:
+        data = vsi.get_bandwidth_data(vsi_id, start_date, end_date, None, summary_period, store=store)
+    finally:
+        if store:
+            store.close()
 
     title = "Bandwidth Report: %s - %s" % (start_date, end_date)
     table, sum_table = create_bandwidth_table(data, summary_period, title)
@@ -47,57 +69,80 @@ def cli(env, identifier, start_date, end_date, summary_period, quite_summary):
 
 
 def create_bandwidth_table(data, summary_period, title="Bandwidth Report"):
-    """Create 2 tables, bandwidth and sumamry. Used here and in hw bandwidth command"""
+    """Create 2 tables, bandwidth and sumamry. Used here and in hw bandwidth command
 
-    formatted_data = {}
-    for point in data:
-        key = utils.clean_time(point['dateTime'])
-        data_type = point['type']
-        # conversion from byte to megabyte
-        value = round(float(point['counter']) / 2 ** 20, 4)
-        if formatted_data.get(key) is None:
-            formatted_data[key] = {}
-        formatted_data[key][data_type] = float(value)
+    Average MBps and P95 MBps are in MB per second, over periods of summary_period seconds.
+    """
 
-    table = formatting.Table(['Date', 'Pub In', 'Pub Out', 'Pri In', 'Pri Out'], title=title)
+    dates, columns = pivot_bandwidth_data(data)
 
-    sum_table = formatting.Table(['Type', 'Sum GB', 'Average MBps', 'Max GB', 'Max Date'], title="Summary")
-
-    # Required to specify keyName because getBandwidthTotals returns other counter types for some reason.
-    bw_totals = [
-        {'keyName': 'publicIn_net_octet', 'sum': 0.0, 'max': 0, 'name': 'Pub In'},
-        {'keyName': 'publicOut_net_octet', 'sum': 0.0, 'max': 0, 'name': 'Pub Out'},
-        {'keyName': 'privateIn_net_octet', 'sum': 0.0, 'max': 0, 'name': 'Pri In'},
-        {'keyName': 'privateOut_net_octet', 'sum': 0.0, 'max': 0, 'name': 'Pri Out'},
-    ]
-
-    for point in formatted_data:
-        new_row = [point]
-        for bw_type in bw_totals:
-            counter = formatted_data[point].get(bw_type['keyName'], 0)
-            new_row.append(mb_to_gb(counter))
-            bw_type['sum'] = bw_type['sum'] + counter
-            if counter > bw_type['max']:
-                bw_type['max'] = counter
-                bw_type['maxDate'] = point
-        table.add_row(new_row)
-
-    for bw_type in bw_totals:
-        total = bw_type.get('sum', 0.0)
+    table = formatting.Table(['Date', 'Pub In', 'Pub Out', 'Pri In', 'Pri Out'], title=title)
+    for index, date in enumerate(dates):
+        table.add_row([date] + [mb_to_gb(columns[key][index]) for key, _ in BANDWIDTH_TYPES])
+
+    sum_table = formatting.Table(['Type', 'Sum GB', 'Average MBps', 'P95 MBps', 'Max GB', 'Max Date'],
+                                 title="Summary")
+    for key, name in BANDWIDTH_TYPES:
+        column = columns[key]
+        total = sum(column)
+        peak = max(column) if column else 0
         average = 0
         if total > 0:
-            average = round(total / len(formatted_data) / summary_period, 4)
+            average = round(total / len(dates) / summary_period, 4)
+        p95 = 0
+        p95_total = percentile(column, 95)
+        if p95_total > 0:
+            p95 = round(p95_total / summary_period, 4)
         sum_table.add_row([
-            bw_type.get('name'),
+            name,
             mb_to_gb(total),
             average,
-            mb_to_gb(bw_type.get('max')),
-            bw_type.get('maxDate')
+            p95,
+            mb_to_gb(peak),
+            # The first date with the highest value, like the portal
+            dates[column.index(peak)] if peak > 0 else None,
         ])
 
     return table, sum_table
 
 
+def pivot_bandwidth_data(data):
+    """Pivots getBandwidthData points into one column of MB per bandwidth type.
+
+    Each dateTime is only formatted once, and points of other types
+    (getBandwidthData returns cpu and memory counters too) are skipped.
+
+    :returns: a list of dates, and a dict of keyName to an array of MB per date
+    """
+    dates = []
+    rows = {}
+    labels = {}
+    columns = dict((key, array.array('d')) for key, _ in BANDWIDTH_TYPES)
+    for point in data:
+        label = labels.get(point['dateTime'])
+        if label is None:
+            label = labels[point['dateTime']] = utils.clean_time(point['dateTime'])
+        row = rows.get(label)
+        if row is None:
+            row = rows[label] = len(dates)
+            dates.append(label)
+            for column in columns.values():
+                column.append(0.0)
+        column = columns.get(point['type'])
+        if column is not None:
+            # conversion from byte to megabyte
+            column[row] = round(float(point['counter']) / 2 ** 20, 4)
+    return dates, columns
+
+
+def percentile(values, percent):
+    """The nearest-rank percentile of values, 95 gives the value 95% of the periods were at or below."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(int(math.ceil(percent / 100.0 * len(ordered))) - 1, 0)]
+
+
 def mb_to_gb(mbytes):
     """Converts a MegaByte int to GigaByte. mbytes/2^10"""
     return round(mbytes / 2 ** 10, 4)
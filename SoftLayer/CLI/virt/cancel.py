@@ -6,17 +6,29 @@ import click
 import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import fleet
 from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
 
 
 @click.command()
 @click.argument('identifier')
+@fleet.bulk_options
 @environment.pass_env
-def cli(env, identifier):
-    """Cancel virtual servers."""
+def cli(env, identifier, bulk, checkpoint, workers):
+    """Cancel virtual servers.
+
+    With --bulk, every selected server is cancelled, for example
+    `slcli vs cancel --bulk 'tag:test,test-*'`. The selected servers are
+    listed first, and the number of them has to be typed to confirm.
+    """
 
     vsi = SoftLayer.VSManager(env.client)
+    if bulk:
+        fleet.run_bulk(env, vsi.list_instances, identifier, vsi.cancel_instance, 'cancel', checkpoint, workers,
+                       destructive=True)
+        return
+
     vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
     if not (env.skip_confirmations or formatting.no_going_back(vs_id)):
         raise exceptions.CLIAbort('Aborted')
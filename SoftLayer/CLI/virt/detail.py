@@ -1,8 +1,6 @@
 """Get details for a virtual server."""
 # :license: MIT, see LICENSE for more details.
 
-import logging
-
 import click
 
 import SoftLayer
@@ -11,8 +9,6 @@ from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
 from SoftLayer import utils
 
-LOGGER = logging.getLogger(__name__)
-
 
 @click.command()
 @click.argument('identifier')
@@ -30,9 +26,9 @@ def cli(env, identifier, passwords=False, price=False):
     table.align['value'] = 'l'
 
     vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
-    result = vsi.get_instance(vs_id)
+    result, extras = vsi.get_instance_details(vs_id)
     result = utils.NestedDict(result)
-    local_disks = vsi.get_local_disks(vs_id)
+    local_disks = extras['local_disks']
 
     table_local_disks = formatting.Table(['Type', 'Name', 'Capacity'])
     for disks in local_disks:
@@ -55,7 +51,7 @@ def cli(env, identifier, passwords=False, price=False):
     )])
     table.add_row(['active_transaction', formatting.active_txn(result)])
     table.add_row(['datacenter', result['datacenter']['name'] or formatting.blank()])
-    _cli_helper_dedicated_host(env, result, table)
+    _cli_helper_dedicated_host(extras['dedicated_host'], table)
     operating_system = utils.lookup(result,
                                     'operatingSystem',
                                     'softwareLicense',
@@ -76,8 +72,7 @@ def cli(env, identifier, passwords=False, price=False):
     table.add_row(_get_owner_row(result))
     table.add_row(_get_vlan_table(result))
 
-    bandwidth = vsi.get_bandwidth_allocation(vs_id)
-    table.add_row(['Bandwidth', _bw_table(bandwidth)])
+    table.add_row(['Bandwidth', _bw_table(extras['bandwidth'])])
 
     security_table = _get_security_table(result)
     if security_table is not None:
@@ -114,19 +109,10 @@ def cli(env, identifier, passwords=False, price=False):
 
     table.add_row(['tags', formatting.tags(result['tagReferences'])])
 
-    # Test to see if this actually has a primary (public) ip address
-    try:
-        if not result['privateNetworkOnlyFlag']:
-            ptr_domains = env.client.call(
-                'Virtual_Guest', 'getReverseDomainRecords',
-                id=vs_id,
-            )
-
-            for ptr_domain in ptr_domains:
-                for ptr in ptr_domain['resourceRecords']:
-                    table.add_row(['ptr', ptr['data']])
-    except SoftLayer.SoftLayerAPIError:
-        pass
+    # Only instances with a primary (public) ip address have PTR records
+    for ptr_domain in extras['ptr_records']:
+        for ptr in ptr_domain['resourceRecords']:
+            table.add_row(['ptr', ptr['data']])
 
     env.fout(table)
 
@@ -148,19 +134,12 @@ def _bw_table(bw_data):
     return table
 
 
-def _cli_helper_dedicated_host(env, result, table):
+def _cli_helper_dedicated_host(dedicated_host, table):
     """Get details on dedicated host for a virtual server."""
 
-    dedicated_host_id = utils.lookup(result, 'dedicatedHost', 'id')
+    dedicated_host_id = dedicated_host.get('id')
     if dedicated_host_id:
         table.add_row(['dedicated_host_id', dedicated_host_id])
-        # Try to find name of dedicated host
-        try:
-            dedicated_host = env.client.call('Virtual_DedicatedHost', 'getObject',
-                                             id=dedicated_host_id)
-        except SoftLayer.SoftLayerAPIError:
-            LOGGER.error('Unable to get dedicated host id %s', dedicated_host_id)
-            dedicated_host = {}
         table.add_row(['dedicated_host',
                        dedicated_host.get('name') or formatting.blank()])
 
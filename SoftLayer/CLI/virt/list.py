@@ -88,8 +88,7 @@ def cli(env, sortby, cpu, domain, datacenter, hostname, memory, network,
 
     table = formatting.Table(columns.columns)
     table.sortby = sortby
-    for guest in guests:
-        table.add_row([value or formatting.blank()
-                       for value in columns.row(guest)])
+    for row in columns.rows(guests):
+        table.add_row(row)
 
     env.fout(table)
@@ -6,6 +6,7 @@ import click
 import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import fleet
 from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
 
@@ -30,12 +31,24 @@ def rescue(env, identifier):
 @click.option('--hard/--soft',
               default=None,
               help="Perform a hard or soft reboot")
+@fleet.bulk_options
 @environment.pass_env
-def reboot(env, identifier, hard):
+def reboot(env, identifier, hard, bulk, checkpoint, workers):
     """Reboot an active virtual server."""
 
     virtual_guest = env.client['Virtual_Guest']
     mgr = SoftLayer.VSManager(env.client)
+    if bulk:
+        if hard is True:
+            operation = virtual_guest.rebootHard
+        elif hard is False:
+            operation = virtual_guest.rebootSoft
+        else:
+            operation = virtual_guest.rebootDefault
+        fleet.run_bulk(env, mgr.list_instances, identifier, lambda vs_id: operation(id=vs_id), 'reboot',
+                       checkpoint, workers)
+        return
+
     vs_id = helpers.resolve_id(mgr.resolve_ids, identifier, 'VS')
     if not (env.skip_confirmations or
             formatting.confirm('This will reboot the VS with id %s. '
@@ -53,12 +66,19 @@ def reboot(env, identifier, hard):
 @click.command()
 @click.argument('identifier')
 @click.option('--hard/--soft', help="Perform a hard shutdown")
+@fleet.bulk_options
 @environment.pass_env
-def power_off(env, identifier, hard):
+def power_off(env, identifier, hard, bulk, checkpoint, workers):
     """Power off an active virtual server."""
 
     virtual_guest = env.client['Virtual_Guest']
     vsi = SoftLayer.VSManager(env.client)
+    if bulk:
+        operation = virtual_guest.powerOff if hard else virtual_guest.powerOffSoft
+        fleet.run_bulk(env, vsi.list_instances, identifier, lambda vs_id: operation(id=vs_id), 'power off',
+                       checkpoint, workers)
+        return
+
     vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
     if not (env.skip_confirmations or
             formatting.confirm('This will power off the VS with id %s. '
@@ -73,22 +93,34 @@ def power_off(env, identifier, hard):
 
 @click.command()
 @click.argument('identifier')
+@fleet.bulk_options
 @environment.pass_env
-def power_on(env, identifier):
+def power_on(env, identifier, bulk, checkpoint, workers):
     """Power on a virtual server."""
 
     vsi = SoftLayer.VSManager(env.client)
+    if bulk:
+        fleet.run_bulk(env, vsi.list_instances, identifier,
+                       lambda vs_id: env.client['Virtual_Guest'].powerOn(id=vs_id), 'power on', checkpoint, workers)
+        return
+
     vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
     env.client['Virtual_Guest'].powerOn(id=vs_id)
 
 
 @click.command()
 @click.argument('identifier')
+@fleet.bulk_options
 @environment.pass_env
-def pause(env, identifier):
+def pause(env, identifier, bulk, checkpoint, workers):
     """Pauses an active virtual server."""
 
     vsi = SoftLayer.VSManager(env.client)
+    if bulk:
+        fleet.run_bulk(env, vsi.list_instances, identifier,
+                       lambda vs_id: env.client['Virtual_Guest'].pause(id=vs_id), 'pause', checkpoint, workers)
+        return
+
     vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
 
     if not (env.skip_confirmations or
@@ -101,10 +133,16 @@ def pause(env, identifier):
 
 @click.command()
 @click.argument('identifier')
+@fleet.bulk_options
 @environment.pass_env
-def resume(env, identifier):
+def resume(env, identifier, bulk, checkpoint, workers):
     """Resumes a paused virtual server."""
 
     vsi = SoftLayer.VSManager(env.client)
+    if bulk:
+        fleet.run_bulk(env, vsi.list_instances, identifier,
+                       lambda vs_id: env.client['Virtual_Guest'].resume(id=vs_id), 'resume', checkpoint, workers)
+        return
+
     vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
     env.client['Virtual_Guest'].resume(id=vs_id)
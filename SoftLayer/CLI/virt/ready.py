@@ -6,20 +6,58 @@ import click
 import SoftLayer
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import exceptions
+from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
 
 
 @click.command()
-@click.argument('identifier')
+@click.argument('identifier', required=False)
 @click.option('--wait', default=0, show_default=True, type=click.INT, help="Seconds to wait")
+@click.option('--all-from-file', type=click.Path(exists=True, dir_okay=False),
+              help="File with one virtual server ID or hostname per line, waits for all of them")
 @environment.pass_env
-def cli(env, identifier, wait):
-    """Check if a virtual server is ready."""
+def cli(env, identifier, wait, all_from_file):
+    """Check if a virtual server is ready.
+
+    With --all-from-file the hostnames and IP addresses in the file are
+    resolved together, every listed server is checked with a single API
+    call per poll, and the servers that are not ready are listed.
+
+    Example::
+
+        slcli vs ready --all-from-file guests.txt --wait 3600
+    """
 
     vsi = SoftLayer.VSManager(env.client)
-    vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
-    ready = vsi.wait_for_ready(vs_id, wait)
-    if ready:
-        env.fout("READY")
-    else:
-        raise exceptions.CLIAbort("Instance %s not ready" % vs_id)
+    if all_from_file is None:
+        if identifier is None:
+            raise exceptions.ArgumentError("Either an IDENTIFIER or --all-from-file is required")
+        vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
+        ready = vsi.wait_for_ready(vs_id, wait)
+        if ready:
+            env.fout("READY")
+        else:
+            raise exceptions.CLIAbort("Instance %s not ready" % vs_id)
+        return
+
+    if identifier is not None:
+        raise exceptions.ArgumentError("IDENTIFIER can not be used with --all-from-file")
+    with open(all_from_file) as id_file:
+        identifiers = [line.strip() for line in id_file if line.strip() and not line.startswith('#')]
+    if not identifiers:
+        raise exceptions.CLIAbort("No virtual servers in %s" % all_from_file)
+    vs_ids = helpers.resolve_many_ids(vsi.resolve_many_ids, identifiers, 'VS')
+
+    def progress(ready_ids, waiting_ids):
+        if waiting_ids and wait:
+            env.err("%d of %d ready, waiting for %d" % (len(ready_ids), len(vs_ids), len(waiting_ids)))
+
+    ready = vsi.wait_for_ready_many(vs_ids, limit=wait, progress=progress)
+    table = formatting.Table(['id', 'status'])
+    for vs_id in vs_ids:
+        table.add_row([vs_id, 'READY' if ready[vs_id] else 'NOT READY'])
+    env.fout(table)
+
+    not_ready = [vs_id for vs_id in vs_ids if not ready[vs_id]]
+    if not_ready:
+        raise exceptions.CLIAbort("%d of %d instances not ready" % (len(not_ready), len(vs_ids)))
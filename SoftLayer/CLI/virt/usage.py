@@ -8,6 +8,7 @@ from SoftLayer.CLI import environment
 from SoftLayer.CLI import exceptions
 from SoftLayer.CLI import formatting
 from SoftLayer.CLI import helpers
+from SoftLayer.managers import metrics
 from SoftLayer.utils import clean_time
 
 
@@ -19,8 +20,11 @@ from SoftLayer.utils import clean_time
               help="Metric_Data_Type keyName e.g. CPU0, CPU1, MEMORY_USAGE, etc.")
 @click.option('--summary_period', '-p', type=click.INT, default=3600,
               help="300, 600, 1800, 3600, 43200 or 86400 seconds")
+@click.option('--cache', is_flag=True, default=False,
+              help="Keep the data in the local metric store (SL_METRICS_DB or ~/.softlayer_metrics.db) and only "
+                   "download the time ranges it is missing. Dates without a timezone are read as UTC.")
 @environment.pass_env
-def cli(env, identifier, start_date, end_date, valid_type, summary_period):
+def cli(env, identifier, start_date, end_date, valid_type, summary_period, cache):
     """Usage information of a virtual server."""
 
     vsi = SoftLayer.VSManager(env.client)
@@ -29,8 +33,13 @@ def cli(env, identifier, start_date, end_date, valid_type, summary_period):
 
     vs_id = helpers.resolve_id(vsi.resolve_ids, identifier, 'VS')
 
-    result = vsi.get_summary_data_usage(vs_id, start_date=start_date, end_date=end_date,
-                                        valid_type=valid_type, summary_period=summary_period)
+    store = metrics.MetricStore() if cache else None
+    try:
+        result = vsi.get_summary_data_usage(vs_id, start_date=start_date, end_date=end_date,
+                                            valid_type=valid_type, summary_period=summary_period, store=store)
+    finally:
+        if store:
+            store.close()
 
     if len(result) == 0:
         raise exceptions.CLIAbort('No metric data for this range of dates provided')
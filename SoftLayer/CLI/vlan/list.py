@@ -4,55 +4,56 @@
 import click
 
 import SoftLayer
+from SoftLayer.CLI import columns as column_helper
 from SoftLayer.CLI import environment
 from SoftLayer.CLI import formatting
-from SoftLayer import utils
 
-COLUMNS = ['id',
-           'number',
-           'name',
-           'firewall',
-           'datacenter',
-           'hardware',
-           'virtual_servers',
-           'public_ips']
+COLUMNS = [
+    column_helper.Column('id', ('id',)),
+    column_helper.Column('number', ('vlanNumber',)),
+    column_helper.Column('name', lambda vlan: vlan.get('name') or formatting.blank(), mask='name'),
+    column_helper.Column('firewall', lambda vlan: 'Yes' if vlan.get('firewallInterfaces') else 'No',
+                         mask='firewallInterfaces.id'),
+    column_helper.Column('datacenter', ('primaryRouter', 'datacenter', 'name')),
+    column_helper.Column('hardware', ('hardwareCount',)),
+    column_helper.Column('virtual_servers', ('virtualGuestCount',)),
+    column_helper.Column('public_ips', ('totalPrimaryIpAddressCount',)),
+]
 
 
 @click.command()
 @click.option('--sortby',
               help='Column to sort by',
-              type=click.Choice(COLUMNS))
+              type=click.Choice([column.name for column in COLUMNS]))
 @click.option('--datacenter', '-d',
               help='Filter by datacenter shortname (sng01, dal05, ...)')
 @click.option('--number', '-n', help='Filter by VLAN number')
 @click.option('--name', help='Filter by VLAN name')
+@click.option('--columns',
+              callback=column_helper.get_formatter(COLUMNS),
+              help='Columns to display. [options: %s]'
+              % ', '.join(column.name for column in COLUMNS),
+              default=','.join(column.name for column in COLUMNS),
+              show_default=True)
 @click.option('--limit', '-l',
               help='How many results to get in one api call, default is 100',
               default=100,
               show_default=True)
 @environment.pass_env
-def cli(env, sortby, datacenter, number, name, limit):
+def cli(env, sortby, datacenter, number, name, columns, limit):
     """List VLANs."""
 
     mgr = SoftLayer.NetworkManager(env.client)
 
-    table = formatting.Table(COLUMNS)
+    table = formatting.Table(columns.columns)
     table.sortby = sortby
 
     vlans = mgr.list_vlans(datacenter=datacenter,
                            vlan_number=number,
                            name=name,
+                           mask=columns.mask(),
                            limit=limit)
-    for vlan in vlans:
-        table.add_row([
-            vlan['id'],
-            vlan['vlanNumber'],
-            vlan.get('name') or formatting.blank(),
-            'Yes' if vlan['firewallInterfaces'] else 'No',
-            utils.lookup(vlan, 'primaryRouter', 'datacenter', 'name'),
-            vlan['hardwareCount'],
-            vlan['virtualGuestCount'],
-            vlan['totalPrimaryIpAddressCount'],
-        ])
+    for row in columns.rows(vlans):
+        table.add_row(row)
 
     env.fout(table)
@@ -1,3 +1,6 @@
 createObject = {'name': 'example.com'}
 deleteObject = True
 editObject = True
+createObjects = True
+editObjects = True
+deleteObjects = True
@@ -67,7 +67,25 @@ getObject = {
             'friendlyName': 'Friendly Transaction Name',
             'id': 6660
         }
-    }
+    },
+    'hardDrives': [
+        {
+            'serialNumber': 'z1w4sdf',
+            'hardwareComponentModel': {
+                'manufacturer': 'Seagate',
+                'name': 'Constellation ES',
+                'hardwareGenericComponentModel': {'capacity': '1000', 'units': 'GB'}
+            }
+        }
+    ],
+    'bandwidthAllotmentDetail': {
+        'id': 25888247,
+        'allocation': {'amount': '250'}
+    },
+    'billingCycleBandwidthUsage': [
+        {'amountIn': '.448', 'amountOut': '.52157', 'type': {'alias': 'PUBLIC_SERVER_BW'}},
+        {'amountIn': '.03842', 'amountOut': '.01822', 'type': {'alias': 'PRIVATE_SERVER_BW'}}
+    ]
 }
 editObject = True
 setTags = True
@@ -8,5 +8,17 @@ getDatacenters = [
         "id": 449494,
         "longName": "Dallas 9",
         "name": "dal09"
+    },
+    {
+        "id": 1854895,
+        "longName": "Dallas 13",
+        "name": "dal13",
+        "regions": [{"keyname": "DALLAS13"}]
+    },
+    {
+        "id": 2017603,
+        "longName": "Washington 7",
+        "name": "wdc07",
+        "regions": [{"keyname": "WASHINGTON07"}]
     }
 ]
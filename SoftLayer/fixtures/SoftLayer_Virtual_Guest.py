@@ -39,16 +39,28 @@ getObject = {
     'createDate': '2013-08-01 15:23:45',
     'blockDevices': [{'device': 0, 'mountType': 'Disk', 'uuid': 1},
                      {'device': 1, 'mountType': 'Disk',
-                      'diskImage': {'type': {'keyName': 'SWAP'}}},
+                      'diskImage': {'type': {'keyName': 'SWAP'},
+                                    'capacity': 2, 'units': 'GB',
+                                    'description': '6211111-SWAP'}},
                      {'device': 2, 'mountType': 'CD'},
                      {'device': 3, 'mountType': 'Disk', 'uuid': 3},
                      {'device': 4, 'mountType': 'Disk', 'uuid': 4,
-                      'diskImage': {'metadataFlag': True}}],
+                      'diskImage': {'metadataFlag': True,
+                                    'capacity': 64, 'units': 'MB',
+                                    'description': '6211111-METADATA'}}],
     'notes': 'notes',
     'networkVlans': [{'networkSpace': 'PUBLIC',
                       'vlanNumber': 23,
                       'id': 1}],
-    'dedicatedHost': {'id': 37401},
+    'dedicatedHost': {'id': 37401, 'name': 'test-dedicated'},
+    'bandwidthAllotmentDetail': {
+        'id': 25888247,
+        'allocation': {'amount': '250'}
+    },
+    'billingCycleBandwidthUsage': [
+        {'amountIn': '.448', 'amountOut': '.52157', 'type': {'alias': 'PUBLIC_SERVER_BW'}},
+        {'amountIn': '.03842', 'amountOut': '.01822', 'type': {'alias': 'PRIVATE_SERVER_BW'}}
+    ],
     'transientGuestFlag': False,
     'operatingSystem': {
         'passwords': [{'username': 'user', 'password': 'pass'}],
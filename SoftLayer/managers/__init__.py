@@ -8,6 +8,8 @@
     :license: MIT, see LICENSE for more details.
 """
 from SoftLayer.managers.block import BlockStorageManager
+from SoftLayer.managers.bulk_order import BulkOrderManager
+from SoftLayer.managers.catalog import CatalogManager
 from SoftLayer.managers.cdn import CDNManager
 from SoftLayer.managers.dedicated_host import DedicatedHostManager
 from SoftLayer.managers.dns import DNSManager
@@ -33,7 +35,9 @@ from SoftLayer.managers.vs_placement import PlacementManager
 
 __all__ = [
     'BlockStorageManager',
+    'BulkOrderManager',
     'CapacityManager',
+    'CatalogManager',
     'CDNManager',
     'DedicatedHostManager',
     'DNSManager',
@@ -48,7 +48,7 @@ class BlockStorageManager(StorageManager):
             ]
             kwargs['mask'] = ','.join(items)
 
-        _filter = utils.NestedDict(kwargs.get('filter') or {})
+        _filter = utils.NestedDict.from_dict(kwargs.get('filter') or {})
 
         _filter['iscsiNetworkStorage']['serviceResource']['type']['type'] = \
             (utils.query_filter('!~ ISCSI'))
@@ -191,3 +191,10 @@ class BlockStorageManager(StorageManager):
         if results:
             return [result['id'] for result in results]
         return []
+
+    def _get_ids_from_usernames(self, usernames):
+        """Returns a dict of username to the matching volume IDs, with a single API call."""
+        return utils.find_ids(self.list_block_volumes, 'iscsiNetworkStorage', ['username'], usernames)
+
+    def _identifier_index_records(self):
+        return self.list_block_volumes(mask='id, username')
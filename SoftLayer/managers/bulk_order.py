@@ -0,0 +1,355 @@
+"""
+    SoftLayer.bulk_order
+    ~~~~~~~~~~~~~~~~~~~~
+    Verify and place many orders from a manifest
+
+    :license: MIT, see LICENSE for more details.
+"""
+from concurrent import futures
+import copy
+import json
+import logging
+
+from SoftLayer import exceptions
+from SoftLayer.managers.dns import DNSManager
+from SoftLayer.managers.hardware import HardwareManager
+from SoftLayer.managers import ordering
+from SoftLayer.managers.vs import VSManager
+
+# PyYAML is optional (pip install 'SoftLayer[bulk-yaml]'), JSON manifests work without it
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+LOGGER = logging.getLogger(__name__)
+
+# verifyOrder and placeOrder are slow, but the API throttles accounts that send too many at once
+DEFAULT_WORKERS = 8
+
+DNS_GUEST_MASK = 'id, hostname, domain, primaryIpAddress'
+
+# Keys an order in a manifest can have, anything else is a typo
+ORDER_KEYS = ('name', 'count', 'package', 'location', 'items', 'preset', 'complex_type', 'billing',
+              'quantity', 'hostname', 'domain', 'extras', 'tags', 'dns')
+
+
+def load_manifest(path):
+    """Reads a manifest file, YAML if the file name ends with .yaml or .yml, JSON otherwise.
+
+    :param str path: the manifest file
+    """
+    with open(path) as manifest_file:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise exceptions.SoftLayerError("PyYAML is required to read %s, install it with "
+                                                "pip install 'SoftLayer[bulk-yaml]' or use a JSON manifest" % path)
+            try:
+                return yaml.safe_load(manifest_file)
+            except yaml.YAMLError as ex:
+                raise exceptions.SoftLayerError("Unable to parse %s: %s" % (path, ex))
+        try:
+            return json.load(manifest_file)
+        except ValueError as ex:
+            raise exceptions.SoftLayerError("Unable to parse %s: %s" % (path, ex))
+
+
+def expand_manifest(manifest):
+    """Turns a manifest into a flat list of orders.
+
+    A manifest has a list of orders, and optionally defaults that every
+    order starts from. Keys set on an order replace the default. An order
+    with a count is repeated count times, and {index} in its hostname is
+    replaced by 1..count. Example::
+
+        defaults:
+          package: PUBLIC_CLOUD_SERVER
+          location: DALLAS13
+          complex_type: SoftLayer_Container_Product_Order_Virtual_Guest
+          billing: hourly
+          domain: example.com
+          items: [GUEST_CORE_2, RAM_4_GB, ...]
+        orders:
+          - name: web
+            count: 3
+            hostname: "web{index:02d}"
+            tags: web,production
+            dns: true
+          - hostname: db01
+            preset: B1_8X16X100
+
+    :param dict manifest: the parsed manifest
+    :returns: a list of dicts with name, package, location, items, preset,
+              complex_type, hourly, quantity, extras, tags and dns
+    """
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('orders'), list):
+        raise exceptions.SoftLayerError("A manifest needs a list of orders")
+    defaults = manifest.get('defaults') or {}
+
+    orders = []
+    for position, entry in enumerate(manifest['orders'], start=1):
+        spec = dict(defaults)
+        spec.update(entry)
+        unknown = sorted(key for key in spec if key not in ORDER_KEYS)
+        if unknown:
+            raise exceptions.SoftLayerError("Order %d has unknown keys: %s" % (position, ', '.join(unknown)))
+        missing = [key for key in ('package', 'location', 'items') if not spec.get(key)]
+        if missing:
+            raise exceptions.SoftLayerError("Order %d is missing %s" % (position, ', '.join(missing)))
+
+        count = int(spec.get('count') or 1)
+        hostnames = [None] * count
+        if spec.get('hostname'):
+            hostnames = [spec['hostname'].format(index=index) for index in range(1, count + 1)]
+            if len(set(hostnames)) != count:
+                raise exceptions.SoftLayerError("Order %d needs {index} in its hostname to order %d servers"
+                                                % (position, count))
+        for index, hostname in enumerate(hostnames, start=1):
+            orders.append(_expand_order(spec, position, index, count, hostname))
+    return orders
+
+
+def _expand_order(spec, position, index, count, hostname):
+    complex_type = spec.get('complex_type')
+    extras = copy.deepcopy(spec.get('extras') or {})
+    if hostname:
+        host_key = 'hardware' if complex_type and 'Hardware' in complex_type else 'virtualGuests'
+        extras[host_key] = [{'hostname': hostname, 'domain': spec.get('domain')}]
+
+    name = hostname or spec.get('name') or 'order%d' % position
+    if not hostname and count > 1:
+        name = '%s-%d' % (name, index)
+    return {
+        'name': name,
+        'package': spec['package'],
+        'location': spec['location'],
+        'items': list(spec['items']),
+        'preset': spec.get('preset'),
+        'complex_type': complex_type,
+        'hourly': spec.get('billing', 'hourly') == 'hourly',
+        'quantity': int(spec.get('quantity') or 1),
+        'extras': extras,
+        'tags': spec.get('tags'),
+        'dns': bool(spec.get('dns')),
+    }
+
+
+class BulkOrderManager(object):
+    """Verifies and places many orders at once.
+
+    Orders are generated locally, with one generate_order() per distinct
+    package, location, item list and preset, so the price IDs of a package
+    are only looked up once. Verifying, placing, and tagging or registering
+    the ordered servers in DNS then run concurrently.
+
+    Every step takes the list returned by generate_orders() and records its
+    outcome on each entry, so one failed order does not stop the others.
+
+    Example::
+
+        bulk = BulkOrderManager(client)
+        results = bulk.generate_orders(expand_manifest(load_manifest('fleet.yaml')))
+        bulk.verify_orders(results)
+        bulk.place_orders([result for result in results if not result['error']])
+
+    :param SoftLayer.API.BaseClient client: the client instance
+    :param OrderingManager ordering_manager: manager used to build the orders
+    :param int max_workers: the most API calls to run at the same time
+    """
+
+    def __init__(self, client, ordering_manager=None, max_workers=DEFAULT_WORKERS):
+        self.client = client
+        self.ordering = ordering_manager or ordering.OrderingManager(client)
+        self.max_workers = max_workers
+
+    def generate_orders(self, orders):
+        """Builds the order containers of expanded orders.
+
+        :param list orders: orders as returned by expand_manifest()
+        :returns: a list of {'order', 'container', 'error'}, in the same order
+        """
+        templates = {}
+        results = []
+        for order in orders:
+            key = (order['package'], order['location'], tuple(order['items']), order['preset'],
+                   order['complex_type'], order['hourly'])
+            if key not in templates:
+                try:
+                    templates[key] = (self.ordering.generate_order(
+                        order['package'], order['location'], order['items'], complex_type=order['complex_type'],
+                        hourly=order['hourly'], preset_keyname=order['preset']), None)
+                except exceptions.SoftLayerError as ex:
+                    templates[key] = (None, str(ex))
+
+            template, error = templates[key]
+            container = None
+            if template is not None:
+                container = copy.deepcopy(template)
+                container['orderContainers'][0].update(copy.deepcopy(order['extras']))
+                container['orderContainers'][0]['quantity'] = order['quantity']
+            results.append({'order': order, 'container': container, 'error': error})
+        return results
+
+    def verify_orders(self, results):
+        """Calls verifyOrder for every order that has no error yet.
+
+        Sets 'verified' to the verifyOrder result and 'cost' to its hourly,
+        monthly and setup totals, or 'error' if the order was rejected.
+        """
+        pending = [result for result in results if not result['error']]
+        outcomes = self._run(lambda result: self.client['Product_Order'].verifyOrder(result['container']), pending)
+        for result, (verified, error) in zip(pending, outcomes):
+            result['verified'] = verified
+            result['error'] = error
+            if verified is not None:
+                result['cost'] = get_order_cost(verified)
+        return results
+
+    def place_orders(self, results):
+        """Calls placeOrder for every order that has no error yet.
+
+        Sets 'placed' to the placeOrder result, or 'error' if it failed.
+
+        .. warning::
+
+            This will add charges to your account
+        """
+        pending = [result for result in results if not result['error']]
+        outcomes = self._run(lambda result: self.client['Product_Order'].placeOrder(result['container']), pending)
+        for result, (placed, error) in zip(pending, outcomes):
+            result['placed'] = placed
+            result['error'] = error
+        return results
+
+    def finish_orders(self, results, wait=0):
+        """Tags the servers of placed orders and adds their A records.
+
+        A records are added to the zone of the server domain, for orders
+        with dns set. Servers only get an IP address once they are being
+        provisioned, a server without one is waited on for up to wait seconds.
+
+        Sets 'tasks' on every placed order to a list of
+        {'task', 'id', 'error'}, one per tag or DNS update.
+
+        :param list results: results of place_orders()
+        :param int wait: seconds to wait for a server to get an IP address
+        """
+        tasks = []
+        zones = {}
+        for result in results:
+            if not result.get('placed'):
+                continue
+            result['tasks'] = []
+            order = result['order']
+            for service, server_id in _ordered_servers(result['placed']):
+                if order['tags']:
+                    tasks.append((result, 'tags', service, server_id, None))
+                if order['dns']:
+                    domain = (order['extras'].get('virtualGuests') or order['extras'].get('hardware') or [{}])[0]
+                    zones.setdefault(domain.get('domain'), None)
+                    tasks.append((result, 'dns', service, server_id, domain.get('domain')))
+
+        for domain in zones:
+            zones[domain] = self._get_zone_id(domain)
+        dns_servers = [(task[2], task[3]) for task in tasks if task[1] == 'dns' and zones[task[4]] is not None]
+        servers = self._get_dns_servers(dns_servers, wait)
+
+        def run_task(task):
+            result, name, service, server_id, domain = task
+            if name == 'tags':
+                return self.client[service].setTags(result['order']['tags'], id=server_id)
+            if zones[domain] is None:
+                raise exceptions.SoftLayerError("No DNS zone for %s" % domain)
+            return self._register_dns(zones[domain], servers[(service, server_id)])
+
+        for task, (_, error) in zip(tasks, self._run(run_task, tasks)):
+            task[0]['tasks'].append({'task': task[1], 'id': task[3], 'error': error})
+        return results
+
+    def _get_zone_id(self, domain):
+        zone_ids = DNSManager(self.client).resolve_ids(domain) if domain else []
+        if len(zone_ids) != 1:
+            return None
+        return zone_ids[0]
+
+    def _get_dns_servers(self, keys, wait):
+        """Returns {(service, id): (server, error)}, waiting up to wait seconds for servers without an IP.
+
+        The servers of each service are waited on together with wait_for_ready_many().
+        """
+        def get_server(key):
+            return self.client[key[0]].getObject(id=key[1], mask=DNS_GUEST_MASK)
+
+        servers = dict(zip(keys, self._run(get_server, keys)))
+        waiting = [key for key, (server, _) in servers.items() if server and not server.get('primaryIpAddress')]
+        if not waiting or not wait:
+            return servers
+
+        managers = {'Virtual_Guest': VSManager, 'Hardware_Server': HardwareManager}
+        groups = {}
+        for service, server_id in waiting:
+            groups.setdefault(service, []).append(server_id)
+
+        def wait_for_group(service):
+            return managers[service](self.client).wait_for_ready_many(groups[service], limit=wait)
+
+        for service, (_, error) in zip(groups, self._run(wait_for_group, list(groups))):
+            if error:
+                LOGGER.debug("Waiting for %s %s failed: %s", service, groups[service], error)
+        servers.update(zip(waiting, self._run(get_server, waiting)))
+        return servers
+
+    def _register_dns(self, zone_id, fetched):
+        server, error = fetched
+        if error:
+            raise exceptions.SoftLayerError(error)
+        if not server.get('primaryIpAddress'):
+            raise exceptions.SoftLayerError("%s has no IP address yet" % server.get('hostname', server['id']))
+        DNSManager(self.client).sync_host_record(zone_id, server['hostname'], server['primaryIpAddress'])
+
+    def _run(self, func, args):
+        """Calls func on every arg with at most max_workers at once.
+
+        Any exception is recorded as the error of its arg, so one failing
+        call never hides the results of the others.
+
+        :returns: a list of (result, error) in the order of args, error is
+                  the message of the exception, or None
+        """
+        def call(arg):
+            try:
+                return func(arg), None
+            except exceptions.SoftLayerError as ex:
+                LOGGER.debug("Bulk order call failed: %s", ex)
+                return None, str(ex)
+            except Exception as ex:  # pylint: disable=broad-except
+                LOGGER.exception("Bulk order call failed")
+                return None, '%s: %s' % (type(ex).__name__, ex)
+
+        if not args:
+            return []
+        with futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(args))) as executor:
+            return list(executor.map(call, args))
+
+
+def get_order_cost(order):
+    """Returns the hourly, monthly and setup totals of a verifyOrder or placeOrder result."""
+    containers = order.get('orderContainers') or [order]
+    prices = [price for container in containers for price in container.get('prices') or []]
+    return {
+        'hourly': round(sum(float(price.get('hourlyRecurringFee') or 0) for price in prices), 6),
+        'monthly': round(sum(float(price.get('recurringFee') or 0) for price in prices), 6),
+        'setup': round(sum(float(price.get('setupFee') or 0) for price in prices), 6),
+    }
+
+
+def _ordered_servers(placed):
+    """Yields (service, id) for the servers of a placeOrder result that already have an ID."""
+    details = placed.get('orderDetails') or {}
+    for container in details.get('orderContainers') or [details]:
+        for guest in container.get('virtualGuests') or []:
+            if guest.get('id'):
+                yield 'Virtual_Guest', guest['id']
+        for server in container.get('hardware') or []:
+            if server.get('id'):
+                yield 'Hardware_Server', server['id']
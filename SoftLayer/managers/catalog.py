@@ -0,0 +1,252 @@
+"""
+    SoftLayer.catalog
+    ~~~~~~~~~~~~~~~~~
+    Offline snapshots of the product catalog
+
+    :license: MIT, see LICENSE for more details.
+"""
+import datetime
+import gzip
+import json
+import os
+import re
+
+from SoftLayer import exceptions
+from SoftLayer.managers import fetch
+
+# Bump when the layout of the snapshot files changes, older snapshots are then ignored
+FORMAT_VERSION = 2
+
+DEFAULT_CATALOG_DIR = os.path.join(os.path.expanduser('~'), '.softlayer_catalog')
+
+SNAPSHOT_PACKAGE_MASK = 'id, name, keyName, isActive, type.keyName, itemCount, modifyDate'
+
+# A superset of the item masks used by the ordering, hardware and dedicated host managers
+SNAPSHOT_ITEM_MASK = '''id, keyName, description, capacity, units,
+    itemCategory[id, name, categoryCode], categories[id, name, categoryCode],
+    attributes[id, attributeTypeKeyName],
+    softwareDescription[id, referenceCode, longDescription],
+    bundleItems[capacity, keyName, categories[categoryCode],
+                hardwareGenericComponentModel[id, hardwareComponentType[keyName]]],
+    prices[id, locationGroupId, hourlyRecurringFee, recurringFee, setupFee,
+           capacityRestrictionType, capacityRestrictionMinimum, capacityRestrictionMaximum,
+           categories[id, name, categoryCode]]'''
+
+SNAPSHOT_PRESET_MASK = 'id, name, keyName, description, prices[id, item[id, keyName, capacity, itemCategory]]'
+
+SNAPSHOT_REGION_MASK = 'description, keyname, locations[location[id, name, longName, priceGroups[id, name]]]'
+
+SNAPSHOT_CATEGORY_MASK = 'id, isRequired, itemCategory[id, name, categoryCode]'
+
+
+def default_catalog_dir():
+    """The snapshot directory, SL_CATALOG_DIR or ~/.softlayer_catalog."""
+    return os.environ.get('SL_CATALOG_DIR') or DEFAULT_CATALOG_DIR
+
+
+class CatalogSnapshot(object):
+    """A local copy of product packages.
+
+    The snapshot is a directory with an index.json listing the stored
+    packages and one gzipped JSON file per package, holding its items,
+    presets, regions and categories. Package files are only read when the
+    package is used.
+
+    :param str path: the snapshot directory, defaults to default_catalog_dir()
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_catalog_dir()
+        self._index = None
+        self._packages = {}
+
+    @property
+    def index(self):
+        """The snapshot index, empty if there is no snapshot yet."""
+        if self._index is None:
+            self._index = self._read_index()
+        return self._index
+
+    def _read_index(self):
+        empty = {'version': FORMAT_VERSION, 'syncDate': None, 'packages': {}}
+        try:
+            with open(os.path.join(self.path, 'index.json')) as index_file:
+                index = json.load(index_file)
+        except (IOError, OSError, ValueError):
+            return empty
+        if index.get('version') != FORMAT_VERSION:
+            return empty
+        return index
+
+    def list_packages(self):
+        """Returns the stored package records, sorted by keyName."""
+        packages = self.index['packages']
+        return [packages[keyname]['package'] for keyname in sorted(packages)]
+
+    def has_package(self, package_keyname):
+        """Returns True if the package is in the snapshot."""
+        return package_keyname in self.index['packages']
+
+    def get_package(self, package_keyname):
+        """Returns a stored package, or None if it is not in the snapshot.
+
+        The package has the same shape as Product_Package::getObject with
+        items, activePresets, accountRestrictedActivePresets, regions and
+        categories (the result of getConfiguration). Regions are the result of
+        getRegions, each also holding its first location under 'location' like
+        getObject returns it, so both region[locations][] and
+        region[location][location] work.
+        """
+        entry = self.index['packages'].get(package_keyname)
+        if entry is None:
+            return None
+        if package_keyname not in self._packages:
+            with gzip.open(os.path.join(self.path, entry['file']), 'rt') as package_file:
+                self._packages[package_keyname] = json.load(package_file)
+        return self._packages[package_keyname]
+
+    def signature(self, package_keyname):
+        """Returns the itemCount and modifyDate a package had when it was stored."""
+        entry = self.index['packages'].get(package_keyname)
+        if entry is None:
+            return None
+        return _signature(entry['package'])
+
+    def save_package(self, package):
+        """Stores a package, replacing any older copy. Call save_index() afterwards."""
+        keyname = package['keyName']
+        filename = os.path.join('packages', '%s.json.gz' % re.sub(r'[^A-Za-z0-9_.-]', '_', keyname))
+        _makedirs(os.path.join(self.path, 'packages'))
+
+        record = dict((key, value) for key, value in package.items()
+                      if key not in ('items', 'activePresets', 'accountRestrictedActivePresets',
+                                     'regions', 'categories'))
+        temp_path = os.path.join(self.path, filename + '.tmp')
+        with gzip.open(temp_path, 'wt') as package_file:
+            json.dump(package, package_file, separators=(',', ':'))
+        os.replace(temp_path, os.path.join(self.path, filename))
+
+        self.index['packages'][keyname] = {'package': record, 'file': filename}
+        self._packages[keyname] = package
+
+    def remove_package(self, package_keyname):
+        """Removes a package from the snapshot. Call save_index() afterwards."""
+        entry = self.index['packages'].pop(package_keyname, None)
+        self._packages.pop(package_keyname, None)
+        if entry is not None:
+            try:
+                os.remove(os.path.join(self.path, entry['file']))
+            except OSError:
+                pass
+
+    def save_index(self, sync_date=None):
+        """Writes the index, recording when the snapshot was synced."""
+        _makedirs(self.path)
+        self.index['version'] = FORMAT_VERSION
+        self.index['syncDate'] = sync_date or datetime.datetime.utcnow().isoformat()
+        temp_path = os.path.join(self.path, 'index.json.tmp')
+        with open(temp_path, 'w') as index_file:
+            json.dump(self.index, index_file, indent=1, sort_keys=True)
+        os.replace(temp_path, os.path.join(self.path, 'index.json'))
+
+
+class CatalogManager(object):
+    """Keeps a CatalogSnapshot in sync with the product catalog.
+
+    Example::
+
+        snapshot = CatalogSnapshot()
+        CatalogManager(client, snapshot).sync(['BARE_METAL_SERVER'])
+        ordering = OrderingManager(client, catalog=snapshot)
+
+    :param SoftLayer.API.BaseClient client: the client instance
+    :param CatalogSnapshot snapshot: the snapshot to sync, defaults to the one in default_catalog_dir()
+    """
+
+    def __init__(self, client, snapshot=None):
+        self.client = client
+        self.package_svc = client['Product_Package']
+        self.snapshot = snapshot or CatalogSnapshot()
+
+    def sync(self, package_keynames=None, all_packages=False, force=False):
+        """Refreshes packages whose itemCount or modifyDate changed since they were stored.
+
+        :param list package_keynames: packages to add or refresh. Defaults to
+                                      the packages already in the snapshot
+        :param bool all_packages: sync every active package
+        :param bool force: refresh packages even if they did not change
+        :returns: a list of {'keyName', 'status', 'items'} where status is one
+                  of added, updated, unchanged or removed
+        """
+        remote = dict((package['keyName'], package)
+                      for package in self.package_svc.getAllObjects(mask=SNAPSHOT_PACKAGE_MASK)
+                      if package.get('keyName'))
+
+        stored = [package['keyName'] for package in self.snapshot.list_packages()]
+        if all_packages:
+            targets = sorted(keyname for keyname, package in remote.items() if package.get('isActive'))
+        elif package_keynames:
+            targets = list(package_keynames)
+        else:
+            targets = stored
+        if not targets:
+            raise exceptions.SoftLayerError("No packages to sync, the snapshot is empty")
+
+        unknown = [keyname for keyname in targets if keyname not in remote]
+        if package_keynames and unknown:
+            raise exceptions.SoftLayerError("Package {} does not exist".format(', '.join(unknown)))
+
+        results = []
+        for keyname in targets:
+            if keyname not in remote:
+                self.snapshot.remove_package(keyname)
+                results.append({'keyName': keyname, 'status': 'removed', 'items': 0})
+                continue
+
+            package = remote[keyname]
+            known = self.snapshot.has_package(keyname)
+            if known and not force and self.snapshot.signature(keyname) == _signature(package):
+                status = 'unchanged'
+            else:
+                package = self._fetch_package(package)
+                self.snapshot.save_package(package)
+                status = 'updated' if known else 'added'
+            results.append({'keyName': keyname, 'status': status,
+                            'items': len(self.snapshot.get_package(keyname)['items'])})
+
+        self.snapshot.save_index()
+        return results
+
+    def _fetch_package(self, package):
+        """Downloads everything the snapshot stores for a package."""
+        package_id = package['id']
+        plan = fetch.FetchPlan()
+        plan.add('items', lambda _: self.package_svc.getItems(id=package_id, mask=SNAPSHOT_ITEM_MASK))
+        plan.add('activePresets', lambda _: self.package_svc.getActivePresets(
+            id=package_id, mask=SNAPSHOT_PRESET_MASK))
+        plan.add('accountRestrictedActivePresets', lambda _: self.package_svc.getAccountRestrictedActivePresets(
+            id=package_id, mask=SNAPSHOT_PRESET_MASK))
+        plan.add('regions', lambda _: self.package_svc.getRegions(id=package_id, mask=SNAPSHOT_REGION_MASK))
+        plan.add('categories', lambda _: self.package_svc.getConfiguration(
+            id=package_id, mask=SNAPSHOT_CATEGORY_MASK))
+
+        snapshot_package = dict(package)
+        snapshot_package.update(plan.run())
+        snapshot_package['regions'] = [_with_region_location(region) for region in snapshot_package['regions']]
+        return snapshot_package
+
+
+def _with_region_location(region):
+    """Adds the location of a getRegions region under 'location', as getObject returns it."""
+    if 'location' in region or not region.get('locations'):
+        return region
+    return dict(region, location=region['locations'][0])
+
+
+def _signature(package):
+    return [package.get('itemCount'), package.get('modifyDate')]
+
+
+def _makedirs(path):
+    if not os.path.isdir(path):
+        os.makedirs(path)
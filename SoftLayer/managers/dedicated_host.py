@@ -9,6 +9,8 @@ import logging
 
 from SoftLayer.exceptions import SoftLayerAPIError
 from SoftLayer.exceptions import SoftLayerError
+from SoftLayer.managers.locations import find_region
+from SoftLayer.managers.locations import get_location_registry
 from SoftLayer.managers import ordering
 from SoftLayer import utils
 
@@ -37,6 +39,8 @@ class DedicatedHostManager(utils.IdentifierMixin, object):
 
         if ordering_manager is None:
             self.ordering_manager = ordering.OrderingManager(client)
+        else:
+            self.ordering_manager = ordering_manager
 
     def cancel_host(self, host_id):
         """Cancel a dedicated host immediately, it fails if there are still guests in the host.
@@ -389,11 +393,13 @@ class DedicatedHostManager(utils.IdentifierMixin, object):
         return package
 
     def _get_location(self, regions, datacenter):
-        """Get the longer key with a short location(datacenter) name."""
-        for region in regions:
-            # list of locations
-            if region['location']['location']['name'] == datacenter:
-                return region
+        """Get the longer key with a short location(datacenter) name.
+
+        Long names, IDs and region keynames are resolved with the location registry.
+        """
+        region = find_region(regions, datacenter, get_location_registry(self.client))
+        if region is not None:
+            return region
 
         raise SoftLayerError("Could not find valid location for: '%s'" % datacenter)
 
@@ -5,11 +5,34 @@
 
     :license: MIT, see LICENSE for more details.
 """
+from concurrent import futures
+import logging
 import time
 
 from SoftLayer import exceptions
 from SoftLayer import utils
 
+LOGGER = logging.getLogger(__name__)
+
+# How many records go into one createObjects/editObjects/deleteObjects call
+ZONE_SYNC_BATCH_SIZE = 100
+
+# How many of those calls run at the same time
+ZONE_SYNC_WORKERS = 4
+
+# TTL of synced records that don't have one
+ZONE_SYNC_TTL = 7200
+
+# Record types whose data is a hostname, compared without case or a trailing dot
+HOSTNAME_TYPES = ('cname', 'mx', 'ns', 'ptr', 'srv')
+
+# Keys, besides host, type and data, that make a live record differ from the wanted one
+SYNC_KEYS = ('ttl', 'mxPriority', 'priority', 'weight', 'port', 'protocol', 'service')
+
+# Properties of a guest or server that plan_server_sync() needs
+SERVER_SYNC_MASK = ('mask[id, hostname, domain, fullyQualifiedDomainName, primaryIpAddress, '
+                    'primaryNetworkComponent[id, primaryVersion6IpAddressRecord[ipAddress]]]')
+
 
 class DNSManager(utils.IdentifierMixin, object):
     """Manage SoftLayer DNS.
@@ -19,12 +42,14 @@ class DNSManager(utils.IdentifierMixin, object):
     :param SoftLayer.API.BaseClient client: the client instance
 
     """
+    identifier_index_keys = ('name',)
 
     def __init__(self, client):
         self.client = client
         self.service = self.client['Dns_Domain']
         self.record = self.client['Dns_Domain_ResourceRecord']
         self.resolvers = [self._get_zone_id_from_name]
+        self.batch_resolvers = [self._get_zone_ids_from_names]
 
     def _get_zone_id_from_name(self, name):
         """Return zone ID based on a zone."""
@@ -32,6 +57,13 @@ class DNSManager(utils.IdentifierMixin, object):
             filter={"domains": {"name": utils.query_filter(name)}})
         return [x['id'] for x in results]
 
+    def _get_zone_ids_from_names(self, names):
+        """Return a dict of zone name to zone IDs, with a single API call."""
+        return utils.find_ids(self.list_zones, 'domains', ['name'], names)
+
+    def _identifier_index_records(self):
+        return self.list_zones(mask='id, name')
+
     def list_zones(self, **kwargs):
         """Retrieve a list of all DNS zones.
 
@@ -279,3 +311,321 @@ class DNSManager(utils.IdentifierMixin, object):
             self.edit_record(edit_ptr)
         else:
             self.create_record(ptr_domains['id'], host_rec, 'ptr', fqdn, ttl=ttl)
+
+    def plan_zone_sync(self, zone_id, records, prune=False, default_ttl=ZONE_SYNC_TTL):
+        """Works out the changes that make a zone hold the given records.
+
+        The zone and its records are fetched once and compared to records
+        by host, type and data. See diff_zone_records() for the plan.
+
+        :param integer zone_id: the zone's ID, None for a zone that doesn't exist yet
+        :param list records: the wanted records, dicts with host, type, data and
+                             optionally ttl, mxPriority and the SRV keys
+        :param bool prune: delete records of the zone that are not in records
+        :param integer default_ttl: TTL of records that don't have one
+        :returns: a dict of create, edit, delete and unchanged record lists
+        """
+        existing = []
+        if zone_id is not None:
+            existing = self.get_zone(zone_id, records=True).get('resourceRecords') or []
+        return diff_zone_records(zone_id, existing, records, prune=prune, default_ttl=default_ttl)
+
+    def apply_zone_sync(self, plan, batch_size=ZONE_SYNC_BATCH_SIZE, max_workers=ZONE_SYNC_WORKERS, progress=None):
+        """Makes the changes of a plan_zone_sync() plan.
+
+        Records are sent in batches of batch_size, with up to max_workers
+        calls at the same time. Deletes finish before edits, and edits
+        before creates, so a new record never clashes with one going away.
+
+        :param dict plan: the result of plan_zone_sync()
+        :param integer batch_size: the most records in one call
+        :param integer max_workers: the most calls to run at the same time
+        :param progress: function called with every batch result once it is done
+        :returns: a list of {'action', 'records', 'error'}, one per batch.
+                  error is the message of a failed call, or None
+        """
+        results = []
+        for action, method in (('delete', 'deleteObjects'), ('edit', 'editObjects'), ('create', 'createObjects')):
+            records = plan[action]
+            batches = [records[start:start + batch_size] for start in range(0, len(records), batch_size)]
+            if not batches:
+                continue
+
+            def call(batch, action=action, method=method):
+                if action == 'delete':
+                    templates = [{'id': record['id']} for record in batch]
+                else:
+                    templates = batch
+                try:
+                    getattr(self.record, method)(templates)
+                    return {'action': action, 'records': batch, 'error': None}
+                except exceptions.SoftLayerError as ex:
+                    LOGGER.debug("Zone sync %s failed: %s", method, ex)
+                    return {'action': action, 'records': batch, 'error': str(ex)}
+
+            with futures.ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+                for result in executor.map(call, batches):
+                    results.append(result)
+                    if progress is not None:
+                        progress(result)
+        return results
+
+    def plan_server_sync(self, servers, service, a_record=True, aaaa_record=False, ptr=True, ttl=7200,
+                         max_workers=ZONE_SYNC_WORKERS):
+        """Works out the A, AAAA and PTR record changes of many guests or servers at once.
+
+        This is sync_host_record() and sync_ptr_record() for a whole fleet.
+        Every forward zone is fetched once, and the reverse records of every
+        server, with up to max_workers calls at the same time. The plan can
+        be applied with apply_zone_sync().
+
+        :param list servers: the guests or servers, with the properties of SERVER_SYNC_MASK
+        :param string service: Virtual_Guest or Hardware_Server
+        :param bool a_record: sync the A records
+        :param bool aaaa_record: sync the AAAA records
+        :param bool ptr: sync the PTR records
+        :param integer ttl: TTL of the records
+        :param integer max_workers: the most zones to fetch at the same time
+        :returns: a dict of create, edit, delete and unchanged record lists, and
+                  errors, a list of {'id', 'name', 'error'} for servers that can't be synced
+        """
+        plan = {'create': [], 'edit': [], 'delete': [], 'unchanged': [], 'errors': []}
+
+        zones = {}
+        domains = sorted(set(server['domain'] for server in servers if server.get('domain')))
+        if domains and (a_record or aaaa_record):
+            zone_ids = dict((domain, ids[0]) for domain, ids in self.resolve_many_ids(domains).items() if ids)
+            fetched = _fetch_all(lambda zone_id: self.get_zone(zone_id, records=True), zone_ids.values(), max_workers)
+            for domain, zone_id in zone_ids.items():
+                zone, error = fetched[zone_id]
+                zones[domain] = _HostRecords(zone_id, (zone or {}).get('resourceRecords'), error)
+
+        reverse = {}
+        if ptr:
+            def get_reverse(server_id):
+                # getReverseDomainRecords returns a list of 1 element, so just get the top.
+                # Its resourceRecords only hold the PTR record of that server.
+                return (self.client[service].getReverseDomainRecords(id=server_id) or [None])[0]
+
+            reverse = _fetch_all(get_reverse, [server['id'] for server in servers if server.get('primaryIpAddress')],
+                                 max_workers)
+
+        planned_ptrs = set()
+        for server in servers:
+            name = server.get('fullyQualifiedDomainName') or server.get('hostname') or server['id']
+            changes = {'create': [], 'edit': [], 'unchanged': []}
+            try:
+                if not server.get('primaryIpAddress'):
+                    raise exceptions.SoftLayerError("No primary IP address")
+                ipv6 = utils.lookup(server, 'primaryNetworkComponent', 'primaryVersion6IpAddressRecord', 'ipAddress')
+                if aaaa_record and not ipv6:
+                    raise exceptions.SoftLayerError("No ipv6 address")
+                if a_record:
+                    self._plan_host_record(changes, zones, server, 'a', server['primaryIpAddress'], ttl)
+                if aaaa_record:
+                    self._plan_host_record(changes, zones, server, 'aaaa', ipv6, ttl)
+                if ptr:
+                    _plan_ptr_record(changes, planned_ptrs, reverse[server['id']], server['primaryIpAddress'],
+                                     server.get('fullyQualifiedDomainName'), ttl)
+            except exceptions.SoftLayerError as ex:
+                plan['errors'].append({'id': server['id'], 'name': name, 'error': str(ex)})
+                continue
+            for action, records in changes.items():
+                plan[action].extend(records)
+        return plan
+
+    @staticmethod
+    def _plan_host_record(changes, zones, server, record_type, ip_address, ttl):
+        zone = zones.get(server.get('domain'))
+        if zone is None:
+            raise exceptions.SoftLayerError("No DNS zone for %s" % server.get('domain'))
+        if zone.error:
+            raise exceptions.SoftLayerError(zone.error)
+
+        records = zone.find(server['hostname'], record_type)
+        if not records:
+            record = {'host': server['hostname'], 'type': record_type, 'data': ip_address, 'ttl': ttl,
+                      'domainId': zone.zone_id}
+            zone.add(record)
+            changes['create'].append(record)
+        elif len(records) != 1 or 'id' not in records[0]:
+            raise exceptions.SoftLayerError("Found %d %s records for %s" % (len(records), record_type.upper(),
+                                                                            server['hostname']))
+        elif records[0].get('data') == ip_address and records[0].get('ttl') == ttl:
+            changes['unchanged'].append(records[0])
+        else:
+            changes['edit'].append({'id': records[0]['id'], 'domainId': zone.zone_id, 'host': records[0]['host'],
+                                    'type': record_type, 'data': ip_address, 'ttl': ttl})
+
+
+def record_key(record):
+    """Returns the (host, type, data) a record is matched on when syncing a zone."""
+    record_type = str(record.get('type') or '').lower()
+    data = str(record.get('data') or '').strip()
+    if record_type in HOSTNAME_TYPES:
+        data = data.lower().rstrip('.')
+    return str(record.get('host') or '@').lower(), record_type, data
+
+
+def diff_zone_records(zone_id, existing, records, prune=False, default_ttl=ZONE_SYNC_TTL):
+    """Compares the live records of a zone to the wanted ones.
+
+    A wanted record with the same host, type and data as a live one is
+    unchanged, or edited when its TTL or MX/SRV settings differ. With prune,
+    a leftover live record with the same host and type as a leftover wanted
+    one is edited into it, and other leftover live records, including extra
+    copies of a wanted one, are deleted.
+    Leftover wanted records are created. SOA records, and NS records of
+    the zone itself, are never edited or deleted.
+
+    :param integer zone_id: the zone's ID, set as domainId of new records
+    :param list existing: the live records, from get_zone()
+    :param list records: the wanted records
+    :param bool prune: edit or delete live records that are not wanted
+    :param integer default_ttl: TTL of wanted records that don't have one
+    :returns: a dict of create, edit, delete and unchanged record lists
+    """
+    plan = {'create': [], 'edit': [], 'delete': [], 'unchanged': []}
+
+    live = {}
+    protected = set()
+    for record in existing:
+        key = record_key(record)
+        if key[1] == 'soa' or (key[1] == 'ns' and key[0] == '@'):
+            protected.add(key)
+        live.setdefault(key, []).append(record)
+
+    wanted = []
+    seen = set()
+    for record in records:
+        if str(record.get('type') or '').lower() == 'soa':
+            continue
+        key = record_key(record)
+        if key in seen:
+            continue
+        seen.add(key)
+        record = dict(record, host=record.get('host') or '@')
+        record['ttl'] = int(record['ttl']) if record.get('ttl') not in (None, '') else default_ttl
+        wanted.append((key, record))
+
+    leftover = []
+    for key, record in wanted:
+        current = live[key].pop(0) if live.get(key) else None
+        if current is None:
+            leftover.append((key, record))
+        elif key in protected or not _record_changes(current, record):
+            plan['unchanged'].append(current)
+        else:
+            plan['edit'].append(_edited_record(current, record))
+
+    stale = {}
+    if prune:
+        for key, live_records in live.items():
+            if key not in protected:
+                stale.setdefault(key[:2], []).extend(live_records)
+
+    for key, record in leftover:
+        if stale.get(key[:2]):
+            plan['edit'].append(_edited_record(stale[key[:2]].pop(0), record))
+        else:
+            plan['create'].append(_created_record(zone_id, record))
+
+    plan['delete'] = [record for records_left in stale.values() for record in records_left]
+    return plan
+
+
+class _HostRecords(object):
+    """The records of a forward zone, by host and type."""
+
+    def __init__(self, zone_id, records, error=None):
+        self.zone_id = zone_id
+        self.error = error
+        self.records = {}
+        for record in records or []:
+            self.add(record)
+
+    def find(self, host, record_type):
+        """Returns the records of a host with a type."""
+        return self.records.get((str(host).lower(), record_type.lower()), [])
+
+    def add(self, record):
+        """Adds a record, planned records have no id."""
+        self.records.setdefault((str(record.get('host')).lower(), str(record.get('type')).lower()), []).append(record)
+
+
+def _fetch_all(func, args, max_workers):
+    """Calls func on every distinct arg, with at most max_workers at once.
+
+    :returns: a dict of arg to (result, error), error is the message of a SoftLayerError or None
+    """
+    def call(arg):
+        try:
+            return arg, (func(arg), None)
+        except exceptions.SoftLayerError as ex:
+            LOGGER.debug("DNS sync fetch failed for %s: %s", arg, ex)
+            return arg, (None, str(ex))
+
+    args = sorted(set(args))
+    if not args:
+        return {}
+    with futures.ThreadPoolExecutor(max_workers=min(max_workers, len(args))) as executor:
+        return dict(executor.map(call, args))
+
+
+def _plan_ptr_record(changes, planned, fetched, ip_address, fqdn, ttl):
+    """The same changes as DNSManager.sync_ptr_record.
+
+    planned is the set of (reverse domain id, host) already in the plan.
+    """
+    ptr_domain, error = fetched
+    if error:
+        raise exceptions.SoftLayerError(error)
+    if not ptr_domain:
+        raise exceptions.SoftLayerError("No reverse domain for %s" % ip_address)
+
+    host_rec = ip_address.split('.')[-1]
+    if (ptr_domain.get('id'), host_rec) in planned:
+        raise exceptions.SoftLayerError("%s is synced twice" % ip_address)
+    planned.add((ptr_domain.get('id'), host_rec))
+    for record in ptr_domain.get('resourceRecords') or []:
+        if record.get('host', '') == host_rec:
+            if record.get('data', '').rstrip('.').lower() == (fqdn or '').lower() and record.get('ttl') == ttl:
+                changes['unchanged'].append(record)
+            else:
+                changes['edit'].append({'id': record['id'], 'domainId': ptr_domain.get('id'), 'host': host_rec,
+                                        'type': 'ptr', 'data': fqdn, 'ttl': ttl})
+            return
+
+    changes['create'].append({'host': host_rec, 'type': 'ptr', 'data': fqdn, 'ttl': ttl,
+                              'domainId': ptr_domain.get('id')})
+
+
+def _record_changes(current, record):
+    for key in SYNC_KEYS:
+        if record.get(key) is not None and str(record[key]) != str(current.get(key)):
+            return True
+    return False
+
+
+def _edited_record(current, record):
+    edited = {'id': current['id']}
+    for key in ('domainId', 'host', 'type', 'data') + SYNC_KEYS:
+        value = record.get(key, current.get(key))
+        if value is not None:
+            edited[key] = value
+    return edited
+
+
+def _created_record(zone_id, record):
+    created = {'host': record['host'], 'data': record['data'], 'ttl': record['ttl'], 'type': record['type'],
+               'domainId': zone_id}
+    for key in SYNC_KEYS:
+        if record.get(key) is not None:
+            created.setdefault(key, record[key])
+    record_type = str(record['type']).lower()
+    if record_type == 'mx':
+        created.setdefault('mxPriority', 10)
+    elif record_type == 'srv':
+        # createObjects won't create SRV records without the complexType, as with create_record_srv
+        created['complexType'] = 'SoftLayer_Dns_Domain_ResourceRecord_SrvType'
+    return created
@@ -5,9 +5,301 @@
 
     :license: MIT, see LICENSE for more details.
 """
+import calendar
+from concurrent import futures
+import datetime
+import json
+import os
+import re
+import sqlite3
+import time
 
+from SoftLayer import exceptions
 from SoftLayer import utils
 
+# Page size of the getAllObjects calls that look for new event logs
+FOLLOW_PAGE_SIZE = 500
+
+# Slices of the date range an export fetches at the same time
+EXPORT_WORKERS = 4
+
+# How often an export fetches a slice that failed again, waiting EXPORT_BACKOFF seconds doubled on every retry
+EXPORT_RETRIES = 3
+EXPORT_BACKOFF = 5
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.softlayer_event_log.db')
+
+# Bump when the tables of the index change, an older index is then emptied
+INDEX_FORMAT_VERSION = 2
+
+INDEX_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, event_time INTEGER NOT NULL,
+        eventName TEXT, objectId INTEGER, objectName TEXT, userId INTEGER, username TEXT, metaData TEXT,
+        data TEXT NOT NULL)''',
+    'CREATE INDEX IF NOT EXISTS events_time ON events (event_time)',
+    'CREATE INDEX IF NOT EXISTS events_object ON events (objectId, event_time)',
+    'CREATE INDEX IF NOT EXISTS events_name ON events (eventName, event_time)',
+    'CREATE INDEX IF NOT EXISTS events_type ON events (objectName, event_time)',
+    'CREATE INDEX IF NOT EXISTS events_user ON events (userId, event_time)',
+]
+
+EVENT_DATE_REGEX = re.compile(r'^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6})\d*)?'
+                              r'(?:([+-])(\d{2}):?(\d{2}))?$')
+
+
+def event_log_time(date):
+    """Returns an eventCreateDate as (epoch, microseconds), for comparing and sorting.
+
+    :param string date: an eventCreateDate like 2017-10-23T14:22:36.221541-05:00
+    """
+    match = EVENT_DATE_REGEX.match(date or '')
+    if not match:
+        raise exceptions.SoftLayerError("Unable to read the event log date %r" % date)
+    year, month, day, hour, minute, second, fraction, sign, zone_hours, zone_minutes = match.groups()
+    epoch = calendar.timegm((int(year), int(month), int(day), int(hour), int(minute), int(second)))
+    if sign:
+        offset = int(zone_hours) * 3600 + int(zone_minutes) * 60
+        epoch += offset if sign == '-' else -offset
+    return epoch, int((fraction or '0').ljust(6, '0'))
+
+
+def event_log_key(log):
+    """Returns a string that tells event logs from the same date apart."""
+    return '%s|%s|%s|%s' % (log.get('traceId'), log.get('eventName'), log.get('objectId'),
+                            log.get('eventCreateDate'))
+
+
+def event_log_slices(date_min, date_max, slice_days=1, utc_offset=None):
+    """Splits a date range into slices of days for EventLogManager.export_event_logs.
+
+    :param string date_min: Lower bound date in MM/DD/YYYY format
+    :param string date_max: Upper bound date in MM/DD/YYYY format
+    :param int slice_days: days per slice
+    :param string utc_offset: The UTC offset of the dates, +/-HHMM (default '+0000')
+    :returns: a list of {'start', 'end', 'end_time', 'last'}, end_time being the epoch of the end date
+    """
+    try:
+        start = datetime.datetime.strptime(date_min, '%m/%d/%Y')
+        end = datetime.datetime.strptime(date_max, '%m/%d/%Y')
+    except (TypeError, ValueError) as ex:
+        raise exceptions.SoftLayerError("Dates must be in MM/DD/YYYY format, not %s and %s"
+                                        % (date_min, date_max)) from ex
+    if end <= start:
+        raise exceptions.SoftLayerError("%s is not after %s" % (date_max, date_min))
+
+    offset = 0
+    if utc_offset:
+        offset = (int(utc_offset[1:3]) * 3600 + int(utc_offset[3:5]) * 60) * (-1 if utc_offset[0] == '-' else 1)
+
+    slices = []
+    while start < end:
+        slice_end = min(start + datetime.timedelta(days=slice_days), end)
+        slices.append({
+            'start': start.strftime('%m/%d/%Y'),
+            'end': slice_end.strftime('%m/%d/%Y'),
+            'end_time': calendar.timegm(slice_end.timetuple()) - offset,
+            'last': slice_end == end,
+        })
+        start = slice_end
+    return slices
+
+
+class EventLogCheckpoint(object):
+    """The newest event log that was followed, so following resumes where it stopped.
+
+    The checkpoint is a JSON file with the eventCreateDate of the newest event
+    log and the event_log_key() of every event log from that date.
+
+    :param str path: the checkpoint file, None only keeps it in memory
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.since = None
+        self.seen = []
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as checkpoint_file:
+                saved = json.load(checkpoint_file)
+        except (IOError, OSError):
+            return
+        except ValueError as ex:
+            raise exceptions.SoftLayerError("Unable to read checkpoint %s: %s" % (self.path, ex)) from ex
+        if not isinstance(saved, dict) or 'since' not in saved:
+            raise exceptions.SoftLayerError("Checkpoint %s is not an event log checkpoint" % self.path)
+        self.since = saved['since']
+        self.seen = list(saved.get('seen') or [])
+
+    def update(self, log):
+        """Records an event log that was followed."""
+        date = log['eventCreateDate']
+        key = event_log_key(log)
+        if self.since is None or event_log_time(date) > event_log_time(self.since):
+            self.since = date
+            self.seen = [key]
+        elif event_log_time(date) == event_log_time(self.since) and key not in self.seen:
+            self.seen.append(key)
+
+    def save(self):
+        """Writes the checkpoint file."""
+        if not self.path or self.since is None:
+            return
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as checkpoint_file:
+            json.dump({'since': self.since, 'seen': self.seen}, checkpoint_file)
+        os.replace(temp_path, self.path)
+
+
+def default_index_path():
+    """The event log index file, SL_EVENT_LOG_DB or ~/.softlayer_event_log.db."""
+    return os.environ.get('SL_EVENT_LOG_DB') or DEFAULT_INDEX_PATH
+
+
+class EventLogIndex(utils.SQLiteStore):
+    """A local SQLite copy of the event log, searchable without API calls.
+
+    Event logs are indexed on their date, object id, object type, event name
+    and user, and their metaData is searchable with SQLite full-text search.
+    Fill it with EventLogManager.sync_index().
+
+    Example::
+
+        index = EventLogIndex()
+        event_mgr.sync_index(index, date_min='01/01/2019')
+        logs = index.get_event_logs(event_mgr.build_filter(obj_type='User'), text='password')
+
+    :param str path: the SQLite file, defaults to default_index_path()
+    """
+
+    schema = INDEX_SCHEMA
+    tables = ('events', 'event_text')
+    format_version = INDEX_FORMAT_VERSION
+
+    def __init__(self, path=None):
+        super().__init__(path or default_index_path())
+        self.fts = None
+
+    def _create_tables(self, connection):
+        self.fts = _create_text_table(connection)
+
+    def count(self):
+        """Returns how many event logs are in the index."""
+        return self.connection.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+
+    def newest(self):
+        """Returns the eventCreateDate of the newest event log and the event_log_key() of every event log from it.
+
+        :returns: (None, []) if the index is empty
+        """
+        rows = self.connection.execute(
+            'SELECT data FROM events WHERE event_time = (SELECT MAX(event_time) FROM events)').fetchall()
+        logs = [json.loads(row[0]) for row in rows]
+        if not logs:
+            return None, []
+        return logs[0]['eventCreateDate'], [event_log_key(log) for log in logs]
+
+    def add(self, logs, username=None):
+        """Adds event logs that are not in the index yet.
+
+        :param logs: iterable of event logs
+        :param username: function returning the username of a userId, called once per CUSTOMER user
+        :returns: how many event logs were added
+        """
+        connection = self.connection
+        usernames = dict(connection.execute('SELECT DISTINCT userId, username FROM events '
+                                            'WHERE username IS NOT NULL').fetchall())
+        added = 0
+        try:
+            for log in logs:
+                user = None
+                if log.get('userType') == 'CUSTOMER' and log.get('userId'):
+                    if log['userId'] not in usernames:
+                        usernames[log['userId']] = log.get('username') or (username and username(log['userId']))
+                    user = usernames[log['userId']]
+                seconds, micro = event_log_time(log['eventCreateDate'])
+                cursor = connection.execute(
+                    'INSERT OR IGNORE INTO events (key, event_time, eventName, objectId, objectName, userId, '
+                    'username, metaData, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (event_log_key(log), seconds * 1000000 + micro, log.get('eventName'), log.get('objectId'),
+                     log.get('objectName'), log.get('userId') or None, user, log.get('metaData') or '',
+                     json.dumps(log, sort_keys=True)))
+                if cursor.rowcount == 1:
+                    added += 1
+                    if self.fts:
+                        connection.execute('INSERT INTO event_text (rowid, metaData) VALUES (?, ?)',
+                                           (cursor.lastrowid, log.get('metaData') or ''))
+        finally:
+            # Keeps what was added before logs failed, the next sync starts after it
+            connection.commit()
+        return added
+
+    def get_event_logs(self, request_filter=None, text=None, limit=None):
+        """Returns the indexed event logs matching a filter, newest first like Event_Log::getAllObjects.
+
+        :param dict request_filter: filter dict, see EventLogManager.build_filter()
+        :param string text: full-text search of the metaData, like "password OR ssh". Without
+            SQLite full-text search, event logs whose metaData contains text are returned
+        :param int limit: return at most this many event logs
+        """
+        request_filter = request_filter or {}
+        where = []
+        params = []
+        date_filter = request_filter.get('eventCreateDate')
+        if date_filter:
+            dates = dict((option['name'], option['value'][0]) for option in date_filter['options'])
+            comparisons = {'betweenDate': [('>=', 'startDate'), ('<=', 'endDate')],
+                           'greaterThanDate': [('>', 'date')],
+                           'lessThanDate': [('<', 'date')]}
+            for operator, name in comparisons[date_filter['operation']]:
+                seconds, micro = event_log_time(dates[name])
+                where.append('event_time %s ?' % operator)
+                params.append(seconds * 1000000 + micro)
+        for column in ('eventName', 'objectId', 'objectName'):
+            if column in request_filter:
+                where.append('%s = ?' % column)
+                params.append(request_filter[column]['operation'])
+        connection = self.connection
+        if text and self.fts:
+            where.append('id IN (SELECT rowid FROM event_text WHERE event_text MATCH ?)')
+            params.append(text)
+        elif text:
+            where.append("metaData LIKE ? ESCAPE '\\'")
+            params.append('%%%s%%' % re.sub(r'([\\%_])', r'\\\1', text))
+
+        sql = 'SELECT data, username FROM events'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY event_time DESC, id DESC'
+        if limit:
+            sql += ' LIMIT %d' % int(limit)
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as ex:
+            raise exceptions.SoftLayerError("Unable to search the event log index for %r: %s" % (text, ex))
+
+        logs = []
+        for data, user in rows:
+            log = json.loads(data)
+            if user:
+                log['username'] = user
+            logs.append(log)
+        return logs
+
+
+def _create_text_table(connection):
+    """Creates the full-text table of the metaData with the newest FTS SQLite has, returns its name."""
+    for module in ('fts5', 'fts4'):
+        try:
+            connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS event_text USING %s(metaData)' % module)
+            return module
+        except sqlite3.OperationalError:
+            continue
+    return None
+
 
 class EventLogManager(object):
     """Provides an interface for the SoftLayer Event Log Service.
@@ -43,6 +335,210 @@ class EventLogManager(object):
             return self.client.iter_call('Event_Log', 'getAllObjects', filter=request_filter, limit=log_limit)
         return self.client.call('Event_Log', 'getAllObjects', filter=request_filter, limit=log_limit)
 
+    def get_event_logs_since(self, since=None, seen=None, request_filter=None, page_size=FOLLOW_PAGE_SIZE):
+        """Returns the event logs created after a date, oldest first.
+
+        The API pages newest first, so every matching event log is kept in
+        memory to sort them. This is meant for the few event logs since the
+        last poll or sync, use export_event_logs() for long date ranges.
+
+        :param string since: an eventCreateDate, replaces the date filter of request_filter.
+            Event logs from exactly that date are returned too, unless their event_log_key() is in seen
+        :param list seen: keys of the event logs from the since date that were already returned
+        :param dict request_filter: filter dict, see build_filter()
+        :param int page_size: number of results to get in one API call
+        """
+        request_filter = dict(request_filter or {})
+        if since:
+            request_filter['eventCreateDate'] = {
+                'operation': 'greaterThanDate',
+                'options': [{'name': 'date', 'value': [since]}]
+            }
+            since_time = event_log_time(since)
+            seen = set(seen or [])
+
+        logs = []
+        for log in self.client.iter_call('Event_Log', 'getAllObjects', filter=request_filter, limit=page_size):
+            if not log:
+                continue
+            if since:
+                log_time = event_log_time(log['eventCreateDate'])
+                if log_time < since_time or (log_time == since_time and event_log_key(log) in seen):
+                    continue
+            logs.append(log)
+        logs.sort(key=lambda log: event_log_time(log['eventCreateDate']))
+        return logs
+
+    def follow_event_logs(self, request_filter=None, checkpoint=None, since=None, poll_interval=60,
+                          page_size=FOLLOW_PAGE_SIZE, sleep=None):
+        """Yields event logs as they are created, oldest first, until the generator is closed.
+
+        Every poll only asks for the event logs newer than the last one. The
+        checkpoint is saved after every poll and when the generator is closed,
+        an event log is recorded in it once the next one is asked for, so a
+        resumed follow returns every event log at least once.
+
+        Example::
+
+            checkpoint = EventLogCheckpoint('events.json')
+            for log in event_mgr.follow_event_logs(checkpoint=checkpoint, since='2019-01-01T00:00:00.000000+00:00'):
+                print(json.dumps(log))
+
+        :param dict request_filter: filter dict, see build_filter()
+        :param EventLogCheckpoint checkpoint: where to resume from and record the followed event logs
+        :param string since: eventCreateDate to start after when the checkpoint is empty
+        :param int poll_interval: seconds between polls
+        :param int page_size: number of results to get in one API call
+        """
+        checkpoint = checkpoint or EventLogCheckpoint()
+        sleep = sleep or time.sleep
+        try:
+            while True:
+                for log in self.get_event_logs_since(checkpoint.since or since, checkpoint.seen,
+                                                     request_filter, page_size):
+                    yield log
+                    checkpoint.update(log)
+                checkpoint.save()
+                sleep(poll_interval)
+        finally:
+            checkpoint.save()
+
+    def export_event_logs(self, date_min, date_max, obj_event=None, obj_id=None, obj_type=None, utc_offset=None,
+                          slice_days=1, max_workers=EXPORT_WORKERS, page_size=FOLLOW_PAGE_SIZE, progress=None,
+                          sleep=None):
+        """Yields the event logs between two dates, oldest first, fetching several slices of the range at once.
+
+        The range is split into slices of slice_days (see event_log_slices),
+        each fetched with its own betweenDate filter and pagination. A slice
+        that fails is fetched again up to EXPORT_RETRIES times. Slices are
+        yielded in order, no more than twice max_workers of them are fetched
+        ahead of the one being yielded.
+
+        Example::
+
+            for log in event_mgr.export_event_logs('01/01/2019', '04/01/2019', obj_type='User'):
+                print(json.dumps(log))
+
+        :param string date_min: Lower bound date in MM/DD/YYYY format
+        :param string date_max: Upper bound date in MM/DD/YYYY format
+        :param string obj_event: The name of the events we want to filter by
+        :param int obj_id: The id of the event we want to filter by
+        :param string obj_type: The type of event we want to filter by
+        :param string utc_offset: The UTC offset of the dates, +/-HHMM (default '+0000')
+        :param int slice_days: days per slice
+        :param int max_workers: how many slices to fetch at the same time
+        :param int page_size: number of results to get in one API call
+        :param progress: function called with {'start', 'end', 'status', 'count', 'attempts', 'error'}
+            when a slice is done or failed
+        :raises SoftLayerError: after the other slices, if a slice failed every attempt
+        """
+        slices = event_log_slices(date_min, date_max, slice_days, utc_offset)
+        filters = (obj_event, obj_id, obj_type, utc_offset)
+        sleep = sleep or time.sleep
+
+        failed = []
+        results = {}
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            submitted = 0
+            try:
+                for index, time_slice in enumerate(slices):
+                    while submitted < min(len(slices), index + 2 * max_workers):
+                        future = executor.submit(self._fetch_slice, slices[submitted], filters, page_size, sleep)
+                        pending[future] = submitted
+                        submitted += 1
+                    while index not in results:
+                        for future in futures.wait(pending, return_when=futures.FIRST_COMPLETED)[0]:
+                            done_index = pending.pop(future)
+                            results[done_index] = self._slice_result(slices[done_index], future, progress)
+
+                    logs = results.pop(index)
+                    if logs is None:
+                        failed.append(time_slice)
+                        continue
+                    yield from logs
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        if failed:
+            raise exceptions.SoftLayerError("Unable to export the event logs of %s" % ', '.join(
+                '%s - %s' % (time_slice['start'], time_slice['end']) for time_slice in failed))
+
+    def _fetch_slice(self, time_slice, filters, page_size, sleep):
+        """Returns the event logs of a slice, oldest first, and how many attempts that took."""
+        request_filter = self.build_filter(time_slice['start'], time_slice['end'], *filters)
+        attempt = 0
+        while True:
+            try:
+                logs = [log for log in self.client.iter_call('Event_Log', 'getAllObjects', filter=request_filter,
+                                                             limit=page_size) if log]
+                break
+            except exceptions.SoftLayerError:
+                if attempt >= EXPORT_RETRIES:
+                    raise
+                sleep(EXPORT_BACKOFF * 2 ** attempt)
+                attempt += 1
+
+        # betweenDate includes the end date, which is the start of the next slice
+        if not time_slice['last']:
+            logs = [log for log in logs if event_log_time(log['eventCreateDate'])[0] < time_slice['end_time']]
+        logs.sort(key=lambda log: event_log_time(log['eventCreateDate']))
+        return logs, attempt + 1
+
+    @staticmethod
+    def _slice_result(time_slice, future, progress):
+        """Returns the event logs of a finished slice, or None if it failed."""
+        status = {'start': time_slice['start'], 'end': time_slice['end'], 'status': 'done', 'count': 0,
+                  'attempts': EXPORT_RETRIES + 1, 'error': None}
+        logs = None
+        try:
+            logs, status['attempts'] = future.result()
+            status['count'] = len(logs)
+        except exceptions.SoftLayerError as ex:
+            status['status'] = 'failed'
+            status['error'] = str(ex)
+        if progress:
+            progress(status)
+        return logs
+
+    def sync_index(self, index, date_min=None, date_max=None, utc_offset=None, max_workers=EXPORT_WORKERS,
+                   progress=None):
+        """Adds the event logs that are not in a local EventLogIndex yet.
+
+        With date_min, every event log from that date on is exported into the
+        index (see export_event_logs). Otherwise only the event logs newer
+        than the newest one in the index are fetched, all at once (see
+        get_event_logs_since), so an index that is far behind is better
+        synced with a date_min.
+
+        :param EventLogIndex index: the index to add to
+        :param string date_min: Lower bound date in MM/DD/YYYY format
+        :param string date_max: Upper bound date in MM/DD/YYYY format, with date_min (default two days
+            from now in UTC, so today's event logs are included whatever the utc_offset)
+        :param string utc_offset: The UTC offset of the dates, +/-HHMM (default '+0000')
+        :param int max_workers: how many slices to fetch at the same time
+        :param progress: see export_event_logs
+        :returns: how many event logs were added
+        """
+        if date_min:
+            if not date_max:
+                date_max = (datetime.datetime.now(utils.UTC()) + datetime.timedelta(days=2)).strftime('%m/%d/%Y')
+            logs = self.export_event_logs(date_min, date_max, utc_offset=utc_offset, max_workers=max_workers,
+                                          progress=progress)
+        else:
+            since, seen = index.newest()
+            if since is None:
+                raise exceptions.SoftLayerError("The event log index is empty, give a date to start from")
+            logs = self.get_event_logs_since(since, seen)
+        return index.add(logs, self._get_username)
+
+    def _get_username(self, user_id):
+        try:
+            return self.client.call('User_Customer', 'getObject', id=user_id, mask='mask[username]')['username']
+        except exceptions.SoftLayerAPIError:
+            return None
+
     def get_event_log_types(self):
         """Returns a list of event log types
 
@@ -0,0 +1,208 @@
+"""
+    SoftLayer.fetch
+    ~~~~~~~~~~~~~~~
+    Helpers for managers to fetch the data behind a detail view in as few API
+    calls as possible.
+
+    :license: MIT, see LICENSE for more details.
+"""
+import collections
+from concurrent import futures
+import logging
+
+from SoftLayer import exceptions
+from SoftLayer import utils
+
+LOGGER = logging.getLogger(__name__)
+
+# Most detail views only have a handful of independent calls
+DEFAULT_WORKERS = 4
+
+# Name of the getObject step in get_details(), can not clash with extra names
+_OBJECT_STEP = object()
+
+
+class Fragment(object):
+    """Data that can be fetched along with an object in a single getObject call.
+
+    :param string mask: object mask of the relational properties the data
+                        comes from
+    :param extract: function that takes the getObject result and returns the data
+    """
+
+    def __init__(self, mask, extract):
+        self.mask = mask
+        self.extract = extract
+
+
+class FetchPlan(object):
+    """A set of API calls, run concurrently where they do not depend on each other.
+
+    Each step is a function taking a dict of {name: result} for the steps it
+    requires. Steps can only require steps added before them, so a plan can
+    not contain cycles. run() returns the results in the order the steps were
+    added, whatever order they finished in.
+
+    Example::
+
+        plan = fetch.FetchPlan()
+        plan.add('vsi', lambda _: mgr.get_instance(1234))
+        plan.add('ptr', lambda _: client['Virtual_Guest'].getReverseDomainRecords(id=1234))
+        plan.add('host', lambda results: mgr.get_host(results['vsi']['dedicatedHost']['id']),
+                 requires=['vsi'])
+        results = plan.run()
+
+    :param int max_workers: the most calls to run at the same time
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self.steps = collections.OrderedDict()
+
+    def add(self, name, func, requires=None):
+        """Adds a step to the plan.
+
+        :param string name: name of the result of the step
+        :param func: function taking a dict of the required results
+        :param list requires: names of steps that have to finish first
+        """
+        requires = list(requires or [])
+        if name in self.steps:
+            raise ValueError("Step %s is already in the plan" % name)
+        missing = [required for required in requires if required not in self.steps]
+        if missing:
+            raise ValueError("Step %s requires unknown steps: %s" % (name, ', '.join(missing)))
+        self.steps[name] = (func, requires)
+
+    def run(self):
+        """Runs every step and returns an OrderedDict of {name: result}.
+
+        If a step raises, steps that require it are not run and the
+        exception is raised once the running steps have finished.
+        """
+        if self.max_workers <= 1 or len(self.steps) <= 1:
+            return self._run_serial()
+
+        results = {}
+        pending = collections.OrderedDict(self.steps)
+        running = {}
+        workers = min(self.max_workers, len(self.steps))
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for name, (func, requires) in list(pending.items()):
+                    if all(required in results for required in requires):
+                        del pending[name]
+                        args = dict((required, results[required]) for required in requires)
+                        running[executor.submit(func, args)] = name
+
+                done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        LOGGER.debug("Step %s failed: %s", name, error)
+                        futures.wait(running)
+                        raise error
+                    results[name] = future.result()
+
+        return collections.OrderedDict((name, results[name]) for name in self.steps)
+
+    def _run_serial(self):
+        results = collections.OrderedDict()
+        for name, (func, requires) in self.steps.items():
+            results[name] = func(dict((required, results[required]) for required in requires))
+        return results
+
+
+def fused_get(get_object, mask, fragments, names=None):
+    """Fetches an object and the data of some fragments with one API call.
+
+    The fragment masks are merged into mask, so relational properties needed
+    by several fragments are only requested once.
+
+    :param get_object: function taking a mask and returning the object
+    :param string mask: object mask for the object itself
+    :param dict fragments: {name: Fragment} the data that can be fetched
+    :param list names: names of the fragments to fetch, defaults to all
+    :returns: a tuple of the object and a dict of {name: data}
+    """
+    if names is None:
+        names = list(fragments)
+    unknown = [name for name in names if name not in fragments]
+    if unknown:
+        raise ValueError("Unknown fragments: %s" % ', '.join(unknown))
+
+    merged_mask = utils.merge_masks(mask, *[fragments[name].mask for name in names])
+    result = get_object(merged_mask)
+    return result, dict((name, fragments[name].extract(result)) for name in names)
+
+
+def get_details(get_object, mask, fragments, calls=None, names=None, max_workers=DEFAULT_WORKERS):
+    """Fetches an object and extra data about it in as few round trips as possible.
+
+    Fragments are fused into the getObject call with fused_get(). Calls that
+    can not be fused, like methods of other services, run concurrently with it.
+
+    :param get_object: function taking a mask and returning the object
+    :param string mask: object mask for the object itself
+    :param dict fragments: {name: Fragment} data that comes with the object
+    :param dict calls: {name: function} data that needs its own API call,
+                       each function takes no arguments
+    :param list names: names of the fragments and calls to fetch, defaults to all
+    :param int max_workers: the most calls to run at the same time
+    :returns: a tuple of the object and a dict of {name: data}
+    """
+    calls = calls or {}
+    if names is None:
+        names = list(fragments) + list(calls)
+    unknown = [name for name in names if name not in fragments and name not in calls]
+    if unknown:
+        raise ValueError("Unknown fragments: %s" % ', '.join(unknown))
+
+    plan = FetchPlan(max_workers=max_workers)
+    fragment_names = [name for name in names if name in fragments]
+    plan.add(_OBJECT_STEP, lambda _: fused_get(get_object, mask, fragments, fragment_names))
+    for name in names:
+        if name in calls:
+            plan.add(name, _no_args(calls[name]))
+    results = plan.run()
+
+    result, extras = results.pop(_OBJECT_STEP)
+    extras.update(results)
+    return result, dict((name, extras[name]) for name in names)
+
+
+def _no_args(func):
+    """Adapts a function without arguments to a FetchPlan step."""
+    return lambda _: func()
+
+
+def ignore_api_errors(func, default=None):
+    """Returns a function calling func that returns default on an API error.
+
+    Useful for extra data that a detail view can be shown without.
+    """
+    def call():
+        try:
+            return func()
+        except exceptions.SoftLayerAPIError as ex:
+            LOGGER.debug("Ignoring API error: %s", ex)
+            return default
+    return call
+
+
+def bandwidth_allocation(result):
+    """Returns the bandwidth allotment and usage of a fused server result.
+
+    The returned dict is the same as get_bandwidth_allocation() returns.
+    """
+    allotment = result.get('bandwidthAllotmentDetail')
+    usage = result.get('billingCycleBandwidthUsage') or []
+    if allotment:
+        return {'allotment': allotment.get('allocation'), 'usage': usage}
+    return {'allotment': allotment, 'usage': usage}
+
+
+BANDWIDTH_FRAGMENT = Fragment(
+    'bandwidthAllotmentDetail.allocation.amount,billingCycleBandwidthUsage[amountIn,amountOut,type]',
+    bandwidth_allocation)
@@ -45,7 +45,7 @@ class FileStorageManager(StorageManager):
             ]
             kwargs['mask'] = ','.join(items)
 
-        _filter = utils.NestedDict(kwargs.get('filter') or {})
+        _filter = utils.NestedDict.from_dict(kwargs.get('filter') or {})
 
         _filter['nasNetworkStorage']['serviceResource']['type']['type'] = \
             (utils.query_filter('!~ NAS'))
@@ -164,3 +164,10 @@ class FileStorageManager(StorageManager):
         if results:
             return [result['id'] for result in results]
         return []
+
+    def _get_ids_from_usernames(self, usernames):
+        """Returns a dict of username to the matching volume IDs, with a single API call."""
+        return utils.find_ids(self.list_file_volumes, 'nasNetworkStorage', ['username'], usernames)
+
+    def _identifier_index_records(self):
+        return self.list_file_volumes(mask='id, username')
@@ -0,0 +1,266 @@
+"""
+    SoftLayer.fleet
+    ~~~~~~~~~~~~~~~
+    Run an operation on many servers at once
+
+    :license: MIT, see LICENSE for more details.
+"""
+from concurrent import futures
+import fnmatch
+import json
+import logging
+import os
+import threading
+import time
+
+from SoftLayer import exceptions
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+
+# How often an operation that hit the API rate limit is tried again
+DEFAULT_RETRIES = 4
+
+# Seconds every worker pauses after a rate limited call, doubled on each retry
+DEFAULT_BACKOFF = 5
+
+SELECT_MASK = 'mask[id, hostname, domain]'
+
+
+def select_resources(list_func, ids=None, hostnames=None, **filters):
+    """Finds the servers an operation should run on.
+
+    Servers are listed with list_func when hostnames or filters are given,
+    and only kept if their hostname matches one of the hostname globs.
+    IDs are added as they are, without looking them up.
+
+    Example::
+
+        mgr = VSManager(client)
+        select_resources(mgr.list_instances, hostnames=['web*'], datacenter='dal13')
+        select_resources(mgr.list_instances, tags=['web'])
+        select_resources(mgr.list_instances, ids=[1234, 1235])
+
+    :param list_func: function listing servers, like VSManager.list_instances
+                      or HardwareManager.list_hardware
+    :param list ids: IDs of servers to include
+    :param list hostnames: hostname globs, like web*
+    :param dict \\*\\*filters: filters of list_func, like tags, datacenter or domain
+    :returns: a list of {'id', 'hostname'}, hostname is None for servers given by ID
+    """
+    selected = []
+    seen = set()
+    for resource_id in ids or []:
+        if int(resource_id) not in seen:
+            seen.add(int(resource_id))
+            selected.append({'id': int(resource_id), 'hostname': None})
+
+    if hostnames or filters:
+        for resource in list_func(mask=SELECT_MASK, **filters):
+            if hostnames and not any(fnmatch.fnmatch(resource.get('hostname') or '', glob) for glob in hostnames):
+                continue
+            if resource['id'] not in seen:
+                seen.add(resource['id'])
+                selected.append({'id': resource['id'], 'hostname': resource.get('hostname')})
+    return selected
+
+
+def is_rate_limited(error):
+    """Returns True if an API error was caused by sending too many requests."""
+    if not isinstance(error, exceptions.SoftLayerAPIError):
+        return False
+    return error.faultCode == 429 or 'rate limit' in str(error.faultString).lower()
+
+
+class Checkpoint(object):
+    """Records which servers an operation finished on, so a run can be resumed.
+
+    The checkpoint is a JSON file, written again after every finished server.
+
+    :param str path: the checkpoint file
+    :param str operation: name of the operation, a checkpoint of another
+                          operation is not resumed
+    """
+
+    def __init__(self, path, operation):
+        self.path = path
+        self.operation = operation
+        self.done = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as checkpoint_file:
+                saved = json.load(checkpoint_file)
+        except (IOError, OSError):
+            return
+        except ValueError as ex:
+            raise exceptions.SoftLayerError("Unable to read checkpoint %s: %s" % (self.path, ex))
+        if saved.get('operation') != self.operation:
+            raise exceptions.SoftLayerError("Checkpoint %s is for %s, not %s"
+                                            % (self.path, saved.get('operation'), self.operation))
+        self.done = set(saved.get('done') or [])
+
+    def is_done(self, resource_id):
+        """Returns True if the operation already finished on a server."""
+        return resource_id in self.done
+
+    def mark_done(self, resource_id):
+        """Records that the operation finished on a server."""
+        with self._lock:
+            self.done.add(resource_id)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w') as checkpoint_file:
+                json.dump({'operation': self.operation, 'done': sorted(self.done)}, checkpoint_file)
+            os.replace(temp_path, self.path)
+
+
+class FleetExecutor(object):
+    """Runs an operation on many servers with a bounded number of threads.
+
+    Every server gets its own result, so one failure does not stop the
+    others. When the API rate limits a call, every worker pauses before
+    its next call and the call is tried again, up to max_retries times.
+
+    Example::
+
+        mgr = VSManager(client)
+        servers = select_resources(mgr.list_instances, tags=['web'])
+        executor = FleetExecutor(checkpoint=Checkpoint('reboot.json', 'reboot'))
+        results = executor.run(lambda guest_id: client['Virtual_Guest'].rebootSoft(id=guest_id),
+                               [server['id'] for server in servers])
+
+    :param int max_workers: the most operations to run at the same time
+    :param int max_retries: how often to retry a rate limited operation
+    :param int backoff: seconds to pause after the first rate limited call
+    :param Checkpoint checkpoint: skip servers it has done, and record the ones that finish
+    :param sleep: function sleeping for some seconds, defaults to time.sleep
+    :param float rate: the most operations to start per second, None for no limit
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 checkpoint=None, sleep=None, rate=None):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.checkpoint = checkpoint
+        self._throttle = _Throttle(rate=rate, sleep=sleep)
+
+    def run(self, operation, resource_ids):
+        """Calls operation with every resource ID.
+
+        :param operation: function taking a resource ID
+        :param list resource_ids: the resources to run the operation on
+        :returns: a list of {'id', 'status', 'result', 'error'} in the order
+                  of resource_ids. status is done, failed, or skipped if the
+                  checkpoint says the operation already finished on it
+        """
+        results = []
+        pending = []
+        for resource_id in resource_ids:
+            result = {'id': resource_id, 'status': 'skipped', 'result': None, 'error': None}
+            if self.checkpoint is None or not self.checkpoint.is_done(resource_id):
+                pending.append(result)
+            results.append(result)
+
+        if pending:
+            workers = min(self.max_workers, len(pending))
+            with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda result: self._run_one(operation, result), pending))
+        return results
+
+    def iter_run(self, operation, resource_ids):
+        """Calls operation with every resource ID, yielding each result as soon as it is done.
+
+        Results come in the order the operations finish, skipped ones first.
+        Operations that have not started when the caller stops iterating,
+        or on KeyboardInterrupt, are cancelled.
+
+        :param operation: function taking a resource ID
+        :param list resource_ids: the resources to run the operation on
+        :returns: a generator of {'id', 'status', 'result', 'error'}, see run()
+        """
+        pending = []
+        for resource_id in resource_ids:
+            result = {'id': resource_id, 'status': 'skipped', 'result': None, 'error': None}
+            if self.checkpoint is None or not self.checkpoint.is_done(resource_id):
+                pending.append(result)
+            else:
+                yield result
+        if not pending:
+            return
+
+        executor = futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending)))
+        submitted = [executor.submit(self._run_one, operation, result) for result in pending]
+        done = dict((future, result) for future, result in zip(submitted, pending))
+        try:
+            for future in futures.as_completed(submitted):
+                future.result()
+                yield done[future]
+        finally:
+            for future in submitted:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _run_one(self, operation, result):
+        attempt = 0
+        while True:
+            self._throttle.wait()
+            try:
+                result['result'] = operation(result['id'])
+                result['status'] = 'done'
+                break
+            except exceptions.SoftLayerError as ex:
+                if is_rate_limited(ex) and attempt < self.max_retries:
+                    self._throttle.pause(self.backoff * 2 ** attempt)
+                    attempt += 1
+                    continue
+                LOGGER.debug("Operation failed on %s: %s", result['id'], ex)
+                result['status'] = 'failed'
+                result['error'] = str(ex)
+                return
+
+        if self.checkpoint is not None:
+            self.checkpoint.mark_done(result['id'])
+
+
+class _Throttle(object):
+    """Spaces out the calls of many threads.
+
+    Calls wait while paused after the API rate limited one, and are started
+    no more than rate times per second.
+
+    :param float rate: the most calls to start per second, None for no limit
+    :param sleep: function sleeping for some seconds, defaults to time.sleep
+    """
+
+    def __init__(self, rate=None, sleep=None):
+        self.rate = rate
+        self.sleep = sleep or time.sleep
+        self._lock = threading.Lock()
+        self._paused_until = 0
+        self._next_start = 0
+
+    def pause(self, seconds):
+        """Makes every thread wait seconds before its next call."""
+        LOGGER.info("Rate limited, pausing for %ds", seconds)
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.time() + seconds)
+
+    def wait(self):
+        """Waits until the next call can start."""
+        with self._lock:
+            remaining = self._paused_until - time.time()
+        if remaining > 0:
+            self.sleep(remaining)
+
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_start)
+            self._next_start = start + 1.0 / self.rate
+        if start > now:
+            self.sleep(start - now)
@@ -11,6 +11,10 @@ import time
 
 from SoftLayer.decoration import retry
 from SoftLayer.exceptions import SoftLayerError
+from SoftLayer.managers import fetch
+from SoftLayer.managers.locations import find_region
+from SoftLayer.managers.locations import get_location_registry
+from SoftLayer.managers import metrics
 from SoftLayer.managers import ordering
 from SoftLayer.managers.ticket import TicketManager
 from SoftLayer import utils
@@ -24,6 +28,64 @@ EXTRA_CATEGORIES = ['pri_ipv6_addresses',
                     'static_ipv6_addresses',
                     'sec_ip_addresses']
 
+# Seconds the ordering package is kept before it is fetched again
+PACKAGE_TTL = 3600
+
+HARDWARE_MASK = (
+    'id,'
+    'globalIdentifier,'
+    'fullyQualifiedDomainName,'
+    'hostname,'
+    'domain,'
+    'provisionDate,'
+    'hardwareStatus,'
+    'processorPhysicalCoreAmount,'
+    'memoryCapacity,'
+    'notes,'
+    'privateNetworkOnlyFlag,'
+    'primaryBackendIpAddress,'
+    'primaryIpAddress,'
+    'networkManagementIpAddress,'
+    'userData,'
+    'datacenter,'
+    '''networkComponents[id, status, speed, maxSpeed, name,
+       ipmiMacAddress, ipmiIpAddress, macAddress, primaryIpAddress,
+       port, primarySubnet[id, netmask, broadcastAddress,
+                           networkIdentifier, gateway]],'''
+    'hardwareChassis[id,name],'
+    'activeTransaction[id, transactionStatus[friendlyName,name]],'
+    '''operatingSystem[
+        softwareLicense[softwareDescription[manufacturer,
+                                            name,
+                                            version,
+                                            referenceCode]],
+        passwords[username,password]],'''
+    '''softwareComponents[
+        softwareLicense[softwareDescription[manufacturer,
+                                            name,
+                                            version,
+                                            referenceCode]],
+        passwords[username,password]],'''
+    'billingItem['
+    'id,nextInvoiceTotalRecurringAmount,'
+    'children[nextInvoiceTotalRecurringAmount],'
+    'orderItem.order.userRecord[username]'
+    '],'
+    'hourlyBillingFlag,'
+    'tagReferences[id,tag[name,id]],'
+    'networkVlans[id,vlanNumber,networkSpace],'
+    'remoteManagementAccounts[username,password]'
+)
+
+# Extra data shown along with a server, see get_hardware_details()
+DETAIL_FRAGMENTS = {
+    'hard_drives': fetch.Fragment(
+        'hardDrives[serialNumber,hardwareComponentModel[manufacturer,name,'
+        'hardwareGenericComponentModel[capacity,units]]]',
+        lambda result: result.get('hardDrives') or []),
+    'bandwidth': fetch.BANDWIDTH_FRAGMENT,
+}
+
 
 class HardwareManager(utils.IdentifierMixin, object):
     """Manage SoftLayer hardware servers.
@@ -46,13 +108,17 @@ class HardwareManager(utils.IdentifierMixin, object):
                                               manager to handle ordering.
                                               If none is provided, one will be
                                               auto initialized.
+    :param int package_ttl: seconds the ordering package is kept between
+                            calls, see PACKAGE_TTL.
     """
+    identifier_index_keys = ('hostname', 'fullyQualifiedDomainName', 'primaryIpAddress', 'primaryBackendIpAddress')
 
-    def __init__(self, client, ordering_manager=None):
+    def __init__(self, client, ordering_manager=None, package_ttl=PACKAGE_TTL):
         self.client = client
         self.hardware = self.client['Hardware_Server']
         self.account = self.client['Account']
         self.resolvers = [self._get_ids_from_ip, self._get_ids_from_hostname]
+        self.package_cache = utils.TTLCache(ttl=package_ttl)
         if ordering_manager is None:
             self.ordering_manager = ordering.OrderingManager(client)
         else:
@@ -218,54 +284,29 @@ class HardwareManager(utils.IdentifierMixin, object):
         """
 
         if 'mask' not in kwargs:
-            kwargs['mask'] = (
-                'id,'
-                'globalIdentifier,'
-                'fullyQualifiedDomainName,'
-                'hostname,'
-                'domain,'
-                'provisionDate,'
-                'hardwareStatus,'
-                'processorPhysicalCoreAmount,'
-                'memoryCapacity,'
-                'notes,'
-                'privateNetworkOnlyFlag,'
-                'primaryBackendIpAddress,'
-                'primaryIpAddress,'
-                'networkManagementIpAddress,'
-                'userData,'
-                'datacenter,'
-                '''networkComponents[id, status, speed, maxSpeed, name,
-                   ipmiMacAddress, ipmiIpAddress, macAddress, primaryIpAddress,
-                   port, primarySubnet[id, netmask, broadcastAddress,
-                                       networkIdentifier, gateway]],'''
-                'hardwareChassis[id,name],'
-                'activeTransaction[id, transactionStatus[friendlyName,name]],'
-                '''operatingSystem[
-                    softwareLicense[softwareDescription[manufacturer,
-                                                        name,
-                                                        version,
-                                                        referenceCode]],
-                    passwords[username,password]],'''
-                '''softwareComponents[
-                    softwareLicense[softwareDescription[manufacturer,
-                                                        name,
-                                                        version,
-                                                        referenceCode]],
-                    passwords[username,password]],'''
-                'billingItem['
-                'id,nextInvoiceTotalRecurringAmount,'
-                'children[nextInvoiceTotalRecurringAmount],'
-                'orderItem.order.userRecord[username]'
-                '],'
-                'hourlyBillingFlag,'
-                'tagReferences[id,tag[name,id]],'
-                'networkVlans[id,vlanNumber,networkSpace],'
-                'remoteManagementAccounts[username,password]'
-            )
+            kwargs['mask'] = HARDWARE_MASK
 
         return self.hardware.getObject(id=hardware_id, **kwargs)
 
+    @retry(logger=LOGGER)
+    def get_hardware_details(self, hardware_id, extras=None):
+        """Get a hardware device along with the extra data needed to show its details.
+
+        The extra data is fetched in the same getObject call as the device.
+
+        :param integer hardware_id: the hardware ID
+        :param list extras: names of the extra data to fetch, defaults to both
+                            'hard_drives' and 'bandwidth'
+        :returns: A tuple of the device and a dictionary of the extra data.
+                  'bandwidth' is the same as get_bandwidth_allocation() returns.
+
+        Example::
+
+            server, extras = mgr.get_hardware_details(1234, extras=['hard_drives'])
+        """
+        return fetch.fused_get(lambda mask: self.hardware.getObject(id=hardware_id, mask=mask),
+                               HARDWARE_MASK, DETAIL_FRAGMENTS, extras)
+
     def reload(self, hardware_id, post_uri=None, ssh_keys=None):
         """Perform an OS reload of a server with its current configuration.
 
@@ -397,32 +438,30 @@ class HardwareManager(utils.IdentifierMixin, object):
                 'key': preset['keyName']
             })
 
-        # Operating systems
         operating_systems = []
+        port_speeds = []
+        extras = []
         for item in package['items']:
-            if item['itemCategory']['categoryCode'] == 'os':
+            category = item['itemCategory']['categoryCode']
+
+            # Operating systems
+            if category == 'os':
                 operating_systems.append({
                     'name': item['softwareDescription']['longDescription'],
                     'key': item['keyName']
                 })
 
-        # Port speeds
-        port_speeds = []
-        for item in package['items']:
-            if all([item['itemCategory']['categoryCode'] == 'port_speed',
-                    # Hide private options
-                    not _is_private_port_speed_item(item),
-                    # Hide unbonded options
-                    _is_bonded(item)]):
-                port_speeds.append({
-                    'name': item['description'],
-                    'key': item['capacity'],
-                })
-
-        # Extras
-        extras = []
-        for item in package['items']:
-            if item['itemCategory']['categoryCode'] in EXTRA_CATEGORIES:
+            # Port speeds
+            elif category == 'port_speed':
+                # Hide private and unbonded options
+                if not _is_private_port_speed_item(item) and _is_bonded(item):
+                    port_speeds.append({
+                        'name': item['description'],
+                        'key': item['capacity'],
+                    })
+
+            # Extras
+            elif category in EXTRA_CATEGORIES:
                 extras.append({
                     'name': item['description'],
                     'key': item['keyName']
@@ -436,9 +475,17 @@ class HardwareManager(utils.IdentifierMixin, object):
             'extras': extras,
         }
 
-    @retry(logger=LOGGER)
     def _get_package(self):
-        """Get the package related to simple hardware ordering."""
+        """Get the package related to simple hardware ordering.
+
+        The package is kept for package_ttl seconds, so creating several
+        servers only downloads it once.
+        """
+        return self.package_cache.get_or_set('BARE_METAL_SERVER', self._fetch_package)
+
+    @retry(logger=LOGGER)
+    def _fetch_package(self):
+        """Fetches the package related to simple hardware ordering."""
         mask = '''
             items[
                 keyName,
@@ -475,24 +522,25 @@ class HardwareManager(utils.IdentifierMixin, object):
         extras = extras or []
 
         package = self._get_package()
-        location = _get_location(package, location)
+        location = _get_location(package, location, get_location_registry(self.client))
+        items = _items_by_category(package['items'])
 
         prices = []
         for category in ['pri_ip_addresses',
                          'vpn_management',
                          'remote_management']:
-            prices.append(_get_default_price_id(package['items'],
+            prices.append(_get_default_price_id(items.get(category, []),
                                                 option=category,
                                                 hourly=hourly,
                                                 location=location))
 
-        prices.append(_get_os_price_id(package['items'], os,
+        prices.append(_get_os_price_id(items.get('os', []), os,
                                        location=location))
-        prices.append(_get_bandwidth_price_id(package['items'],
+        prices.append(_get_bandwidth_price_id(items.get('bandwidth', []),
                                               hourly=hourly,
                                               no_public=no_public,
                                               location=location))
-        prices.append(_get_port_speed_price_id(package['items'],
+        prices.append(_get_port_speed_price_id(items.get('port_speed', []),
                                                port_speed,
                                                no_public,
                                                location=location))
@@ -524,6 +572,14 @@ class HardwareManager(utils.IdentifierMixin, object):
 
         return order
 
+    @property
+    def batch_resolvers(self):
+        """Resolvers looking up many identifiers with one API call, see resolve_many_ids()."""
+        return utils.server_batch_resolvers(self.list_hardware, 'hardware')
+
+    def _identifier_index_records(self):
+        return self.list_hardware(mask='id, %s' % ', '.join(self.identifier_index_keys))
+
     def _get_ids_from_hostname(self, hostname):
         """Returns list of matching hardware IDs for a given hostname."""
         results = self.list_hardware(hostname=hostname, mask="id")
@@ -666,6 +722,26 @@ class HardwareManager(utils.IdentifierMixin, object):
         LOGGER.info("Waiting for %d expired.", instance_id)
         return False
 
+    def wait_for_ready_many(self, instance_ids, limit=14400, delay=10, pending=False, progress=None):
+        """Waits for many servers to be ready.
+
+        Each poll is a single SoftLayer_Account::getHardware call for all the
+        servers that are not ready yet, see utils.wait_for_ready_many().
+
+        :param list instance_ids: IDs of the servers to wait for
+        :param int limit: The maximum amount of seconds to wait.
+        :param int delay: The number of seconds to sleep before checks. Defaults to 10.
+        :param bool pending: Wait for pending transactions to finish
+        :param progress: function called after every poll with the ready and waiting IDs
+        :returns: a dict of {id: True if the server is ready}
+        """
+        def get_instances(ids):
+            _filter = {'hardware': {'id': {'operation': 'in', 'options': [{'name': 'data', 'value': ids}]}}}
+            return self.account.getHardware(mask=utils.READY_MASK, filter=_filter)
+
+        return utils.wait_for_ready_many(get_instances, instance_ids, limit, delay=delay, pending=pending,
+                                         progress=progress)
+
     def get_tracking_id(self, instance_id):
         """Returns the Metric Tracking Object Id for a hardware server
 
@@ -673,7 +749,8 @@ class HardwareManager(utils.IdentifierMixin, object):
         """
         return self.hardware.getMetricTrackingObjectId(id=instance_id)
 
-    def get_bandwidth_data(self, instance_id, start_date=None, end_date=None, direction=None, rollup=3600):
+    def get_bandwidth_data(self, instance_id, start_date=None, end_date=None, direction=None, rollup=3600,
+                           store=None):
         """Gets bandwidth data for a server
 
         Will get averaged bandwidth data for a given time period. If you use a rollup over 3600 be aware
@@ -686,11 +763,17 @@ class HardwareManager(utils.IdentifierMixin, object):
         :param date end_date: Date to finish pulling data for
         :param string direction: Can be either 'public', 'private', or None for both.
         :param int rollup: 300, 600, 1800, 3600, 43200 or 86400 seconds to average data over.
+                           Ranges of more than a month of rollups are fetched in windows, several at a time.
+        :param MetricStore store: keep the data in this local store and only download what it is missing.
         """
         tracking_id = self.get_tracking_id(instance_id)
-        data = self.client.call('Metric_Tracking_Object', 'getBandwidthData', start_date, end_date, direction,
-                                rollup, id=tracking_id, iter=True)
-        return data
+        if store is not None:
+            return store.get_bandwidth_data(self.client, tracking_id, start_date, end_date, direction, rollup)
+
+        def get_window(start, end):
+            return self.client.call('Metric_Tracking_Object', 'getBandwidthData', start, end, direction, rollup,
+                                    id=tracking_id, iter=True)
+        return metrics.WindowedFetch(get_window, rollup).run(start_date, end_date)
 
     def get_bandwidth_allocation(self, instance_id):
         """Combines getBandwidthAllotmentDetail() and getBillingCycleBandwidthUsage() """
@@ -728,6 +811,14 @@ class HardwareManager(utils.IdentifierMixin, object):
         return self.hardware.getHardDrives(id=instance_id)
 
 
+def _items_by_category(items):
+    """Groups package items by their category code, in one pass."""
+    by_category = {}
+    for item in items:
+        by_category.setdefault(utils.lookup(item, 'itemCategory', 'categoryCode'), []).append(item)
+    return by_category
+
+
 def _get_extra_price_id(items, key_name, hourly, location):
     """Returns a price id attached to item with the given key_name."""
 
@@ -875,11 +966,14 @@ def _is_bonded(item):
     return True
 
 
-def _get_location(package, location):
-    """Get the longer key with a short location name."""
-    for region in package['regions']:
-        if region['location']['location']['name'] == location:
-            return region
+def _get_location(package, location, registry=None):
+    """Get the longer key with a short location name.
+
+    :param LocationRegistry registry: used to also accept long names, IDs and region keynames
+    """
+    region = find_region(package['regions'], location, registry)
+    if region is not None:
+        return region
 
     raise SoftLayerError("Could not find valid location for: '%s'" % location)
 
@@ -0,0 +1,177 @@
+"""
+    SoftLayer.locations
+    ~~~~~~~~~~~~~~~~~~~
+    Registry of datacenters, shared by the managers that order products
+
+    :license: MIT, see LICENSE for more details.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+from SoftLayer import exceptions
+
+LOGGER = logging.getLogger(__name__)
+
+DATACENTER_MASK = 'mask[id, name, longName, regions[keyname, description], priceGroups[id, name]]'
+
+# Datacenters are rarely added, a day old list is good enough for ordering
+DEFAULT_TTL = 86400
+
+_REGISTRIES = weakref.WeakKeyDictionary()
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_location_registry(client):
+    """Returns the LocationRegistry shared by every manager using this client.
+
+    If the SL_LOCATION_CACHE environment variable is set, the registry is
+    also saved to that file, so other processes can skip loading it.
+
+    :param SoftLayer.API.BaseClient client: the client instance
+    """
+    with _REGISTRIES_LOCK:
+        registry = _REGISTRIES.get(client)
+        if registry is None:
+            registry = LocationRegistry(client, path=os.environ.get('SL_LOCATION_CACHE'))
+            _REGISTRIES[client] = registry
+        return registry
+
+
+class LocationRegistry(object):
+    """Looks up datacenters by name, long name, ID or region keyname.
+
+    Every datacenter is loaded with one SoftLayer_Location_Datacenter::getDatacenters
+    call the first time a location is looked up, and again once ttl seconds
+    have passed. Lookups are dictionary reads after that.
+
+    Example::
+
+        registry = LocationRegistry(client)
+        registry.get_datacenter_id('dal13')       # 1854895
+        registry.get_datacenter_id('DALLAS13')    # 1854895
+        registry.get_datacenter('Dallas 13')['priceGroups']
+
+    :param SoftLayer.API.BaseClient client: the client instance
+    :param int ttl: seconds before the datacenters are loaded again
+    :param str path: optional JSON file to save the datacenters to and load them from
+    :param clock: function returning the current time in seconds, defaults to time.time
+    """
+
+    def __init__(self, client, ttl=DEFAULT_TTL, path=None, clock=None):
+        self.client = client
+        self.ttl = ttl
+        self.path = path
+        self.clock = clock or time.time
+        # (datacenters, {identifier: datacenter}, loaded at)
+        self._loaded = None
+        self._lock = threading.Lock()
+
+    def list_datacenters(self):
+        """Returns every datacenter."""
+        return list(self._get_loaded()[0])
+
+    def find(self, identifier):
+        """Returns the datacenter matching identifier, or None.
+
+        :param identifier: datacenter ID, name (dal13), long name (Dallas 13)
+                           or region keyname (DALLAS13), not case sensitive
+        """
+        return self._get_loaded()[1].get(_key(identifier))
+
+    def get_datacenter(self, identifier):
+        """Returns the datacenter matching identifier, see find().
+
+        :raises SoftLayerError: if no datacenter matches
+        """
+        datacenter = self.find(identifier)
+        if datacenter is None:
+            raise exceptions.SoftLayerError("Unable to find location: %s" % identifier)
+        return datacenter
+
+    def get_datacenter_id(self, identifier):
+        """Returns the ID of the datacenter matching identifier, see find()."""
+        return self.get_datacenter(identifier)['id']
+
+    def get_price_group_ids(self, identifier):
+        """Returns the IDs of the price groups of the datacenter matching identifier."""
+        return [group['id'] for group in self.get_datacenter(identifier).get('priceGroups') or []]
+
+    def refresh(self):
+        """Loads the datacenters from the API, even if they have not expired."""
+        with self._lock:
+            self._load(self.client['Location_Datacenter'].getDatacenters(mask=DATACENTER_MASK), self.clock())
+            self._save()
+
+    def _get_loaded(self):
+        with self._lock:
+            if self._loaded is None or self.clock() - self._loaded[2] >= self.ttl:
+                if not self._load_file():
+                    self._load(self.client['Location_Datacenter'].getDatacenters(mask=DATACENTER_MASK),
+                               self.clock())
+                    self._save()
+            return self._loaded
+
+    def _load(self, datacenters, loaded_at):
+        index = {}
+        for datacenter in datacenters:
+            keys = [datacenter.get('id'), datacenter.get('name'), datacenter.get('longName')]
+            keys.extend(region.get('keyname') for region in datacenter.get('regions') or [])
+            for key in keys:
+                if key is not None:
+                    index.setdefault(_key(key), datacenter)
+        self._loaded = (datacenters, index, loaded_at)
+
+    def _load_file(self):
+        """Loads the datacenters saved in path, if they have not expired."""
+        if not self.path:
+            return False
+        try:
+            with open(self.path) as cache_file:
+                saved = json.load(cache_file)
+            if self.clock() - saved['loadedAt'] >= self.ttl:
+                return False
+            self._load(saved['datacenters'], saved['loadedAt'])
+        except (IOError, OSError, ValueError, KeyError, TypeError) as ex:
+            LOGGER.debug("Ignoring location cache %s: %s", self.path, ex)
+            return False
+        return True
+
+    def _save(self):
+        if not self.path:
+            return
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w') as cache_file:
+                json.dump({'loadedAt': self._loaded[2], 'datacenters': self._loaded[0]}, cache_file)
+            os.replace(temp_path, self.path)
+        except (IOError, OSError) as ex:
+            LOGGER.debug("Unable to save location cache %s: %s", self.path, ex)
+
+
+def _key(identifier):
+    return str(identifier).strip().lower()
+
+
+def find_region(regions, location, registry=None):
+    """Returns the package region of a datacenter, or None.
+
+    Regions, as returned by Product_Package::getRegions, are matched by
+    datacenter name. If none matches and a registry is given, location is
+    resolved with it first, so long names, IDs and region keynames work too.
+
+    :param list regions: package regions with location[location[name]]
+    :param location: the datacenter to find
+    :param LocationRegistry registry: registry to resolve other identifiers with
+    """
+    by_name = dict((region['location']['location']['name'], region) for region in regions)
+    if location in by_name:
+        return by_name[location]
+    if registry is not None:
+        datacenter = registry.find(location)
+        if datacenter is not None:
+            return by_name.get(datacenter['name'])
+    return None
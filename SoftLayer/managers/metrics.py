@@ -0,0 +1,360 @@
+"""
+    SoftLayer.metrics
+    ~~~~~~~~~~~~~~~~~
+    Fetches Metric_Tracking_Object data in windows and keeps it in a local store
+
+    :license: MIT, see LICENSE for more details.
+"""
+import calendar
+from concurrent import futures
+import datetime
+import json
+import os
+import re
+import threading
+import time
+
+from SoftLayer import exceptions
+from SoftLayer import utils
+
+# Bump when the tables change, an older store is then emptied
+FORMAT_VERSION = 1
+
+DEFAULT_METRICS_PATH = os.path.join(os.path.expanduser('~'), '.softlayer_metrics.db')
+
+# Data this recent may still change, it is kept but fetched again next time
+SETTLE_SECONDS = 3600
+
+# Ranges longer than this many rollup periods are fetched in windows, a month of five minute data
+WINDOW_PERIODS = 8640
+
+# Windows never get smaller than a day of five minute data
+MIN_WINDOW_PERIODS = 288
+
+# Windows are halved after one that took longer or returned more points than this
+WINDOW_TARGET_SECONDS = 20
+WINDOW_MAX_POINTS = 50000
+
+WINDOW_WORKERS = 4
+
+DATE_REGEX = re.compile(r'^\s*(\d{4})-(\d{1,2})-(\d{1,2})'
+                        r'(?:[T ](\d{1,2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?)?'
+                        r'\s*(Z|[+-]\d{2}:?\d{2})?\s*$')
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS series (
+        id INTEGER PRIMARY KEY, tracking_id INTEGER NOT NULL, query TEXT NOT NULL, rollup INTEGER NOT NULL,
+        UNIQUE (tracking_id, query, rollup))''',
+    'CREATE TABLE IF NOT EXISTS ranges (series_id INTEGER NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS ranges_series ON ranges (series_id)',
+    '''CREATE TABLE IF NOT EXISTS points (
+        series_id INTEGER NOT NULL, type TEXT NOT NULL, epoch INTEGER NOT NULL,
+        utc_offset INTEGER NOT NULL, counter REAL,
+        PRIMARY KEY (series_id, epoch, type)) WITHOUT ROWID''',
+]
+
+
+def default_metrics_path():
+    """The store file, SL_METRICS_DB or ~/.softlayer_metrics.db."""
+    return os.environ.get('SL_METRICS_DB') or DEFAULT_METRICS_PATH
+
+
+def parse_time(value):
+    """Returns the epoch and UTC offset in minutes of a date.
+
+    Dates are datetime objects or strings like YYYY-MM-DD, YYYY-MM-DDTHH:mm:ss
+    and YYYY-MM-DDTHH:mm:ss.00000-HH:mm. Dates without a timezone are UTC.
+    """
+    if isinstance(value, datetime.datetime):
+        offset = value.utcoffset()
+        offset = int(offset.total_seconds() // 60) if offset else 0
+        return calendar.timegm(value.replace(tzinfo=None).timetuple()) - offset * 60, offset
+
+    match = DATE_REGEX.match(value or '')
+    if not match:
+        raise exceptions.SoftLayerError("Unable to read the date %r, use YYYY-MM-DD or YYYY-MM-DDTHH:mm:ss" % value)
+    year, month, day, hour, minute, second, zone = match.groups()
+    try:
+        date = datetime.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError as ex:
+        raise exceptions.SoftLayerError("Unable to read the date %r: %s" % (value, ex))
+
+    offset = 0
+    if zone and zone != 'Z':
+        zone = zone.replace(':', '')
+        offset = (int(zone[1:3]) * 60 + int(zone[3:5])) * (-1 if zone[0] == '-' else 1)
+    return calendar.timegm(date.timetuple()) - offset * 60, offset
+
+
+def _has_zone(value):
+    if isinstance(value, datetime.datetime):
+        return value.utcoffset() is not None
+    return DATE_REGEX.match(value).group(7) is not None
+
+
+def format_time(epoch, offset=0):
+    """Formats an epoch like the dateTime of Metric_Tracking_Object data, in the given UTC offset."""
+    date = datetime.datetime.utcfromtimestamp(epoch + offset * 60)
+    sign = '-' if offset < 0 else '+'
+    return '%s%s%02d:%02d' % (date.strftime('%Y-%m-%dT%H:%M:%S'), sign, abs(offset) // 60, abs(offset) % 60)
+
+
+def _api_time(epoch):
+    """Formats an epoch the way getBandwidthData and getSummaryData read it."""
+    return datetime.datetime.utcfromtimestamp(epoch).strftime('%Y-%m-%dT%H:%M:%S.00000+00:00')
+
+
+def missing_ranges(covered, start, end):
+    """Returns the parts of [start, end) that are not in the sorted, merged covered ranges."""
+    missing = []
+    for range_start, range_end in covered:
+        if range_end <= start:
+            continue
+        if range_start >= end:
+            break
+        if range_start > start:
+            missing.append((start, range_start))
+        start = max(start, range_end)
+    if start < end:
+        missing.append((start, end))
+    return missing
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for range_start, range_end in sorted(ranges):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    return merged
+
+
+class WindowedFetch(object):
+    """Fetches a long range of metric data in windows, several at a time.
+
+    The range is split at multiples of the rollup, in the timezone of the
+    start date (dates without a timezone stay without one, so the API reads
+    them as it always did). The first window starts at start_date and the
+    last one ends at end_date. Windows start with `periods` rollup periods,
+    are halved after a window that was slow or large and doubled again
+    after one that was quick and small. Ranges that fit in one window, and
+    dates that can not be read, are fetched with a single call.
+
+    Example::
+
+        def fetch(start, end):
+            return client.call('Metric_Tracking_Object', 'getBandwidthData', start, end, None, 300, id=tracking_id)
+        data = WindowedFetch(fetch, 300).run('2019-01-01', '2019-04-01')
+
+    :param fetch: function(start, end) returning the data points of a window
+    :param int rollup: seconds per data point
+    :param int max_workers: how many windows to fetch at the same time
+    :param int periods: rollup periods in the first window
+    """
+
+    def __init__(self, fetch, rollup, max_workers=WINDOW_WORKERS, periods=WINDOW_PERIODS, clock=time.time):
+        self.fetch = fetch
+        self.rollup = rollup
+        self.max_workers = max_workers
+        self.periods = periods
+        self.clock = clock
+
+    def run(self, start_date, end_date):
+        """Returns the data points of the range, ordered like the windows and without duplicates."""
+        try:
+            start, offset = parse_time(start_date)
+            end = parse_time(end_date)[0]
+        except (exceptions.SoftLayerError, TypeError):
+            return list(self.fetch(start_date, end_date))
+        if not self.rollup or (end - start) // self.rollup <= self.periods:
+            return list(self.fetch(start_date, end_date))
+
+        suffix = ''
+        if _has_zone(start_date):
+            suffix = format_time(0, offset)[19:]
+        windows = self._windows(start + offset * 60, end + offset * 60, start_date, end_date,
+                                lambda wall: datetime.datetime.utcfromtimestamp(wall).strftime(
+                                    '%Y-%m-%dT%H:%M:%S') + suffix)
+
+        results = {}
+        with futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            try:
+                while True:
+                    for window in windows:
+                        pending[executor.submit(self._timed_fetch, window[1], window[2])] = window[0]
+                        if len(pending) >= self.max_workers:
+                            break
+                    if not pending:
+                        break
+                    done = futures.wait(pending, return_when=futures.FIRST_COMPLETED)[0]
+                    for future in done:
+                        window_start = pending.pop(future)
+                        data, elapsed = future.result()
+                        results[window_start] = data
+                        self._adapt(len(data), elapsed)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        seen = set()
+        stitched = []
+        for window_start in sorted(results):
+            for point in results[window_start]:
+                key = (point.get('dateTime'), point.get('type'))
+                if key not in seen:
+                    seen.add(key)
+                    stitched.append(point)
+        return stitched
+
+    def _windows(self, start, end, start_date, end_date, label):
+        """Yields (start, start label, end label) windows, sized by self.periods when they are yielded."""
+        window_start = start
+        while True:
+            window_end = (window_start // self.rollup + self.periods) * self.rollup
+            first = start_date if window_start == start else label(window_start)
+            if window_end > end:
+                yield window_start, first, end_date
+                return
+            yield window_start, first, label(window_end - 1)
+            window_start = window_end
+
+    def _timed_fetch(self, start, end):
+        began = self.clock()
+        data = list(self.fetch(start, end))
+        return data, self.clock() - began
+
+    def _adapt(self, points, elapsed):
+        if elapsed > WINDOW_TARGET_SECONDS or points > WINDOW_MAX_POINTS:
+            self.periods = max(self.periods // 2, MIN_WINDOW_PERIODS)
+        elif elapsed < WINDOW_TARGET_SECONDS / 4.0 and points < WINDOW_MAX_POINTS / 4:
+            self.periods = min(self.periods * 2, WINDOW_PERIODS * 4)
+
+
+class MetricStore(utils.SQLiteStore):
+    """A local copy of metric data, so only new time ranges are downloaded.
+
+    Data points are kept in a SQLite file per tracking object, query (the
+    bandwidth direction or summary types) and rollup, with the time ranges
+    that were downloaded. Asking for a range again only calls the API for
+    the parts of it the store does not have, a range that was fully
+    downloaded is answered without calling the API.
+
+    The store is safe to use from several threads.
+
+    Example::
+
+        store = MetricStore()
+        data = store.get_bandwidth_data(client, tracking_id, '2019-05-01', '2019-06-01')
+
+    :param str path: the SQLite file, defaults to default_metrics_path()
+    """
+
+    schema = SCHEMA
+    tables = ('series', 'ranges', 'points')
+    format_version = FORMAT_VERSION
+    check_same_thread = False
+
+    def __init__(self, path=None):
+        super().__init__(path or default_metrics_path())
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Closes the SQLite file."""
+        with self._lock:
+            super().close()
+
+    def get_bandwidth_data(self, client, tracking_id, start_date, end_date, direction=None, rollup=3600):
+        """Metric_Tracking_Object::getBandwidthData, downloading only what the store is missing.
+
+        :param int tracking_id: the metric tracking object id
+        :param start_date: date to start pulling data for
+        :param end_date: date to finish pulling data for
+        :param string direction: 'public', 'private', or None for both
+        :param int rollup: 300, 600, 1800, 3600, 43200 or 86400 seconds to average data over
+        """
+        def fetch(start, end):
+            return client.call('Metric_Tracking_Object', 'getBandwidthData', start, end, direction, rollup,
+                               id=tracking_id, iter=True)
+        return self.get_data(tracking_id, 'bandwidth:%s' % (direction or 'all'), rollup,
+                             start_date, end_date, fetch)
+
+    def get_summary_data(self, client, tracking_id, start_date, end_date, types, rollup=3600):
+        """Metric_Tracking_Object::getSummaryData, downloading only what the store is missing.
+
+        :param int tracking_id: the metric tracking object id
+        :param start_date: date to start pulling data for
+        :param end_date: date to finish pulling data for
+        :param list types: the Container_Metric_Data_Type objects to get
+        :param int rollup: 300, 600, 1800, 3600, 43200 or 86400 seconds to summarize data over
+        """
+        def fetch(start, end):
+            return client.call('Metric_Tracking_Object', 'getSummaryData', start, end, types, rollup,
+                               id=tracking_id, iter=True)
+        return self.get_data(tracking_id, 'summary:%s' % json.dumps(types, sort_keys=True), rollup,
+                             start_date, end_date, fetch)
+
+    def get_data(self, tracking_id, query, rollup, start_date, end_date, fetch):
+        """Returns the data points of a range, calling fetch(start, end) for the parts not in the store.
+
+        The range is aligned to the rollup, covering every period that starts
+        between start_date and end_date.
+        """
+        start = parse_time(start_date)[0] // rollup * rollup
+        end = parse_time(end_date)[0] // rollup * rollup + rollup
+        for missing_start, missing_end in self.missing(tracking_id, query, rollup, start, end):
+            data = WindowedFetch(fetch, rollup).run(_api_time(missing_start), _api_time(missing_end - 1))
+            self.save(tracking_id, query, rollup, missing_start, missing_end, data)
+        return self.points(tracking_id, query, rollup, start, end)
+
+    def missing(self, tracking_id, query, rollup, start, end):
+        """Returns the (start, end) epoch ranges of [start, end) that were not downloaded yet."""
+        with self._lock:
+            series_id = self._series_id(tracking_id, query, rollup)
+            covered = self.connection.execute(
+                'SELECT start, end FROM ranges WHERE series_id = ? ORDER BY start', (series_id,)).fetchall()
+        return missing_ranges(covered, start, end)
+
+    def save(self, tracking_id, query, rollup, start, end, data):
+        """Stores the data points downloaded for [start, end).
+
+        Periods that are not over yet are stored, but not marked as downloaded.
+        """
+        rows = []
+        for point in data:
+            epoch, offset = parse_time(point['dateTime'])
+            rows.append((point['type'], epoch, offset, point['counter']))
+        settled = int(time.time() - SETTLE_SECONDS) // rollup * rollup
+        end = min(end, settled)
+
+        with self._lock, self.connection as connection:
+            series_id = self._series_id(tracking_id, query, rollup)
+            connection.executemany('INSERT OR REPLACE INTO points VALUES (%d, ?, ?, ?, ?)' % series_id, rows)
+            if start < end:
+                ranges = connection.execute('SELECT start, end FROM ranges WHERE series_id = ?',
+                                            (series_id,)).fetchall()
+                connection.execute('DELETE FROM ranges WHERE series_id = ?', (series_id,))
+                connection.executemany('INSERT INTO ranges VALUES (%d, ?, ?)' % series_id,
+                                       _merge_ranges(ranges + [(start, end)]))
+
+    def points(self, tracking_id, query, rollup, start, end):
+        """Returns the stored data points of [start, end), ordered by time."""
+        with self._lock:
+            series_id = self._series_id(tracking_id, query, rollup)
+            rows = self.connection.execute(
+                'SELECT type, epoch, utc_offset, counter FROM points '
+                'WHERE series_id = ? AND epoch >= ? AND epoch < ? ORDER BY epoch, type',
+                (series_id, start, end)).fetchall()
+        return [{'dateTime': format_time(epoch, offset), 'type': data_type, 'counter': counter}
+                for data_type, epoch, offset, counter in rows]
+
+    def _series_id(self, tracking_id, query, rollup):
+        key = (int(tracking_id), query, int(rollup))
+        row = self.connection.execute(
+            'SELECT id FROM series WHERE tracking_id = ? AND query = ? AND rollup = ?', key).fetchone()
+        if row:
+            return row[0]
+        with self.connection as connection:
+            return connection.execute('INSERT INTO series (tracking_id, query, rollup) VALUES (?, ?, ?)',
+                                      key).lastrowid
@@ -70,6 +70,7 @@ class NetworkManager(object):
         self.subnet = client['Network_Subnet']
         self.network_storage = self.client['Network_Storage']
         self.security_group = self.client['Network_SecurityGroup']
+        self.identifier_indexes = {}
 
     def add_global_ip(self, version=4, test_order=False):
         """Adds a global IP address to the account.
@@ -628,11 +629,50 @@ class NetworkManager(object):
     def resolve_subnet_ids(self, identifier):
         """Resolve subnet ids."""
         return utils.resolve_ids(identifier,
-                                 [self._list_subnets_by_identifier])
+                                 self._indexed('subnet', [self._list_subnets_by_identifier]))
 
     def resolve_vlan_ids(self, identifier):
         """Resolve VLAN ids."""
-        return utils.resolve_ids(identifier, [self._list_vlans_by_name])
+        return utils.resolve_ids(identifier, self._indexed('vlan', [self._list_vlans_by_name]))
+
+    def resolve_many_subnet_ids(self, identifiers):
+        """Resolve the ids of many subnets with a single API call.
+
+        :param list identifiers: subnet IDs or network identifiers, like 10.0.0.0/24
+        :returns: an OrderedDict of identifier to its list of matching ids
+        """
+        return utils.resolve_many_ids(identifiers,
+                                      self._indexed('subnet', [self._list_subnets_by_identifiers], many=True))
+
+    def resolve_many_vlan_ids(self, identifiers):
+        """Resolve the ids of many VLANs with a single API call.
+
+        :param list identifiers: VLAN IDs or names
+        :returns: an OrderedDict of identifier to its list of matching ids
+        """
+        return utils.resolve_many_ids(identifiers, self._indexed('vlan', [self._list_vlans_by_names], many=True))
+
+    def enable_identifier_index(self, ttl=utils.IDENTIFIER_INDEX_TTL):
+        """Resolves subnets and VLANs from in-memory indexes of the account.
+
+        The subnets and VLANs are each listed with one API call the first
+        time one is resolved, and listed again once the index is ttl seconds
+        old. Identifiers missing from an index are still looked up with the API.
+
+        :param int ttl: seconds the indexes are kept
+        """
+        self.identifier_indexes = {
+            'subnet': utils.IdentifierIndex(self._list_subnet_identifiers,
+                                            ['networkIdentifier', 'identifier'], ttl=ttl),
+            'vlan': utils.IdentifierIndex(lambda: self.list_vlans(mask='id, name'), ['name'], ttl=ttl),
+        }
+
+    def _indexed(self, kind, resolvers, many=False):
+        """Puts the index of kind, if enabled, in front of resolvers."""
+        index = self.identifier_indexes.get(kind)
+        if index is None:
+            return resolvers
+        return [index.lookup_many if many else index.lookup] + resolvers
 
     def summary_by_datacenter(self):
         """Summary of the networks on the account, grouped by data center.
@@ -708,6 +748,26 @@ class NetworkManager(object):
         results = self.list_vlans(name=name, mask='id')
         return [result['id'] for result in results]
 
+    def _list_subnets_by_identifiers(self, identifiers):
+        """Returns a dict of identifier to the IDs of the matching subnets.
+
+        :param list identifiers: network identifiers, with or without the cidr
+        """
+        networks = dict((identifier, identifier.split('/', 1)[0]) for identifier in identifiers)
+        found = utils.find_ids(self.list_subnets, 'subnets', ['networkIdentifier'], sorted(set(networks.values())))
+        return dict((identifier, found[network]) for identifier, network in networks.items() if network in found)
+
+    def _list_vlans_by_names(self, names):
+        """Returns a dict of VLAN name to the IDs of the matching VLANs."""
+        return utils.find_ids(self.list_vlans, 'networkVlans', ['name'], names)
+
+    def _list_subnet_identifiers(self):
+        """Lists the subnets, with identifier set to their network identifier and cidr."""
+        subnets = list(self.list_subnets(mask='id, networkIdentifier, cidr'))
+        for subnet in subnets:
+            subnet['identifier'] = '%s/%s' % (subnet.get('networkIdentifier'), subnet.get('cidr'))
+        return subnets
+
     def get_nas_credentials(self, identifier, **kwargs):
         """Returns a list of IDs of VLANs which match the given VLAN name.
 
@@ -7,9 +7,12 @@
 """
 # pylint: disable=no-self-use
 
-from re import match
+import bisect
+import heapq
 
 from SoftLayer import exceptions
+from SoftLayer.managers import locations
+from SoftLayer import utils
 
 
 CATEGORY_MASK = '''id,
@@ -23,19 +26,246 @@ PACKAGE_MASK = '''id, name, keyName, isActive, type'''
 
 PRESET_MASK = '''id, name, keyName, description'''
 
+PRICE_ID_ITEM_MASK = 'id, description, capacity, itemCategory, keyName, prices[categories]'
 
-class OrderingManager(object):
+PRICE_GROUP_REGION_MASK = 'keyname, locations[location[id, name, priceGroups[id]]]'
+
+
+class PackageIndex(object):
+    """Lookup tables for resolving item keynames of a package to price IDs.
+
+    Built once from the items of a package, so resolving an order doesn't
+    scan the whole catalog for every item. Prices tables of an item are only
+    built the first time the item is looked up.
+
+    :param list items: the package items, with at least the properties in
+                       PRICE_ID_ITEM_MASK
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.items_by_keyname = {}
+        self.items_by_category = {}
+        self._price_tables = {}
+        self._price_ids = {}
+        self._prices_by_id = None
+        self._location_prices = {}
+
+        for item in items:
+            # The first item wins when several share a keyName
+            self.items_by_keyname.setdefault(item.get('keyName'), item)
+            category = (item.get('itemCategory') or {}).get('categoryCode')
+            self.items_by_category.setdefault(category, []).append(item)
+
+    def get_item(self, keyname):
+        """Returns the item with the given keyName, or None."""
+        return self.items_by_keyname.get(keyname)
+
+    def get_items_by_category(self, category_code):
+        """Returns the items of the given category code."""
+        return self.items_by_category.get(category_code, [])
+
+    def get_item_capacity(self, item_keynames):
+        """Same as OrderingManager.get_item_capacity() for the items of this package."""
+        item_capacity = None
+        for item_keyname in item_keynames:
+            item = self.items_by_keyname.get(item_keyname)
+            if item is None:
+                continue
+            if "CORE" in item_keyname or "TIER" in item_keyname:
+                item_capacity = item['capacity']
+            elif "INTEL" in item_keyname:
+                item_capacity = item['description'].split("(")[1].split(" ")[0]
+        return item_capacity
+
+    def get_item_price_id(self, keyname, core=None):
+        """Returns the generic price ID of an item for the given capacity.
+
+        Gives the same result as OrderingManager.get_item_price_id(core, item['prices']).
+
+        :param str keyname: keyName of the item
+        :param core: capacity to check the capacity restrictions of prices against
+        """
+        key = (keyname, core)
+        if key not in self._price_ids:
+            self._price_ids[key] = self._price_table(keyname).price_id(core)
+        return self._price_ids[key]
+
+    def get_category_price_id(self, keyname, category_code):
+        """Returns the ID of the first generic price of an item in the given category, or None."""
+        return self._price_table(keyname).by_category.get(category_code)
+
+    def get_price(self, price_id):
+        """Returns a tuple of the item and the price with the given price ID, or None."""
+        if self._prices_by_id is None:
+            self._prices_by_id = {}
+            for item in self.items:
+                for price in item.get('prices') or []:
+                    self._prices_by_id.setdefault(price['id'], (item, price))
+        return self._prices_by_id.get(price_id)
+
+    def get_location_price(self, price_id, price_group_ids):
+        """Returns the price a generic price is replaced with in a location.
+
+        Locations with different rates have prices of their own in one of the
+        location's price groups, with the same capacity restriction as the
+        generic price. Returns the generic price if there is no such price.
+
+        :param int price_id: ID of a generic price, as returned by get_item_price_id()
+        :param list price_group_ids: IDs of the price groups of the location
+        """
+        key = (price_id, tuple(price_group_ids))
+        if key not in self._location_prices:
+            item, generic = self.get_price(price_id)
+            price = generic
+            for candidate in item.get('prices') or []:
+                if (candidate.get('locationGroupId') in price_group_ids and
+                        _restriction(candidate) == _restriction(generic)):
+                    price = candidate
+                    break
+            self._location_prices[key] = price
+        return self._location_prices[key]
+
+    def _price_table(self, keyname):
+        table = self._price_tables.get(keyname)
+        if table is None:
+            table = _PriceTable(self.items_by_keyname[keyname].get('prices') or [])
+            self._price_tables[keyname] = table
+        return table
+
+
+class _PriceTable(object):
+    """The generic prices of an item, with their capacity restrictions sorted by minimum."""
+
+    def __init__(self, prices):
+        self.last_id = None
+        self.unrestricted = (-1, None)
+        self.by_category = {}
+        restricted = []
+
+        generic = [price for price in prices if not price['locationGroupId']]
+        for position, price in enumerate(generic):
+            self.last_id = price['id']
+            for category in (price.get('categories') or [])[:1]:
+                self.by_category.setdefault(category.get('categoryCode'), price['id'])
+
+            capacity_min = int(price.get('capacityRestrictionMinimum', -1))
+            if capacity_min == -1:
+                self.unrestricted = (position, price['id'])
+                continue
+            restriction_type = price.get('capacityRestrictionType') or ''
+            if 'STORAGE' in restriction_type or 'CORE' in restriction_type:
+                capacity_max = int(price.get('capacityRestrictionMaximum', -1))
+                restricted.append((capacity_min, capacity_max, position, price['id']))
+
+        restricted.sort()
+        self.minimums = [entry[0] for entry in restricted]
+        self.restricted = restricted
+
+    def price_id(self, core):
+        """The last generic price that is unrestricted or whose restriction includes core."""
+        if core is None:
+            return self.last_id
+        if not self.restricted:
+            return self.unrestricted[1]
+
+        core = int(core)
+        best = self.unrestricted
+        for _, capacity_max, position, price_id in self.restricted[:bisect.bisect_right(self.minimums, core)]:
+            if core <= capacity_max and position > best[0]:
+                best = (position, price_id)
+        return best[1]
+
+
+def _restriction(price):
+    return (price.get('capacityRestrictionType'), price.get('capacityRestrictionMinimum'),
+            price.get('capacityRestrictionMaximum'))
+
+
+class PriceCalculator(object):
+    """Computes the cost of orders in a location without calling verifyOrder.
+
+    The cost of each price is worked out once, so pricing many candidate
+    orders for the same package and location is a sum of lookups.
+
+    :param PackageIndex index: the items of the package, including their fees
+    :param list price_group_ids: IDs of the price groups of the location
+    """
+
+    def __init__(self, index, price_group_ids=None):
+        self.index = index
+        self.price_group_ids = list(price_group_ids or [])
+        self._costs = {}
+
+    def get_price_cost(self, price_id):
+        """Returns the cost of a generic price in the location.
+
+        :returns: a dict with the keyName of the item, the priceId used in the
+                  location and its hourly, monthly and setup fees
+        """
+        cost = self._costs.get(price_id)
+        if cost is None:
+            if self.index.get_price(price_id) is None:
+                raise exceptions.SoftLayerError("Price {} does not exist in the package".format(price_id))
+            item = self.index.get_price(price_id)[0]
+            price = self.index.get_location_price(price_id, self.price_group_ids)
+            cost = {'keyName': item.get('keyName'),
+                    'priceId': price['id'],
+                    'hourly': _fee(price, 'hourlyRecurringFee'),
+                    'monthly': _fee(price, 'recurringFee'),
+                    'setup': _fee(price, 'setupFee')}
+            self._costs[price_id] = cost
+        return cost
+
+    def get_order_cost(self, price_ids):
+        """Returns the hourly, monthly and setup totals of a list of generic price IDs."""
+        hourly = monthly = setup = 0.0
+        for price_id in price_ids:
+            cost = self.get_price_cost(price_id)
+            hourly += cost['hourly']
+            monthly += cost['monthly']
+            setup += cost['setup']
+        return {'hourly': round(hourly, 6), 'monthly': round(monthly, 6), 'setup': round(setup, 6)}
+
+
+def _fee(price, key):
+    try:
+        return float(price.get(key) or 0)
+    except ValueError:
+        return 0.0
+
+
+# The service handles, the catalog snapshot settings and the package index
+# cache are all state of the manager itself.
+class OrderingManager(object):  # pylint: disable=too-many-instance-attributes
     """Manager to help ordering via the SoftLayer API.
 
     :param SoftLayer.API.BaseClient client: the client instance
+    :param SoftLayer.managers.catalog.CatalogSnapshot catalog: if given, packages in this
+        snapshot are read from it instead of the API
+    :param bool offline: raise a SoftLayerError for packages missing from the
+        catalog snapshot, instead of reading them from the API
     """
 
-    def __init__(self, client):
+    def __init__(self, client, catalog=None, offline=False):
         self.client = client
+        self.catalog = catalog
+        self.offline = offline
         self.package_svc = client['Product_Package']
         self.order_svc = client['Product_Order']
         self.billing_svc = client['Billing_Order']
         self.package_preset = client['Product_Package_Preset']
+        self.package_indexes = {}
+
+    def _get_snapshot_package(self, package_keyname):
+        """Returns the package from the catalog snapshot, or None to use the API."""
+        if self.catalog is None:
+            return None
+        package = self.catalog.get_package(package_keyname)
+        if package is None and self.offline:
+            raise exceptions.SoftLayerError("Package {} is not in the catalog snapshot {}, sync it first".format(
+                package_keyname, self.catalog.path))
+        return package
 
     def get_packages_of_type(self, package_types, mask=None):
         """Get packages that match a certain type.
@@ -237,6 +467,10 @@ class OrderingManager(object):
         :param package_keyname: string representing the package key name we are interested in.
         :param string mask: Mask to specify the properties we want to retrieve
         """
+        package = self._get_snapshot_package(package_keyname)
+        if package is not None:
+            return package
+
         _filter = {'keyName': {'operation': package_keyname}}
 
         packages = self.package_svc.getAllObjects(mask=mask, filter=_filter)
@@ -256,6 +490,10 @@ class OrderingManager(object):
         if 'filter' in kwargs:
             kwargs['filter'] = kwargs['filter']
 
+        package = self._get_snapshot_package(package_keyname)
+        if package is not None:
+            return utils.filter_results(package['categories'], (kwargs.get('filter') or {}).get('configuration'))
+
         package = self.get_package_by_key(package_keyname, mask='id')
         categories = self.package_svc.getConfiguration(id=package['id'], **kwargs)
         return categories
@@ -270,6 +508,10 @@ class OrderingManager(object):
         if 'mask' not in kwargs:
             kwargs['mask'] = ITEM_MASK
 
+        package = self._get_snapshot_package(package_keyname)
+        if package is not None:
+            return utils.filter_results(package['items'], (kwargs.get('filter') or {}).get('items'))
+
         package = self.get_package_by_key(package_keyname, mask='id')
         items = self.package_svc.getItems(id=package['id'], **kwargs)
         return items
@@ -285,7 +527,13 @@ class OrderingManager(object):
         if 'filter' in kwargs:
             kwargs['filter'] = kwargs['filter']
 
-        packages = self.package_svc.getAllObjects(**kwargs)
+        if self.catalog is not None and self.catalog.list_packages():
+            packages = utils.filter_results(self.catalog.list_packages(), kwargs.get('filter'))
+        elif self.catalog is not None and self.offline:
+            raise exceptions.SoftLayerError("The catalog snapshot {} is empty, sync it first".format(
+                self.catalog.path))
+        else:
+            packages = self.package_svc.getAllObjects(**kwargs)
 
         return [package for package in packages if package['isActive']]
 
@@ -302,6 +550,14 @@ class OrderingManager(object):
         if 'filter' in kwargs:
             kwargs['filter'] = kwargs['filter']
 
+        package = self._get_snapshot_package(package_keyname)
+        if package is not None:
+            _filter = kwargs.get('filter') or {}
+            active_presets = utils.filter_results(package['activePresets'], _filter.get('activePresets'))
+            acc_presets = utils.filter_results(package['accountRestrictedActivePresets'],
+                                               _filter.get('accountRestrictedActivePresets'))
+            return active_presets + acc_presets
+
         package = self.get_package_by_key(package_keyname, mask='id')
         acc_presets = self.package_svc.getAccountRestrictedActivePresets(id=package['id'], **kwargs)
         active_presets = self.package_svc.getActivePresets(id=package['id'], **kwargs)
@@ -332,6 +588,113 @@ class OrderingManager(object):
 
         return presets[0]
 
+    def get_package_index(self, package_keyname, refresh=False):
+        """Returns a PackageIndex of the items of a package.
+
+        The index is built once per package and kept on this manager, so
+        resolving several orders for the same package only fetches its items once.
+
+        :param str package_keyname: The package to index
+        :param bool refresh: fetch the items again even if the package is already indexed
+        """
+        if refresh or package_keyname not in self.package_indexes:
+            items = self.list_items(package_keyname, mask=PRICE_ID_ITEM_MASK)
+            self.package_indexes[package_keyname] = PackageIndex(items)
+        return self.package_indexes[package_keyname]
+
+    def get_price_calculator(self, package_keyname, location):
+        """Returns a PriceCalculator for a package in a location.
+
+        :param str package_keyname: The package to price orders of
+        :param str location: Region Keyname (DALLAS13) or datacenter name (dal13)
+        """
+        return PriceCalculator(self.get_package_index(package_keyname),
+                               self.get_location_price_group_ids(package_keyname, location))
+
+    def get_location_price_group_ids(self, package_keyname, location):
+        """Returns the IDs of the price groups a package location belongs to.
+
+        :param str package_keyname: The package the location is used with
+        :param str location: Region Keyname (DALLAS13) or datacenter name (dal13)
+        """
+        package = self._get_snapshot_package(package_keyname)
+        if package is not None:
+            regions = package['regions']
+        else:
+            package = self.get_package_by_key(package_keyname, mask='id')
+            regions = self.package_svc.getRegions(id=package['id'], mask=PRICE_GROUP_REGION_MASK)
+
+        location = location.lower()
+        for region in regions:
+            datacenters = [datacenter.get('location') or {} for datacenter in region.get('locations') or []]
+            names = [str(datacenter.get('name')).lower() for datacenter in datacenters]
+            if location == str(region.get('keyname')).lower() or location in names:
+                return [group['id'] for datacenter in datacenters for group in datacenter.get('priceGroups') or []]
+        raise exceptions.SoftLayerError("Unable to find location {} for package {}".format(location, package_keyname))
+
+    def price_order(self, package_keyname, location, item_keynames, preset_keyname=None):
+        """Computes the cost of an order from the package prices, without verifyOrder.
+
+        Prices are picked like generate_order() does, then replaced by the
+        prices of the location where it has different rates. Taxes, discounts
+        and promotions are not included, verify_order() gives the exact cost.
+
+        :param str package_keyname: The keyname for the package being ordered
+        :param str location: The datacenter location string for ordering (Ex: DALLAS13)
+        :param list item_keynames: The list of item keyname strings to order
+        :param string preset_keyname: If needed, specifies a preset to use for that package
+        :returns: a dict with the hourly, monthly and setup totals, and the
+                  cost of each price in 'prices'
+        """
+        return self.price_orders(package_keyname, location, [item_keynames],
+                                 preset_keyname=preset_keyname, include_prices=True)[0]
+
+    def price_orders(self, package_keyname, location, candidates, preset_keyname=None,
+                     hourly=True, limit=None, include_prices=False):
+        """Computes the cost of many candidate orders and sorts them, cheapest first.
+
+        The package items and location are only fetched once, so comparing
+        thousands of configurations costs the same few API calls as one.
+
+        :param str package_keyname: The keyname for the package being ordered
+        :param str location: The datacenter location string for ordering (Ex: DALLAS13)
+        :param list candidates: lists of item keynames, one per order
+        :param string preset_keyname: If needed, specifies a preset to use for that package
+        :param bool hourly: sort by the hourly total, otherwise by the monthly total
+        :param int limit: only return the cheapest limit orders
+        :param bool include_prices: include the cost of each price in 'prices'
+        :returns: a list of dicts with items, hourly, monthly and setup
+        """
+        calculator = self.get_price_calculator(package_keyname, location)
+
+        preset_core = None
+        preset_price_ids = []
+        if preset_keyname:
+            preset = self.get_preset_by_key(package_keyname, preset_keyname)
+            if self._get_snapshot_package(package_keyname) is not None:
+                # Presets stored in the catalog snapshot already hold their prices
+                preset_prices = preset['prices']
+            else:
+                preset_prices = self.get_preset_prices(preset['id'])['prices']
+            for price in preset_prices:
+                if price['item']['itemCategory']['categoryCode'] == "guest_core":
+                    preset_core = price['item']['capacity']
+                preset_price_ids.append(price['id'])
+
+        results = []
+        for item_keynames in candidates:
+            price_ids = preset_price_ids + self.get_price_id_list(package_keyname, item_keynames, preset_core)
+            result = calculator.get_order_cost(price_ids)
+            result['items'] = list(item_keynames)
+            if include_prices:
+                result['prices'] = [calculator.get_price_cost(price_id) for price_id in price_ids]
+            results.append(result)
+
+        sort_key = 'hourly' if hourly else 'monthly'
+        if limit:
+            return heapq.nsmallest(limit, results, key=lambda result: result[sort_key])
+        return sorted(results, key=lambda result: result[sort_key])
+
     def get_price_id_list(self, package_keyname, item_keynames, core=None):
         """Converts a list of item keynames to a list of price IDs.
 
@@ -346,20 +709,17 @@ class OrderingManager(object):
                   keynames in the given package
 
         """
-        mask = 'id, description, capacity, itemCategory, keyName, prices[categories]'
-        items = self.list_items(package_keyname, mask=mask)
-        item_capacity = self.get_item_capacity(items, item_keynames)
+        index = self.get_package_index(package_keyname)
+        item_capacity = index.get_item_capacity(item_keynames)
+        if core is None:
+            core = item_capacity
 
         prices = []
         category_dict = {"gpu0": -1, "pcie_slot0": -1}
 
         for item_keyname in item_keynames:
-            try:
-                # Need to find the item in the package that has a matching
-                # keyName with the current item we are searching for
-                matching_item = [i for i in items
-                                 if i['keyName'] == item_keyname][0]
-            except IndexError:
+            matching_item = index.get_item(item_keyname)
+            if matching_item is None:
                 raise exceptions.SoftLayerError(
                     "Item {} does not exist for package {}".format(item_keyname,
                                                                    package_keyname))
@@ -370,18 +730,17 @@ class OrderingManager(object):
             # in which the order is made
             item_category = matching_item['itemCategory']['categoryCode']
             if item_category not in category_dict:
-                if core is None:
-                    price_id = self.get_item_price_id(item_capacity, matching_item['prices'])
-                else:
-                    price_id = self.get_item_price_id(core, matching_item['prices'])
+                price_id = index.get_item_price_id(item_keyname, core)
             else:
                 # GPU and PCIe items has two generic prices and they are added to the list
                 # according to the number of items in the order.
                 category_dict[item_category] += 1
                 category_code = item_category[:-1] + str(category_dict[item_category])
-                price_id = [p['id'] for p in matching_item['prices']
-                            if not p['locationGroupId']
-                            and p['categories'][0]['categoryCode'] == category_code][0]
+                price_id = index.get_category_price_id(item_keyname, category_code)
+                if price_id is None:
+                    raise exceptions.SoftLayerError(
+                        "Item {} has no {} price in package {}".format(item_keyname, category_code,
+                                                                       package_keyname))
 
             prices.append(price_id)
 
@@ -407,22 +766,7 @@ class OrderingManager(object):
 
     def get_item_capacity(self, items, item_keynames):
         """Get item capacity."""
-        item_capacity = None
-        for item_keyname in item_keynames:
-            for item in items:
-                if item['keyName'] == item_keyname:
-                    if "CORE" in item["keyName"]:
-                        item_capacity = item['capacity']
-                        break
-                    if "TIER" in item["keyName"]:
-                        item_capacity = item['capacity']
-                        break
-                    if "INTEL" in item["keyName"]:
-                        item_split = item['description'].split("(")
-                        item_core = item_split[1].split(" ")
-                        item_capacity = item_core[0]
-                        break
-        return item_capacity
+        return PackageIndex(items).get_item_capacity(item_keynames)
 
     def get_preset_prices(self, preset):
         """Get preset item prices.
@@ -615,6 +959,10 @@ class OrderingManager(object):
         """
         mask = "mask[description, keyname, locations]"
 
+        package = self._get_snapshot_package(package_keyname)
+        if package is not None:
+            return package['regions']
+
         package = self.get_package_by_key(package_keyname, mask='id')
 
         regions = self.package_svc.getRegions(id=package['id'], mask=mask)
@@ -623,19 +971,13 @@ class OrderingManager(object):
     def get_location_id(self, location):
         """Finds the location ID of a given datacenter
 
-        This is mostly used so either a dc name, or regions keyname can be used when ordering
+        This is mostly used so either a dc name, or regions keyname can be used when ordering.
+        Datacenters come from the location registry shared by the managers of this client.
+
         :param str location: Region Keyname (DALLAS13) or datacenter name (dal13)
         :returns: integer id of the datacenter
         """
 
         if isinstance(location, int):
             return location
-        mask = "mask[id,name,regions[keyname]]"
-        if match(r'[a-zA-Z]{3}[0-9]{2}', location) is not None:
-            search = {'name': {'operation': location}}
-        else:
-            search = {'regions': {'keyname': {'operation': location}}}
-        datacenter = self.client.call('SoftLayer_Location', 'getDatacenters', mask=mask, filter=search)
-        if len(datacenter) != 1:
-            raise exceptions.SoftLayerError("Unable to find location: %s" % location)
-        return datacenter[0]['id']
+        return locations.get_location_registry(self.client).get_datacenter_id(location)
@@ -19,11 +19,14 @@ class StorageManager(utils.IdentifierMixin, object):
 
     :param SoftLayer.API.BaseClient client: the client instance
     """
+    identifier_index_keys = ('username',)
 
     def __init__(self, client):
         self.configuration = {}
         self.client = client
         self.resolvers = [self._get_ids_from_username]
+        self.batch_resolvers = [self._get_ids_from_usernames]
+        self.storage_packages = {}
 
     def get_volume_count_limits(self):
         """Returns a list of block volume count limit.
@@ -5,7 +5,10 @@
 
     :license: MIT, see LICENSE for more details.
 """
+import bisect
+
 from SoftLayer import exceptions
+from SoftLayer.managers import locations
 from SoftLayer import utils
 
 # pylint: disable=too-many-lines
@@ -62,13 +65,19 @@ def populate_host_templates(hardware_ids=None,
     return host_templates
 
 
-def get_package(manager, category_code):
+def get_package(manager, category_code, refresh=False):
     """Returns a product package based on type of storage.
 
+    Packages are kept on the manager, so ordering several volumes only
+    fetches the package and builds its price index once.
+
     :param manager: The storage manager which calls this function.
     :param category_code: Category code of product package.
-    :return: Returns a packaged based on type of storage.
+    :param bool refresh: fetch the package again even if the manager has it
+    :return: Returns a packaged based on type of storage, as a StoragePackage.
     """
+    if not refresh and category_code in manager.storage_packages:
+        return manager.storage_packages[category_code]
 
     _filter = utils.NestedDict({})
     _filter['categories']['categoryCode'] = (
@@ -86,7 +95,136 @@ def get_package(manager, category_code):
         raise ValueError('More than one package was found for %s'
                          % category_code)
 
-    return packages[0]
+    package = StoragePackage(packages[0])
+    manager.storage_packages[category_code] = package
+    return package
+
+
+class StoragePackage(dict):
+    """A storage product package, with an index of its prices.
+
+    Behaves like the package dict. The price index is built the first
+    time one of the find_*_price() functions is given the package.
+    """
+
+    _price_index = None
+
+    @property
+    def price_index(self):
+        """The StoragePriceIndex of the package items."""
+        if self._price_index is None:
+            self._price_index = StoragePriceIndex(self['items'])
+        return self._price_index
+
+
+class StoragePriceIndex(object):
+    """The generic prices of storage package items, by category and capacity.
+
+    Finding a price looks at the items that have a price in the category
+    instead of every item of the package, and restricted prices are sorted
+    by the start of their restriction range. The first matching item, and
+    its first matching price, win like scanning package['items'] would.
+
+    :param list items: the package items, with prices[categories]
+    """
+
+    def __init__(self, items):
+        self.by_category = {}
+        self.by_category_capacity = {}
+
+        for item in items:
+            item_prices = {}
+            for position, price in enumerate(item.get('prices') or []):
+                # Only collect prices from valid location groups.
+                if price.get('locationGroupId'):
+                    continue
+                for category in price.get('categories') or []:
+                    item_prices.setdefault(category['categoryCode'], []).append((position, price))
+
+            capacity = _capacity(item.get('capacity'))
+            for category_code, prices in item_prices.items():
+                entry = _ItemPrices(item, prices)
+                self.by_category.setdefault(category_code, []).append(entry)
+                if capacity is not None:
+                    self.by_category_capacity.setdefault(category_code, {}).setdefault(capacity, []).append(entry)
+
+    def find(self, category_code, restriction_type=None, restriction_value=None, capacity=None, item_filter=None):
+        """Finds the first generic price of an item in a category.
+
+        :param str category_code: the category the price has to be in
+        :param str restriction_type: capacity restriction type of the price, like STORAGE_TIER_LEVEL
+        :param restriction_value: value that has to be within the capacity restriction
+        :param capacity: only look at items with this capacity
+        :param item_filter: function that returns True for items to look at
+        :return: Returns {'id': price_id}, or None if no price matches
+        """
+        if capacity is None:
+            entries = self.by_category.get(category_code, [])
+        else:
+            entries = self.by_category_capacity.get(category_code, {}).get(capacity, [])
+
+        for entry in entries:
+            if item_filter is not None and not item_filter(entry.item):
+                continue
+            price_id = entry.price_id(restriction_type, restriction_value)
+            if price_id is not None:
+                return {'id': price_id}
+        return None
+
+
+class _ItemPrices(object):
+    """The generic prices of an item in one category."""
+
+    def __init__(self, item, prices):
+        self.item = item
+        self.first_id = prices[0][1]['id']
+        self.restricted = {}
+        self.minimums = {}
+
+        ranges = {}
+        for position, price in prices:
+            try:
+                capacity_range = (int(price['capacityRestrictionMinimum']), int(price['capacityRestrictionMaximum']))
+            except (KeyError, TypeError, ValueError):
+                continue
+            ranges.setdefault(price.get('capacityRestrictionType'), []).append(
+                capacity_range + (position, price['id']))
+        for restriction_type, restricted in ranges.items():
+            restricted.sort()
+            self.restricted[restriction_type] = restricted
+            self.minimums[restriction_type] = [entry[0] for entry in restricted]
+
+    def price_id(self, restriction_type=None, restriction_value=None):
+        """The first price whose restriction of the given type includes restriction_value."""
+        if restriction_type is None or restriction_value is None:
+            return self.first_id
+
+        restricted = self.restricted.get(restriction_type, [])
+        end = bisect.bisect_right(self.minimums.get(restriction_type, []), restriction_value)
+        best_position, best_id = None, None
+        for _, capacity_max, position, price_id in restricted[:end]:
+            if restriction_value <= capacity_max and (best_position is None or position < best_position):
+                best_position, best_id = position, price_id
+        return best_id
+
+
+def _capacity(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_price_index(package):
+    """Returns the StoragePriceIndex of a package.
+
+    The index of a package from get_package() is built once and reused.
+
+    :param package: a product package, with items[prices[categories]]
+    """
+    if isinstance(package, StoragePackage):
+        return package.price_index
+    return StoragePriceIndex(package['items'])
 
 
 def get_location_id(manager, location):
@@ -96,13 +234,10 @@ def get_location_id(manager, location):
     :param location: Datacenter short name
     :return: Returns location id
     """
-    loc_svc = manager.client['Location_Datacenter']
-    datacenters = loc_svc.getDatacenters(mask='mask[longName,id,name]')
-    for datacenter in datacenters:
-        if datacenter['name'] == location:
-            location = datacenter['id']
-            return location
-    raise ValueError('Invalid datacenter name specified.')
+    datacenter = locations.get_location_registry(manager.client).find(location)
+    if datacenter is None:
+        raise ValueError('Invalid datacenter name specified.')
+    return datacenter['id']
 
 
 def find_price_by_category(package, price_category):
@@ -112,10 +247,9 @@ def find_price_by_category(package, price_category):
     :param price_category: The price category code to search for
     :return: Returns the price for the given category, or an error if not found
     """
-    for item in package['items']:
-        price_id = _find_price_id(item['prices'], price_category)
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find(price_category)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price with the category, %s" % price_category)
 
@@ -138,12 +272,9 @@ def find_ent_space_price(package, category, size, tier_level):
 
     level = ENDURANCE_TIERS.get(tier_level)
 
-    for item in package['items']:
-        if int(item['capacity']) != size:
-            continue
-        price_id = _find_price_id(item['prices'], category_code, 'STORAGE_TIER_LEVEL', level)
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find(category_code, 'STORAGE_TIER_LEVEL', level, capacity=size)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for %s storage space" % category)
 
@@ -155,16 +286,14 @@ def find_ent_endurance_tier_price(package, tier_level):
     :param tier_level: The endurance tier for which a price is desired
     :return: Returns the price for the given tier, or an error if not found
     """
-    for item in package['items']:
-        for attribute in item.get('attributes', []):
-            if int(attribute['value']) == ENDURANCE_TIERS.get(tier_level):
-                break
-        else:
-            continue
+    target_value = ENDURANCE_TIERS.get(tier_level)
+
+    def has_tier(item):
+        return any(int(attribute['value']) == target_value for attribute in item.get('attributes', []))
 
-        price_id = _find_price_id(item['prices'], 'storage_tier_level')
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find('storage_tier_level', item_filter=has_tier)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for endurance tier level")
 
@@ -199,13 +328,9 @@ def find_perf_space_price(package, size):
     :param size: The storage space size for which a price is desired
     :return: Returns the price for the given size, or an error if not found
     """
-    for item in package['items']:
-        if int(item['capacity']) != size:
-            continue
-
-        price_id = _find_price_id(item['prices'], 'performance_storage_space')
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find('performance_storage_space', capacity=size)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find performance space price for this volume")
 
@@ -218,13 +343,10 @@ def find_perf_iops_price(package, size, iops):
     :param iops: The number of IOPS for which a price is desired
     :return: Returns the price for the size and IOPS, or an error if not found
     """
-    for item in package['items']:
-        if int(item['capacity']) != int(iops):
-            continue
-
-        price_id = _find_price_id(item['prices'], 'performance_storage_iops', 'STORAGE_SPACE', size)
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find('performance_storage_iops', 'STORAGE_SPACE', size,
+                                             capacity=int(iops))
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for iops for the given volume")
 
@@ -241,21 +363,13 @@ def find_saas_endurance_space_price(package, size, tier_level):
         tier_level = int(tier_level)
     key_name = 'STORAGE_SPACE_FOR_{0}_IOPS_PER_GB'.format(tier_level)
     key_name = key_name.replace(".", "_")
-    for item in package['items']:
-        if key_name not in item['keyName']:
-            continue
-
-        if 'capacityMinimum' not in item or 'capacityMaximum' not in item:
-            continue
 
-        capacity_minimum = int(item['capacityMinimum'])
-        capacity_maximum = int(item['capacityMaximum'])
-        if size < capacity_minimum or size > capacity_maximum:
-            continue
+    def is_space_item(item):
+        return key_name in item['keyName'] and _in_capacity_range(item, size)
 
-        price_id = _find_price_id(item['prices'], 'performance_storage_space')
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find('performance_storage_space', item_filter=is_space_item)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for endurance storage space")
 
@@ -268,19 +382,10 @@ def find_saas_endurance_tier_price(package, tier_level):
     :return: Returns the price for the given tier, or an error if not found
     """
     target_capacity = ENDURANCE_TIERS.get(tier_level)
-    for item in package['items']:
-        if 'itemCategory' not in item\
-                or 'categoryCode' not in item['itemCategory']\
-                or item['itemCategory']['categoryCode']\
-                != 'storage_tier_level':
-            continue
-
-        if int(item['capacity']) != target_capacity:
-            continue
-
-        price_id = _find_price_id(item['prices'], 'storage_tier_level')
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find('storage_tier_level', capacity=target_capacity,
+                                             item_filter=_in_item_category('storage_tier_level'))
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for endurance tier level")
 
@@ -292,27 +397,17 @@ def find_saas_perform_space_price(package, size):
     :param size: The volume size for which a price is desired
     :return: Returns the price for the size and tier, or an error if not found
     """
-    for item in package['items']:
-        if 'itemCategory' not in item\
-                or 'categoryCode' not in item['itemCategory']\
-                or item['itemCategory']['categoryCode']\
-                != 'performance_storage_space':
-            continue
-
-        if 'capacityMinimum' not in item or 'capacityMaximum' not in item:
-            continue
-
-        capacity_minimum = int(item['capacityMinimum'])
-        capacity_maximum = int(item['capacityMaximum'])
-        if size < capacity_minimum or size > capacity_maximum:
-            continue
-
-        key_name = '{0}_{1}_GBS'.format(capacity_minimum, capacity_maximum)
-        if item['keyName'] != key_name:
-            continue
-        price_id = _find_price_id(item['prices'], 'performance_storage_space')
-        if price_id:
-            return price_id
+    in_category = _in_item_category('performance_storage_space')
+
+    def is_space_item(item):
+        if not in_category(item) or not _in_capacity_range(item, size):
+            return False
+        key_name = '{0}_{1}_GBS'.format(int(item['capacityMinimum']), int(item['capacityMaximum']))
+        return item['keyName'] == key_name
+
+    price_id = get_price_index(package).find('performance_storage_space', item_filter=is_space_item)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for performance storage space")
 
@@ -325,24 +420,15 @@ def find_saas_perform_iops_price(package, size, iops):
     :param iops: The number of IOPS for which a price is desired
     :return: Returns the price for the size and IOPS, or an error if not found
     """
-    for item in package['items']:
-        if 'itemCategory' not in item\
-                or 'categoryCode' not in item['itemCategory']\
-                or item['itemCategory']['categoryCode']\
-                != 'performance_storage_iops':
-            continue
-
-        if 'capacityMinimum' not in item or 'capacityMaximum' not in item:
-            continue
+    in_category = _in_item_category('performance_storage_iops')
 
-        capacity_minimum = int(item['capacityMinimum'])
-        capacity_maximum = int(item['capacityMaximum'])
-        if iops < capacity_minimum or iops > capacity_maximum:
-            continue
+    def is_iops_item(item):
+        return in_category(item) and _in_capacity_range(item, iops)
 
-        price_id = _find_price_id(item['prices'], 'performance_storage_iops', 'STORAGE_SPACE', size)
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find('performance_storage_iops', 'STORAGE_SPACE', size,
+                                             item_filter=is_iops_item)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for iops for the given volume")
 
@@ -363,13 +449,10 @@ def find_saas_snapshot_space_price(package, size, tier=None, iops=None):
         target_value = iops
         target_restriction_type = 'IOPS'
 
-    for item in package['items']:
-        if int(item['capacity']) != size:
-            continue
-
-        price_id = _find_price_id(item['prices'], 'storage_snapshot_space', target_restriction_type, target_value)
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find('storage_snapshot_space', target_restriction_type, target_value,
+                                             capacity=size)
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for snapshot space")
 
@@ -391,18 +474,14 @@ def find_saas_replication_price(package, tier=None, iops=None):
         target_item_keyname = 'REPLICATION_FOR_IOPSBASED_PERFORMANCE'
         target_restriction_type = 'IOPS'
 
-    for item in package['items']:
-        if item['keyName'] != target_item_keyname:
-            continue
-
-        price_id = _find_price_id(
-            item['prices'],
-            'performance_storage_replication',
-            target_restriction_type,
-            target_value
-        )
-        if price_id:
-            return price_id
+    price_id = get_price_index(package).find(
+        'performance_storage_replication',
+        target_restriction_type,
+        target_value,
+        item_filter=lambda item: item['keyName'] == target_item_keyname
+    )
+    if price_id:
+        return price_id
 
     raise ValueError("Could not find price for replicant volume")
 
@@ -1001,32 +1080,16 @@ def block_or_file(storage_type_keyname):
     return 'block' if 'BLOCK_STORAGE' in storage_type_keyname else 'file'
 
 
-def _has_category(categories, category_code):
-    return any(
-        True
-        for category
-        in categories
-        if category['categoryCode'] == category_code
-    )
-
+def _in_item_category(category_code):
+    """Returns a function checking if an item is in the given item category."""
+    return lambda item: utils.lookup(item, 'itemCategory', 'categoryCode') == category_code
 
-def _staas_version_is_v2_or_above(volume):
-    return int(volume['staasVersion']) > 1 and volume['hasEncryptionAtRest']
 
+def _in_capacity_range(item, value):
+    if 'capacityMinimum' not in item or 'capacityMaximum' not in item:
+        return False
+    return int(item['capacityMinimum']) <= value <= int(item['capacityMaximum'])
 
-def _find_price_id(prices, category, restriction_type=None, restriction_value=None):
-    for price in prices:
-        # Only collect prices from valid location groups.
-        if price['locationGroupId']:
-            continue
 
-        if restriction_type is not None and restriction_value is not None:
-            if restriction_type != price['capacityRestrictionType']\
-                    or restriction_value < int(price['capacityRestrictionMinimum'])\
-                    or restriction_value > int(price['capacityRestrictionMaximum']):
-                continue
-
-        if not _has_category(price['categories'], category):
-            continue
-
-        return {'id': price['id']}
+def _staas_version_is_v2_or_above(volume):
+    return int(volume['staasVersion']) > 1 and volume['hasEncryptionAtRest']
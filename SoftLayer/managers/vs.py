@@ -5,6 +5,7 @@
 
     :license: MIT, see LICENSE for more details.
 """
+from concurrent import futures
 import datetime
 import logging
 import socket
@@ -13,13 +14,82 @@ import warnings
 
 from SoftLayer.decoration import retry
 from SoftLayer import exceptions
+from SoftLayer.managers import fetch
+from SoftLayer.managers import metrics
 from SoftLayer.managers import ordering
 from SoftLayer import utils
 
 LOGGER = logging.getLogger(__name__)
 
+# Guests created by create_instances() are tagged concurrently
+TAG_WORKERS = 8
+
 # pylint: disable=no-self-use,too-many-lines
 
+INSTANCE_MASK = (
+    'id,'
+    'globalIdentifier,'
+    'fullyQualifiedDomainName,'
+    'hostname,'
+    'domain,'
+    'createDate,'
+    'modifyDate,'
+    'provisionDate,'
+    'notes,'
+    'dedicatedAccountHostOnlyFlag,'
+    'transientGuestFlag,'
+    'privateNetworkOnlyFlag,'
+    'primaryBackendIpAddress,'
+    'primaryIpAddress,'
+    '''networkComponents[id, status, speed, maxSpeed, name,
+                         macAddress, primaryIpAddress, port,
+                         primarySubnet[addressSpace],
+                         securityGroupBindings[
+                            securityGroup[id, name]]],'''
+    'lastKnownPowerState.name,'
+    'powerState,'
+    'status,'
+    'maxCpu,'
+    'maxMemory,'
+    'datacenter,'
+    'activeTransaction[id, transactionStatus[friendlyName,name]],'
+    'lastTransaction[transactionStatus],'
+    'lastOperatingSystemReload.id,'
+    'blockDevices,'
+    'blockDeviceTemplateGroup[id, name, globalIdentifier],'
+    'postInstallScriptUri,'
+    '''operatingSystem[passwords[username,password],
+                       softwareLicense.softwareDescription[
+                           manufacturer,name,version,
+                           referenceCode]],'''
+    '''softwareComponents[
+        passwords[username,password,notes],
+        softwareLicense[softwareDescription[
+                            manufacturer,name,version,
+                            referenceCode]]],'''
+    'hourlyBillingFlag,'
+    'userData,'
+    '''billingItem[id,nextInvoiceTotalRecurringAmount,
+                   package[id,keyName],
+                   children[categoryCode,nextInvoiceTotalRecurringAmount],
+                   orderItem[id,
+                             order.userRecord[username],
+                             preset.keyName]],'''
+    'tagReferences[id,tag[name,id]],'
+    'networkVlans[id,vlanNumber,networkSpace],'
+    'dedicatedHost.id,'
+    'placementGroupId'
+)
+
+# Extra data shown along with an instance, see get_instance_details()
+DETAIL_FRAGMENTS = {
+    'local_disks': fetch.Fragment(
+        'blockDevices.diskImage[capacity,units,description]',
+        lambda result: [device for device in result.get('blockDevices') or [] if 'diskImage' in device]),
+    'bandwidth': fetch.BANDWIDTH_FRAGMENT,
+    'dedicated_host': fetch.Fragment('dedicatedHost[id,name]', lambda result: result.get('dedicatedHost') or {}),
+}
+
 
 class VSManager(utils.IdentifierMixin, object):
     """Manages SoftLayer Virtual Servers.
@@ -45,6 +115,7 @@ class VSManager(utils.IdentifierMixin, object):
                                               auto initialized.
 
     """
+    identifier_index_keys = ('hostname', 'fullyQualifiedDomainName', 'primaryIpAddress', 'primaryBackendIpAddress')
 
     def __init__(self, client, ordering_manager=None):
         self.client = client
@@ -190,63 +261,41 @@ class VSManager(utils.IdentifierMixin, object):
         """
 
         if 'mask' not in kwargs:
-            kwargs['mask'] = (
-                'id,'
-                'globalIdentifier,'
-                'fullyQualifiedDomainName,'
-                'hostname,'
-                'domain,'
-                'createDate,'
-                'modifyDate,'
-                'provisionDate,'
-                'notes,'
-                'dedicatedAccountHostOnlyFlag,'
-                'transientGuestFlag,'
-                'privateNetworkOnlyFlag,'
-                'primaryBackendIpAddress,'
-                'primaryIpAddress,'
-                '''networkComponents[id, status, speed, maxSpeed, name,
-                                     macAddress, primaryIpAddress, port,
-                                     primarySubnet[addressSpace],
-                                     securityGroupBindings[
-                                        securityGroup[id, name]]],'''
-                'lastKnownPowerState.name,'
-                'powerState,'
-                'status,'
-                'maxCpu,'
-                'maxMemory,'
-                'datacenter,'
-                'activeTransaction[id, transactionStatus[friendlyName,name]],'
-                'lastTransaction[transactionStatus],'
-                'lastOperatingSystemReload.id,'
-                'blockDevices,'
-                'blockDeviceTemplateGroup[id, name, globalIdentifier],'
-                'postInstallScriptUri,'
-                '''operatingSystem[passwords[username,password],
-                                   softwareLicense.softwareDescription[
-                                       manufacturer,name,version,
-                                       referenceCode]],'''
-                '''softwareComponents[
-                    passwords[username,password,notes],
-                    softwareLicense[softwareDescription[
-                                        manufacturer,name,version,
-                                        referenceCode]]],'''
-                'hourlyBillingFlag,'
-                'userData,'
-                '''billingItem[id,nextInvoiceTotalRecurringAmount,
-                               package[id,keyName],
-                               children[categoryCode,nextInvoiceTotalRecurringAmount],
-                               orderItem[id,
-                                         order.userRecord[username],
-                                         preset.keyName]],'''
-                'tagReferences[id,tag[name,id]],'
-                'networkVlans[id,vlanNumber,networkSpace],'
-                'dedicatedHost.id,'
-                'placementGroupId'
-            )
+            kwargs['mask'] = INSTANCE_MASK
 
         return self.guest.getObject(id=instance_id, **kwargs)
 
+    @retry(logger=LOGGER)
+    def get_instance_details(self, instance_id, extras=None):
+        """Get an instance along with the extra data needed to show its details.
+
+        Extra data that comes from relational properties is fetched in the
+        same getObject call as the instance. PTR records need their own call,
+        made at the same time and discarded for private only instances.
+
+        :param integer instance_id: the instance ID
+        :param list extras: names of the extra data to fetch, defaults to all of
+                            'local_disks', 'bandwidth', 'dedicated_host' and
+                            'ptr_records'
+        :returns: A tuple of the instance and a dictionary of the extra data.
+                  'local_disks' are the block devices with a disk image,
+                  'bandwidth' is the same as get_bandwidth_allocation() returns
+                  and 'ptr_records' is empty if they could not be looked up.
+
+        Example::
+
+            vsi, extras = mgr.get_instance_details(12345, extras=['bandwidth'])
+            print(extras['bandwidth']['usage'])
+        """
+        get_ptr_records = fetch.ignore_api_errors(lambda: self.guest.getReverseDomainRecords(id=instance_id),
+                                                  default=[])
+        instance, details = fetch.get_details(lambda mask: self.guest.getObject(id=instance_id, mask=mask),
+                                              INSTANCE_MASK, DETAIL_FRAGMENTS, names=extras,
+                                              calls={'ptr_records': get_ptr_records})
+        if 'ptr_records' in details and instance.get('privateNetworkOnlyFlag'):
+            details['ptr_records'] = []
+        return instance, details
+
     @retry(logger=LOGGER)
     def get_create_options(self):
         """Retrieves the available options for creating a VS.
@@ -500,6 +549,31 @@ class VSManager(utils.IdentifierMixin, object):
         LOGGER.info("Waiting for %d expired.", instance_id)
         return False
 
+    def wait_for_ready_many(self, instance_ids, limit=3600, delay=10, pending=False, progress=None):
+        """Waits for many virtual servers to be ready.
+
+        Each poll is a single SoftLayer_Account::getVirtualGuests call for all
+        the servers that are not ready yet, see utils.wait_for_ready_many().
+
+        :param list instance_ids: IDs of the virtual servers to wait for
+        :param int limit: The maximum amount of seconds to wait.
+        :param int delay: The number of seconds to sleep before checks. Defaults to 10.
+        :param bool pending: Wait for pending transactions, see wait_for_ready()
+        :param progress: function called after every poll with the ready and waiting IDs
+        :returns: a dict of {id: True if the server is ready}
+
+        Example::
+
+            ready = mgr.wait_for_ready_many([12345, 12346, 12347], limit=1800)
+            not_ready = [guest_id for guest_id, is_ready in ready.items() if not is_ready]
+        """
+        def get_instances(ids):
+            _filter = {'virtualGuests': {'id': {'operation': 'in', 'options': [{'name': 'data', 'value': ids}]}}}
+            return self.account.getVirtualGuests(mask=utils.READY_MASK, filter=_filter)
+
+        return utils.wait_for_ready_many(get_instances, instance_ids, limit, delay=delay, pending=pending,
+                                         progress=progress)
+
     def verify_create_instance(self, **kwargs):
         """Verifies an instance creation command.
 
@@ -657,9 +731,10 @@ class VSManager(utils.IdentifierMixin, object):
         resp = self.guest.createObjects([self._generate_create_dict(**kwargs)
                                          for kwargs in config_list])
 
-        for instance, tag in zip(resp, tags):
-            if tag is not None:
-                self.set_tags(tag, guest_id=instance['id'])
+        tagged = [(tag, instance['id']) for instance, tag in zip(resp, tags) if tag is not None]
+        if tagged:
+            with futures.ThreadPoolExecutor(max_workers=min(TAG_WORKERS, len(tagged))) as executor:
+                list(executor.map(lambda args: self.set_tags(args[0], guest_id=args[1]), tagged))
 
         return resp
 
@@ -689,6 +764,14 @@ class VSManager(utils.IdentifierMixin, object):
             return self.client.call('Virtual_Guest', 'setPrivateNetworkInterfaceSpeed',
                                     speed, id=instance_id)
 
+    @property
+    def batch_resolvers(self):
+        """Resolvers looking up many identifiers with one API call, see resolve_many_ids()."""
+        return utils.server_batch_resolvers(self.list_instances, 'virtualGuests')
+
+    def _identifier_index_records(self):
+        return self.list_instances(mask='id, %s' % ', '.join(self.identifier_index_keys))
+
     def _get_ids_from_hostname(self, hostname):
         """List VS ids which match the given hostname."""
         results = self.list_instances(hostname=hostname, mask="id")
@@ -1023,7 +1106,8 @@ class VSManager(utils.IdentifierMixin, object):
                 else:
                     return price.get('id')
 
-    def get_summary_data_usage(self, instance_id, start_date=None, end_date=None, valid_type=None, summary_period=None):
+    def get_summary_data_usage(self, instance_id, start_date=None, end_date=None, valid_type=None, summary_period=None,
+                               store=None):
         """Retrieve the usage information of a virtual server.
 
         :param string instance_id: a string identifier used to resolve ids
@@ -1031,6 +1115,7 @@ class VSManager(utils.IdentifierMixin, object):
         :param string end_date: the start data to retrieve the vs usage information
         :param string string valid_type: the Metric_Data_Type keyName.
         :param int summary_period: summary period.
+        :param MetricStore store: keep the data in this local store and only download what it is missing.
         """
         valid_types = [
             {
@@ -1040,9 +1125,14 @@ class VSManager(utils.IdentifierMixin, object):
         ]
 
         metric_tracking_id = self.get_tracking_id(instance_id)
+        if store is not None:
+            return store.get_summary_data(self.client, metric_tracking_id, start_date, end_date, valid_types,
+                                          summary_period)
 
-        return self.client.call('Metric_Tracking_Object', 'getSummaryData', start_date, end_date, valid_types,
-                                summary_period, id=metric_tracking_id, iter=True)
+        def get_window(start, end):
+            return self.client.call('Metric_Tracking_Object', 'getSummaryData', start, end, valid_types,
+                                    summary_period, id=metric_tracking_id, iter=True)
+        return metrics.WindowedFetch(get_window, summary_period).run(start_date, end_date)
 
     def get_tracking_id(self, instance_id):
         """Returns the Metric Tracking Object Id for a hardware server
@@ -1051,7 +1141,8 @@ class VSManager(utils.IdentifierMixin, object):
         """
         return self.guest.getMetricTrackingObjectId(id=instance_id)
 
-    def get_bandwidth_data(self, instance_id, start_date=None, end_date=None, direction=None, rollup=3600):
+    def get_bandwidth_data(self, instance_id, start_date=None, end_date=None, direction=None, rollup=3600,
+                           store=None):
         """Gets bandwidth data for a server
 
         Will get averaged bandwidth data for a given time period. If you use a rollup over 3600 be aware
@@ -1064,11 +1155,17 @@ class VSManager(utils.IdentifierMixin, object):
         :param date end_date: Date to finish pulling data for
         :param string direction: Can be either 'public', 'private', or None for both.
         :param int rollup: 300, 600, 1800, 3600, 43200 or 86400 seconds to average data over.
+                           Ranges of more than a month of rollups are fetched in windows, several at a time.
+        :param MetricStore store: keep the data in this local store and only download what it is missing.
         """
         tracking_id = self.get_tracking_id(instance_id)
-        data = self.client.call('Metric_Tracking_Object', 'getBandwidthData', start_date, end_date, direction,
-                                rollup, id=tracking_id, iter=True)
-        return data
+        if store is not None:
+            return store.get_bandwidth_data(self.client, tracking_id, start_date, end_date, direction, rollup)
+
+        def get_window(start, end):
+            return self.client.call('Metric_Tracking_Object', 'getBandwidthData', start, end, direction, rollup,
+                                    id=tracking_id, iter=True)
+        return metrics.WindowedFetch(get_window, rollup).run(start_date, end_date)
 
     def get_bandwidth_allocation(self, instance_id):
         """Combines getBandwidthAllotmentDetail() and getBillingCycleBandwidthUsage() """
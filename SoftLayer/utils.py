@@ -5,14 +5,27 @@
 
     :license: MIT, see LICENSE for more details.
 """
+import collections
 import datetime
+import os
 import re
+import socket
+import sqlite3
+import threading
 import time
 
+from SoftLayer import exceptions
+
 # pylint: disable=no-member, invalid-name
 
 UUID_RE = re.compile(r'^[0-9A-F]{8}-[0-9A-F]{4}-4[0-9A-F]{3}-[89AB][0-9A-F]{3}-[0-9A-F]{12}$', re.I)
 KNOWN_OPERATIONS = ['<=', '>=', '<', '>', '~', '!~', '*=', '^=', '$=', '_=']
+# Longest first, so '<=' is not mistaken for '<'
+MATCH_OPERATIONS = sorted(KNOWN_OPERATIONS + ['!='], key=len, reverse=True)
+MASK_TOKEN_RE = re.compile(r'\s*([A-Za-z0-9_]+(?:\([A-Za-z0-9_]+\))?|[\[\],.])')
+
+# Seconds an IdentifierIndex is kept before the objects are listed again
+IDENTIFIER_INDEX_TTL = 300
 
 
 def lookup(dic, key, *keys):
@@ -56,6 +69,211 @@ class NestedDict(dict):
         return {key: val.to_dict() if isinstance(val, NestedDict) else val
                 for key, val in self.items()}
 
+    @classmethod
+    def from_dict(cls, data):
+        """Converts a dictionary and every dictionary in it into NestedDicts.
+
+        Unlike NestedDict(data), filters built from it can add keys at any depth.
+        """
+        return cls((key, cls.from_dict(val) if isinstance(val, dict) else val)
+                   for key, val in data.items())
+
+
+class TTLCache(object):
+    """A cache whose entries expire a number of seconds after they were stored.
+
+    Managers use it to keep catalog data that rarely changes, like product
+    packages, between calls without keeping it forever.
+
+    ::
+
+        >>> cache = TTLCache(ttl=3600)
+        >>> cache.get_or_set('BARE_METAL_SERVER', lambda: fetch_package())
+
+    :param int ttl: seconds entries are kept, None keeps them until cleared
+    :param clock: function returning the current time in seconds, defaults to time.time
+    """
+
+    def __init__(self, ttl=None, clock=None):
+        self.ttl = ttl
+        self.clock = clock or time.time
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return self._lookup(key)[0]
+
+    def get(self, key, default=None):
+        """Returns the value stored for key, or default if it is missing or expired."""
+        found, value = self._lookup(key)
+        return value if found else default
+
+    def set(self, key, value):
+        """Stores a value, restarting its TTL."""
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+
+    def get_or_set(self, key, factory):
+        """Returns the value stored for key, storing factory() first if it is missing or expired.
+
+        factory is called without holding the lock, so two threads missing
+        the same key at once can both call it.
+        """
+        found, value = self._lookup(key)
+        if not found:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def pop(self, key, default=None):
+        """Removes key from the cache, returning its value or default."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        """Removes every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def age(self, key):
+        """Returns the seconds since key was stored, or None if it is not stored."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else self.clock() - entry[0]
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if self.ttl is not None and self.clock() - entry[0] >= self.ttl:
+                del self._entries[key]
+                return False, None
+            return True, entry[1]
+
+
+def mask_tree(mask):
+    """Parses an object mask into a tree of nested dictionaries.
+
+    Each key is a property name (with its type cast, if any), and each value
+    holds the sub-properties requested for it.
+
+    ::
+
+        >>> mask_tree('mask[id,datacenter.name,tagReferences[tag[name]]]')
+        {'id': {}, 'datacenter': {'name': {}}, 'tagReferences': {'tag': {'name': {}}}}
+
+    :param string mask: object mask, with or without the mask[] wrapper
+    :returns dict:
+    """
+    tokens = []
+    position = 0
+    mask = mask.strip()
+    while position < len(mask):
+        match = MASK_TOKEN_RE.match(mask, position)
+        if match is None:
+            raise ValueError("Invalid object mask at position %d: %s" % (position, mask))
+        tokens.append(match.group(1))
+        position = match.end()
+
+    tree = {}
+    if tokens:
+        position = _parse_mask_properties(tokens, 0, tree)
+        if position != len(tokens):
+            raise ValueError("Invalid object mask, unexpected '%s': %s" % (tokens[position], mask))
+
+    if list(tree) == ['mask']:
+        return tree['mask']
+    return tree
+
+
+def _parse_mask_properties(tokens, position, tree):
+    """Parses comma separated properties into tree, returns the next position."""
+    while True:
+        position = _parse_mask_property(tokens, position, tree)
+        if position < len(tokens) and tokens[position] == ',':
+            position += 1
+        else:
+            return position
+
+
+def _parse_mask_property(tokens, position, tree):
+    """Parses one (possibly dotted or bracketed) property into tree."""
+    if position >= len(tokens) or tokens[position] in '[],.':
+        raise ValueError("Invalid object mask, expected a property name")
+
+    children = tree.setdefault(tokens[position], {})
+    position += 1
+    if position < len(tokens) and tokens[position] == '.':
+        return _parse_mask_property(tokens, position + 1, children)
+    if position < len(tokens) and tokens[position] == '[':
+        position = _parse_mask_properties(tokens, position + 1, children)
+        if position >= len(tokens) or tokens[position] != ']':
+            raise ValueError("Invalid object mask, missing ']'")
+        position += 1
+    return position
+
+
+# Marks a merged property that was also requested without sub-properties
+_BARE_PROPERTY = None
+
+
+def format_mask_tree(tree):
+    """Formats a tree from mask_tree() back into an object mask.
+
+    Properties with a single sub-property use the dotted form, except for a
+    type cast mask root like mask(SoftLayer_Hardware_Server). A property marked
+    by merge_masks() as also requested bare is emitted on its own as well.
+
+    :param dict tree: mask tree
+    :returns string: object mask without the mask[] wrapper
+    """
+    properties = []
+    for name, children in tree.items():
+        if name is _BARE_PROPERTY:
+            continue
+        sub_properties = [sub for sub in children if sub is not _BARE_PROPERTY]
+        if not sub_properties or _BARE_PROPERTY in children:
+            properties.append(name)
+        if len(sub_properties) == 1 and not name.startswith('mask'):
+            properties.append("%s.%s" % (name, format_mask_tree(children)))
+        elif sub_properties:
+            properties.append("%s[%s]" % (name, format_mask_tree(children)))
+    return ','.join(properties)
+
+
+def merge_masks(*masks):
+    """Merges object masks into a single mask with no duplicated properties.
+
+    Empty masks are ignored. A property requested on its own in one mask and
+    with sub-properties in another is emitted both ways, so it keeps all of its
+    local properties instead of being narrowed to the sub-properties.
+
+    ::
+
+        >>> merge_masks('id,datacenter.name', 'mask[id,datacenter.longName]')
+        'id,datacenter[name,longName]'
+        >>> merge_masks('datacenter', 'datacenter.name')
+        'datacenter,datacenter.name'
+
+    :param masks: object masks to merge
+    :returns string: object mask without the mask[] wrapper
+    """
+    tree = {}
+    for mask in masks:
+        if mask:
+            _merge_mask_tree(tree, mask_tree(mask))
+    return format_mask_tree(tree)
+
+
+def _merge_mask_tree(tree, other):
+    """Merges the mask tree other into tree."""
+    for name, children in other.items():
+        if name in tree and bool(tree[name]) != bool(children):
+            tree[name][_BARE_PROPERTY] = {}
+        _merge_mask_tree(tree.setdefault(name, {}), children)
+
 
 def query_filter(query):
     """Translate a query-style string to a 'filter'.
@@ -102,6 +320,84 @@ def query_filter(query):
     return {'operation': query}
 
 
+def filter_matches(data, _filter):
+    """Checks if data matches an object filter, like the API would.
+
+    Used to apply filters to data that was stored locally. Supports the
+    operations built by query_filter(), 'in' and plain values. Operations
+    that don't select anything, like orderBy or date ranges, always match.
+
+    :param data: a result, or a list of results where any can match
+    :param dict _filter: object filter, relative to data
+    """
+    if isinstance(data, list):
+        return any(filter_matches(value, _filter) for value in data)
+
+    _filter = _filter or {}
+    for key, sub_filter in _filter.items():
+        if key == 'operation':
+            if not _operation_matches(data, sub_filter, _filter.get('options') or []):
+                return False
+        elif key == 'options':
+            continue
+        elif not isinstance(data, dict) or not filter_matches(data.get(key), sub_filter):
+            return False
+    return True
+
+
+def filter_results(results, _filter):
+    """Returns the results matching an object filter, see filter_matches()."""
+    if not _filter:
+        return list(results)
+    return [result for result in results if filter_matches(result, _filter)]
+
+
+def _operation_matches(value, operation, options):
+    """Checks a single filter operation against a value."""
+    if not isinstance(operation, str):
+        return value == operation
+    if operation == 'in':
+        return any(value in option.get('value', []) for option in options if option.get('name') == 'data')
+    if operation in ('orderBy', 'betweenDate', 'greaterThanDate', 'lessThanDate'):
+        return True
+
+    name, argument = '', operation
+    for known in MATCH_OPERATIONS:
+        if operation.startswith(known):
+            name, argument = known, operation[len(known):].strip()
+            break
+
+    if value is None:
+        return name in ('!=', '!~')
+    return _COMPARISONS[name](str(value), argument)
+
+
+def _compare_numbers(compare):
+    """Compares as numbers if both sides are numbers, else as strings."""
+    def check(text, argument):
+        try:
+            return compare(float(text), float(argument))
+        except ValueError:
+            return compare(text, argument)
+    return check
+
+
+_COMPARISONS = {
+    '': lambda text, argument: text == argument,
+    '!=': lambda text, argument: text != argument,
+    '_=': lambda text, argument: text.lower() == argument.lower(),
+    '*=': lambda text, argument: argument.lower() in text.lower(),
+    '^=': lambda text, argument: text.lower().startswith(argument.lower()),
+    '$=': lambda text, argument: text.lower().endswith(argument.lower()),
+    '~': lambda text, argument: argument in text,
+    '!~': lambda text, argument: argument not in text,
+    '<': _compare_numbers(lambda left, right: left < right),
+    '>': _compare_numbers(lambda left, right: left > right),
+    '<=': _compare_numbers(lambda left, right: left <= right),
+    '>=': _compare_numbers(lambda left, right: left >= right),
+}
+
+
 def query_filter_date(start, end):
     """Query filters given start and end date.
 
@@ -121,6 +417,17 @@ def query_filter_date(start, end):
     }
 
 
+def query_filter_in(values):
+    """Returns an object filter operation matching any of values
+
+    :param list values: the values to match
+    """
+    return {
+        'operation': 'in',
+        'options': [{'name': 'data', 'value': list(values)}]
+    }
+
+
 def query_filter_orderby(sort="ASC"):
     """Returns an object filter operation for sorting
 
@@ -206,8 +513,16 @@ class IdentifierMixin(object):
     This mixin provides an interface to provide multiple methods for
     converting an 'indentifier' to an id
 
+    Managers can also provide batch_resolvers, which resolve many
+    identifiers with one API call, and an identifier index, see
+    enable_identifier_index().
     """
     resolvers = []
+    batch_resolvers = []
+    identifier_index = None
+
+    # The properties enable_identifier_index() indexes objects by
+    identifier_index_keys = ()
 
     def resolve_ids(self, identifier):
         """Takes a string and tries to resolve to a list of matching ids.
@@ -218,7 +533,41 @@ class IdentifierMixin(object):
         :returns list:
         """
 
-        return resolve_ids(identifier, self.resolvers)
+        resolvers = self.resolvers
+        if self.identifier_index is not None:
+            resolvers = [self.identifier_index.lookup] + list(resolvers)
+        return resolve_ids(identifier, resolvers)
+
+    def resolve_many_ids(self, identifiers):
+        """Resolves many identifiers at once.
+
+        Managers with batch_resolvers look up all the identifiers with one
+        API call per resolver, the others call the resolvers once per identifier.
+
+        :param list identifiers: identifying strings
+        :returns: an OrderedDict of identifier to its list of matching ids
+        """
+        batch_resolvers = self.batch_resolvers or [_batch_resolver(resolver) for resolver in self.resolvers]
+        if self.identifier_index is not None:
+            batch_resolvers = [self.identifier_index.lookup_many] + list(batch_resolvers)
+        return resolve_many_ids(identifiers, batch_resolvers)
+
+    def enable_identifier_index(self, ttl=IDENTIFIER_INDEX_TTL):
+        """Resolves identifiers from an in-memory index of every object on the account.
+
+        The objects are listed with one API call the first time an
+        identifier is resolved, and listed again once the index is ttl
+        seconds old. Identifiers missing from the index are still looked
+        up with the resolvers.
+
+        :param int ttl: seconds the index is kept
+        :returns: the IdentifierIndex
+        :raises SoftLayerError: if the manager has no identifier index
+        """
+        if not hasattr(self, '_identifier_index_records'):
+            raise exceptions.SoftLayerError("%s has no identifier index" % self.__class__.__name__)
+        self.identifier_index = IdentifierIndex(self._identifier_index_records, self.identifier_index_keys, ttl=ttl)
+        return self.identifier_index
 
 
 def resolve_ids(identifier, resolvers):
@@ -247,6 +596,167 @@ def resolve_ids(identifier, resolvers):
     return []
 
 
+def resolve_many_ids(identifiers, batch_resolvers):
+    """Resolves many identifiers given a list of batch functions.
+
+    A batch function takes a list of identifiers and returns a dict of
+    identifier to matching ids. Identifiers one function does not find are
+    passed on to the next.
+
+    :param list identifiers: identifier strings
+    :param list batch_resolvers: a list of functions
+    :returns: an OrderedDict of identifier to its list of ids, empty if nothing matched
+    """
+    resolved = collections.OrderedDict()
+    for identifier in identifiers:
+        if identifier not in resolved:
+            resolved[identifier] = resolve_ids(identifier, [])
+
+    pending = [identifier for identifier, ids in resolved.items() if not ids]
+    for resolver in batch_resolvers:
+        if not pending:
+            break
+        found = resolver(pending)
+        for identifier in pending:
+            resolved[identifier] = list(found.get(identifier) or [])
+        pending = [identifier for identifier in pending if not resolved[identifier]]
+    return resolved
+
+
+def _batch_resolver(resolver):
+    """Turns a resolver of one identifier into a batch resolver."""
+    return lambda identifiers: dict((identifier, resolver(identifier)) for identifier in identifiers)
+
+
+def index_ids(records, keys):
+    """Indexes the ids of objects by some of their properties.
+
+    Values are indexed lower case, so matching ignores case.
+
+    :param list records: objects with an id
+    :param list keys: properties to index, like hostname or primaryIpAddress
+    :returns: a dict of value to the list of ids having it
+    """
+    index = {}
+    for record in records:
+        for key in keys:
+            value = record.get(key)
+            if value is None or value == '':
+                continue
+            ids = index.setdefault(str(value).lower(), [])
+            if record['id'] not in ids:
+                ids.append(record['id'])
+    return index
+
+
+def match_ids(index, identifiers):
+    """Looks identifiers up in an index from index_ids().
+
+    :returns: a dict of identifier to ids, for the identifiers in the index
+    """
+    found = {}
+    for identifier in identifiers:
+        ids = index.get(str(identifier).lower())
+        if ids:
+            found[identifier] = list(ids)
+    return found
+
+
+def find_ids(list_func, object_key, keys, identifiers):
+    """Finds the objects matching identifiers with one list call per property.
+
+    Properties are tried in order, identifiers matched by one are not
+    looked for with the next. This is the batch version of resolvers like
+    VSManager._get_ids_from_ip, which try the public IP before the private one::
+
+        find_ids(mgr.list_instances, 'virtualGuests',
+                 ['primaryIpAddress', 'primaryBackendIpAddress'], ['10.0.0.1', '10.0.0.2'])
+
+    :param list_func: function listing the objects, taking mask and filter
+    :param string object_key: the property of the account the objects are in, for the filter
+    :param list keys: the properties to match identifiers with
+    :param list identifiers: the identifiers to find
+    :returns: a dict of identifier to ids, for the identifiers found
+    """
+    found = {}
+    for key in keys:
+        pending = [identifier for identifier in identifiers if identifier not in found]
+        if not pending:
+            break
+        results = list_func(mask='id, %s' % key, filter={object_key: {key: query_filter_in(pending)}})
+        found.update(match_ids(index_ids(results, [key]), pending))
+    return found
+
+
+def server_batch_resolvers(list_func, object_key):
+    """Returns the batch resolvers of a server manager, see IdentifierMixin.resolve_many_ids().
+
+    Servers are matched by public IP, then private IP, then hostname.
+
+    :param list_func: function listing the servers, like VSManager.list_instances
+    :param string object_key: the property of the account the servers are in, like virtualGuests
+    """
+    def ids_from_ips(ip_addresses):
+        """Returns a dict of ip address to the matching server IDs, trying public then private ips."""
+        ip_addresses = [ip_address for ip_address in ip_addresses if is_ip_address(ip_address)]
+        return find_ids(list_func, object_key, ['primaryIpAddress', 'primaryBackendIpAddress'], ip_addresses)
+
+    def ids_from_hostnames(hostnames):
+        """Returns a dict of hostname to the matching server IDs."""
+        return find_ids(list_func, object_key, ['hostname'], hostnames)
+
+    return [ids_from_ips, ids_from_hostnames]
+
+
+def is_ip_address(ip_address):
+    """Returns True if ip_address looks like an IPv4 address."""
+    try:
+        socket.inet_aton(ip_address)
+    except socket.error:
+        return False
+    return True
+
+
+class IdentifierIndex(object):
+    """An in-memory index from names of objects, like hostnames and IP addresses, to their ids.
+
+    The objects are loaded with a single call the first time the index is
+    used, and loaded again once they are older than ttl seconds. Matching
+    ignores case.
+
+    ::
+
+        >>> index = IdentifierIndex(lambda: mgr.list_instances(mask='id, hostname'), ['hostname'])
+        >>> index.lookup_many(['web01', 'web02'])
+        {'web01': [1234], 'web02': [1235]}
+
+    :param load: function returning the objects to index, each with an id
+    :param list keys: properties to index the objects by
+    :param int ttl: seconds the index is kept, None keeps it until refresh()
+    :param clock: function returning the current time in seconds, defaults to time.time
+    """
+
+    def __init__(self, load, keys, ttl=IDENTIFIER_INDEX_TTL, clock=None):
+        self.load = load
+        self.keys = list(keys)
+        self.cache = TTLCache(ttl=ttl, clock=clock)
+
+    def _index(self):
+        return self.cache.get_or_set('index', lambda: index_ids(self.load(), self.keys))
+
+    def lookup(self, identifier):
+        """Returns the ids of the objects matching identifier, an empty list if there are none."""
+        return match_ids(self._index(), [identifier]).get(identifier, [])
+
+    def lookup_many(self, identifiers):
+        """Returns a dict of identifier to ids, for the identifiers in the index."""
+        return match_ids(self._index(), identifiers)
+
+    def refresh(self):
+        """Loads the objects again the next time the index is used."""
+        self.cache.clear()
+
+
 class UTC(datetime.tzinfo):
     """UTC timezone."""
 
@@ -260,6 +770,66 @@ class UTC(datetime.tzinfo):
         return datetime.timedelta(0)
 
 
+class SQLiteStore(object):
+    """A local SQLite file whose tables are created the first time it is used.
+
+    Subclasses list the statements creating their tables in schema, and the
+    tables themselves in tables. A file written with another format_version
+    is emptied first, so changing the tables only needs a new format_version.
+
+    :param str path: the SQLite file, its directory is created if missing
+    """
+    schema = []
+    tables = ()
+    format_version = 1
+
+    # Whether the connection can only be used by the thread that opened it
+    check_same_thread = True
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        """The SQLite connection, the tables are created on first use."""
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(self.path, check_same_thread=self.check_same_thread)
+            with connection:
+                version = None
+                try:
+                    row = connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+                    version = row and int(row[0])
+                except sqlite3.OperationalError:
+                    pass
+                if version != self.format_version:
+                    for table in ('meta',) + tuple(self.tables):
+                        connection.execute('DROP TABLE IF EXISTS %s' % table)
+                connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+                for statement in self.schema:
+                    connection.execute(statement)
+                connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(self.format_version),))
+                self._create_tables(connection)
+            self._connection = connection
+        return self._connection
+
+    def _create_tables(self, connection):
+        """Creates tables that depend on what the SQLite library supports, called after schema."""
+
+    def close(self):
+        """Closes the SQLite file."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+# The fields of a server is_ready() looks at
+READY_MASK = 'mask[id, provisionDate, lastOperatingSystemReload[id], activeTransaction[id]]'
+
+
 def is_ready(instance, pending=False):
     """Returns True if instance is ready to be used
 
@@ -284,6 +854,49 @@ def is_ready(instance, pending=False):
     return False
 
 
+def wait_for_ready_many(get_instances, instance_ids, limit, delay=10, max_delay=60, pending=False,
+                        progress=None, clock=None, sleep=None):
+    """Waits for many instances to be ready, with one API call per poll.
+
+    Instances that are ready are dropped from the next poll. When a poll
+    finds nothing new the delay grows by half, up to max_delay, and it goes
+    back to delay as soon as an instance becomes ready.
+
+    :param get_instances: function taking a list of IDs and returning those
+                          instances, with the fields is_ready() needs
+    :param list instance_ids: IDs of the instances to wait for
+    :param int limit: the maximum amount of seconds to wait
+    :param int delay: seconds to sleep between the first polls
+    :param int max_delay: the most seconds to sleep between polls
+    :param bool pending: wait for all transactions to finish, see is_ready()
+    :param progress: function called after every poll with the lists of
+                     ready IDs and IDs still being waited on
+    :param clock: function returning the current time, defaults to time.time
+    :param sleep: function sleeping for some seconds, defaults to time.sleep
+    :returns: a dict of {id: True if the instance is ready}
+    """
+    clock = clock or time.time
+    sleep = sleep or time.sleep
+    ready = dict((instance_id, False) for instance_id in instance_ids)
+    waiting = list(ready)
+    until = clock() + limit
+    snooze = None
+    while waiting:
+        finished = set(instance['id'] for instance in get_instances(waiting) if is_ready(instance, pending))
+        for instance_id in finished:
+            ready[instance_id] = True
+        waiting = [instance_id for instance_id in waiting if instance_id not in finished]
+        if progress is not None:
+            progress([instance_id for instance_id in ready if ready[instance_id]], waiting)
+
+        now = clock()
+        if not waiting or now >= until:
+            break
+        snooze = delay if finished or snooze is None else min(snooze * 1.5, max_delay)
+        sleep(min(snooze, until - now))
+    return ready
+
+
 def clean_string(string):
     """Returns a string with all newline and other whitespace garbage removed.
 
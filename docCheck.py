@@ -61,6 +61,7 @@ class Checker():
         ignored = [
             'virtual:capacity',
             'virtual:placementgroup',
+            'order:catalog',
             'object-storage:credential'
         ]
         if command[0] in ignored:
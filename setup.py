@@ -38,6 +38,10 @@ setup(
         'pygments >= 2.0.0',
         'urllib3 >= 1.24'
     ],
+    extras_require={
+        # YAML manifests for slcli order bulk
+        'bulk-yaml': ['pyyaml >= 5.1'],
+    },
     keywords=['softlayer', 'cloud', 'slcli'],
     classifiers=[
         'Environment :: Console',
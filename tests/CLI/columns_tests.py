@@ -0,0 +1,67 @@
+"""
+    SoftLayer.tests.CLI.columns_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+from SoftLayer.CLI import columns
+from SoftLayer.CLI import formatting
+from SoftLayer import testing
+
+
+class CompilePathTests(testing.TestCase):
+
+    def test_single_key(self):
+        get = columns.compile_path(('id',))
+        self.assertEqual(1, get({'id': 1}))
+        self.assertIsNone(get({}))
+
+    def test_nested_keys(self):
+        get = columns.compile_path(('datacenter', 'name'))
+        self.assertEqual('dal13', get({'datacenter': {'name': 'dal13'}}))
+        self.assertIsNone(get({}))
+        self.assertIsNone(get({'datacenter': None}))
+
+    def test_deep_keys(self):
+        get = columns.compile_path(['billingItem', 'orderItem', 'order', 'id'])
+        self.assertEqual(5, get({'billingItem': {'orderItem': {'order': {'id': 5}}}}))
+        self.assertIsNone(get({'billingItem': {'orderItem': None}}))
+
+    def test_callable(self):
+        get = columns.compile_path(lambda data: data['a']['b'])
+        self.assertEqual(1, get({'a': {'b': 1}}))
+        self.assertIsNone(get({}))
+        self.assertIsNone(get({'a': None}))
+
+
+class ColumnFormatterTests(testing.TestCase):
+
+    def setUp(self):
+        self.formatter = columns.ColumnFormatter()
+        self.formatter.add_column(columns.Column('id', ('id',)))
+        self.formatter.add_column(columns.Column('datacenter', ('datacenter', 'name')))
+        self.formatter.add_column(columns.Column('tags', lambda data: ','.join(data['tags']), mask='tags'))
+        self.formatter.add_column(columns.Column('datacenter_id', ('datacenter', 'id')))
+
+    def test_row(self):
+        data = {'id': 1, 'datacenter': {'name': 'dal13', 'id': 3}, 'tags': ['a', 'b']}
+        self.assertEqual([1, 'dal13', 'a,b', 3], list(self.formatter.row(data)))
+
+    def test_rows(self):
+        data = [{'id': 1, 'datacenter': {'name': 'dal13', 'id': 3}, 'tags': ['a']},
+                {'id': 2}]
+        rows = self.formatter.rows(data)
+        self.assertEqual([1, 'dal13', 'a', 3], rows[0])
+        self.assertEqual(2, rows[1][0])
+        for value in rows[1][1:]:
+            self.assertIsInstance(value, formatting.FormattedItem)
+            self.assertIsNone(value.original)
+
+    def test_mask(self):
+        self.assertEqual('id,datacenter[name,id],tags', self.formatter.mask())
+
+    def test_get_formatter(self):
+        validate = columns.get_formatter([columns.Column('dc', ('datacenter', 'name'))])
+        formatter = validate(None, None, 'id,dc,billingItem.id')
+        self.assertEqual(['id', 'dc', 'billingItem.id'], formatter.columns)
+        self.assertEqual('id,datacenter.name,billingItem.id', formatter.mask())
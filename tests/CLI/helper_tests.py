@@ -411,6 +411,72 @@ class TestFormatOutput(testing.TestCase):
         )
 
 
+class TestRenderTable(testing.TestCase):
+
+    def _table(self):
+        t = formatting.Table(['id', 'name', 'value'], title='Things')
+        t.align['name'] = 'l'
+        t.align['value'] = 'r'
+        t.add_row([3, 'three', formatting.FormattedItem(3072, '3G')])
+        t.add_row([1, 'one\nline', formatting.blank()])
+        t.add_row([2, '☃', None])
+        return t
+
+    def _legacy(self, table, fmt):
+        if fmt == 'table':
+            return str(formatting.format_prettytable(table))
+        return str(formatting.format_no_tty(table))
+
+    def test_render_matches_prettytable(self):
+        for fmt in ('table', 'raw'):
+            expected = self._legacy(self._table(), fmt)
+            self.assertEqual(expected, formatting.render_table(self._table(), fmt))
+
+    def test_render_sorted_matches_prettytable(self):
+        for fmt in ('table', 'raw'):
+            for column in ('id', 'name'):
+                legacy_table = self._table()
+                legacy_table.sortby = column
+                table = self._table()
+                table.sortby = column
+                self.assertEqual(self._legacy(legacy_table, fmt), formatting.render_table(table, fmt))
+
+    def test_render_does_not_modify_rows(self):
+        t = self._table()
+        formatting.render_table(t)
+        self.assertEqual('3G', t.rows[0][2].formatted)
+
+    def test_render_table_output(self):
+        t = formatting.Table(['id', 'name'])
+        t.add_row([1, 'a'])
+        t.add_row([22, 'bbb'])
+        self.assertEqual(':....:......:\n'
+                         ': id : name :\n'
+                         ':....:......:\n'
+                         ': 1  :  a   :\n'
+                         ': 22 : bbb  :\n'
+                         ':....:......:', formatting.render_table(t))
+        self.assertEqual('1   a    \n22  bbb  ', formatting.render_table(t, 'raw'))
+
+    def test_render_empty(self):
+        t = formatting.Table(['id'])
+        self.assertEqual(':....:\n: id :\n:....:\n:....:', formatting.render_table(t))
+        self.assertEqual('', formatting.render_table(t, 'raw'))
+
+    def test_render_invalid_row(self):
+        t = formatting.Table(['id', 'name'])
+        t.add_row([1])
+        self.assertRaises(ValueError, formatting.render_table, t)
+
+    def test_iter_render_table_chunks(self):
+        t = formatting.Table(['id'])
+        for i in range(5):
+            t.add_row([i])
+        chunks = list(formatting.iter_render_table(t, chunk_rows=2))
+        self.assertEqual(4, len(chunks))
+        self.assertEqual(formatting.render_table(t), ''.join(chunks))
+
+
 class TestTemplateArgs(testing.TestCase):
 
     def test_no_template_option(self):
@@ -6,11 +6,14 @@
 """
 import json
 import os.path
+import shutil
+import tempfile
 
 import mock
 
 from SoftLayer.CLI.dns import zone_import
 from SoftLayer.CLI import exceptions
+from SoftLayer import SoftLayerAPIError
 from SoftLayer import testing
 
 
@@ -149,50 +152,125 @@ spf  IN TXT "v=spf1 ip4:192.0.2.0/24 ip4:198.51.100.123 a"
 *                      86400    IN A     127.0.0.3
 
 """
-        expected = [{'data': 'ns1.softlayer.com.',
+        expected = [{'data': 'ns1.softlayer.com. support.softlayer.com. 2014052300 7200 600 1728000 43200',
+                     'record': '@',
+                     'type': 'SOA',
+                     'ttl': 86400},
+                    {'data': 'ns1.softlayer.com.',
                      'record': '@',
                      'type': 'NS',
-                     'ttl': '86400'},
+                     'ttl': 86400},
                     {'data': 'ns2.softlayer.com.',
                      'record': '@',
                      'type': 'NS',
-                     'ttl': '86400'},
+                     'ttl': 86400},
+                    {'data': 'test.realtest.com.',
+                     'record': '@',
+                     'type': 'MX',
+                     'mxPriority': 10,
+                     'ttl': 86400},
                     {'data': '127.0.0.1',
                      'record': 'testing',
                      'type': 'A',
-                     'ttl': '86400'},
+                     'ttl': 86400},
                     {'data': '12.12.0.1',
                      'record': 'testing1',
                      'type': 'A',
-                     'ttl': '86400'},
+                     'ttl': 86400},
                     {'data': '1.0.3.4',
                      'record': 'server2',
                      'type': 'A',
-                     'ttl': None},
+                     'ttl': 86400},
                     {'data': 'server2',
                      'record': 'ftp',
                      'type': 'CNAME',
-                     'ttl': None},
+                     'ttl': 86400},
                     {'data': '"This is just a test of the txt record"',
                      'record': 'dev.realtest.com',
                      'type': 'TXT',
-                     'ttl': None},
+                     'ttl': 86400},
+                    {'data': '2001:db8:10::1',
+                     'record': 'dev.realtest.com',
+                     'type': 'AAAA',
+                     'ttl': 86400},
                     {'data': '"v=spf1 ip4:192.0.2.0/24 ip4:198.51.100.123 a"',
                      'record': 'spf',
                      'type': 'TXT',
-                     'ttl': None},
+                     'ttl': 86400},
                     {'data': '127.0.0.2',
                      'record': '*.testing',
                      'type': 'A',
-                     'ttl': '86400'},
+                     'ttl': 86400},
                     {'data': '127.0.0.3',
                      'record': '*',
                      'type': 'A',
-                     'ttl': '86400'}]
+                     'ttl': 86400}]
         zone, records, bad_lines = zone_import.parse_zone_details(zone_file)
         self.assertEqual(zone, 'realtest.com')
         self.assertEqual(records, expected)
-        self.assertEqual(len(bad_lines), 13)
+        self.assertEqual(bad_lines, [])
+
+    def test_parse_zone_file_directives(self):
+        zone_file = """$TTL 1h
+example.com. IN SOA ns1 hostmaster.example.com. (2020010101 1d 2h 4w 1h)
+$ORIGIN example.com.
+www 300 IN A 10.0.0.1
+    IN A 10.0.0.2 ; the owner of the last record
+_sip._tcp 60 IN SRV 10 20 5060 sip
+txt IN TXT "a ; not a comment" ( "b"
+  "c" )
+$ORIGIN sub.example.com.
+alias IN 1d CNAME host
+$TTL 60
+@ IN NS ns1.example.com.
+"""
+        zone, records, bad_lines = zone_import.parse_zone_details(zone_file)
+
+        self.assertEqual(zone, 'example.com')
+        self.assertEqual(bad_lines, [])
+        self.assertEqual([(record['record'], record['type'], record['data'], record['ttl']) for record in records],
+                         [('@', 'SOA', 'ns1 hostmaster.example.com. 2020010101 1d 2h 4w 1h', 3600),
+                          ('www', 'A', '10.0.0.1', 300),
+                          ('www', 'A', '10.0.0.2', 3600),
+                          ('@', 'SRV', 'sip', 60),
+                          ('txt', 'TXT', '"a ; not a comment" "b" "c"', 3600),
+                          ('alias.sub', 'CNAME', 'host.sub.example.com.', 86400),
+                          ('sub', 'NS', 'ns1.example.com.', 60)])
+        self.assertEqual({'service': '_sip', 'protocol': 'tcp', 'priority': 10, 'weight': 20, 'port': 5060},
+                         dict((key, records[3][key]) for key in ('service', 'protocol', 'priority', 'weight', 'port')))
+
+    def test_parse_zone_file_bad_lines(self):
+        zone_file = """www IN A 10.0.0.1
+$ORIGIN example.com.
+bad IN CH A 10.0.0.2
+loc IN LOC 52 22 23.000 N 4 53 32.000 E -2.00m 0.00m 10000m 10m
+other.example.org. IN A 10.0.0.3
+$INCLUDE other.zone
+mx IN MX ten mail
+ok IN A 10.0.0.4
+broken IN TXT ( "x"
+"""
+        zone, records, bad_lines = zone_import.parse_zone_details(zone_file)
+
+        self.assertEqual(zone, 'example.com')
+        self.assertEqual([('ok', '10.0.0.4')], [(record['record'], record['data']) for record in records])
+        self.assertEqual([(1, 'relative name www used before $ORIGIN'),
+                          (3, 'unsupported class CH'),
+                          (4, 'unsupported record type LOC'),
+                          (5, 'other.example.org. is not in example.com.'),
+                          (6, 'unsupported directive $INCLUDE'),
+                          (7, 'ten is not a number'),
+                          (9, 'unbalanced parentheses')],
+                         [(line['line'], line['error']) for line in bad_lines])
+
+    def test_parse_zone_file_streams(self):
+        parser = zone_import.ZoneFileParser('example.com')
+        lines = iter(['$TTL 60', 'a IN A 10.0.0.1', 'b IN A 10.0.0.2'])
+
+        records = parser.parse(lines)
+
+        self.assertEqual('a', next(records)['record'])
+        self.assertEqual(['b IN A 10.0.0.2'], list(lines))
 
     def test_import_zone_dry_run(self):
         path = os.path.join(testing.FIXTURE_PATH, 'realtest.com')
@@ -202,62 +280,131 @@ spf  IN TXT "v=spf1 ip4:192.0.2.0/24 ip4:198.51.100.123 a"
         self.assertIn(
             "Parsed: type=NS, record=@, data=ns1.softlayer.com., ttl=86400",
             result.output)
-        self.assertIn("Unparsed: $TTL 86400", result.output)
+        self.assertIn("Parsed: type=AAAA, record=dev.realtest.com, data=2001:db8:10::1, ttl=86400",
+                      result.output)
+        self.assertNotIn("Unparsed", result.output)
+
+    def test_import_zone_without_origin(self):
+        path = os.path.join(tempfile.mkdtemp(), 'example.com.zone')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as zone_f:
+            zone_f.write("www IN A 10.0.0.1\nloc IN LOC 52 22 23.000 N\n")
+
+        result = self.run_command(['dns', 'import', path, '--dry-run'])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("Unparsed: line 1: www IN A 10.0.0.1 (relative name www used before $ORIGIN)", result.output)
+
+        result = self.run_command(['dns', 'import', path, '--dry-run', '--zone', 'example.com'])
+
+        self.assert_no_fail(result)
+        self.assertIn("Parsed: type=A, record=www, data=10.0.0.1, ttl=None", result.output)
+        self.assertIn("Unparsed: line 2: loc IN LOC 52 22 23.000 N (unsupported record type LOC)", result.output)
 
     def test_import_zone(self):
         path = os.path.join(testing.FIXTURE_PATH, 'realtest.com')
         result = self.run_command(['dns', 'import', path])
 
+        self.assert_no_fail(result)
         self.assertEqual(self.calls('SoftLayer_Dns_Domain', 'createObject'),
                          [])
+        self.assertEqual(self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObject'), [])
 
         calls = self.calls('SoftLayer_Dns_Domain_ResourceRecord',
-                           'createObject')
+                           'createObjects')
         expected_calls = [{'data': 'ns1.softlayer.com.',
                            'host': '@',
                            'domainId': 12345,
                            'type': 'NS',
-                           'ttl': '86400'},
+                           'ttl': 86400},
                           {'data': 'ns2.softlayer.com.',
                            'host': '@',
                            'domainId': 12345,
                            'type': 'NS',
-                           'ttl': '86400'},
+                           'ttl': 86400},
+                          {'data': 'test.realtest.com.',
+                           'host': '@',
+                           'domainId': 12345,
+                           'type': 'MX',
+                           'mxPriority': 10,
+                           'ttl': 86400},
                           {'data': '127.0.0.1',
                            'host': 'testing',
                            'domainId': 12345,
                            'type': 'A',
-                           'ttl': '86400'},
+                           'ttl': 86400},
                           {'data': '12.12.0.1',
                            'host': 'testing1',
                            'domainId': 12345,
                            'type': 'A',
-                           'ttl': '86400'},
+                           'ttl': 86400},
                           {'data': '1.0.3.4',
                            'host': 'server2',
                            'domainId': 12345,
                            'type': 'A',
-                           'ttl': None},
+                           'ttl': 86400},
                           {'data': 'server2',
                            'host': 'ftp',
                            'domainId': 12345,
                            'type': 'CNAME',
-                           'ttl': None},
+                           'ttl': 86400},
                           {'data':
                            '"This is just a test of the txt record"',
                            'host': 'dev.realtest.com',
                            'domainId': 12345,
                            'type': 'TXT',
-                           'ttl': None},
+                           'ttl': 86400},
+                          {'data': '2001:db8:10::1',
+                           'host': 'dev.realtest.com',
+                           'domainId': 12345,
+                           'type': 'AAAA',
+                           'ttl': 86400},
                           {'data': '"v=spf1 ip4:192.0.2.0/24 '
                                    'ip4:198.51.100.123 a -all"',
                            'host': 'spf',
                            'domainId': 12345,
                            'type': 'TXT',
-                           'ttl': None}]
-
-        self.assertEqual(len(calls), len(expected_calls))
-        for call, expected_call in zip(calls, expected_calls):
-            self.assertEqual(call.args[0], expected_call)
+                           'ttl': 86400}]
 
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].args[0], expected_calls)
+        self.assertIn("Created: 10 records", result.output)
         self.assertIn("Finished", result.output)
+
+    def test_import_zone_existing_records(self):
+        mock = self.set_mock('SoftLayer_Dns_Domain', 'getObject')
+        mock.return_value = {'id': 12345, 'name': 'realtest.com', 'resourceRecords': [
+            {'id': 1, 'host': '@', 'type': 'ns', 'data': 'ns1.softlayer.com', 'ttl': 86400},
+            {'id': 2, 'host': 'testing', 'type': 'a', 'data': '127.0.0.1', 'ttl': 900},
+            {'id': 3, 'host': 'server2', 'type': 'a', 'data': '10.0.0.1', 'ttl': 7200},
+            {'id': 4, 'host': 'old', 'type': 'a', 'data': '10.0.0.2', 'ttl': 7200},
+        ]}
+        path = os.path.join(testing.FIXTURE_PATH, 'realtest.com')
+        result = self.run_command(['dns', 'import', path, '--prune'])
+
+        self.assert_no_fail(result)
+        self.assertIn("Plan: 7 to create, 2 to edit, 1 to delete, 1 unchanged", result.output)
+        self.assert_called_with('SoftLayer_Dns_Domain_ResourceRecord', 'deleteObjects', args=([{'id': 4}],))
+        edits = self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'editObjects')[0].args[0]
+        self.assertEqual([(edit['id'], edit['data'], edit['ttl']) for edit in edits],
+                         [(2, '127.0.0.1', 86400), (3, '1.0.3.4', 86400)])
+        self.assertEqual(7, len(self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects')[0].args[0]))
+
+    def test_import_zone_dry_run_new_zone(self):
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = []
+        path = os.path.join(testing.FIXTURE_PATH, 'realtest.com')
+        result = self.run_command(['dns', 'import', path, '--dry-run'])
+
+        self.assert_no_fail(result)
+        self.assertIn("Plan: 10 to create, 0 to edit, 0 to delete, 0 unchanged", result.output)
+        self.assertEqual(self.calls('SoftLayer_Dns_Domain', 'createObject'), [])
+        self.assertEqual(self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects'), [])
+
+    def test_import_zone_failed_batch(self):
+        mock = self.set_mock('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects')
+        mock.side_effect = SoftLayerAPIError('SoftLayer_Exception', 'Bad record')
+        path = os.path.join(testing.FIXTURE_PATH, 'realtest.com')
+        result = self.run_command(['dns', 'import', path])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("Bad record", result.output)
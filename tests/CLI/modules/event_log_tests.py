@@ -4,9 +4,17 @@
     :license: MIT, see LICENSE for more details.
 """
 
+import gzip
 import json
+import os
+import shutil
+import tempfile
 
+import mock
+
+from SoftLayer import SoftLayerAPIError
 from SoftLayer import testing
+from SoftLayer import utils
 
 
 class EventLogTests(testing.TestCase):
@@ -91,3 +99,115 @@ class EventLogTests(testing.TestCase):
         self.assert_no_fail(result)
         self.assert_called_with('SoftLayer_Event_Log', 'getAllObjects')
         self.assertEqual(8, result.output.count("\n"))
+
+    @mock.patch('time.sleep')
+    def test_get_event_log_follow(self, sleep):
+        sleep.side_effect = KeyboardInterrupt
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        checkpoint = os.path.join(path, 'events.json')
+        command = ['event-log', 'get', '--follow', '-d', '10/18/2017', '--checkpoint', checkpoint,
+                   '--poll-interval', '5']
+
+        result = self.run_command(command)
+
+        self.assert_no_fail(result)
+        logs = [json.loads(line) for line in result.output.splitlines()]
+        self.assertEqual(7, len(logs))
+        self.assertEqual('2017-10-18T09:40:32.238869-05:00', logs[0]['eventCreateDate'])
+        self.assertEqual('2017-10-23T14:22:36.221541-05:00', logs[-1]['eventCreateDate'])
+        sleep.assert_called_with(5)
+
+        # Resuming only prints the event logs after the checkpoint
+        result = self.run_command(command)
+
+        self.assert_no_fail(result)
+        self.assertEqual('Resuming after the event logs of 2017-10-23T14:22:36.221541-05:00\n', result.output)
+        call = self.calls('SoftLayer_Event_Log', 'getAllObjects')[-1]
+        self.assertEqual(['2017-10-23T14:22:36.221541-05:00'], call.filter['eventCreateDate']['options'][0]['value'])
+
+    def test_get_event_log_follow_date_max(self):
+        result = self.run_command(['event-log', 'get', '--follow', '-D', '10/18/2017'])
+
+        self.assertEqual(2, result.exit_code)
+
+    def test_export_event_log(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        output = os.path.join(path, 'events.ndjson.gz')
+
+        result = self.run_command(['event-log', 'export', '-d', '10/17/2017', '-D', '10/19/2017', '-o', output])
+
+        self.assert_no_fail(result)
+        self.assertEqual(2, len(self.calls('SoftLayer_Event_Log', 'getAllObjects')))
+        self.assertIn('10/17/2017 - 10/18/2017: 0 event logs', result.output)
+        self.assertIn('Exported 7 event logs to %s' % output, result.output)
+        with gzip.open(output, 'rt') as output_file:
+            logs = [json.loads(line) for line in output_file]
+        self.assertEqual('2017-10-18T09:40:32.238869-05:00', logs[0]['eventCreateDate'])
+        self.assertEqual('2017-10-23T14:22:36.221541-05:00', logs[-1]['eventCreateDate'])
+
+    def test_export_event_log_bad_date(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        result = self.run_command(['event-log', 'export', '-d', '2017-10-17', '-D', '10/19/2017',
+                                   '-o', os.path.join(path, 'events.ndjson.gz')])
+
+        self.assertEqual(2, result.exit_code)
+
+    def test_index_event_log(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        with mock.patch.dict(os.environ, {'SL_EVENT_LOG_DB': os.path.join(path, 'event_log.db')}):
+            result = self.run_command(['event-log', 'index'])
+            self.assertEqual(2, result.exit_code)
+
+            result = self.run_command(['event-log', 'index', '-d', '10/18/2017', '-D', '10/19/2017'])
+            self.assert_no_fail(result)
+            self.assertIn('Indexed 7 new event logs, 7 in %s' % os.path.join(path, 'event_log.db'), result.output)
+
+            result = self.run_command(['event-log', 'index'])
+            self.assert_no_fail(result)
+            self.assertIn('Indexed 0 new event logs, 7 in', result.output)
+            self.assertEqual('greaterThanDate', self.calls('SoftLayer_Event_Log', 'getAllObjects')[-1]
+                             .filter['eventCreateDate']['operation'])
+
+            calls = len(self.calls())
+            result = self.run_command(['event-log', 'get', '--local', '-i', '700', '--search', 'ruleId'])
+            self.assert_no_fail(result)
+            self.assertEqual(calls, len(self.calls()))
+
+        # clean_time() only shortens these dates on python 3.7+
+        log_time = '%Y-%m-%dT%H:%M:%S.%f%z'
+        removed = utils.clean_time('2017-10-18T10:42:13.089536-05:00', in_format=log_time)
+        added = utils.clean_time('2017-10-18T10:41:49.802498-05:00', in_format=log_time)
+        self.assertEqual(["Event, Object, Type, Date, Username",
+                          "'Security Group Rule(s) Removed','test_SG','Security Group','%s','user'" % removed,
+                          "'Security Group Rule(s) Added','test_SG','Security Group','%s','user'" % added],
+                         result.output.splitlines())
+
+    @mock.patch('SoftLayer.managers.event_log.time.sleep')
+    def test_index_event_log_failed_day(self, _):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        logs = self.set_mock('SoftLayer_Event_Log', 'getAllObjects')
+
+        def get_logs(call):
+            if call.filter['eventCreateDate']['options'][0]['value'][0].startswith('2017-10-18'):
+                raise SoftLayerAPIError('SoftLayer_Exception', 'Timeout')
+            return []
+        logs.side_effect = get_logs
+
+        with mock.patch.dict(os.environ, {'SL_EVENT_LOG_DB': os.path.join(path, 'event_log.db')}):
+            result = self.run_command(['event-log', 'index', '-d', '10/17/2017', '-D', '10/20/2017'])
+
+        self.assertEqual(2, result.exit_code)
+        self.assertIn('Index the missing days with: slcli event-log index --date-min 10/18/2017 '
+                      '--date-max 10/19/2017', result.exception.message)
+
+    def test_get_event_log_search_without_local(self):
+        result = self.run_command(['event-log', 'get', '--search', 'ruleId'])
+
+        self.assertEqual(2, result.exit_code)
@@ -4,10 +4,15 @@
     :license: MIT, see LICENSE for more details.
 """
 import json
+import os
+import shutil
 import sys
 import tempfile
 
+import mock
+
 from SoftLayer.CLI import exceptions
+from SoftLayer.exceptions import SoftLayerError
 from SoftLayer import testing
 
 
@@ -366,6 +371,148 @@ class OrderTests(testing.TestCase):
         self.assert_no_fail(result)
         self.assert_called_with('SoftLayer_Account', 'getActiveQuotes')
 
+    def test_catalog_sync(self):
+        self.set_mock('SoftLayer_Product_Package', 'getAllObjects').return_value = _get_all_packages()
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = self._get_order_items()
+        self.set_mock('SoftLayer_Product_Package', 'getConfiguration').return_value = []
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        with mock.patch.dict(os.environ, {'SL_CATALOG_DIR': path}):
+            result = self.run_command(['order', 'catalog', 'sync', 'PACKAGE1'])
+            self.assert_no_fail(result)
+            self.assertEqual([{'keyName': 'PACKAGE1', 'status': 'added', 'items': 2}], json.loads(result.output))
+
+            result = self.run_command(['order', 'item-list', 'PACKAGE1', '--offline'])
+            self.assert_no_fail(result)
+            self.assertIn('ITEM2', result.output)
+
+            result = self.run_command(['order', 'catalog', 'sync'])
+            self.assert_no_fail(result)
+            self.assertEqual([{'keyName': 'PACKAGE1', 'status': 'unchanged', 'items': 2}], json.loads(result.output))
+
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+    def test_catalog_sync_empty(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        with mock.patch.dict(os.environ, {'SL_CATALOG_DIR': path}):
+            result = self.run_command(['order', 'catalog', 'sync'])
+
+        self.assertEqual(1, result.exit_code)
+        self.assertIsInstance(result.exception, SoftLayerError)
+
+    def test_price(self):
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = self._get_pricing_items()
+
+        result = self.run_command(['order', 'price', 'PACKAGE', 'wdc07', 'ITEM1', 'ITEM2'])
+
+        self.assert_no_fail(result)
+        self.assertEqual([{'keyName': 'ITEM1', 'priceId': 1111, 'hourly': 0.04, 'monthly': 120.0, 'setup': 0.0},
+                          {'keyName': 'ITEM2', 'priceId': 2222, 'hourly': 0.05, 'monthly': 150.0, 'setup': 0.0},
+                          {'keyName': 'Total', 'priceId': None, 'hourly': 0.09, 'monthly': 270.0, 'setup': 0.0}],
+                         json.loads(result.output))
+        self.assertEqual([], self.calls('SoftLayer_Product_Order', 'verifyOrder'))
+
+    def test_price_choices_verify(self):
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = self._get_pricing_items()
+        order_mock = self.set_mock('SoftLayer_Product_Order', 'verifyOrder')
+        order_mock.return_value = self._get_verified_order_return()
+
+        result = self.run_command(['order', 'price', 'PACKAGE', 'WASHINGTON07', '--choice', 'ITEM1,ITEM2',
+                                   '--billing', 'monthly', '--verify', '--complex-type', 'SoftLayer_Container_Foo'])
+
+        self.assert_no_fail(result)
+        ranking, end = json.JSONDecoder().raw_decode(result.output)
+        self.assertEqual([{'rank': 1, 'hourly': 0.04, 'monthly': 120.0, 'setup': 0.0, 'items': ['ITEM1']},
+                          {'rank': 2, 'hourly': 0.05, 'monthly': 150.0, 'setup': 0.0, 'items': ['ITEM2']}],
+                         ranking)
+        self.assertEqual({'hourly': 0.09, 'monthly': 270.0, 'setup': 0.0}, json.loads(result.output[end:]))
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Order', 'verifyOrder')))
+        order = self.calls('SoftLayer_Product_Order', 'verifyOrder')[0].args[0]
+        self.assertEqual([{'id': 1111}], order['orderContainers'][0]['prices'])
+
+    def test_price_verify_needs_complex_type(self):
+        result = self.run_command(['order', 'price', 'PACKAGE', 'DALLAS13', 'ITEM1', '--verify'])
+
+        self.assertEqual(2, result.exit_code)
+        self.assertIsInstance(result.exception, exceptions.ArgumentError)
+
+    def test_bulk_verify(self):
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = self._get_pricing_items()
+        self.set_mock('SoftLayer_Product_Order', 'verifyOrder').return_value = {
+            'orderContainers': [{'prices': [{'hourlyRecurringFee': '0.04', 'recurringFee': '120'}]}]}
+        manifest = self._write_manifest({
+            'defaults': {'package': 'PACKAGE', 'location': 'DALLAS13', 'domain': 'example.com',
+                         'complex_type': 'SoftLayer_Container_Foo', 'items': ['ITEM1']},
+            'orders': [{'count': 2, 'hostname': 'web{index}'}]})
+
+        result = self.run_command(['order', 'bulk', manifest, '--verify'])
+
+        self.assert_no_fail(result)
+        rows = json.loads(result.output)
+        self.assertEqual(['web1', 'web2', 'Total'], [row['name'] for row in rows])
+        self.assertEqual(0.08, rows[2]['hourly'])
+        self.assertEqual('2 of 2 verified', rows[2]['status'])
+        self.assertEqual(2, len(self.calls('SoftLayer_Product_Order', 'verifyOrder')))
+        self.assertEqual([], self.calls('SoftLayer_Product_Order', 'placeOrder'))
+
+    def test_bulk_place(self):
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = self._get_pricing_items()
+        self.set_mock('SoftLayer_Product_Order', 'verifyOrder').return_value = self._get_verified_order_return()
+        self.set_mock('SoftLayer_Product_Order', 'placeOrder').return_value = {
+            'orderId': 1234, 'orderDetails': {'virtualGuests': [{'id': 100}]}}
+        manifest = self._write_manifest({'orders': [
+            {'package': 'PACKAGE', 'location': 'DALLAS13', 'complex_type': 'SoftLayer_Container_Foo',
+             'items': ['ITEM1', 'ITEM2'], 'hostname': 'web1', 'domain': 'example.com', 'tags': 'web'}]})
+
+        result = self.run_command(['-y', 'order', 'bulk', manifest])
+
+        self.assert_no_fail(result)
+        verified, end = json.JSONDecoder().raw_decode(result.output)
+        self.assertEqual('verified', verified[0]['status'])
+        self.assertEqual([{'name': 'web1', 'orderId': 1234, 'status': 'placed', 'tags': 'done', 'dns': None}],
+                         json.loads(result.output[end:]))
+        self.assert_called_with('SoftLayer_Virtual_Guest', 'setTags', identifier=100, args=('web',))
+
+    def test_bulk_verify_failed(self):
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = self._get_pricing_items()
+        manifest = self._write_manifest({'orders': [
+            {'package': 'PACKAGE', 'location': 'DALLAS13', 'complex_type': 'SoftLayer_Container_Foo',
+             'items': ['ITEM1']},
+            {'package': 'PACKAGE', 'location': 'DALLAS13', 'complex_type': 'SoftLayer_Container_Foo',
+             'items': ['NOT_AN_ITEM']}]})
+
+        result = self.run_command(['-y', 'order', 'bulk', manifest])
+
+        self.assertEqual(2, result.exit_code)
+        self.assertIn('1 of 2 orders failed to verify', result.exception.message)
+        self.assertEqual([], self.calls('SoftLayer_Product_Order', 'placeOrder'))
+
+    def test_bulk_bad_manifest(self):
+        manifest = self._write_manifest({'orders': [{'package': 'PACKAGE'}]})
+
+        result = self.run_command(['order', 'bulk', manifest])
+
+        self.assertEqual(2, result.exit_code)
+        self.assertIn('Order 1 is missing location, items', result.exception.message)
+
+    def _write_manifest(self, manifest):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        manifest_path = os.path.join(path, 'manifest.json')
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        return manifest_path
+
+    def _get_pricing_items(self):
+        items = self._get_order_items()
+        for item, hourly, monthly in zip(items, ('0.04', '0.05'), ('120', '150')):
+            for price in item['prices']:
+                price.update({'hourlyRecurringFee': hourly, 'recurringFee': monthly})
+        return items
+
     def _get_order_items(self):
         item1 = {'keyName': 'ITEM1', 'description': 'description1',
                  'itemCategory': {'categoryCode': 'cat1'},
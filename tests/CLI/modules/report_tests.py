@@ -4,9 +4,14 @@
 
     :license: MIT, see LICENSE for more details.
 """
+from SoftLayer import SoftLayerAPIError
 from SoftLayer import testing
 
 import json
+import mock
+import os
+import shutil
+import tempfile
 
 
 class ReportTests(testing.TestCase):
@@ -194,3 +199,100 @@ class ReportTests(testing.TestCase):
             300,
         )
         self.assertEqual(expected_args, call.args)
+
+    def test_bandwidth_report_checkpoint(self):
+        self.set_mock('SoftLayer_Account', 'getVirtualDedicatedRacks').return_value = []
+        self.set_mock('SoftLayer_Account', 'getHardware').return_value = []
+        guests = self.set_mock('SoftLayer_Account', 'getVirtualGuests')
+        guests.return_value = [{'id': 201, 'metricTrackingObjectId': 201, 'hostname': 'host1'},
+                               {'id': 202, 'metricTrackingObjectId': 202, 'hostname': 'host2'}]
+        summary_data = self.set_mock('SoftLayer_Metric_Tracking_Object', 'getSummaryData')
+        summary_data.side_effect = [SoftLayerAPIError('SoftLayer_Exception', 'Timeout'),
+                                    [{'type': 'publicIn_net_octet', 'counter': 10}]]
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'report.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+        command = ['report', 'bandwidth', '--start=2016-02-04', '--end=2016-03-04', '--workers=1',
+                   '--checkpoint', checkpoint]
+
+        result = self.run_command(command)
+
+        self.assert_no_fail(result)
+        self.assertIn('Unable to get the bandwidth of virtual host1', result.output)
+        self.assertIn('Collected 2 of 2', result.output)
+        rows = json.loads('[' + result.output.split('[', 1)[1].rsplit(']', 1)[0] + ']')
+        self.assertEqual(['host2'], [row['hostname'] for row in rows])
+
+        # Running again only fetches the row that failed
+        summary_data.side_effect = None
+        summary_data.return_value = [{'type': 'publicIn_net_octet', 'counter': 20}]
+        result = self.run_command(command)
+
+        self.assert_no_fail(result)
+        self.assertIn('Resuming with 1 of 2 rows', result.output)
+        self.assertEqual(3, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getSummaryData')))
+        rows = json.loads('[' + result.output.split('[', 1)[1].rsplit(']', 1)[0] + ']')
+        self.assertEqual([('host1', 20), ('host2', 10)], [(row['hostname'], row['public_in']) for row in rows])
+
+        result = self.run_command(['report', 'bandwidth', '--start=2016-01-01', '--checkpoint', checkpoint])
+        self.assertEqual(result.exit_code, 2)
+
+    def test_bandwidth_report_checkpoint_partial_line(self):
+        self.set_mock('SoftLayer_Account', 'getVirtualDedicatedRacks').return_value = []
+        self.set_mock('SoftLayer_Account', 'getHardware').return_value = []
+        self.set_mock('SoftLayer_Account', 'getVirtualGuests').return_value = [
+            {'id': 201, 'metricTrackingObjectId': 201, 'hostname': 'host1'},
+            {'id': 202, 'metricTrackingObjectId': 202, 'hostname': 'host2'}]
+        self.set_mock('SoftLayer_Metric_Tracking_Object', 'getSummaryData').return_value = [
+            {'type': 'publicIn_net_octet', 'counter': 20}]
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'report.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+        with open(checkpoint, 'w') as checkpoint_file:
+            checkpoint_file.write('{"report": "bandwidth", "start": "2016-02-04 00:00:00", '
+                                  '"end": "2016-03-04 00:00:00"}\n'
+                                  '{"key": "virtual:202", "row": ["virtual", "host2", 10, 0, 0, 0, null]}\n'
+                                  '{"key": "virtual:201", "row": ["virt')
+        command = ['report', 'bandwidth', '--start=2016-02-04', '--end=2016-03-04', '--checkpoint', checkpoint]
+
+        result = self.run_command(command)
+
+        self.assert_no_fail(result)
+        self.assertIn('Resuming with 1 of 2 rows', result.output)
+        self.assertEqual(1, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getSummaryData')))
+        with open(checkpoint) as checkpoint_file:
+            self.assertEqual(['virtual:202', 'virtual:201'],
+                             [json.loads(line)['key'] for line in checkpoint_file.readlines()[1:]])
+
+    def test_bandwidth_report_checkpoint_corrupt(self):
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'report.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+        with open(checkpoint, 'w') as checkpoint_file:
+            checkpoint_file.write('{"report": \n{}\n')
+
+        result = self.run_command(['report', 'bandwidth', '--start=2016-02-04', '--checkpoint', checkpoint])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('Unable to read checkpoint', result.exception.message)
+
+    def test_bandwidth_report_cache(self):
+        self.set_mock('SoftLayer_Account', 'getVirtualDedicatedRacks').return_value = []
+        self.set_mock('SoftLayer_Account', 'getHardware').return_value = []
+        guests = self.set_mock('SoftLayer_Account', 'getVirtualGuests')
+        guests.return_value = [{'id': 201, 'metricTrackingObjectId': 201, 'hostname': 'host1'}]
+        summary_data = self.set_mock('SoftLayer_Metric_Tracking_Object', 'getSummaryData')
+        summary_data.return_value = [
+            {'type': 'publicIn_net_octet', 'counter': 10, 'dateTime': '2016-02-04T01:00:00-06:00'}]
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        command = ['report', 'bandwidth', '--start=2016-02-04', '--end=2016-02-05', '--cache']
+
+        with mock.patch.dict(os.environ, {'SL_METRICS_DB': os.path.join(path, 'metrics.db')}):
+            for _ in range(2):
+                result = self.run_command(command)
+                self.assert_no_fail(result)
+                rows = json.loads('[' + result.output.split('[', 1)[1].rsplit(']', 1)[0] + ']')
+                self.assertEqual([('host1', 10)], [(row['hostname'], row['public_in']) for row in rows])
+
+        self.assertEqual(1, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getSummaryData')))
+        self.assert_called_with('SoftLayer_Metric_Tracking_Object', 'getSummaryData', identifier=201,
+                                args=('2016-02-04T00:00:00.00000+00:00', '2016-02-05T00:59:59.00000+00:00',
+                                      mock.ANY, 3600))
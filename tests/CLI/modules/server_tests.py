@@ -129,8 +129,16 @@ class ServerCLITests(testing.TestCase):
         )
 
     def test_detail_empty_allotment(self):
-        mock = self.set_mock('SoftLayer_Hardware_Server', 'getBandwidthAllotmentDetail')
-        mock.return_value = None
+        mock = self.set_mock('SoftLayer_Hardware_Server', 'getObject')
+        mock.return_value = {
+            'id': 100,
+            'processorPhysicalCoreAmount': 2,
+            'memoryCapacity': 2,
+            'bandwidthAllotmentDetail': None,
+            'billingCycleBandwidthUsage': [
+                {'amountIn': '.448', 'amountOut': '.52157', 'type': {'alias': 'PUBLIC_SERVER_BW'}}
+            ],
+        }
         result = self.run_command(['server', 'detail', '100'])
 
         self.assert_no_fail(result)
@@ -140,30 +148,6 @@ class ServerCLITests(testing.TestCase):
         )
 
     def test_detail_drives(self):
-        mock = self.set_mock('SoftLayer_Hardware_Server', 'getHardDrives')
-        mock.return_value = [
-            {
-                "id": 11111,
-                "serialNumber": "z1w4sdf",
-                "hardwareComponentModel": {
-                    "capacity": "1000",
-                    "description": "SATAIII:2000:8300:Constellation",
-                    "id": 111,
-                    "manufacturer": "Seagate",
-                    "name": "Constellation ES",
-                    "hardwareGenericComponentModel": {
-                        "capacity": "1000",
-                        "units": "GB",
-                        "hardwareComponentType": {
-                            "id": 1,
-                            "keyName": "HARD_DRIVE",
-                            "type": "Hard Drive",
-                            "typeParentId": 5
-                        }
-                    }
-                }
-            }
-        ]
         result = self.run_command(['server', 'detail', '100'])
 
         self.assert_no_fail(result)
@@ -172,6 +156,16 @@ class ServerCLITests(testing.TestCase):
         self.assertEqual(output['drives'][0]['Name'], 'Seagate Constellation ES')
         self.assertEqual(output['drives'][0]['Serial #'], 'z1w4sdf')
 
+    def test_detail_single_call(self):
+        result = self.run_command(['server', 'detail', '100'])
+
+        self.assert_no_fail(result)
+        self.assertEqual(len(self.calls('SoftLayer_Hardware_Server', 'getObject')), 1)
+        self.assertEqual(self.calls('SoftLayer_Hardware_Server', 'getHardDrives'), [])
+        self.assertEqual(self.calls('SoftLayer_Hardware_Server', 'getBandwidthAllotmentDetail'), [])
+        self.assertEqual(self.calls('SoftLayer_Hardware_Server', 'getBillingCycleBandwidthUsage'), [])
+        self.assertEqual(self.calls('SoftLayer_Hardware_Server', 'getReverseDomainRecords'), [])
+
     def test_list_servers(self):
         result = self.run_command(['server', 'list', '--tag=openstack'])
 
@@ -272,6 +266,22 @@ class ServerCLITests(testing.TestCase):
         self.assert_called_with('SoftLayer_Hardware_Server', 'rebootDefault',
                                 identifier=12345)
 
+    def test_server_reboot_bulk(self):
+        result = self.run_command(['--really', 'server', 'reboot', '--bulk', '1000,1001', '--hard'])
+
+        self.assert_no_fail(result)
+        self.assertEqual(['done', 'done'], [row['status'] for row in json.loads(result.output)])
+        self.assertEqual([], self.calls('SoftLayer_Account', 'getHardware'))
+        self.assertEqual([1000, 1001], sorted(call.identifier for call in self.calls('SoftLayer_Hardware_Server',
+                                                                                     'rebootHard')))
+
+    def test_server_power_on_bulk(self):
+        result = self.run_command(['--really', 'server', 'power-on', '--bulk', 'hardware-test*'])
+
+        self.assert_no_fail(result)
+        self.assertEqual([1000, 1001], [row['id'] for row in json.loads(result.output)])
+        self.assertEqual(2, len(self.calls('SoftLayer_Hardware_Server', 'powerOn')))
+
     def test_server_reboot_soft(self):
         result = self.run_command(['--really', 'server', 'reboot', '12345',
                                    '--soft'])
@@ -721,6 +731,29 @@ class ServerCLITests(testing.TestCase):
                                 'createObject',
                                 args=createPTRargs)
 
+    @mock.patch('SoftLayer.CLI.formatting.confirm')
+    def test_dns_sync_bulk(self, confirm_mock):
+        confirm_mock.return_value = True
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 12345, 'name': 'test.sftlyr.ws'}]
+        self.set_mock('SoftLayer_Dns_Domain', 'getObject').return_value = {'id': 12345, 'resourceRecords': [
+            {'id': 1, 'host': 'hardware-test1', 'type': 'a', 'data': '172.16.1.100', 'ttl': 7200},
+            {'id': 2, 'host': 'hardware-test2', 'type': 'a', 'data': '10.0.0.1', 'ttl': 7200},
+        ]}
+
+        result = self.run_command(['hw', 'dns-sync', '--bulk', '1000,1001', '-a'])
+
+        # the fixture lists every server, 1003 has no IP address
+        self.assertEqual(result.exit_code, 2)
+        self.assertEqual('DNS sync failed on 1 of 4 servers', result.exception.message)
+        self.assertIn('Plan: 1 to create, 1 to edit, 1 unchanged, for 3 servers', result.output)
+        confirm_mock.assert_called_with('This will update 2 DNS records. Continue?')
+        self.assertEqual([], self.calls('SoftLayer_Hardware_Server', 'getReverseDomainRecords'))
+        edited = self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'editObjects')[0].args[0]
+        self.assertEqual([{'id': 2, 'domainId': 12345, 'host': 'hardware-test2', 'type': 'a', 'data': '172.16.4.94',
+                           'ttl': 7200}], edited)
+        created = self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects')[0].args[0]
+        self.assertEqual(['hardware-bad-memory'], [record['host'] for record in created])
+
     @mock.patch('SoftLayer.CLI.formatting.confirm')
     def test_dns_sync_v6(self, confirm_mock):
         confirm_mock.return_value = True
@@ -26,6 +26,13 @@ class SubnetTests(testing.TestCase):
         result = self.run_command(['subnet', 'list'])
         self.assert_no_fail(result)
 
+    def test_list_columns_mask(self):
+        result = self.run_command(['subnet', 'list', '--columns=id,identifier,hardware'])
+        self.assert_no_fail(result)
+        self.assertEqual(['id', 'identifier', 'hardware'], list(json.loads(result.output)[0].keys()))
+        self.assert_called_with('SoftLayer_Account', 'getSubnets',
+                                mask='mask[id,networkIdentifier,cidr,hardware.id]')
+
     @mock.patch('SoftLayer.CLI.formatting.confirm')
     def test_create_subnet_ipv4(self, confirm_mock):
         confirm_mock.return_value = True
@@ -4,6 +4,8 @@
 
     :license: MIT, see LICENSE for more details.
 """
+import json
+
 import mock
 
 from SoftLayer import testing
@@ -94,3 +96,33 @@ class VlanTests(testing.TestCase):
         click.secho.assert_called_with('Failed to edit the vlan', fg='red')
         self.assert_no_fail(result)
         self.assert_called_with('SoftLayer_Network_Vlan', 'editObject', identifier=100)
+
+    def test_vlan_list(self):
+        result = self.run_command(['vlan', 'list'])
+        self.assert_no_fail(result)
+        self.assertEqual('dal00', json.loads(result.output)[0]['datacenter'])
+
+    def test_vlan_list_blank_values(self):
+        self.set_mock('SoftLayer_Account', 'getNetworkVlans').return_value = [{'id': 1, 'vlanNumber': 1234}]
+
+        result = self.run_command(['--format=table', 'vlan', 'list', '--columns=id,number,datacenter'])
+
+        self.assert_no_fail(result)
+        self.assertNotIn('None', result.output)
+
+    def test_vlan_list_zero_counts(self):
+        self.set_mock('SoftLayer_Account', 'getNetworkVlans').return_value = [
+            {'id': 1, 'hardwareCount': 0, 'virtualGuestCount': 0, 'totalPrimaryIpAddressCount': 0}]
+
+        result = self.run_command(['vlan', 'list', '--columns=id,hardware,virtual_servers,public_ips'])
+
+        self.assert_no_fail(result)
+        self.assertEqual({'id': 1, 'hardware': 0, 'virtual_servers': 0, 'public_ips': 0},
+                         json.loads(result.output)[0])
+
+    def test_vlan_list_columns_mask(self):
+        result = self.run_command(['vlan', 'list', '--columns=id,datacenter,firewall'])
+        self.assert_no_fail(result)
+        self.assertEqual({'id': 1, 'datacenter': 'dal00', 'firewall': 'No'}, json.loads(result.output)[0])
+        self.assert_called_with('SoftLayer_Account', 'getNetworkVlans',
+                                mask='mask[id,primaryRouter.datacenter.name,firewallInterfaces.id]')
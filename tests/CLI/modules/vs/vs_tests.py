@@ -5,12 +5,17 @@
     :license: MIT, see LICENSE for more details.
 """
 import json
+import os
+import shutil
 import sys
+import tempfile
 
 import mock
 
 from SoftLayer.CLI import exceptions
+from SoftLayer.CLI.virt import bandwidth
 from SoftLayer.fixtures import SoftLayer_Virtual_Guest as SoftLayer_Virtual_Guest
+from SoftLayer.managers import metrics
 from SoftLayer import SoftLayerAPIError
 from SoftLayer import SoftLayerError
 from SoftLayer import testing
@@ -206,8 +211,16 @@ class VirtTests(testing.TestCase):
         )
 
     def test_detail_vs_empty_allotment(self):
-        mock = self.set_mock('SoftLayer_Virtual_Guest', 'getBandwidthAllotmentDetail')
-        mock.return_value = None
+        mock = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
+        mock.return_value = {
+            'id': 100,
+            'maxCpu': 2,
+            'maxMemory': 1024,
+            'bandwidthAllotmentDetail': None,
+            'billingCycleBandwidthUsage': [
+                {'amountIn': '.448', 'amountOut': '.52157', 'type': {'alias': 'PUBLIC_SERVER_BW'}}
+            ],
+        }
         result = self.run_command(['vs', 'detail', '100'])
 
         self.assert_no_fail(result)
@@ -217,47 +230,38 @@ class VirtTests(testing.TestCase):
         )
 
     def test_detail_drives_system(self):
-        mock = self.set_mock('SoftLayer_Virtual_Guest', 'getBlockDevices')
-        mock.return_value = [
-            {
-                "createDate": "2018-10-06T04:27:35-06:00",
-                "device": "0",
-                "id": 11111,
-                "mountType": "Disk",
-                "diskImage": {
-                    "capacity": 100,
-                    "description": "adns.vmware.com",
-                    "id": 72222,
-                    "name": "adns.vmware.com",
-                    "units": "GB",
-                }
-            }
-        ]
+        mock = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
+        mock.return_value = {
+            'id': 100,
+            'maxCpu': 2,
+            'maxMemory': 1024,
+            'blockDevices': [
+                {
+                    "createDate": "2018-10-06T04:27:35-06:00",
+                    "device": "0",
+                    "id": 11111,
+                    "mountType": "Disk",
+                    "diskImage": {
+                        "capacity": 100,
+                        "description": "adns.vmware.com",
+                        "id": 72222,
+                        "name": "adns.vmware.com",
+                        "units": "GB",
+                    }
+                },
+                {"device": "2", "mountType": "CD"}
+            ]
+        }
         result = self.run_command(['vs', 'detail', '100'])
 
         self.assert_no_fail(result)
         output = json.loads(result.output)
+        self.assertEqual(len(output['drives']), 1)
         self.assertEqual(output['drives'][0]['Capacity'], '100 GB')
         self.assertEqual(output['drives'][0]['Name'], 'Disk')
         self.assertEqual(output['drives'][0]['Type'], 'System')
 
     def test_detail_drives_swap(self):
-        mock = self.set_mock('SoftLayer_Virtual_Guest', 'getBlockDevices')
-        mock.return_value = [
-            {
-                "device": "1",
-                "id": 22222,
-                "mountType": "Disk",
-                "statusId": 1,
-                "diskImage": {
-                    "capacity": 2,
-                    "description": "6211111-SWAP",
-                    "id": 33333,
-                    "name": "6211111-SWAP",
-                    "units": "GB",
-                }
-            }
-        ]
         result = self.run_command(['vs', 'detail', '100'])
 
         self.assert_no_fail(result)
@@ -266,24 +270,32 @@ class VirtTests(testing.TestCase):
         self.assertEqual(output['drives'][0]['Name'], 'Disk')
         self.assertEqual(output['drives'][0]['Type'], 'Swap')
 
-    def test_detail_vs_dedicated_host_not_found(self):
-        ex = SoftLayerAPIError('SoftLayer_Exception', 'Not found')
-        mock = self.set_mock('SoftLayer_Virtual_DedicatedHost', 'getObject')
-        mock.side_effect = ex
+    def test_detail_vs_dedicated_host(self):
         result = self.run_command(['vs', 'detail', '100'])
         self.assert_no_fail(result)
         self.assertEqual(json.loads(result.output)['dedicated_host_id'], 37401)
-        self.assertIsNone(json.loads(result.output)['dedicated_host'])
+        self.assertEqual(json.loads(result.output)['dedicated_host'], 'test-dedicated')
+        self.assertEqual(self.calls('SoftLayer_Virtual_DedicatedHost', 'getObject'), [])
 
     def test_detail_vs_no_dedicated_host_hostname(self):
-        mock = self.set_mock('SoftLayer_Virtual_DedicatedHost', 'getObject')
-        mock.return_value = {'this_is_a_fudged_Virtual_DedicatedHost': True,
-                             'name_is_not_provided': ''}
+        mock = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
+        mock.return_value = {'id': 100, 'maxCpu': 2, 'maxMemory': 1024,
+                             'dedicatedHost': {'id': 37401, 'name': ''}}
         result = self.run_command(['vs', 'detail', '100'])
         self.assert_no_fail(result)
         self.assertEqual(json.loads(result.output)['dedicated_host_id'], 37401)
         self.assertIsNone(json.loads(result.output)['dedicated_host'])
 
+    def test_detail_vs_single_call(self):
+        result = self.run_command(['vs', 'detail', '100'])
+
+        self.assert_no_fail(result)
+        self.assertEqual(len(self.calls('SoftLayer_Virtual_Guest', 'getObject')), 1)
+        self.assertEqual(self.calls('SoftLayer_Virtual_Guest', 'getBlockDevices'), [])
+        self.assertEqual(self.calls('SoftLayer_Virtual_Guest', 'getBandwidthAllotmentDetail'), [])
+        self.assertEqual(self.calls('SoftLayer_Virtual_Guest', 'getBillingCycleBandwidthUsage'), [])
+        self.assertEqual(len(self.calls('SoftLayer_Virtual_Guest', 'getReverseDomainRecords')), 1)
+
     def test_detail_vs_security_group(self):
         vg_return = SoftLayer_Virtual_Guest.getObject
         sec_group = [
@@ -326,6 +338,12 @@ class VirtTests(testing.TestCase):
         output = json.loads(result.output)
         self.assertEqual(output.get('ptr', None), None)
 
+    def test_detail_vs_ptr(self):
+        result = self.run_command(['vs', 'detail', '100'])
+        self.assert_no_fail(result)
+        output = json.loads(result.output)
+        self.assertEqual(output['ptr'], 'test.softlayer.com.')
+
     def test_create_options(self):
         result = self.run_command(['vs', 'create-options'])
 
@@ -397,6 +415,37 @@ class VirtTests(testing.TestCase):
                                 'createObject',
                                 args=createPTRargs)
 
+    def test_dns_sync_bulk(self):
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 12345, 'name': 'test.sftlyr.ws'}]
+
+        result = self.run_command(['--really', 'vs', 'dns-sync', '--bulk', '100,104'])
+
+        self.assert_no_fail(result)
+        self.assertIn('Plan: 4 to create, 0 to edit, 0 unchanged, for 2 servers', result.output)
+        guests = self.calls('SoftLayer_Account', 'getVirtualGuests')
+        self.assertEqual(1, len(guests))
+        self.assertEqual({'operation': 'in', 'options': [{'name': 'data', 'value': [100, 104]}]},
+                         guests[0].filter['virtualGuests']['id'])
+        self.assert_called_with('SoftLayer_Dns_Domain', 'getObject', identifier=12345)
+        # getReverseDomainRecords only returns the PTR record of the guest it is called on
+        self.assertEqual([100, 104], sorted(call.identifier for call in
+                                            self.calls('SoftLayer_Virtual_Guest', 'getReverseDomainRecords')))
+        self.assertEqual([], self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObject'))
+        created = self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects')[0].args[0]
+        self.assertEqual([('vs-test1', 'a', '172.16.240.2', 12345), ('2', 'ptr', 'vs-test1.test.sftlyr.ws', 123456),
+                          ('vs-test2', 'a', '172.16.240.7', 12345), ('7', 'ptr', 'vs-test2.test.sftlyr.ws', 123456)],
+                         [(record['host'], record['type'], record['data'], record['domainId']) for record in created])
+
+    def test_dns_sync_bulk_no_zone(self):
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = []
+
+        result = self.run_command(['--really', 'vs', 'dns-sync', '--bulk', '100,104', '-a'])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertEqual('DNS sync failed on 2 of 2 servers', result.exception.message)
+        self.assertIn('No DNS zone for test.sftlyr.ws', result.output)
+        self.assertEqual([], self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects'))
+
     @mock.patch('SoftLayer.CLI.formatting.confirm')
     def test_dns_sync_v6(self, confirm_mock):
         confirm_mock.return_value = True
@@ -653,6 +702,57 @@ class VirtTests(testing.TestCase):
         self.assertEqual(result.exit_code, 2)
         self.assertIsInstance(result.exception, exceptions.CLIAbort)
 
+    def test_ready_all_from_file(self):
+        guests = self.set_mock('SoftLayer_Account', 'getVirtualGuests')
+        guests.return_value = [{'id': 100, 'provisionDate': '2017-10-17T11:21:53-07:00'}, {'id': 104}]
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as id_file:
+            id_file.write('100\n# not ready yet\n104\n\n')
+        self.addCleanup(os.remove, id_file.name)
+
+        result = self.run_command(['vs', 'ready', '--all-from-file', id_file.name])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('1 of 2 instances not ready', result.exception.message)
+        self.assertEqual([{'id': 100, 'status': 'READY'}, {'id': 104, 'status': 'NOT READY'}],
+                         json.loads(result.output))
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getVirtualGuests')))
+
+    def test_ready_all_from_file_hostnames(self):
+        guests = self.set_mock('SoftLayer_Account', 'getVirtualGuests')
+        guests.side_effect = [
+            [{'id': 100, 'primaryIpAddress': '172.16.240.2'}],
+            [{'id': 104, 'hostname': 'vs-test2'}],
+            [{'id': 100, 'provisionDate': '2017-10-17T11:21:53-07:00'},
+             {'id': 104, 'provisionDate': '2017-10-17T11:21:53-07:00'}],
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as id_file:
+            id_file.write('172.16.240.2\nvs-test2\n')
+        self.addCleanup(os.remove, id_file.name)
+
+        result = self.run_command(['vs', 'ready', '--all-from-file', id_file.name])
+
+        self.assert_no_fail(result)
+        self.assertEqual([{'id': 100, 'status': 'READY'}, {'id': 104, 'status': 'READY'}], json.loads(result.output))
+        self.assertEqual(3, len(self.calls('SoftLayer_Account', 'getVirtualGuests')))
+
+    def test_ready_all_from_file_not_found(self):
+        guests = self.set_mock('SoftLayer_Account', 'getVirtualGuests')
+        guests.return_value = []
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as id_file:
+            id_file.write('vs-missing\n100\n')
+        self.addCleanup(os.remove, id_file.name)
+
+        result = self.run_command(['vs', 'ready', '--all-from-file', id_file.name])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("Unable to find VS 'vs-missing'", result.exception.message)
+
+    def test_ready_no_identifier(self):
+        result = self.run_command(['vs', 'ready'])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertIsInstance(result.exception, exceptions.ArgumentError)
+
     @mock.patch('time.sleep')
     def test_going_ready(self, _sleep):
         mock = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
@@ -697,6 +797,62 @@ class VirtTests(testing.TestCase):
         result = self.run_command(['vs', 'cancel', '100'])
         self.assert_no_fail(result)
 
+    def test_cancel_bulk(self):
+        delete = self.set_mock('SoftLayer_Virtual_Guest', 'deleteObject')
+        delete.side_effect = [True, SoftLayerAPIError('SoftLayer_Exception', 'Nope'), True]
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'cancel.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(checkpoint))
+
+        result = self.run_command(['--really', 'vs', 'cancel', '--bulk', 'vs-test*,tag:test', '--workers', '1',
+                                   '--checkpoint', checkpoint])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertEqual('cancel failed on 1 of 2 servers', result.exception.message)
+        self.assertEqual([{'id': 100, 'hostname': 'vs-test1', 'status': 'done', 'error': None},
+                          {'id': 104, 'hostname': 'vs-test2', 'status': 'failed',
+                           'error': 'SoftLayerAPIError(SoftLayer_Exception): Nope'}],
+                         json.loads(result.output))
+        guests = self.calls('SoftLayer_Account', 'getVirtualGuests')
+        self.assertEqual(['test'], guests[0].filter['virtualGuests']['tagReferences']['tag']['name']['options'][0]
+                         ['value'])
+
+        # Resuming from the checkpoint only cancels the server that failed
+        result = self.run_command(['--really', 'vs', 'cancel', '--bulk', 'vs-test*', '--checkpoint', checkpoint])
+
+        self.assert_no_fail(result)
+        self.assertEqual(['skipped', 'done'], [row['status'] for row in json.loads(result.output)])
+        deleted = self.calls('SoftLayer_Virtual_Guest', 'deleteObject')
+        self.assertEqual([100, 104, 104], [call.identifier for call in deleted])
+
+    @mock.patch('SoftLayer.CLI.formatting.no_going_back')
+    def test_cancel_bulk_no_confirm(self, confirm_mock):
+        confirm_mock.return_value = False
+
+        result = self.run_command(['vs', 'cancel', '--bulk', 'vs-test*'])
+
+        self.assertEqual(result.exit_code, 2)
+        confirm_mock.assert_called_with(2)
+        self.assertIn('"hostname": "vs-test2"', result.output)
+        self.assertIn('This will cancel 2 servers.', result.output)
+        self.assertEqual([], self.calls('SoftLayer_Virtual_Guest', 'deleteObject'))
+
+    @mock.patch('SoftLayer.CLI.formatting.confirm')
+    def test_power_off_bulk_no_confirm(self, confirm_mock):
+        confirm_mock.return_value = False
+
+        result = self.run_command(['vs', 'power-off', '--bulk', '100,104'])
+
+        self.assertEqual(result.exit_code, 2)
+        confirm_mock.assert_called_with('This will power off 2 servers. Continue?')
+        self.assertEqual([{'id': 100, 'hostname': None}, {'id': 104, 'hostname': None}], json.loads(result.output))
+        self.assertEqual([], self.calls('SoftLayer_Virtual_Guest', 'powerOffSoft'))
+
+    def test_reboot_bulk_no_match(self):
+        result = self.run_command(['--really', 'vs', 'reboot', '--bulk', 'nothing*'])
+
+        self.assertEqual(result.exit_code, 2)
+        self.assertEqual('No servers match nothing*', result.exception.message)
+
     @mock.patch('SoftLayer.CLI.formatting.no_going_back')
     def test_cancel_no_confirm(self, confirm_mock):
         confirm_mock.return_value = False
@@ -790,6 +946,44 @@ class VirtTests(testing.TestCase):
         self.assertEqual(output_summary[1]['Max Date'], date)
         self.assertEqual(output_summary[2]['Max GB'], 0.1172)
         self.assertEqual(output_summary[3]['Sum GB'], 0.0009)
+        self.assertEqual(output_summary[0]['P95 MBps'], 0.3841)
+
+    def test_bandwidth_percentile(self):
+        self.assertEqual(19, bandwidth.percentile(list(range(1, 21)), 95))
+        self.assertEqual(5, bandwidth.percentile([5], 95))
+        self.assertEqual(0, bandwidth.percentile([], 95))
+
+    def test_bandwidth_table_percentile_on_zero_period(self):
+        # One busy hour in twenty, the 95th percentile is one of the idle hours
+        data = [{'dateTime': '2019-05-20T%02d:00:00-06:00' % hour, 'type': 'publicIn_net_octet',
+                 'counter': 3600 * 2 ** 20 if hour == 0 else 0} for hour in range(20)]
+
+        _, sum_table = bandwidth.create_bandwidth_table(data, 3600)
+
+        self.assertEqual(['Pub In', 3.5156, 0.05, 0, 3.5156], sum_table.rows[0][:5])
+        self.assertIsInstance(sum_table.rows[0][3], int)
+
+    def test_bandwidth_vs_cache(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        command = ['vs', 'bandwidth', '100', '--start_date=2019-05-20T00:00:00.00000-06:00',
+                   '--end_date=2019-05-21T00:00:00.00000-06:00', '-q', '--cache']
+
+        with mock.patch.dict(os.environ, {'SL_METRICS_DB': os.path.join(path, 'metrics.db')}), \
+                mock.patch.object(metrics.MetricStore, 'close', autospec=True,
+                                  side_effect=metrics.MetricStore.close) as close:
+            result = self.run_command(command)
+            self.assert_no_fail(result)
+            cached = self.run_command(command)
+            self.assert_no_fail(cached)
+
+        self.assertEqual(result.output, cached.output)
+        self.assertEqual(2, close.call_count)
+        self.assertEqual(json.loads(result.output)[2]['Max GB'], 0.1172)
+        self.assertEqual(1, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getBandwidthData')))
+        self.assert_called_with('SoftLayer_Metric_Tracking_Object', 'getBandwidthData', identifier=1000,
+                                args=('2019-05-20T06:00:00.00000+00:00', '2019-05-21T06:59:59.00000+00:00',
+                                      None, 3600))
 
     def test_vs_storage(self):
         result = self.run_command(
@@ -6,6 +6,8 @@
     :license: MIT, see LICENSE for more details.
 """
 import datetime
+import mock
+
 import SoftLayer
 from SoftLayer import testing
 
@@ -71,6 +73,82 @@ class TestUtils(testing.TestCase):
         }
         self.assertEqual(expected, result)
 
+    def test_filter_matches(self):
+        item = {'keyName': 'RAM_32_GB', 'capacity': '32', 'description': '32 GB RAM',
+                'categories': [{'categoryCode': 'disk0'}, {'categoryCode': 'ram'}]}
+        self.assertTrue(SoftLayer.utils.filter_matches(item, {'keyName': {'operation': 'RAM_32_GB'}}))
+        self.assertTrue(SoftLayer.utils.filter_matches(item, {'description': {'operation': '*= gb'}}))
+        self.assertTrue(SoftLayer.utils.filter_matches(item, {'capacity': {'operation': '>= 16'}}))
+        self.assertTrue(SoftLayer.utils.filter_matches(item, {'categories': {'categoryCode': {'operation': '_= RAM'}}}))
+        self.assertTrue(SoftLayer.utils.filter_matches(
+            item, {'keyName': {'operation': 'in', 'options': [{'name': 'data', 'value': ['RAM_32_GB']}]}}))
+        self.assertFalse(SoftLayer.utils.filter_matches(item, {'keyName': {'operation': '!= RAM_32_GB'}}))
+        self.assertFalse(SoftLayer.utils.filter_matches(item, {'description': {'operation': '^= 64'}}))
+        self.assertFalse(SoftLayer.utils.filter_matches(item, {'missing': {'name': {'operation': 'test'}}}))
+
+    def test_ttl_cache(self):
+        now = [100.0]
+        cache = SoftLayer.utils.TTLCache(ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        self.assertEqual(1, cache.get('a'))
+        self.assertIn('a', cache)
+
+        now[0] += 10
+        self.assertNotIn('a', cache)
+        self.assertEqual('default', cache.get('a', 'default'))
+
+        self.assertEqual(2, cache.get_or_set('b', lambda: 2))
+        self.assertEqual(2, cache.get_or_set('b', lambda: 3))
+        now[0] += 4
+        self.assertEqual(4, cache.age('b'))
+        self.assertEqual(2, cache.pop('b'))
+        self.assertIsNone(cache.age('b'))
+
+    def test_ttl_cache_no_ttl(self):
+        now = [100.0]
+        cache = SoftLayer.utils.TTLCache(clock=lambda: now[0])
+        cache.set('a', 1)
+        now[0] += 10 ** 9
+        self.assertEqual(1, cache.get('a'))
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+
+    def test_wait_for_ready_many(self):
+        now = [0]
+        sleeps = []
+        polls = []
+        states = {
+            1: [{}, {'provisionDate': 'a'}],
+            2: [{}, {}, {}, {}, {'provisionDate': 'a'}],
+            3: [{'provisionDate': 'a', 'activeTransaction': {'id': 5}, 'lastOperatingSystemReload': {'id': 5}}] * 9,
+        }
+
+        def get_instances(ids):
+            polls.append(list(ids))
+            return [dict(states[instance_id].pop(0), id=instance_id) for instance_id in ids]
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        progress = mock.MagicMock()
+        ready = SoftLayer.utils.wait_for_ready_many(get_instances, [1, 2, 3], 60, delay=10, max_delay=20,
+                                                    progress=progress, clock=lambda: now[0], sleep=sleep)
+
+        self.assertEqual({1: True, 2: True, 3: False}, ready)
+        self.assertEqual([[1, 2, 3], [1, 2, 3], [2, 3], [2, 3], [2, 3], [3]], polls)
+        # Back off while nothing is ready, and go back to the delay once something is
+        self.assertEqual([10, 10, 15, 20, 5], sleeps)
+        progress.assert_called_with([1, 2], [3])
+
+    def test_wait_for_ready_many_no_limit(self):
+        get_instances = mock.MagicMock(return_value=[{'id': 1}])
+
+        ready = SoftLayer.utils.wait_for_ready_many(get_instances, [1], 0, sleep=mock.MagicMock())
+
+        self.assertEqual({1: False}, ready)
+        get_instances.assert_called_once_with([1])
+
     def test_timezone(self):
         utc = SoftLayer.utils.UTC()
         time = datetime.datetime(2018, 1, 1, tzinfo=utc)
@@ -105,6 +183,12 @@ class TestNestedDict(testing.TestCase):
         # so you can't assume the same behavior with children
         self.assertRaises(KeyError, lambda: n['test']['not']['nested'])
 
+    def test_from_dict(self):
+        n = SoftLayer.utils.NestedDict.from_dict({'test': {'nested': 1}})
+        n['test']['not']['nested'] = 2
+
+        self.assertEqual({'test': {'nested': 1, 'not': {'nested': 2}}}, n.to_dict())
+
     def test_to_dict(self):
         n = SoftLayer.utils.NestedDict()
         n['test']['test1']['test2']['test3'] = {}
@@ -137,6 +221,37 @@ class TestLookup(testing.TestCase):
         self.assertEqual(val, None)
 
 
+class TestMasks(testing.TestCase):
+
+    def test_mask_tree(self):
+        tree = SoftLayer.utils.mask_tree('mask[id,datacenter.name,tagReferences[id, tag[name]]]')
+        self.assertEqual({'id': {},
+                          'datacenter': {'name': {}},
+                          'tagReferences': {'id': {}, 'tag': {'name': {}}}}, tree)
+
+    def test_mask_tree_invalid(self):
+        for mask in ('id[', 'id..name', 'id,,name', 'id]'):
+            self.assertRaises(ValueError, SoftLayer.utils.mask_tree, mask)
+
+    def test_format_mask_tree(self):
+        tree = {'id': {}, 'datacenter': {'name': {}}, 'tag': {'id': {}, 'name': {}}}
+        self.assertEqual('id,datacenter.name,tag[id,name]', SoftLayer.utils.format_mask_tree(tree))
+
+    def test_merge_masks(self):
+        result = SoftLayer.utils.merge_masks('id,datacenter.name', None, 'mask[id, datacenter.longName]')
+        self.assertEqual('id,datacenter[name,longName]', result)
+
+    def test_merge_masks_keeps_bare_property(self):
+        result = SoftLayer.utils.merge_masks('id,datacenter', 'datacenter.name')
+        self.assertEqual('id,datacenter,datacenter.name', result)
+        result = SoftLayer.utils.merge_masks('datacenter[name,longName]', 'id,datacenter', 'datacenter.id')
+        self.assertEqual('datacenter,datacenter[name,longName,id],id', result)
+
+    def test_merge_masks_type_cast(self):
+        result = SoftLayer.utils.merge_masks('mask(SoftLayer_Hardware_Server)[id]')
+        self.assertEqual('mask(SoftLayer_Hardware_Server)[id]', result)
+
+
 def is_a(string):
     if string == 'a':
         return ['this', 'is', 'a']
@@ -179,3 +294,76 @@ class TestIdentifierMixin(testing.TestCase):
     def test_globalidentifier_upper(self):
         ids = self.fixture.resolve_ids('B534EF96-55C4-4891-B51A-63866411B58E')
         self.assertEqual(ids, ['B534EF96-55C4-4891-B51A-63866411B58E'])
+
+    def test_resolve_many_ids(self):
+        ids = self.fixture.resolve_many_ids(['a', 1234, 'b', 'something', 'a'])
+        self.assertEqual(list(ids.items()), [('a', ['this', 'is', 'a']), (1234, [1234]),
+                                             ('b', ['this', 'is', 'b']), ('something', [])])
+
+    def test_resolve_many_ids_batch(self):
+        batch = mock.MagicMock(return_value={'a': [1]})
+        self.fixture.batch_resolvers = [batch, lambda identifiers: {'b': [2]}]
+
+        ids = self.fixture.resolve_many_ids(['a', 'b', '99'])
+
+        self.assertEqual(dict(ids), {'a': [1], 'b': [2], '99': [99]})
+        batch.assert_called_once_with(['a', 'b'])
+
+    def test_identifier_index(self):
+        records = mock.MagicMock(return_value=[{'id': 1, 'hostname': 'web01', 'ip': '10.0.0.1'},
+                                               {'id': 2, 'hostname': 'WEB01', 'ip': None}])
+        self.fixture._identifier_index_records = records
+        self.fixture.identifier_index_keys = ('hostname', 'ip')
+        self.fixture.enable_identifier_index()
+
+        self.assertEqual(self.fixture.resolve_ids('web01'), [1, 2])
+        self.assertEqual(self.fixture.resolve_ids('10.0.0.1'), [1])
+        self.assertEqual(self.fixture.resolve_ids('a'), ['this', 'is', 'a'])
+        self.assertEqual(dict(self.fixture.resolve_many_ids(['10.0.0.1', 'b'])),
+                         {'10.0.0.1': [1], 'b': ['this', 'is', 'b']})
+        self.assertEqual(1, records.call_count)
+
+    def test_identifier_index_unsupported(self):
+        self.assertRaises(SoftLayer.SoftLayerError, self.fixture.enable_identifier_index)
+        self.assertIsNone(self.fixture.identifier_index)
+
+
+class TestIdentifierIndex(testing.TestCase):
+
+    def test_lookup_expires(self):
+        now = [0]
+        load = mock.MagicMock(side_effect=[[{'id': 1, 'name': 'a'}], [{'id': 2, 'name': 'a'}]])
+        index = SoftLayer.utils.IdentifierIndex(load, ['name'], ttl=60, clock=lambda: now[0])
+
+        self.assertEqual(index.lookup('A'), [1])
+        self.assertEqual(index.lookup_many(['a', 'b']), {'a': [1]})
+        now[0] = 60
+        self.assertEqual(index.lookup('a'), [2])
+        self.assertEqual(2, load.call_count)
+
+    def test_refresh(self):
+        load = mock.MagicMock(return_value=[{'id': 1, 'name': 'a'}])
+        index = SoftLayer.utils.IdentifierIndex(load, ['name'])
+
+        index.lookup('a')
+        index.refresh()
+        index.lookup('a')
+
+        self.assertEqual(2, load.call_count)
+
+    def test_find_ids(self):
+        list_func = mock.MagicMock(side_effect=[[{'id': 1, 'public': '1.1.1.1'}], [{'id': 2, 'private': '2.2.2.2'}]])
+
+        found = SoftLayer.utils.find_ids(list_func, 'things', ['public', 'private'], ['1.1.1.1', '2.2.2.2', '3.3.3.3'])
+
+        self.assertEqual(found, {'1.1.1.1': [1], '2.2.2.2': [2]})
+        everything = SoftLayer.utils.query_filter_in(['1.1.1.1', '2.2.2.2', '3.3.3.3'])
+        list_func.assert_has_calls([
+            mock.call(mask='id, public', filter={'things': {'public': everything}}),
+            mock.call(mask='id, private',
+                      filter={'things': {'private': SoftLayer.utils.query_filter_in(['2.2.2.2', '3.3.3.3'])}}),
+        ])
+
+    def test_query_filter_in(self):
+        self.assertEqual(SoftLayer.utils.query_filter_in(('a', 'b')),
+                         {'operation': 'in', 'options': [{'name': 'data', 'value': ['a', 'b']}]})
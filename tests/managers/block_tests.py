@@ -1043,6 +1043,27 @@ class BlockTests(testing.TestCase):
         self.assert_called_with('SoftLayer_Account', 'getIscsiNetworkStorage')
         self.assertEqual([], result)
 
+    def test_resolve_many_ids(self):
+        mock = self.set_mock('SoftLayer_Account', 'getIscsiNetworkStorage')
+        mock.return_value = [{'id': 100, 'username': 'test'}]
+
+        result = self.block.resolve_many_ids(['test', 'other'])
+
+        self.assertEqual({'test': [100], 'other': []}, dict(result))
+        call = self.calls('SoftLayer_Account', 'getIscsiNetworkStorage')[0]
+        self.assertEqual(SoftLayer.utils.query_filter_in(['test', 'other']),
+                         call.filter['iscsiNetworkStorage']['username'])
+        self.assertEqual('*= BLOCK_STORAGE', call.filter['iscsiNetworkStorage']['storageType']['keyName']['operation'])
+
+    def test_identifier_index(self):
+        mock = self.set_mock('SoftLayer_Account', 'getIscsiNetworkStorage')
+        mock.return_value = [{'id': 100, 'username': 'test'}]
+        self.block.enable_identifier_index()
+
+        self.assertEqual([100], self.block.resolve_ids('test'))
+        self.assertEqual({'test': [100]}, dict(self.block.resolve_many_ids(['test'])))
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getIscsiNetworkStorage')))
+
     def test_refresh_block_depdupe(self):
         result = self.block.refresh_dep_dupe(123, snapshot_id=321)
         self.assertEqual(SoftLayer_Network_Storage.refreshDependentDuplicate, result)
@@ -0,0 +1,215 @@
+"""
+    SoftLayer.tests.managers.bulk_order_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+import SoftLayer
+from SoftLayer.managers import bulk_order
+from SoftLayer import testing
+
+MANIFEST = {
+    'defaults': {
+        'package': 'PUBLIC_CLOUD_SERVER',
+        'location': 'DALLAS13',
+        'complex_type': 'SoftLayer_Container_Product_Order_Virtual_Guest',
+        'domain': 'example.com',
+        'items': ['GUEST_CORE_2', 'RAM_4_GB'],
+    },
+    'orders': [
+        {'count': 2, 'hostname': 'web{index:02d}', 'tags': 'web', 'dns': True},
+        {'hostname': 'db01', 'billing': 'monthly', 'items': ['GUEST_CORE_8', 'RAM_32_GB']},
+    ]
+}
+
+
+class ManifestTests(testing.TestCase):
+
+    def test_expand_manifest(self):
+        orders = bulk_order.expand_manifest(MANIFEST)
+
+        self.assertEqual(['web01', 'web02', 'db01'], [order['name'] for order in orders])
+        self.assertEqual({'virtualGuests': [{'hostname': 'web02', 'domain': 'example.com'}]}, orders[1]['extras'])
+        self.assertEqual(['GUEST_CORE_2', 'RAM_4_GB'], orders[0]['items'])
+        self.assertEqual(['GUEST_CORE_8', 'RAM_32_GB'], orders[2]['items'])
+        self.assertEqual([True, True, False], [order['hourly'] for order in orders])
+        self.assertEqual(['web', 'web', None], [order['tags'] for order in orders])
+        self.assertEqual([True, True, False], [order['dns'] for order in orders])
+
+    def test_expand_manifest_hardware(self):
+        orders = bulk_order.expand_manifest({'orders': [
+            {'package': 'BARE_METAL_SERVER', 'location': 'DALLAS13', 'items': ['OS'], 'count': 2, 'name': 'bm',
+             'complex_type': 'SoftLayer_Container_Product_Order_Hardware_Server'}]})
+
+        self.assertEqual(['bm-1', 'bm-2'], [order['name'] for order in orders])
+        self.assertEqual({}, orders[0]['extras'])
+
+        orders = bulk_order.expand_manifest({'orders': [
+            {'package': 'BARE_METAL_SERVER', 'location': 'DALLAS13', 'items': ['OS'], 'hostname': 'bm',
+             'complex_type': 'SoftLayer_Container_Product_Order_Hardware_Server'}]})
+        self.assertEqual({'hardware': [{'hostname': 'bm', 'domain': None}]}, orders[0]['extras'])
+
+    def test_expand_manifest_errors(self):
+        self.assertRaises(SoftLayer.SoftLayerError, bulk_order.expand_manifest, {'orders': 'nope'})
+        self.assertRaises(SoftLayer.SoftLayerError, bulk_order.expand_manifest,
+                          {'orders': [{'package': 'PACKAGE', 'location': 'DALLAS13'}]})
+        self.assertRaises(SoftLayer.SoftLayerError, bulk_order.expand_manifest,
+                          {'orders': [{'package': 'PACKAGE', 'location': 'DALLAS13', 'items': ['A'], 'colour': 1}]})
+        self.assertRaises(SoftLayer.SoftLayerError, bulk_order.expand_manifest,
+                          {'orders': [{'package': 'PACKAGE', 'location': 'DALLAS13', 'items': ['A'],
+                                       'count': 2, 'hostname': 'same'}]})
+
+    def test_load_manifest(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        json_path = os.path.join(path, 'fleet.json')
+        with open(json_path, 'w') as manifest_file:
+            json.dump(MANIFEST, manifest_file)
+        yaml_path = os.path.join(path, 'fleet.yaml')
+        with open(yaml_path, 'w') as manifest_file:
+            manifest_file.write("orders:\n  - package: PACKAGE\n    location: DALLAS13\n    items: [A, B]\n")
+        bad_path = os.path.join(path, 'bad.json')
+        with open(bad_path, 'w') as manifest_file:
+            manifest_file.write('{')
+
+        self.assertEqual(MANIFEST, bulk_order.load_manifest(json_path))
+        self.assertRaises(SoftLayer.SoftLayerError, bulk_order.load_manifest, bad_path)
+        if bulk_order.yaml is not None:
+            self.assertEqual({'orders': [{'package': 'PACKAGE', 'location': 'DALLAS13', 'items': ['A', 'B']}]},
+                             bulk_order.load_manifest(yaml_path))
+        with mock.patch('SoftLayer.managers.bulk_order.yaml', None):
+            self.assertRaises(SoftLayer.SoftLayerError, bulk_order.load_manifest, yaml_path)
+
+
+class BulkOrderTests(testing.TestCase):
+
+    def set_up(self):
+        self.ordering = mock.MagicMock()
+        self.ordering.generate_order.side_effect = lambda *args, **kwargs: {
+            'orderContainers': [{'packageId': 835, 'prices': [{'id': len(args[2])}]}]}
+        self.bulk = bulk_order.BulkOrderManager(self.client, self.ordering, max_workers=4)
+        self.orders = bulk_order.expand_manifest(MANIFEST)
+
+    def test_generate_orders(self):
+        results = self.bulk.generate_orders(self.orders)
+
+        # The two web servers share the same configuration
+        self.assertEqual(2, self.ordering.generate_order.call_count)
+        self.assertEqual([None, None, None], [result['error'] for result in results])
+        web = results[1]['container']['orderContainers'][0]
+        self.assertEqual([{'hostname': 'web02', 'domain': 'example.com'}], web['virtualGuests'])
+        self.assertEqual(1, web['quantity'])
+        self.assertEqual('web01', results[0]['container']['orderContainers'][0]['virtualGuests'][0]['hostname'])
+
+    def test_generate_orders_error(self):
+        self.ordering.generate_order.side_effect = SoftLayer.SoftLayerError('Item GUEST_CORE_8 does not exist')
+
+        results = self.bulk.generate_orders(self.orders)
+
+        self.assertEqual(2, self.ordering.generate_order.call_count)
+        self.assertEqual(['Item GUEST_CORE_8 does not exist'] * 3, [result['error'] for result in results])
+        self.assertIsNone(results[0]['container'])
+
+    def test_verify_orders(self):
+        verify = self.set_mock('SoftLayer_Product_Order', 'verifyOrder')
+        verify.side_effect = [
+            {'orderContainers': [{'prices': [{'hourlyRecurringFee': '0.1', 'recurringFee': '70'}]}]},
+            SoftLayer.SoftLayerAPIError('SoftLayer_Exception_Order', 'Out of stock'),
+            {'prices': [{'hourlyRecurringFee': '0.5', 'recurringFee': '300', 'setupFee': '1'}]},
+        ]
+        results = self.bulk.generate_orders(self.orders)
+        results[2]['error'] = 'already failed'
+
+        self.bulk.verify_orders(results)
+
+        self.assertEqual(2, len(self.calls('SoftLayer_Product_Order', 'verifyOrder')))
+        self.assertEqual(2, len([result for result in results if result['error']]))
+        verified = [result for result in results if not result['error']]
+        self.assertEqual(1, len(verified))
+        self.assertIn(verified[0]['cost'], [{'hourly': 0.1, 'monthly': 70.0, 'setup': 0.0},
+                                            {'hourly': 0.5, 'monthly': 300.0, 'setup': 1.0}])
+
+    def test_place_and_finish_orders(self):
+        place = self.set_mock('SoftLayer_Product_Order', 'placeOrder')
+        place.side_effect = lambda call: {
+            'orderId': 1234, 'orderDetails': {'virtualGuests': [
+                {'id': 100 + int(call.args[0]['orderContainers'][0]['virtualGuests'][0]['hostname'][-1])}]}}
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 98765}]
+        guest = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
+        guest.side_effect = lambda call: {'id': call.identifier, 'hostname': 'web%02d' % (call.identifier - 100),
+                                          'domain': 'example.com', 'primaryIpAddress': '10.0.0.1'}
+        self.set_mock('SoftLayer_Dns_Domain', 'getResourceRecords').return_value = []
+
+        results = self.bulk.place_orders(self.bulk.generate_orders(self.orders))
+        self.bulk.finish_orders(results)
+
+        self.assertEqual(3, len(self.calls('SoftLayer_Product_Order', 'placeOrder')))
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getDomains')))
+        tagged = sorted(call.identifier for call in self.calls('SoftLayer_Virtual_Guest', 'setTags'))
+        self.assertEqual([101, 102], tagged)
+        self.assertEqual(2, len(self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObject')))
+        self.assertEqual([{'task': 'tags', 'id': 101, 'error': None}, {'task': 'dns', 'id': 101, 'error': None}],
+                         sorted(results[0]['tasks'], key=lambda task: task['task'], reverse=True))
+        self.assertEqual([], results[2]['tasks'])
+
+    def test_finish_orders_no_ip(self):
+        self.set_mock('SoftLayer_Product_Order', 'placeOrder').return_value = {
+            'orderId': 1234, 'orderDetails': {'virtualGuests': [{'id': 101}]}}
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 98765}]
+        self.set_mock('SoftLayer_Virtual_Guest', 'getObject').return_value = {'id': 101, 'hostname': 'web01'}
+
+        results = self.bulk.place_orders(self.bulk.generate_orders(self.orders[:1]))
+        self.bulk.finish_orders(results)
+
+        dns = [task for task in results[0]['tasks'] if task['task'] == 'dns']
+        self.assertEqual('web01 has no IP address yet', dns[0]['error'])
+        self.assertEqual([], self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObject'))
+
+    @mock.patch('SoftLayer.managers.dns.DNSManager.sync_host_record')
+    def test_finish_orders_unexpected_error(self, sync_host_record):
+        place = self.set_mock('SoftLayer_Product_Order', 'placeOrder')
+        place.side_effect = lambda call: {
+            'orderId': 1234, 'orderDetails': {'virtualGuests': [
+                {'id': 100 + int(call.args[0]['orderContainers'][0]['virtualGuests'][0]['hostname'][-1])}]}}
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 98765}]
+        guest = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
+        guest.side_effect = lambda call: {'id': call.identifier, 'hostname': 'web%02d' % (call.identifier - 100),
+                                          'primaryIpAddress': '10.0.0.1'}
+        sync_host_record.side_effect = [ValueError('bad record'), None]
+
+        results = self.bulk.place_orders(self.bulk.generate_orders(self.orders[:2]))
+        self.bulk.finish_orders(results)
+
+        errors = sorted(str(task['error']) for result in results for task in result['tasks']
+                        if task['task'] == 'dns')
+        self.assertEqual(['None', 'ValueError: bad record'], errors)
+        self.assertEqual(2, len(self.calls('SoftLayer_Virtual_Guest', 'setTags')))
+
+    @mock.patch('SoftLayer.managers.vs.VSManager.wait_for_ready_many')
+    def test_finish_orders_wait(self, wait_for_ready_many):
+        place = self.set_mock('SoftLayer_Product_Order', 'placeOrder')
+        place.side_effect = lambda call: {
+            'orderId': 1234, 'orderDetails': {'virtualGuests': [
+                {'id': 100 + int(call.args[0]['orderContainers'][0]['virtualGuests'][0]['hostname'][-1])}]}}
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 98765}]
+        guest = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
+        guest.side_effect = lambda call: {'id': call.identifier, 'hostname': 'web%02d' % (call.identifier - 100),
+                                          'primaryIpAddress': '10.0.0.1' if wait_for_ready_many.called else None}
+        self.set_mock('SoftLayer_Dns_Domain', 'getResourceRecords').return_value = []
+
+        results = self.bulk.place_orders(self.bulk.generate_orders(self.orders[:2]))
+        self.bulk.finish_orders(results, wait=600)
+
+        wait_for_ready_many.assert_called_once_with(mock.ANY, limit=600)
+        self.assertEqual([101, 102], sorted(wait_for_ready_many.call_args[0][0]))
+        self.assertEqual(4, len(self.calls('SoftLayer_Virtual_Guest', 'getObject')))
+        self.assertEqual(2, len(self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObject')))
+        self.assertEqual([None, None], [task['error'] for result in results for task in result['tasks']
+                                        if task['task'] == 'dns'])
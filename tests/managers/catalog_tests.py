@@ -0,0 +1,205 @@
+"""
+    SoftLayer.tests.managers.catalog_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import os
+import shutil
+import tempfile
+
+import SoftLayer
+from SoftLayer.managers import catalog
+from SoftLayer.managers import locations
+from SoftLayer.managers import ordering
+from SoftLayer import testing
+
+PACKAGES = [
+    {'id': 200, 'keyName': 'BARE_METAL_SERVER', 'name': 'Bare Metal Server', 'isActive': 1,
+     'type': {'keyName': 'BARE_METAL_CPU'}, 'itemCount': 2, 'modifyDate': '2019-01-01T00:00:00-06:00'},
+    {'id': 835, 'keyName': 'PUBLIC_CLOUD_SERVER', 'name': 'Public Cloud Server', 'isActive': 1,
+     'type': {'keyName': 'VIRTUAL_SERVER_INSTANCE'}, 'itemCount': 1, 'modifyDate': '2019-01-01T00:00:00-06:00'},
+    {'id': 46, 'keyName': 'OLD_PACKAGE', 'name': 'Old Package', 'isActive': 0,
+     'type': {'keyName': 'BARE_METAL_CPU'}, 'itemCount': 0, 'modifyDate': None},
+]
+
+ITEMS = [
+    {'id': 1, 'keyName': 'RAM_32_GB', 'description': '32 GB RAM', 'capacity': '32',
+     'itemCategory': {'categoryCode': 'ram'},
+     'prices': [{'id': 10, 'locationGroupId': None, 'hourlyRecurringFee': '.1', 'recurringFee': '50',
+                 'categories': [{'categoryCode': 'ram'}]}]},
+    {'id': 2, 'keyName': 'OS_UBUNTU_18_04', 'description': 'Ubuntu 18.04', 'capacity': '0',
+     'itemCategory': {'categoryCode': 'os'}, 'softwareDescription': {'longDescription': 'Ubuntu 18.04-64'},
+     'prices': [{'id': 20, 'locationGroupId': None, 'hourlyRecurringFee': '0', 'recurringFee': '0',
+                 'categories': [{'categoryCode': 'os'}]}]},
+]
+
+PRESETS = [{'id': 1, 'keyName': 'S1270_32GB', 'name': 'S1270 32GB', 'description': 'Small',
+            'prices': [{'id': 10, 'item': {'id': 1, 'keyName': 'RAM_32_GB', 'capacity': '32',
+                                           'itemCategory': {'categoryCode': 'ram'}}}]}]
+RESTRICTED_PRESETS = [{'id': 2, 'keyName': 'PRIVATE_PRESET', 'name': 'Private', 'description': 'Restricted'}]
+REGIONS = [{'description': 'DAL10', 'keyname': 'DALLAS10',
+            'locations': [{'location': {'id': 1, 'name': 'dal10', 'longName': 'Dallas 10'}}]}]
+# Snapshot regions also hold their location the way Product_Package::getObject does
+SNAPSHOT_REGIONS = [dict(REGIONS[0], location=REGIONS[0]['locations'][0])]
+CATEGORIES = [{'id': 1, 'isRequired': 1, 'itemCategory': {'categoryCode': 'ram', 'name': 'RAM'}},
+              {'id': 2, 'isRequired': 0, 'itemCategory': {'categoryCode': 'os', 'name': 'OS'}}]
+
+
+class CatalogTests(testing.TestCase):
+
+    def set_up(self):
+        self.path = tempfile.mkdtemp()
+        self.snapshot = catalog.CatalogSnapshot(self.path)
+        self.catalog = catalog.CatalogManager(self.client, self.snapshot)
+
+        self.set_mock('SoftLayer_Product_Package', 'getAllObjects').return_value = PACKAGES
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = ITEMS
+        self.set_mock('SoftLayer_Product_Package', 'getActivePresets').return_value = PRESETS
+        self.set_mock('SoftLayer_Product_Package', 'getAccountRestrictedActivePresets').return_value = \
+            RESTRICTED_PRESETS
+        self.set_mock('SoftLayer_Product_Package', 'getRegions').return_value = REGIONS
+        self.set_mock('SoftLayer_Product_Package', 'getConfiguration').return_value = CATEGORIES
+
+    def tear_down(self):
+        shutil.rmtree(self.path)
+
+    def test_sync_adds_packages(self):
+        result = self.catalog.sync(['BARE_METAL_SERVER'])
+
+        self.assertEqual([{'keyName': 'BARE_METAL_SERVER', 'status': 'added', 'items': 2}], result)
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+        self.assert_called_with('SoftLayer_Product_Package', 'getItems', identifier=200)
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'index.json')))
+
+        snapshot = catalog.CatalogSnapshot(self.path)
+        self.assertEqual(['BARE_METAL_SERVER'], [package['keyName'] for package in snapshot.list_packages()])
+        package = snapshot.get_package('BARE_METAL_SERVER')
+        self.assertEqual(ITEMS, package['items'])
+        self.assertEqual(PRESETS, package['activePresets'])
+        self.assertEqual(SNAPSHOT_REGIONS, package['regions'])
+        self.assertNotIn('items', snapshot.list_packages()[0])
+
+    def test_sync_skips_unchanged_packages(self):
+        self.catalog.sync(['BARE_METAL_SERVER'])
+        result = self.catalog.sync()
+
+        self.assertEqual([{'keyName': 'BARE_METAL_SERVER', 'status': 'unchanged', 'items': 2}], result)
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+    def test_sync_updates_changed_packages(self):
+        self.catalog.sync(['BARE_METAL_SERVER', 'PUBLIC_CLOUD_SERVER'])
+        changed = [dict(package) for package in PACKAGES]
+        changed[0]['itemCount'] = 3
+        self.set_mock('SoftLayer_Product_Package', 'getAllObjects').return_value = changed
+
+        result = self.catalog.sync()
+
+        statuses = dict((package['keyName'], package['status']) for package in result)
+        self.assertEqual({'BARE_METAL_SERVER': 'updated', 'PUBLIC_CLOUD_SERVER': 'unchanged'}, statuses)
+        self.assertEqual(3, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+    def test_sync_force(self):
+        self.catalog.sync(['BARE_METAL_SERVER'])
+        result = self.catalog.sync(force=True)
+
+        self.assertEqual('updated', result[0]['status'])
+        self.assertEqual(2, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+    def test_sync_all(self):
+        result = self.catalog.sync(all_packages=True)
+
+        self.assertEqual(['BARE_METAL_SERVER', 'PUBLIC_CLOUD_SERVER'], [package['keyName'] for package in result])
+
+    def test_sync_removed_package(self):
+        self.catalog.sync(['BARE_METAL_SERVER', 'PUBLIC_CLOUD_SERVER'])
+        self.set_mock('SoftLayer_Product_Package', 'getAllObjects').return_value = PACKAGES[:1]
+
+        result = self.catalog.sync()
+
+        self.assertEqual('removed', result[1]['status'])
+        self.assertFalse(catalog.CatalogSnapshot(self.path).has_package('PUBLIC_CLOUD_SERVER'))
+
+    def test_sync_unknown_package(self):
+        self.assertRaises(SoftLayer.SoftLayerError, self.catalog.sync, ['NOPE'])
+
+    def test_sync_empty_snapshot(self):
+        self.assertRaises(SoftLayer.SoftLayerError, self.catalog.sync)
+
+    def test_snapshot_ignores_other_versions(self):
+        self.catalog.sync(['BARE_METAL_SERVER'])
+        with open(os.path.join(self.path, 'index.json'), 'w') as index_file:
+            index_file.write('{"version": 0, "packages": {"BARE_METAL_SERVER": {}}}')
+
+        self.assertEqual([], catalog.CatalogSnapshot(self.path).list_packages())
+
+    def test_ordering_reads_snapshot(self):
+        self.catalog.sync(['BARE_METAL_SERVER'])
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = []
+        manager = ordering.OrderingManager(self.client, catalog=catalog.CatalogSnapshot(self.path))
+
+        items = manager.list_items('BARE_METAL_SERVER', filter={'items': {'description': {'operation': '*= ubuntu'}}})
+        presets = manager.list_presets('BARE_METAL_SERVER')
+        categories = manager.list_categories('BARE_METAL_SERVER')
+        locations = manager.package_locations('BARE_METAL_SERVER')
+        package = manager.get_package_by_key('BARE_METAL_SERVER', mask='id')
+        packages = manager.list_packages(filter={'type': {'keyName': {'operation': 'BARE_METAL_CPU'}}})
+
+        self.assertEqual([ITEMS[1]], items)
+        self.assertEqual(PRESETS + RESTRICTED_PRESETS, presets)
+        self.assertEqual(CATEGORIES, categories)
+        self.assertEqual(SNAPSHOT_REGIONS, locations)
+        self.assertEqual(200, package['id'])
+        self.assertEqual(['BARE_METAL_SERVER'], [package['keyName'] for package in packages])
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+    def test_snapshot_regions_have_get_object_shape(self):
+        host_package = dict(PACKAGES[0], id=813, keyName='DEDICATED_HOST', name='Dedicated Host')
+        self.set_mock('SoftLayer_Product_Package', 'getAllObjects').return_value = PACKAGES + [host_package]
+        self.catalog.sync(['BARE_METAL_SERVER', 'DEDICATED_HOST'])
+        manager = ordering.OrderingManager(self.client, catalog=catalog.CatalogSnapshot(self.path), offline=True)
+        calls = len(self.calls())
+
+        hardware_options = SoftLayer.HardwareManager(self.client, ordering_manager=manager).get_create_options()
+        host_options = SoftLayer.DedicatedHostManager(self.client, ordering_manager=manager).get_create_options()
+        region = locations.find_region(manager.get_package_by_key('BARE_METAL_SERVER')['regions'], 'dal10')
+
+        expected = [{'name': 'Dallas 10', 'key': 'dal10'}]
+        self.assertEqual(expected, hardware_options['locations'])
+        self.assertEqual(expected, host_options['locations'])
+        self.assertEqual('DALLAS10', region['keyname'])
+        self.assertEqual(calls, len(self.calls()))
+
+    def test_price_order_offline_preset(self):
+        self.catalog.sync(['BARE_METAL_SERVER'])
+        manager = ordering.OrderingManager(self.client, catalog=catalog.CatalogSnapshot(self.path), offline=True)
+        calls = len(self.calls())
+
+        result = manager.price_order('BARE_METAL_SERVER', 'DALLAS10', ['OS_UBUNTU_18_04'], preset_keyname='S1270_32GB')
+
+        self.assertEqual(['OS_UBUNTU_18_04'], result['items'])
+        self.assertEqual([10, 20], [price['priceId'] for price in result['prices']])
+        self.assertEqual(50, result['monthly'])
+        self.assertEqual(calls, len(self.calls()))
+
+    def test_ordering_offline(self):
+        self.catalog.sync(['BARE_METAL_SERVER'])
+        manager = ordering.OrderingManager(self.client, catalog=catalog.CatalogSnapshot(self.path), offline=True)
+        empty = ordering.OrderingManager(self.client, catalog=catalog.CatalogSnapshot(os.path.join(self.path, 'no')),
+                                         offline=True)
+
+        calls = len(self.calls())
+
+        self.assertRaises(SoftLayer.SoftLayerError, manager.list_items, 'PUBLIC_CLOUD_SERVER')
+        self.assertRaises(SoftLayer.SoftLayerError, empty.list_packages)
+        self.assertEqual(calls, len(self.calls()))
+
+    def test_ordering_falls_back_to_api(self):
+        manager = ordering.OrderingManager(self.client, catalog=catalog.CatalogSnapshot(self.path))
+
+        items = manager.list_items('BARE_METAL_SERVER')
+
+        self.assertEqual(ITEMS, items)
+        self.assert_called_with('SoftLayer_Product_Package', 'getAllObjects',
+                                filter={'keyName': {'operation': 'BARE_METAL_SERVER'}})
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
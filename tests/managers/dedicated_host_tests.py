@@ -395,6 +395,12 @@ class DedicatedHostTests(testing.TestCase):
         self.assertRaises(exceptions.SoftLayerError,
                           self.dedicated_host._get_location, regions, 'dal10')
 
+    def test_get_location_by_keyname(self):
+        regions = [{'location': {'location': {'name': 'dal13'}}}]
+
+        self.assertEqual(regions[0], self.dedicated_host._get_location(regions, 'DALLAS13'))
+        self.assertEqual(regions[0], self.dedicated_host._get_location(regions, 'Dallas 13'))
+
     def test_get_create_options(self):
         self.dedicated_host._get_package = mock.MagicMock()
         self.dedicated_host._get_package.return_value = self._get_package()
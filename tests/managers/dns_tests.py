@@ -55,6 +55,24 @@ class DNSTests(testing.TestCase):
         self.assert_called_with('SoftLayer_Account', 'getDomains',
                                 filter=_filter)
 
+    def test_resolve_many_zone_names(self):
+        mock = self.set_mock('SoftLayer_Account', 'getDomains')
+        mock.return_value = [{'id': 12345, 'name': 'example.com'}, {'id': 12346, 'name': 'example.org'}]
+
+        res = self.dns_client.resolve_many_ids(['example.com', 'example.org', 'example.net'])
+
+        self.assertEqual(dict(res), {'example.com': [12345], 'example.org': [12346], 'example.net': []})
+        names = ['example.com', 'example.org', 'example.net']
+        _filter = {'domains': {'name': SoftLayer.utils.query_filter_in(names)}}
+        self.assert_called_with('SoftLayer_Account', 'getDomains', filter=_filter, mask='mask[id, name]')
+
+    def test_identifier_index(self):
+        self.dns_client.enable_identifier_index()
+
+        self.assertEqual([12345], self.dns_client.resolve_ids('example.com'))
+        self.assertEqual([12345], self.dns_client.resolve_ids('example.com'))
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getDomains')))
+
     def test_create_zone(self):
         res = self.dns_client.create_zone('example.com', serial='2014110201')
 
@@ -203,3 +221,152 @@ class DNSTests(testing.TestCase):
         self.assert_called_with('SoftLayer_Dns_Domain', 'getResourceRecords',
                                 identifier=12345,
                                 filter=_filter)
+
+    def test_plan_zone_sync(self):
+        mock = self.set_mock('SoftLayer_Dns_Domain', 'getObject')
+        mock.return_value = {'id': 12345, 'resourceRecords': [
+            {'id': 1, 'host': '@', 'type': 'soa', 'data': 'ns1.softlayer.com.', 'ttl': 86400},
+            {'id': 2, 'host': 'www', 'type': 'cname', 'data': 'web.example.com', 'ttl': 900},
+            {'id': 3, 'host': 'web', 'type': 'a', 'data': '10.0.0.1', 'ttl': 900},
+            {'id': 4, 'host': 'mail', 'type': 'mx', 'data': 'mx1.example.com', 'ttl': 900, 'mxPriority': 10},
+            {'id': 5, 'host': 'old', 'type': 'a', 'data': '10.0.0.9', 'ttl': 900},
+        ]}
+        records = [
+            {'host': 'www', 'type': 'CNAME', 'data': 'WEB.example.com.', 'ttl': '900'},
+            {'host': 'web', 'type': 'A', 'data': '10.0.0.1', 'ttl': 3600},
+            {'host': 'web', 'type': 'A', 'data': '10.0.0.1', 'ttl': 3600},
+            {'host': 'mail', 'type': 'MX', 'data': 'mx1.example.com', 'ttl': 900, 'mxPriority': 20},
+            {'host': 'api', 'type': 'A', 'data': '10.0.0.2'},
+        ]
+
+        plan = self.dns_client.plan_zone_sync(12345, records)
+
+        self.assert_called_with('SoftLayer_Dns_Domain', 'getObject', identifier=12345, mask='mask[resourceRecords]')
+        self.assertEqual([2], [record['id'] for record in plan['unchanged']])
+        self.assertEqual([(3, 3600, None), (4, 900, 20)],
+                         [(record['id'], record['ttl'], record.get('mxPriority')) for record in plan['edit']])
+        self.assertEqual([{'host': 'api', 'type': 'A', 'data': '10.0.0.2', 'ttl': 7200, 'domainId': 12345}],
+                         plan['create'])
+        self.assertEqual([], plan['delete'])
+
+        plan = self.dns_client.plan_zone_sync(12345, records, prune=True)
+        self.assertEqual([5], [record['id'] for record in plan['delete']])
+        self.assertNotIn(1, [record['id'] for record in plan['edit'] + plan['delete']])
+
+    def test_plan_zone_sync_duplicates(self):
+        mock = self.set_mock('SoftLayer_Dns_Domain', 'getObject')
+        mock.return_value = {'id': 12345, 'resourceRecords': [
+            {'id': 1, 'host': 'web', 'type': 'a', 'data': '10.0.0.1', 'ttl': 900},
+            {'id': 2, 'host': 'web', 'type': 'a', 'data': '10.0.0.1', 'ttl': 900},
+            {'id': 3, 'host': 'WEB', 'type': 'a', 'data': '10.0.0.1', 'ttl': 900},
+        ]}
+        records = [{'host': 'web', 'type': 'a', 'data': '10.0.0.1', 'ttl': 900}]
+
+        plan = self.dns_client.plan_zone_sync(12345, records)
+        self.assertEqual([1], [record['id'] for record in plan['unchanged']])
+        self.assertEqual([], plan['delete'])
+
+        plan = self.dns_client.plan_zone_sync(12345, records, prune=True)
+        self.assertEqual([1], [record['id'] for record in plan['unchanged']])
+        self.assertEqual([2, 3], [record['id'] for record in plan['delete']])
+        self.assertEqual([], plan['create'] + plan['edit'])
+
+    def test_plan_zone_sync_new_zone(self):
+        plan = self.dns_client.plan_zone_sync(None, [{'host': '_sip._tcp', 'type': 'SRV', 'data': 'sip.example.com',
+                                                      'ttl': 60, 'port': 5060}])
+
+        self.assertEqual(self.calls('SoftLayer_Dns_Domain', 'getObject'), [])
+        self.assertEqual('SoftLayer_Dns_Domain_ResourceRecord_SrvType', plan['create'][0]['complexType'])
+        self.assertEqual(5060, plan['create'][0]['port'])
+
+    def test_apply_zone_sync(self):
+        plan = {'create': [{'host': 'h%d' % num, 'type': 'a', 'data': '10.0.0.%d' % num} for num in range(5)],
+                'edit': [{'id': 7, 'host': 'www', 'type': 'a', 'data': '10.0.1.1'}],
+                'delete': [{'id': 8, 'host': 'old', 'type': 'a', 'data': '10.0.1.2'}],
+                'unchanged': []}
+
+        results = self.dns_client.apply_zone_sync(plan, batch_size=2, max_workers=2)
+
+        self.assertEqual(['delete', 'edit', 'create', 'create', 'create'], [result['action'] for result in results])
+        self.assertEqual([2, 2, 1], [len(result['records']) for result in results[2:]])
+        self.assert_called_with('SoftLayer_Dns_Domain_ResourceRecord', 'deleteObjects', args=([{'id': 8}],))
+        self.assert_called_with('SoftLayer_Dns_Domain_ResourceRecord', 'editObjects', args=(plan['edit'],))
+        self.assertEqual(3, len(self.calls('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects')))
+
+    def test_apply_zone_sync_failed(self):
+        mock = self.set_mock('SoftLayer_Dns_Domain_ResourceRecord', 'createObjects')
+        mock.side_effect = SoftLayer.SoftLayerAPIError('SoftLayer_Exception', 'Bad record')
+        plan = {'create': [{'host': 'a', 'type': 'a', 'data': '10.0.0.1'}], 'edit': [], 'delete': [], 'unchanged': []}
+
+        results = self.dns_client.apply_zone_sync(plan)
+
+        self.assertEqual([{'action': 'create', 'records': plan['create'],
+                           'error': 'SoftLayerAPIError(SoftLayer_Exception): Bad record'}], results)
+
+    def test_plan_server_sync(self):
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 12345, 'name': 'example.com'}]
+        self.set_mock('SoftLayer_Dns_Domain', 'getObject').return_value = {'id': 12345, 'resourceRecords': [
+            {'id': 10, 'host': 'web1', 'type': 'a', 'data': '10.0.0.5', 'ttl': 7200},
+            {'id': 11, 'host': 'web2', 'type': 'a', 'data': '10.0.0.1', 'ttl': 7200},
+            {'id': 12, 'host': 'dup', 'type': 'a', 'data': '10.0.1.1', 'ttl': 7200},
+            {'id': 13, 'host': 'dup', 'type': 'a', 'data': '10.0.1.2', 'ttl': 7200},
+        ]}
+        reverse = self.set_mock('SoftLayer_Virtual_Guest', 'getReverseDomainRecords')
+        reverse.return_value = [{'id': 900, 'resourceRecords': [
+            {'id': 50, 'host': '5', 'type': 'ptr', 'data': 'web1.example.com.', 'ttl': 7200}]}]
+        servers = [
+            {'id': 1, 'hostname': 'web1', 'domain': 'example.com', 'fullyQualifiedDomainName': 'web1.example.com',
+             'primaryIpAddress': '10.0.0.5'},
+            {'id': 2, 'hostname': 'web2', 'domain': 'example.com', 'fullyQualifiedDomainName': 'web2.example.com',
+             'primaryIpAddress': '10.0.0.6'},
+            {'id': 3, 'hostname': 'dup', 'domain': 'example.com', 'fullyQualifiedDomainName': 'dup.example.com',
+             'primaryIpAddress': '10.0.0.7'},
+            {'id': 4, 'hostname': 'new', 'domain': 'example.org', 'fullyQualifiedDomainName': 'new.example.org',
+             'primaryIpAddress': '10.0.1.8'},
+        ]
+
+        plan = self.dns_client.plan_server_sync(servers, 'Virtual_Guest', ttl=7200)
+
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getDomains')))
+        self.assertEqual(1, len(self.calls('SoftLayer_Dns_Domain', 'getObject')))
+        self.assertEqual([1, 2, 3, 4], sorted(call.identifier for call in
+                                              self.calls('SoftLayer_Virtual_Guest', 'getReverseDomainRecords')))
+        self.assertEqual([10, 50], [record['id'] for record in plan['unchanged']])
+        self.assertEqual([{'id': 11, 'domainId': 12345, 'host': 'web2', 'type': 'a', 'data': '10.0.0.6',
+                           'ttl': 7200}], plan['edit'])
+        self.assertEqual([('6', 'ptr', 'web2.example.com', 900)],
+                         [(record['host'], record['type'], record['data'], record['domainId'])
+                          for record in plan['create']])
+        self.assertEqual([{'id': 3, 'name': 'dup.example.com', 'error': 'Found 2 A records for dup'},
+                          {'id': 4, 'name': 'new.example.org', 'error': 'No DNS zone for example.org'}],
+                         plan['errors'])
+        self.assertEqual([], plan['delete'])
+
+    def test_plan_server_sync_ptr_same_network(self):
+        reverse = self.set_mock('SoftLayer_Hardware_Server', 'getReverseDomainRecords')
+        reverse.side_effect = lambda call: [{'id': 900, 'resourceRecords': [
+            {'id': 50 + call.identifier, 'host': str(4 + call.identifier), 'type': 'ptr',
+             'data': 'web%d.example.com.' % call.identifier, 'ttl': 7200}]}]
+        servers = [{'id': 1, 'hostname': 'web1', 'fullyQualifiedDomainName': 'web1.example.com',
+                    'primaryIpAddress': '10.0.0.5'},
+                   {'id': 2, 'hostname': 'web2', 'fullyQualifiedDomainName': 'web2.example.com',
+                    'primaryIpAddress': '10.0.0.6'}]
+
+        plan = self.dns_client.plan_server_sync(servers, 'Hardware_Server', a_record=False)
+
+        self.assertEqual([51, 52], sorted(record['id'] for record in plan['unchanged']))
+        self.assertEqual([], plan['create'] + plan['edit'] + plan['errors'])
+
+    def test_plan_server_sync_aaaa(self):
+        self.set_mock('SoftLayer_Account', 'getDomains').return_value = [{'id': 12345, 'name': 'example.com'}]
+        servers = [{'id': 1, 'hostname': 'web1', 'domain': 'example.com', 'primaryIpAddress': '10.0.0.5',
+                    'primaryNetworkComponent': {'primaryVersion6IpAddressRecord': {'ipAddress': '2001:db8::1'}}},
+                   {'id': 2, 'hostname': 'web2', 'domain': 'example.com', 'primaryIpAddress': '10.0.0.6'}]
+
+        plan = self.dns_client.plan_server_sync(servers, 'Hardware_Server', a_record=False, aaaa_record=True,
+                                                ptr=False)
+
+        self.assertEqual([], self.calls('SoftLayer_Hardware_Server', 'getReverseDomainRecords'))
+        self.assertEqual([('web1', 'aaaa', '2001:db8::1')],
+                         [(record['host'], record['type'], record['data']) for record in plan['create']])
+        self.assertEqual([{'id': 2, 'name': 'web2', 'error': 'No ipv6 address'}], plan['errors'])
@@ -4,9 +4,19 @@
 
     :license: MIT, see LICENSE for more details.
 """
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
 import SoftLayer
 from SoftLayer import fixtures
+from SoftLayer.fixtures import SoftLayer_Event_Log
+from SoftLayer.managers import event_log
 from SoftLayer import testing
+from SoftLayer import utils
 
 
 class EventLogTests(testing.TestCase):
@@ -251,3 +261,221 @@ class EventLogTests(testing.TestCase):
         result = self.event_log.build_filter(None, None, None, None, 'CCI', None)
 
         self.assertEqual(expected, result)
+
+    def test_event_log_time(self):
+        self.assertEqual((1508786556, 221541), event_log.event_log_time('2017-10-23T14:22:36.221541-05:00'))
+        self.assertEqual((1508768556, 0), event_log.event_log_time('2017-10-23T14:22:36+00:00'))
+        self.assertRaises(SoftLayer.SoftLayerError, event_log.event_log_time, '10/23/2017')
+
+    def test_get_event_logs_since(self):
+        since = '2017-10-18T10:42:11.679736-05:00'
+        seen = [event_log.event_log_key(SoftLayer_Event_Log.getAllObjects[4])]
+
+        result = self.event_log.get_event_logs_since(since, seen, {'objectName': {'operation': 'CCI'}})
+
+        self.assertEqual(['59e7765515e28', '100'], [log['traceId'] for log in result])
+        expected_filter = {
+            'objectName': {'operation': 'CCI'},
+            'eventCreateDate': {'operation': 'greaterThanDate', 'options': [{'name': 'date', 'value': [since]}]}
+        }
+        self.assert_called_with('SoftLayer_Event_Log', 'getAllObjects', filter=expected_filter,
+                                limit=event_log.FOLLOW_PAGE_SIZE)
+
+    def test_follow_event_logs(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        checkpoint_path = os.path.join(path, 'events.json')
+        logs = SoftLayer_Event_Log.getAllObjects
+        newer = dict(logs[0], eventCreateDate='2017-10-24T00:00:00.000000-05:00', traceId='101')
+        self.set_mock('SoftLayer_Event_Log', 'getAllObjects').side_effect = [list(logs), list(logs) + [newer]]
+        sleep = mock.MagicMock(side_effect=[None, KeyboardInterrupt])
+
+        followed = []
+
+        def follow():
+            for log in self.event_log.follow_event_logs(checkpoint=event_log.EventLogCheckpoint(checkpoint_path),
+                                                        since='2017-10-18T10:42:11.679736-05:00', sleep=sleep):
+                followed.append(log['traceId'])
+
+        self.assertRaises(KeyboardInterrupt, follow)
+
+        self.assertEqual(['59e77653a1e5f', '59e7765515e28', '100', '101'], followed)
+        sleep.assert_called_with(60)
+        self.assertEqual('2017-10-23T14:22:36.221541-05:00',
+                         utils.lookup(self.calls('SoftLayer_Event_Log', 'getAllObjects')[1].filter,
+                                      'eventCreateDate', 'options')[0]['value'][0])
+        with open(checkpoint_path) as checkpoint_file:
+            self.assertEqual({'since': newer['eventCreateDate'], 'seen': [event_log.event_log_key(newer)]},
+                             json.load(checkpoint_file))
+
+        checkpoint = event_log.EventLogCheckpoint(checkpoint_path)
+        self.assertEqual(newer['eventCreateDate'], checkpoint.since)
+
+    def test_event_log_slices(self):
+        slices = event_log.event_log_slices('01/30/2019', '02/04/2019', 2, '-0500')
+
+        self.assertEqual([('01/30/2019', '02/01/2019', False), ('02/01/2019', '02/03/2019', False),
+                          ('02/03/2019', '02/04/2019', True)],
+                         [(time_slice['start'], time_slice['end'], time_slice['last']) for time_slice in slices])
+        self.assertEqual(event_log.event_log_time('2019-02-01T00:00:00-05:00')[0], slices[0]['end_time'])
+        self.assertRaises(SoftLayer.SoftLayerError, event_log.event_log_slices, '2019-01-01', '02/01/2019')
+        self.assertRaises(SoftLayer.SoftLayerError, event_log.event_log_slices, '02/01/2019', '01/01/2019')
+
+
+class EventLogExportTests(testing.TestCase):
+
+    def set_up(self):
+        self.event_log = SoftLayer.EventLogManager(self.client)
+        self.get_logs = self.set_mock('SoftLayer_Event_Log', 'getAllObjects')
+        self.get_logs.side_effect = self._slice_logs
+        self.failures = {}
+        self.sleep = mock.MagicMock()
+        self.progress = mock.MagicMock()
+
+    def _slice_logs(self, call):
+        start, end = [option['value'][0][:10] for option in call.filter['eventCreateDate']['options']]
+        if self.failures.get(start):
+            self.failures[start] -= 1
+            raise SoftLayer.SoftLayerAPIError('SoftLayer_Exception', 'Timeout')
+        # Unsorted, and with an event at the end date that is also in the next slice
+        return [{'eventCreateDate': start + 'T12:00:00.000000+00:00', 'traceId': start + '-2'},
+                {'eventCreateDate': start + 'T06:00:00.000000+00:00', 'traceId': start + '-1'},
+                {'eventCreateDate': end + 'T00:00:00.000000+00:00', 'traceId': end + '-0'}]
+
+    def export(self):
+        return [log['traceId'] for log in self.event_log.export_event_logs(
+            '01/01/2019', '01/04/2019', obj_type='User', utc_offset='+0000', max_workers=2,
+            progress=self.progress, sleep=self.sleep)]
+
+    def test_export_event_logs(self):
+        self.assertEqual(['2019-01-01-1', '2019-01-01-2', '2019-01-02-1', '2019-01-02-2',
+                          '2019-01-03-1', '2019-01-03-2', '2019-01-04-0'], self.export())
+
+        self.assertEqual(3, len(self.calls('SoftLayer_Event_Log', 'getAllObjects')))
+        request_filter = self.calls('SoftLayer_Event_Log', 'getAllObjects', limit=event_log.FOLLOW_PAGE_SIZE)[0].filter
+        self.assertEqual({'operation': 'User'}, request_filter['objectName'])
+        self.assertEqual('betweenDate', request_filter['eventCreateDate']['operation'])
+        self.assertEqual([2, 2, 3], sorted(call[0][0]['count'] for call in self.progress.call_args_list))
+        self.sleep.assert_not_called()
+
+    def test_export_event_logs_retry(self):
+        self.failures['2019-01-02'] = 2
+
+        self.assertEqual(7, len(self.export()))
+
+        self.assertEqual(5, len(self.calls('SoftLayer_Event_Log', 'getAllObjects')))
+        self.assertEqual([mock.call(5), mock.call(10)], self.sleep.call_args_list)
+        self.progress.assert_any_call({'start': '01/02/2019', 'end': '01/03/2019', 'status': 'done', 'count': 2,
+                                       'attempts': 3, 'error': None})
+
+    def test_export_event_logs_failed(self):
+        self.failures['2019-01-02'] = 10
+        exported = []
+
+        def export():
+            for log in self.event_log.export_event_logs('01/01/2019', '01/04/2019', progress=self.progress,
+                                                        sleep=self.sleep):
+                exported.append(log['traceId'])
+
+        self.assertRaises(SoftLayer.SoftLayerError, export)
+
+        self.assertEqual(['2019-01-01-1', '2019-01-01-2', '2019-01-03-1', '2019-01-03-2', '2019-01-04-0'],
+                         exported)
+        self.progress.assert_any_call({'start': '01/02/2019', 'end': '01/03/2019', 'status': 'failed', 'count': 0,
+                                       'attempts': event_log.EXPORT_RETRIES + 1,
+                                       'error': 'SoftLayerAPIError(SoftLayer_Exception): Timeout'})
+
+
+class EventLogIndexTests(testing.TestCase):
+
+    def set_up(self):
+        self.event_log = SoftLayer.EventLogManager(self.client)
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.index = event_log.EventLogIndex(os.path.join(self.path, 'event_log.db'))
+        self.addCleanup(self.index.close)
+        self.logs = SoftLayer_Event_Log.getAllObjects
+
+    def without_usernames(self):
+        return [dict((key, value) for key, value in log.items() if key != 'username') for log in self.logs]
+
+    def traces(self, request_filter=None, text=None, limit=None):
+        return [log['traceId'] for log in self.index.get_event_logs(request_filter, text, limit)]
+
+    def test_add(self):
+        self.assertEqual(7, self.index.add(self.logs))
+        self.assertEqual(0, self.index.add(self.logs))
+
+        self.assertEqual(7, self.index.count())
+        self.assertEqual(['100', '59e7765515e28', '59e77653a1e5f', '59e7763dc3f1c', '59e77636261e7',
+                          '59e767e9c2184', '59e767e03a57e'], self.traces())
+        self.assertEqual(self.logs[3], self.index.get_event_logs(limit=2)[1])
+        self.assertEqual(('2017-10-23T14:22:36.221541-05:00',
+                          ['100|Disable Port|300|2017-10-23T14:22:36.221541-05:00']), self.index.newest())
+
+    def test_get_event_logs_filter(self):
+        self.index.add(self.logs)
+
+        self.assertEqual(['59e7765515e28', '59e77653a1e5f', '59e7763dc3f1c', '59e77636261e7'],
+                         self.traces(self.event_log.build_filter(obj_id='700')))
+        self.assertEqual(['59e767e03a57e'], self.traces(self.event_log.build_filter(obj_event='Security Group Added')))
+        self.assertEqual(['100'], self.traces(self.event_log.build_filter(obj_type='CCI', date_min='10/19/2017')))
+        self.assertEqual(6, len(self.traces(self.event_log.build_filter(date_min='10/18/2017', date_max='10/19/2017',
+                                                                        utc_offset='-0500'))))
+        self.assertEqual([], self.traces(self.event_log.build_filter(date_max='10/18/2017', utc_offset='-0500')))
+
+    def test_get_event_logs_search(self):
+        self.index.add(self.logs)
+
+        self.assertEqual(['59e7765515e28', '59e7763dc3f1c', '59e767e9c2184'], self.traces(text='ruleId'))
+        self.assertEqual(['59e7763dc3f1c'], self.traces(self.event_log.build_filter(obj_id=700),
+                                                        text='0a293c1c3e59e4471da6495'))
+        self.assertRaises(SoftLayer.SoftLayerError, self.traces, text='"ruleId')
+
+    @mock.patch('SoftLayer.managers.event_log._create_text_table', return_value=None)
+    def test_get_event_logs_search_without_fts(self, _):
+        self.index.add(self.logs)
+
+        self.assertIsNone(self.index.fts)
+        self.assertEqual(['59e7765515e28', '59e7763dc3f1c', '59e767e9c2184'], self.traces(text='ruleId'))
+        # Only the metaData is searched, and % and _ are not wildcards
+        self.assertEqual([], self.traces(text='traceId'))
+        self.assertEqual([], self.traces(text='rule_d'))
+        self.assertEqual([], self.traces(text='%'))
+
+    def test_add_usernames(self):
+        username = mock.MagicMock(return_value='bob')
+        self.index.add(self.without_usernames(), username)
+
+        username.assert_called_once_with(400)
+        self.assertEqual(['bob'] * 6, [log.get('username') for log in self.index.get_event_logs()][1:])
+        self.assertNotIn('username', self.index.get_event_logs(limit=1)[0])
+
+    def test_old_format_is_emptied(self):
+        self.index.add(self.logs)
+        self.index.connection.execute("UPDATE meta SET value = '0' WHERE key = 'version'")
+        self.index.connection.commit()
+        self.index.close()
+
+        self.assertEqual(0, self.index.count())
+
+    def test_sync_index(self):
+        self.assertRaises(SoftLayer.SoftLayerError, self.event_log.sync_index, self.index)
+
+        self.assertEqual(7, self.event_log.sync_index(self.index, '10/18/2017', '10/19/2017', '-0500'))
+        self.assertEqual(1, len(self.calls('SoftLayer_Event_Log', 'getAllObjects')))
+
+        self.assertEqual(0, self.event_log.sync_index(self.index))
+        request_filter = self.calls('SoftLayer_Event_Log', 'getAllObjects')[-1].filter
+        self.assertEqual({'operation': 'greaterThanDate',
+                          'options': [{'name': 'date', 'value': ['2017-10-23T14:22:36.221541-05:00']}]},
+                         request_filter['eventCreateDate'])
+
+    def test_sync_index_usernames(self):
+        logs = self.set_mock('SoftLayer_Event_Log', 'getAllObjects')
+        logs.return_value = self.without_usernames()
+
+        self.event_log.sync_index(self.index, '10/18/2017', '10/19/2017')
+
+        self.assert_called_with('SoftLayer_User_Customer', 'getObject', identifier=400, mask='mask[username]')
+        self.assertEqual('SL12345-test', self.index.get_event_logs(limit=2)[1]['username'])
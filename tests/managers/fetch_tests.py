@@ -0,0 +1,156 @@
+"""
+    SoftLayer.tests.managers.fetch_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import threading
+import time
+
+from SoftLayer import exceptions
+from SoftLayer.managers import fetch
+from SoftLayer import testing
+
+
+class FusedGetTests(testing.TestCase):
+
+    def set_up(self):
+        self.masks = []
+        self.fragments = {
+            'disks': fetch.Fragment('blockDevices.diskImage', lambda result: result.get('blockDevices')),
+            'host': fetch.Fragment('dedicatedHost[id,name]', lambda result: result.get('dedicatedHost')),
+        }
+
+    def get_object(self, mask):
+        self.masks.append(mask)
+        return {'id': 1, 'blockDevices': [{'device': 0}], 'dedicatedHost': {'id': 2}}
+
+    def test_fused_get(self):
+        result, extras = fetch.fused_get(self.get_object, 'id,dedicatedHost.id', self.fragments)
+
+        self.assertEqual(['id,dedicatedHost[id,name],blockDevices.diskImage'], self.masks)
+        self.assertEqual(1, result['id'])
+        self.assertEqual({'disks': [{'device': 0}], 'host': {'id': 2}}, extras)
+
+    def test_fused_get_names(self):
+        _, extras = fetch.fused_get(self.get_object, 'id', self.fragments, names=['host'])
+
+        self.assertEqual(['id,dedicatedHost[id,name]'], self.masks)
+        self.assertEqual({'host': {'id': 2}}, extras)
+
+    def test_fused_get_unknown(self):
+        self.assertRaises(ValueError, fetch.fused_get, self.get_object, 'id', self.fragments, names=['nope'])
+        self.assertEqual([], self.masks)
+
+    def test_bandwidth_allocation(self):
+        result = fetch.bandwidth_allocation({
+            'bandwidthAllotmentDetail': {'allocation': {'amount': '250'}},
+            'billingCycleBandwidthUsage': [{'amountIn': '1'}],
+        })
+        self.assertEqual({'allotment': {'amount': '250'}, 'usage': [{'amountIn': '1'}]}, result)
+
+    def test_bandwidth_allocation_empty(self):
+        self.assertEqual({'allotment': None, 'usage': []}, fetch.bandwidth_allocation({}))
+
+
+class FetchPlanTests(testing.TestCase):
+
+    def test_run_order(self):
+        plan = fetch.FetchPlan()
+        finished = []
+
+        def slow(_):
+            time.sleep(0.05)
+            finished.append('slow')
+            return 'slow'
+
+        def fast(_):
+            finished.append('fast')
+            return 'fast'
+
+        plan.add('slow', slow)
+        plan.add('fast', fast)
+        results = plan.run()
+
+        self.assertEqual(['fast', 'slow'], finished)
+        self.assertEqual([('slow', 'slow'), ('fast', 'fast')], list(results.items()))
+
+    def test_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+        plan = fetch.FetchPlan(max_workers=3)
+        for name in ('a', 'b', 'c'):
+            plan.add(name, lambda _: barrier.wait())
+
+        results = plan.run()
+
+        self.assertEqual(['a', 'b', 'c'], list(results))
+
+    def test_run_requires(self):
+        plan = fetch.FetchPlan()
+        plan.add('object', lambda _: {'hostId': 5})
+        plan.add('other', lambda _: 'other')
+        plan.add('host', lambda results: {'id': results['object']['hostId']}, requires=['object'])
+
+        results = plan.run()
+
+        self.assertEqual({'id': 5}, results['host'])
+        self.assertEqual(['object', 'other', 'host'], list(results))
+
+    def test_run_serial(self):
+        plan = fetch.FetchPlan(max_workers=1)
+        plan.add('a', lambda _: threading.current_thread())
+        plan.add('b', lambda results: results['a'], requires=['a'])
+
+        results = plan.run()
+
+        self.assertEqual(threading.current_thread(), results['a'])
+        self.assertEqual(threading.current_thread(), results['b'])
+
+    def test_run_error(self):
+        called = []
+        plan = fetch.FetchPlan()
+        plan.add('bad', lambda _: 1 / 0)
+        plan.add('after', lambda _: called.append(True), requires=['bad'])
+
+        self.assertRaises(ZeroDivisionError, plan.run)
+        self.assertEqual([], called)
+
+    def test_add_duplicate(self):
+        plan = fetch.FetchPlan()
+        plan.add('a', lambda _: 1)
+        self.assertRaises(ValueError, plan.add, 'a', lambda _: 2)
+
+    def test_add_unknown_requires(self):
+        plan = fetch.FetchPlan()
+        self.assertRaises(ValueError, plan.add, 'a', lambda _: 1, requires=['b'])
+
+
+class GetDetailsTests(testing.TestCase):
+
+    def set_up(self):
+        self.fragments = {'host': fetch.Fragment('dedicatedHost.name', lambda result: result.get('dedicatedHost'))}
+
+    def test_get_details(self):
+        calls = {'ptr': lambda: ['ptr'], 'other': lambda: 'other'}
+        result, extras = fetch.get_details(lambda mask: {'id': 1, 'mask': mask}, 'id', self.fragments, calls)
+
+        self.assertEqual({'id': 1, 'mask': 'id,dedicatedHost.name'}, result)
+        self.assertEqual(['host', 'ptr', 'other'], list(extras))
+        self.assertEqual(['ptr'], extras['ptr'])
+
+    def test_get_details_names(self):
+        calls = {'ptr': lambda: ['ptr']}
+        result, extras = fetch.get_details(lambda mask: {'mask': mask}, 'id', self.fragments, calls, names=['ptr'])
+
+        self.assertEqual({'mask': 'id'}, result)
+        self.assertEqual({'ptr': ['ptr']}, extras)
+
+    def test_get_details_unknown(self):
+        self.assertRaises(ValueError, fetch.get_details, lambda mask: {}, 'id', self.fragments, names=['nope'])
+
+    def test_ignore_api_errors(self):
+        def fail():
+            raise exceptions.SoftLayerAPIError('SoftLayer_Exception', 'Not found')
+
+        self.assertEqual([], fetch.ignore_api_errors(fail, default=[])())
+        self.assertEqual(1, fetch.ignore_api_errors(lambda: 1)())
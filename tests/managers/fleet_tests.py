@@ -0,0 +1,133 @@
+"""
+    SoftLayer.tests.managers.fleet_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+
+import SoftLayer
+from SoftLayer.managers import fleet
+from SoftLayer import testing
+
+
+class SelectResourcesTests(testing.TestCase):
+
+    def set_up(self):
+        self.list_func = mock.MagicMock(return_value=[
+            {'id': 1, 'hostname': 'web01'}, {'id': 2, 'hostname': 'web02'}, {'id': 3, 'hostname': 'db01'}])
+
+    def test_ids(self):
+        selected = fleet.select_resources(self.list_func, ids=[5, '6', 5])
+
+        self.assertEqual([{'id': 5, 'hostname': None}, {'id': 6, 'hostname': None}], selected)
+        self.list_func.assert_not_called()
+
+    def test_hostname_globs(self):
+        selected = fleet.select_resources(self.list_func, ids=[1], hostnames=['web*'], datacenter='dal13')
+
+        self.assertEqual([1, 2], [server['id'] for server in selected])
+        self.list_func.assert_called_once_with(mask=fleet.SELECT_MASK, datacenter='dal13')
+
+    def test_filters(self):
+        selected = fleet.select_resources(self.list_func, tags=['web'])
+
+        self.assertEqual([1, 2, 3], [server['id'] for server in selected])
+        self.list_func.assert_called_once_with(mask=fleet.SELECT_MASK, tags=['web'])
+
+
+class FleetExecutorTests(testing.TestCase):
+
+    def set_up(self):
+        self.sleep = mock.MagicMock()
+
+    def test_run(self):
+        def operation(server_id):
+            if server_id == 2:
+                raise SoftLayer.SoftLayerAPIError('SoftLayer_Exception', 'Nope')
+            return server_id * 10
+
+        results = fleet.FleetExecutor(max_workers=2, sleep=self.sleep).run(operation, [1, 2, 3])
+
+        self.assertEqual(['done', 'failed', 'done'], [result['status'] for result in results])
+        self.assertEqual([10, None, 30], [result['result'] for result in results])
+        self.assertEqual('SoftLayerAPIError(SoftLayer_Exception): Nope', results[1]['error'])
+        self.sleep.assert_not_called()
+
+    def test_iter_run(self):
+        executor = fleet.FleetExecutor(max_workers=3, sleep=self.sleep)
+        results = executor.iter_run(lambda server_id: server_id * 10, [1, 2, 3])
+
+        self.assertEqual([(1, 10), (2, 20), (3, 30)], sorted((result['id'], result['result']) for result in results))
+
+    def test_iter_run_cancels_when_stopped(self):
+        operation = mock.MagicMock(side_effect=lambda server_id: time.sleep(0.01))
+
+        results = fleet.FleetExecutor(max_workers=1, sleep=self.sleep).iter_run(operation, list(range(50)))
+        next(results)
+        results.close()
+
+        self.assertLess(operation.call_count, 50)
+
+    def test_rate(self):
+        with mock.patch('time.time', return_value=100.0):
+            results = fleet.FleetExecutor(max_workers=1, sleep=self.sleep, rate=4).run(lambda server_id: True,
+                                                                                       [1, 2, 3])
+
+        self.assertEqual(['done'] * 3, [result['status'] for result in results])
+        self.assertEqual([mock.call(0.25), mock.call(0.5)], self.sleep.call_args_list)
+
+    def test_rate_limited(self):
+        calls = []
+
+        def operation(server_id):
+            calls.append(server_id)
+            if len(calls) < 3:
+                raise SoftLayer.SoftLayerAPIError(429, 'Too Many Requests')
+            return True
+
+        results = fleet.FleetExecutor(max_workers=1, backoff=1, sleep=self.sleep).run(operation, [1])
+
+        self.assertEqual('done', results[0]['status'])
+        self.assertEqual([1, 1, 1], calls)
+        self.assertEqual(2, self.sleep.call_count)
+
+    def test_rate_limited_gives_up(self):
+        operation = mock.MagicMock(side_effect=SoftLayer.SoftLayerAPIError(429, 'Too Many Requests'))
+
+        results = fleet.FleetExecutor(max_retries=2, backoff=1, sleep=self.sleep).run(operation, [1])
+
+        self.assertEqual('failed', results[0]['status'])
+        self.assertEqual(3, operation.call_count)
+
+    def test_is_rate_limited(self):
+        self.assertTrue(fleet.is_rate_limited(SoftLayer.SoftLayerAPIError(500, 'Rate limit exceeded')))
+        self.assertFalse(fleet.is_rate_limited(SoftLayer.SoftLayerAPIError(500, 'Internal error')))
+        self.assertFalse(fleet.is_rate_limited(SoftLayer.SoftLayerError('Rate limit')))
+
+    def test_checkpoint(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        checkpoint_path = os.path.join(path, 'reboot.json')
+        operation = mock.MagicMock(side_effect=[True, SoftLayer.SoftLayerError('Nope'), True, True])
+
+        results = fleet.FleetExecutor(max_workers=1, checkpoint=fleet.Checkpoint(checkpoint_path, 'reboot')).run(
+            operation, [1, 2, 3])
+        self.assertEqual(['done', 'failed', 'done'], [result['status'] for result in results])
+        with open(checkpoint_path) as checkpoint_file:
+            self.assertEqual({'operation': 'reboot', 'done': [1, 3]}, json.load(checkpoint_file))
+
+        # Resuming only runs the operation where it failed
+        results = fleet.FleetExecutor(max_workers=1, checkpoint=fleet.Checkpoint(checkpoint_path, 'reboot')).run(
+            operation, [1, 2, 3])
+        self.assertEqual(['skipped', 'done', 'skipped'], [result['status'] for result in results])
+        operation.assert_called_with(2)
+        self.assertEqual(4, operation.call_count)
+
+        self.assertRaises(SoftLayer.SoftLayerError, fleet.Checkpoint, checkpoint_path, 'cancel')
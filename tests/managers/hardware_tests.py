@@ -11,6 +11,7 @@ import mock
 import SoftLayer
 from SoftLayer import fixtures
 from SoftLayer import managers
+from SoftLayer.managers import locations
 from SoftLayer import testing
 
 MINIMAL_TEST_CREATE_ARGS = {
@@ -95,6 +96,31 @@ class HardwareTests(testing.TestCase):
         _id = self.hardware._get_ids_from_hostname('hardware-test1')
         self.assertEqual(_id, [1000, 1001, 1002, 1003])
 
+    def test_resolve_many_ids(self):
+        mock = self.set_mock('SoftLayer_Account', 'getHardware')
+        mock.side_effect = [
+            [{'id': 1000, 'primaryIpAddress': '172.16.1.100'}],
+            [],
+            [{'id': 1001, 'hostname': 'hardware-test1'}],
+        ]
+
+        ids = self.hardware.resolve_many_ids(['172.16.1.100', '10.0.1.87', 'hardware-test1'])
+
+        self.assertEqual(dict(ids), {'172.16.1.100': [1000], '10.0.1.87': [], 'hardware-test1': [1001]})
+        calls = self.calls('SoftLayer_Account', 'getHardware')
+        self.assertEqual(3, len(calls))
+        self.assertEqual({'hardware': {'hostname': SoftLayer.utils.query_filter_in(['10.0.1.87', 'hardware-test1'])}},
+                         calls[2].filter)
+
+    def test_identifier_index(self):
+        mock = self.set_mock('SoftLayer_Account', 'getHardware')
+        mock.return_value = [{'id': 1000, 'hostname': 'hardware-test1', 'primaryIpAddress': '172.16.1.100'}]
+        self.hardware.enable_identifier_index(ttl=60)
+
+        self.assertEqual([1000], self.hardware.resolve_ids('HARDWARE-TEST1'))
+        self.assertEqual([1000], self.hardware.resolve_ids('172.16.1.100'))
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getHardware')))
+
     def test_get_hardware(self):
         result = self.hardware.get_hardware(1000)
 
@@ -102,6 +128,28 @@ class HardwareTests(testing.TestCase):
         self.assert_called_with('SoftLayer_Hardware_Server', 'getObject',
                                 identifier=1000)
 
+    def test_get_hardware_details(self):
+        result, extras = self.hardware.get_hardware_details(1000)
+
+        self.assertEqual(fixtures.SoftLayer_Hardware_Server.getObject, result)
+        self.assertEqual(len(self.calls('SoftLayer_Hardware_Server', 'getObject')), 1)
+        call = self.calls('SoftLayer_Hardware_Server', 'getObject')[0]
+        self.assertEqual(1000, call.identifier)
+        self.assertIn('hardDrives[serialNumber,', call.mask)
+        self.assertIn('billingCycleBandwidthUsage[amountIn,amountOut,type]', call.mask)
+        self.assertEqual('z1w4sdf', extras['hard_drives'][0]['serialNumber'])
+        self.assertEqual('250', extras['bandwidth']['allotment']['amount'])
+
+    def test_get_hardware_details_no_allotment(self):
+        mock = self.set_mock('SoftLayer_Hardware_Server', 'getObject')
+        mock.return_value = {'id': 1000}
+
+        result, extras = self.hardware.get_hardware_details(1000)
+
+        self.assertEqual(1000, result['id'])
+        self.assertEqual({'allotment': None, 'usage': []}, extras['bandwidth'])
+        self.assertEqual([], extras['hard_drives'])
+
     def test_reload(self):
         post_uri = 'http://test.sftlyr.ws/test.sh'
         result = self.hardware.reload(1, post_uri=post_uri, ssh_keys=[1701])
@@ -140,6 +188,30 @@ class HardwareTests(testing.TestCase):
 
         self.assertEqual(options, expected)
 
+    def test_get_create_options_package_cached(self):
+        args = {'size': 'S1270_8GB_2X1TBSATA_NORAID', 'hostname': 'unicorn', 'domain': 'giggles.woo',
+                'location': 'wdc01', 'os': 'OS_UBUNTU_14_04_LTS_TRUSTY_TAHR_64_BIT', 'port_speed': 10}
+
+        self.hardware.get_create_options()
+        self.hardware.verify_order(**args)
+        self.hardware.place_order(**args)
+
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getAllObjects')))
+
+    def test_get_package_ttl(self):
+        now = [1000.0]
+        hardware = SoftLayer.HardwareManager(self.client, package_ttl=60)
+        hardware.package_cache.clock = lambda: now[0]
+
+        hardware.get_create_options()
+        now[0] += 59
+        hardware.get_create_options()
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getAllObjects')))
+
+        now[0] += 1
+        hardware.get_create_options()
+        self.assertEqual(2, len(self.calls('SoftLayer_Product_Package', 'getAllObjects')))
+
     def test_get_create_options_package_missing(self):
         packages = self.set_mock('SoftLayer_Product_Package', 'getAllObjects')
         packages.return_value = []
@@ -171,6 +243,19 @@ class HardwareTests(testing.TestCase):
                                **MINIMAL_TEST_CREATE_ARGS)
         self.assertIn("Could not find valid location for: 'wdc01'", str(ex))
 
+    def test_get_location_long_name(self):
+        datacenters = self.set_mock('SoftLayer_Location_Datacenter', 'getDatacenters')
+        datacenters.return_value = [{'id': 37473, 'name': 'wdc01', 'longName': 'Washington 1',
+                                     'regions': [{'keyname': 'WASHINGTON1'}]}]
+        package = fixtures.SoftLayer_Product_Package.getAllObjects[0]
+        registry = locations.get_location_registry(self.client)
+
+        self.assertEqual(package['regions'][0], managers.hardware._get_location(package, 'wdc01', registry))
+        self.assertEqual([], self.calls('SoftLayer_Location_Datacenter', 'getDatacenters'))
+        self.assertEqual(package['regions'][0], managers.hardware._get_location(package, 'Washington 1', registry))
+        self.assertEqual(package['regions'][0], managers.hardware._get_location(package, 'WASHINGTON1', registry))
+        self.assertEqual(1, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
     def test_generate_create_dict_invalid_size(self):
         args = {
             'size': 'UNKNOWN_SIZE',
@@ -626,6 +711,18 @@ class HardwareTests(testing.TestCase):
 
         self.assertEqual([], result)
 
+    @mock.patch('time.sleep')
+    def test_wait_for_ready_many(self, _sleep):
+        hardware = self.set_mock('SoftLayer_Account', 'getHardware')
+        hardware.return_value = [{'id': 1, 'provisionDate': 'aaa'}, {'id': 2, 'provisionDate': 'aaa'}]
+
+        value = self.hardware.wait_for_ready_many([1, 2], 60)
+
+        self.assertEqual({1: True, 2: True}, value)
+        _filter = {'hardware': {'id': {'operation': 'in', 'options': [{'name': 'data', 'value': [1, 2]}]}}}
+        self.assert_called_with('SoftLayer_Account', 'getHardware', filter=_filter, mask=SoftLayer.utils.READY_MASK)
+        _sleep.assert_not_called()
+
 
 class HardwareHelperTests(testing.TestCase):
     def test_get_extra_price_id_no_items(self):
@@ -0,0 +1,111 @@
+"""
+    SoftLayer.tests.managers.locations_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import os
+import shutil
+import tempfile
+
+import SoftLayer
+from SoftLayer.managers import locations
+from SoftLayer import testing
+
+DATACENTERS = [
+    {'id': 1854895, 'name': 'dal13', 'longName': 'Dallas 13', 'regions': [{'keyname': 'DALLAS13'}],
+     'priceGroups': [{'id': 1, 'name': 'Location Group 1'}]},
+    {'id': 2017603, 'name': 'wdc07', 'longName': 'Washington 7', 'regions': [{'keyname': 'WASHINGTON07'}]},
+]
+
+REGIONS = [
+    {'keyname': 'DALLAS13', 'location': {'location': {'id': 1854895, 'name': 'dal13'}}},
+    {'keyname': 'WASHINGTON07', 'location': {'location': {'id': 2017603, 'name': 'wdc07'}}},
+]
+
+
+class LocationRegistryTests(testing.TestCase):
+
+    def set_up(self):
+        self.datacenters = self.set_mock('SoftLayer_Location_Datacenter', 'getDatacenters')
+        self.datacenters.return_value = DATACENTERS
+        self.now = 1000
+        self.registry = locations.LocationRegistry(self.client, ttl=60, clock=lambda: self.now)
+
+    def test_lookups(self):
+        for identifier in ('dal13', 'DAL13', 'Dallas 13', 'DALLAS13', 'dallas13', 1854895, '1854895'):
+            self.assertEqual(1854895, self.registry.get_datacenter_id(identifier))
+        self.assertEqual('wdc07', self.registry.get_datacenter('WASHINGTON07')['name'])
+        self.assertEqual([1], self.registry.get_price_group_ids('dal13'))
+        self.assertEqual([], self.registry.get_price_group_ids('wdc07'))
+        self.assertEqual(DATACENTERS, self.registry.list_datacenters())
+        self.assertEqual(1, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+        self.assert_called_with('SoftLayer_Location_Datacenter', 'getDatacenters', mask=locations.DATACENTER_MASK)
+
+    def test_unknown_location(self):
+        self.assertIsNone(self.registry.find('BURMUDA'))
+        self.assertRaises(SoftLayer.SoftLayerError, self.registry.get_datacenter_id, 'BURMUDA')
+
+    def test_ttl(self):
+        self.registry.find('dal13')
+        self.now += 59
+        self.registry.find('dal13')
+        self.assertEqual(1, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
+        self.now += 1
+        self.registry.find('dal13')
+        self.assertEqual(2, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
+    def test_refresh(self):
+        self.registry.find('dal13')
+        self.datacenters.return_value = DATACENTERS[:1]
+        self.registry.refresh()
+        self.assertIsNone(self.registry.find('wdc07'))
+        self.assertEqual(2, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
+    def test_persist(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        cache_path = os.path.join(path, 'locations.json')
+
+        registry = locations.LocationRegistry(self.client, ttl=60, path=cache_path, clock=lambda: self.now)
+        self.assertEqual(1854895, registry.get_datacenter_id('dal13'))
+        self.assertTrue(os.path.exists(cache_path))
+
+        registry = locations.LocationRegistry(self.client, ttl=60, path=cache_path, clock=lambda: self.now)
+        self.assertEqual(2017603, registry.get_datacenter_id('Washington 7'))
+        self.assertEqual(1, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
+        # An expired file is loaded again from the API
+        self.now += 60
+        registry = locations.LocationRegistry(self.client, ttl=60, path=cache_path, clock=lambda: self.now)
+        registry.find('dal13')
+        self.assertEqual(2, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
+    def test_persist_bad_file(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        cache_path = os.path.join(path, 'locations.json')
+        with open(cache_path, 'w') as cache_file:
+            cache_file.write('not json')
+
+        registry = locations.LocationRegistry(self.client, path=cache_path)
+        self.assertEqual(1854895, registry.get_datacenter_id('dal13'))
+        self.assertEqual(1, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
+    def test_shared_by_managers(self):
+        self.assertIs(locations.get_location_registry(self.client), locations.get_location_registry(self.client))
+
+        SoftLayer.OrderingManager(self.client).get_location_id('DALLAS13')
+        SoftLayer.OrderingManager(self.client).get_location_id('dal13')
+        self.assertEqual(1, len(self.calls('SoftLayer_Location_Datacenter', 'getDatacenters')))
+
+    def test_find_region(self):
+        self.assertEqual(REGIONS[0], locations.find_region(REGIONS, 'dal13'))
+        self.assertIsNone(locations.find_region(REGIONS, 'DALLAS13'))
+        self.assertEqual([], self.calls('SoftLayer_Location_Datacenter', 'getDatacenters'))
+
+        self.assertEqual(REGIONS[0], locations.find_region(REGIONS, 'DALLAS13', self.registry))
+        self.assertEqual(REGIONS[1], locations.find_region(REGIONS, 'Washington 7', self.registry))
+        self.assertIsNone(locations.find_region(REGIONS[1:], 'dal13', self.registry))
+        self.assertIsNone(locations.find_region(REGIONS, 'BURMUDA', self.registry))
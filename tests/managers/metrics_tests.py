@@ -0,0 +1,199 @@
+"""
+    SoftLayer.tests.managers.metrics_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import datetime
+import os
+import shutil
+import tempfile
+
+import mock
+
+import SoftLayer
+from SoftLayer.managers import metrics
+from SoftLayer import testing
+
+
+def _points(start, count, rollup=3600):
+    return [{'dateTime': metrics.format_time(start + index * rollup, -360), 'type': 'publicIn_net_octet',
+             'counter': index} for index in range(count)]
+
+
+class WindowedFetchTests(testing.TestCase):
+
+    def set_up(self):
+        self.fetch = mock.MagicMock(side_effect=lambda start, end: [{'dateTime': start, 'type': 'cpu0'},
+                                                                    {'dateTime': 'same', 'type': 'cpu0'}])
+
+    def test_short_range(self):
+        data = metrics.WindowedFetch(self.fetch, 300).run('2019-3-4', '2019-4-2')
+
+        self.assertEqual(2, len(data))
+        self.fetch.assert_called_once_with('2019-3-4', '2019-4-2')
+
+    def test_unreadable_dates(self):
+        metrics.WindowedFetch(self.fetch, 300).run(None, None)
+
+        self.fetch.assert_called_once_with(None, None)
+
+    def test_windows(self):
+        fetcher = metrics.WindowedFetch(self.fetch, 3600, max_workers=2, periods=100)
+
+        data = fetcher.run('2019-01-01T00:30:00.00000-06:00', '2019-01-10T00:00:00.00000-06:00')
+
+        self.assertEqual([mock.call('2019-01-01T00:30:00.00000-06:00', '2019-01-05T03:59:59-06:00'),
+                          mock.call('2019-01-05T04:00:00-06:00', '2019-01-09T07:59:59-06:00'),
+                          mock.call('2019-01-09T08:00:00-06:00', '2019-01-10T00:00:00.00000-06:00')],
+                         sorted(self.fetch.call_args_list))
+        self.assertEqual(['2019-01-01T00:30:00.00000-06:00', 'same', '2019-01-05T04:00:00-06:00',
+                          '2019-01-09T08:00:00-06:00'], [point['dateTime'] for point in data])
+
+    def test_windows_without_timezone(self):
+        metrics.WindowedFetch(self.fetch, 86400, max_workers=1, periods=10).run('2019-01-01', '2019-01-25T12:00')
+
+        # The second window is twice as long after a quick first one
+        self.assertEqual([mock.call('2019-01-01', '2019-01-10T23:59:59'),
+                          mock.call('2019-01-11T00:00:00', '2019-01-25T12:00')], self.fetch.call_args_list)
+
+    def test_slow_windows_shrink(self):
+        clock = mock.MagicMock(side_effect=[0, 30] * 10)
+        fetcher = metrics.WindowedFetch(self.fetch, 300, max_workers=1, periods=1000, clock=clock)
+
+        fetcher.run('2019-01-01', '2019-01-10')
+
+        self.assertEqual(metrics.MIN_WINDOW_PERIODS, fetcher.periods)
+        self.assertEqual(('2019-01-04T11:20:00', '2019-01-06T04:59:59'), self.fetch.call_args_list[1][0])
+        self.assertEqual(6, self.fetch.call_count)
+
+    def test_quick_windows_grow(self):
+        fetcher = metrics.WindowedFetch(self.fetch, 300, max_workers=1, periods=1000)
+
+        fetcher.run('2019-01-01', '2019-03-01')
+
+        self.assertEqual(5, self.fetch.call_count)
+        self.assertEqual(32000, fetcher.periods)
+
+    def test_error(self):
+        self.fetch.side_effect = SoftLayer.SoftLayerAPIError('SoftLayer_Exception', 'Timeout')
+        fetcher = metrics.WindowedFetch(self.fetch, 300, periods=1000)
+
+        self.assertRaises(SoftLayer.SoftLayerAPIError, fetcher.run, '2019-01-01', '2019-03-01')
+
+
+class MetricStoreTests(testing.TestCase):
+
+    def set_up(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.store = metrics.MetricStore(os.path.join(self.path, 'metrics.db'))
+        self.addCleanup(self.store.close)
+        self.day = metrics.parse_time('2019-05-01')[0]
+        self.bandwidth = self.set_mock('SoftLayer_Metric_Tracking_Object', 'getBandwidthData')
+
+    def test_parse_time(self):
+        self.assertEqual((self.day, 0), metrics.parse_time('2019-5-1'))
+        self.assertEqual((self.day + 60, 0), metrics.parse_time('2019-05-01T00:01'))
+        self.assertEqual((self.day + 6 * 3600, -360), metrics.parse_time('2019-05-01T00:00:00.00000-06:00'))
+        self.assertEqual((self.day, 0), metrics.parse_time(datetime.datetime(2019, 5, 1)))
+        self.assertEqual('2019-04-30T18:00:00-06:00', metrics.format_time(self.day, -360))
+        self.assertRaises(SoftLayer.SoftLayerError, metrics.parse_time, 'welp')
+        self.assertRaises(SoftLayer.SoftLayerError, metrics.parse_time, '2019-02-30')
+
+    def test_missing_ranges(self):
+        self.assertEqual([(0, 10)], metrics.missing_ranges([], 0, 10))
+        self.assertEqual([(0, 2), (4, 6), (8, 10)], metrics.missing_ranges([(2, 4), (6, 8)], 0, 10))
+        self.assertEqual([], metrics.missing_ranges([(0, 20)], 5, 10))
+
+    def test_get_bandwidth_data(self):
+        self.bandwidth.return_value = _points(self.day, 24)
+
+        data = self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00')
+
+        self.assertEqual(24, len(data))
+        self.assertEqual({'dateTime': '2019-04-30T18:00:00-06:00', 'type': 'publicIn_net_octet', 'counter': 0},
+                         data[0])
+        self.assert_called_with('SoftLayer_Metric_Tracking_Object', 'getBandwidthData', identifier=1000,
+                                args=('2019-05-01T00:00:00.00000+00:00', '2019-05-01T23:59:59.00000+00:00',
+                                      None, 3600))
+
+        # The same range again is answered from the store
+        self.assertEqual(data, self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00'))
+        self.assertEqual(1, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getBandwidthData')))
+
+    def test_only_missing_ranges_are_fetched(self):
+        self.bandwidth.return_value = _points(self.day, 24)
+        self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00')
+        self.bandwidth.return_value = _points(self.day + 86400, 24)
+
+        data = self.store.get_bandwidth_data(self.client, 1000, '2019-05-01T12:00', '2019-05-02T23:00')
+
+        self.assertEqual(36, len(data))
+        self.assert_called_with('SoftLayer_Metric_Tracking_Object', 'getBandwidthData', identifier=1000,
+                                args=('2019-05-02T00:00:00.00000+00:00', '2019-05-02T23:59:59.00000+00:00',
+                                      None, 3600))
+        self.assertEqual(2, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getBandwidthData')))
+
+        # Other directions, rollups and tracking objects are stored apart
+        self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00', 'public')
+        self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00', rollup=300)
+        self.store.get_bandwidth_data(self.client, 1001, '2019-05-01', '2019-05-01T23:00')
+        self.assertEqual(5, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getBandwidthData')))
+
+    def test_recent_data_is_fetched_again(self):
+        now = self.day + 86400
+        self.bandwidth.return_value = _points(self.day, 24)
+
+        with mock.patch('time.time', return_value=now):
+            self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00')
+            self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00')
+
+        self.assertEqual(metrics.missing_ranges([(self.day, now - metrics.SETTLE_SECONDS)], self.day, now),
+                         self.store.missing(1000, 'bandwidth:all', 3600, self.day, now))
+        self.assert_called_with('SoftLayer_Metric_Tracking_Object', 'getBandwidthData', identifier=1000,
+                                args=('2019-05-01T23:00:00.00000+00:00', '2019-05-01T23:59:59.00000+00:00',
+                                      None, 3600))
+
+    def test_get_summary_data(self):
+        summary = self.set_mock('SoftLayer_Metric_Tracking_Object', 'getSummaryData')
+        summary.return_value = _points(self.day, 1, 86400)
+        types = [{'keyName': 'PUBLICIN', 'name': 'publicIn', 'summaryType': 'sum'}]
+
+        self.store.get_summary_data(self.client, 1000, '2019-05-01', '2019-05-01', types, 86400)
+        data = self.store.get_summary_data(self.client, 1000, '2019-05-01', '2019-05-01', types, 86400)
+
+        self.assertEqual(1, len(data))
+        self.assertEqual(1, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getSummaryData')))
+        self.assert_called_with('SoftLayer_Metric_Tracking_Object', 'getSummaryData', identifier=1000,
+                                args=('2019-05-01T00:00:00.00000+00:00', '2019-05-01T23:59:59.00000+00:00',
+                                      types, 86400))
+
+    def test_old_format_is_emptied(self):
+        self.bandwidth.return_value = _points(self.day, 24)
+        self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00')
+        self.store.connection.execute("UPDATE meta SET value = '0' WHERE key = 'version'")
+        self.store.connection.commit()
+        self.store.close()
+
+        self.store.get_bandwidth_data(self.client, 1000, '2019-05-01', '2019-05-01T23:00')
+
+        self.assertEqual(2, len(self.calls('SoftLayer_Metric_Tracking_Object', 'getBandwidthData')))
+
+    def test_vs_manager(self):
+        self.bandwidth.return_value = _points(self.day, 24)
+
+        data = SoftLayer.VSManager(self.client).get_bandwidth_data(100, '2019-05-01', '2019-05-01T23:00',
+                                                                   store=self.store)
+
+        self.assertEqual(24, len(data))
+        self.assert_called_with('SoftLayer_Virtual_Guest', 'getMetricTrackingObjectId', identifier=100)
+
+    def test_vs_manager_windows(self):
+        self.bandwidth.return_value = []
+
+        SoftLayer.VSManager(self.client).get_bandwidth_data(100, '2019-01-01', '2019-04-01', rollup=300)
+
+        self.assertEqual(['2019-01-01', '2019-01-31T00:00:00', '2019-03-02T00:00:00', '2019-04-01T00:00:00'],
+                         sorted(call.args[0] for call in self.calls('SoftLayer_Metric_Tracking_Object',
+                                                                    'getBandwidthData')))
@@ -480,6 +480,42 @@ class NetworkTests(testing.TestCase):
 
         self.assertEqual(_id, [])
 
+    def test_resolve_many_subnet_ids(self):
+        mock = self.set_mock('SoftLayer_Account', 'getSubnets')
+        mock.return_value = [{'id': 100, 'networkIdentifier': '10.0.0.0'}]
+
+        ids = self.network.resolve_many_subnet_ids(['10.0.0.0/29', '10.0.0.0', '10.1.0.0/24', '200'])
+
+        self.assertEqual(dict(ids), {'10.0.0.0/29': [100], '10.0.0.0': [100], '10.1.0.0/24': [], '200': [200]})
+        call = self.calls('SoftLayer_Account', 'getSubnets')[0]
+        self.assertEqual(SoftLayer.utils.query_filter_in(['10.0.0.0', '10.1.0.0']),
+                         call.filter['subnets']['networkIdentifier'])
+
+    def test_resolve_many_vlan_ids(self):
+        mock = self.set_mock('SoftLayer_Account', 'getNetworkVlans')
+        mock.return_value = [{'id': 100, 'name': 'vlan_name'}]
+
+        ids = self.network.resolve_many_vlan_ids(['vlan_name', 'nope'])
+
+        self.assertEqual(dict(ids), {'vlan_name': [100], 'nope': []})
+        _filter = {'networkVlans': {'name': SoftLayer.utils.query_filter_in(['vlan_name', 'nope'])}}
+        self.assert_called_with('SoftLayer_Account', 'getNetworkVlans', mask='mask[id, name]', filter=_filter)
+
+    def test_identifier_index(self):
+        subnets = self.set_mock('SoftLayer_Account', 'getSubnets')
+        subnets.return_value = [{'id': 100, 'networkIdentifier': '10.0.0.0', 'cidr': 29}]
+        vlans = self.set_mock('SoftLayer_Account', 'getNetworkVlans')
+        vlans.return_value = [{'id': 200, 'name': 'vlan_name'}]
+        self.network.enable_identifier_index()
+
+        self.assertEqual([100], self.network.resolve_subnet_ids('10.0.0.0/29'))
+        self.assertEqual([100], self.network.resolve_subnet_ids('10.0.0.0'))
+        self.assertEqual({'10.0.0.0/29': [100]}, dict(self.network.resolve_many_subnet_ids(['10.0.0.0/29'])))
+        self.assertEqual([200], self.network.resolve_vlan_ids('vlan_name'))
+        self.assertEqual({'vlan_name': [200]}, dict(self.network.resolve_many_vlan_ids(['vlan_name'])))
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getSubnets')))
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getNetworkVlans')))
+
     def test_unassign_global_ip(self):
         result = self.network.unassign_global_ip(9876)
 
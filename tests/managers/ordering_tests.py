@@ -9,6 +9,7 @@ import mock
 import SoftLayer
 from SoftLayer import exceptions
 from SoftLayer import fixtures
+from SoftLayer.managers import ordering
 from SoftLayer import testing
 
 
@@ -574,19 +575,19 @@ class OrderingTests(testing.TestCase):
         return to_return
 
     def test_get_location_id_short(self):
-        locations = self.set_mock('SoftLayer_Location', 'getDatacenters')
+        locations = self.set_mock('SoftLayer_Location_Datacenter', 'getDatacenters')
         locations.return_value = [{'id': 1854895, 'name': 'dal13', 'regions': [{'keyname': 'DALLAS13'}]}]
         dc_id = self.ordering.get_location_id('dal13')
         self.assertEqual(1854895, dc_id)
 
     def test_get_location_id_keyname(self):
-        locations = self.set_mock('SoftLayer_Location', 'getDatacenters')
+        locations = self.set_mock('SoftLayer_Location_Datacenter', 'getDatacenters')
         locations.return_value = [{'id': 1854895, 'name': 'dal13', 'regions': [{'keyname': 'DALLAS13'}]}]
         dc_id = self.ordering.get_location_id('DALLAS13')
         self.assertEqual(1854895, dc_id)
 
     def test_get_location_id_exception(self):
-        locations = self.set_mock('SoftLayer_Location', 'getDatacenters')
+        locations = self.set_mock('SoftLayer_Location_Datacenter', 'getDatacenters')
         locations.return_value = []
         self.assertRaises(exceptions.SoftLayerError, self.ordering.get_location_id, "BURMUDA")
 
@@ -761,3 +762,164 @@ class OrderingTests(testing.TestCase):
         item_capacity = self.ordering.get_item_capacity(items, ['INTEL_XEON_2690_2_60', 'BANDWIDTH_20000_GB'])
 
         self.assertEqual(24, int(item_capacity))
+
+    def test_get_package_index_cached(self):
+        item_mock = self.set_mock('SoftLayer_Product_Package', 'getItems')
+        item_mock.return_value = [{'id': 1, 'keyName': 'ITEM1', 'itemCategory': {'categoryCode': 'cat1'},
+                                   'prices': [{'id': 11, 'locationGroupId': None}]}]
+
+        index = self.ordering.get_package_index('PACKAGE_KEYNAME')
+        self.assertIs(index, self.ordering.get_package_index('PACKAGE_KEYNAME'))
+        self.assertEqual([11], self.ordering.get_price_id_list('PACKAGE_KEYNAME', ['ITEM1']))
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+        self.assertIsNot(index, self.ordering.get_package_index('PACKAGE_KEYNAME', refresh=True))
+        self.assertEqual(2, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+    def test_generate_order_reuses_index(self):
+        item_mock = self.set_mock('SoftLayer_Product_Package', 'getItems')
+        item_mock.return_value = [
+            {'id': 1, 'keyName': 'ITEM1', 'itemCategory': {'categoryCode': 'cat1'},
+             'prices': [{'id': 11, 'locationGroupId': None}]},
+            {'id': 2, 'keyName': 'ITEM2', 'itemCategory': {'categoryCode': 'cat2'},
+             'prices': [{'id': 21, 'locationGroupId': 503}, {'id': 22, 'locationGroupId': None}]},
+        ]
+        for _ in range(3):
+            order = self.ordering.generate_order('PACKAGE_KEYNAME', 'DALLAS13', ['ITEM1', 'ITEM2'],
+                                                 complex_type='SoftLayer_Container_Foo')
+            self.assertEqual([{'id': 11}, {'id': 22}], order['orderContainers'][0]['prices'])
+
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+
+
+class PackageIndexTests(testing.TestCase):
+
+    def set_up(self):
+        self.items = [
+            {'id': 1, 'keyName': 'GUEST_CORE_4', 'capacity': '4', 'itemCategory': {'categoryCode': 'guest_core'},
+             'prices': [{'id': 11, 'locationGroupId': 503},
+                        {'id': 12, 'locationGroupId': None}]},
+            {'id': 2, 'keyName': 'OS_LINUX', 'itemCategory': {'categoryCode': 'os'},
+             'prices': [{'id': 21, 'locationGroupId': '', 'capacityRestrictionType': 'CORE',
+                         'capacityRestrictionMinimum': '1', 'capacityRestrictionMaximum': '4'},
+                        {'id': 22, 'locationGroupId': '', 'capacityRestrictionType': 'CORE',
+                         'capacityRestrictionMinimum': '5', 'capacityRestrictionMaximum': '16'},
+                        {'id': 23, 'locationGroupId': 503, 'capacityRestrictionType': 'CORE',
+                         'capacityRestrictionMinimum': '1', 'capacityRestrictionMaximum': '16'}]},
+            {'id': 3, 'keyName': 'GPU_M10', 'itemCategory': {'categoryCode': 'gpu0'},
+             'prices': [{'id': 31, 'locationGroupId': None, 'categories': [{'categoryCode': 'gpu1'}]},
+                        {'id': 32, 'locationGroupId': None, 'categories': [{'categoryCode': 'gpu0'}]}]},
+            {'id': 4, 'keyName': 'OS_LINUX', 'itemCategory': {'categoryCode': 'os'}, 'prices': []},
+        ]
+        self.index = ordering.PackageIndex(self.items)
+
+    def test_get_item(self):
+        self.assertEqual(1, self.index.get_item('GUEST_CORE_4')['id'])
+        self.assertEqual(2, self.index.get_item('OS_LINUX')['id'])
+        self.assertIsNone(self.index.get_item('NOPE'))
+
+    def test_get_items_by_category(self):
+        self.assertEqual([2, 4], [item['id'] for item in self.index.get_items_by_category('os')])
+        self.assertEqual([], self.index.get_items_by_category('nope'))
+
+    def test_get_item_capacity(self):
+        self.assertEqual('4', self.index.get_item_capacity(['OS_LINUX', 'GUEST_CORE_4', 'NOPE']))
+        self.assertIsNone(self.index.get_item_capacity(['OS_LINUX']))
+
+    def test_get_item_price_id(self):
+        self.assertEqual(12, self.index.get_item_price_id('GUEST_CORE_4', '8'))
+        self.assertEqual(21, self.index.get_item_price_id('OS_LINUX', '4'))
+        self.assertEqual(22, self.index.get_item_price_id('OS_LINUX', 8))
+        self.assertIsNone(self.index.get_item_price_id('OS_LINUX', '32'))
+        self.assertEqual(22, self.index.get_item_price_id('OS_LINUX'))
+
+    def test_get_item_price_id_matches_manager(self):
+        for core in (None, '1', '4', '5', '16', '17'):
+            for item in self.items[:3]:
+                self.assertEqual(ordering.OrderingManager.get_item_price_id(core, item['prices']),
+                                 self.index.get_item_price_id(item['keyName'], core))
+
+    def test_get_category_price_id(self):
+        self.assertEqual(32, self.index.get_category_price_id('GPU_M10', 'gpu0'))
+        self.assertEqual(31, self.index.get_category_price_id('GPU_M10', 'gpu1'))
+        self.assertIsNone(self.index.get_category_price_id('GPU_M10', 'gpu2'))
+
+    def test_get_price(self):
+        item, price = self.index.get_price(22)
+        self.assertEqual(2, item['id'])
+        self.assertEqual('5', price['capacityRestrictionMinimum'])
+        self.assertIsNone(self.index.get_price(99))
+
+    def test_get_location_price(self):
+        self.assertEqual(11, self.index.get_location_price(12, [503])['id'])
+        self.assertEqual(12, self.index.get_location_price(12, [1])['id'])
+        # The location price has a different capacity restriction
+        self.assertEqual(21, self.index.get_location_price(21, [503])['id'])
+
+
+PRICING_ITEMS = [
+    {'id': 1, 'keyName': 'RAM_32_GB', 'capacity': '32', 'itemCategory': {'categoryCode': 'ram'},
+     'prices': [{'id': 11, 'locationGroupId': None, 'hourlyRecurringFee': '.1', 'recurringFee': '60'},
+                {'id': 12, 'locationGroupId': 503, 'hourlyRecurringFee': '.12', 'recurringFee': '70'}]},
+    {'id': 2, 'keyName': 'RAM_64_GB', 'capacity': '64', 'itemCategory': {'categoryCode': 'ram'},
+     'prices': [{'id': 21, 'locationGroupId': None, 'hourlyRecurringFee': '.2', 'recurringFee': '120'}]},
+    {'id': 3, 'keyName': 'DISK_1_TB', 'capacity': '1', 'itemCategory': {'categoryCode': 'disk0'},
+     'prices': [{'id': 31, 'locationGroupId': None, 'hourlyRecurringFee': '.05', 'recurringFee': '30',
+                 'setupFee': '10'}]},
+    {'id': 4, 'keyName': 'DISK_2_TB', 'capacity': '2', 'itemCategory': {'categoryCode': 'disk0'},
+     'prices': [{'id': 41, 'locationGroupId': None, 'recurringFee': '50'}]},
+]
+
+PRICING_REGIONS = [
+    {'keyname': 'DALLAS13', 'locations': [{'location': {'id': 1, 'name': 'dal13', 'priceGroups': []}}]},
+    {'keyname': 'SAOPAULO01', 'locations': [{'location': {'id': 2, 'name': 'sao01', 'priceGroups': [{'id': 503}]}}]},
+]
+
+
+class PriceOrderTests(testing.TestCase):
+
+    def set_up(self):
+        self.ordering = SoftLayer.OrderingManager(self.client)
+        self.set_mock('SoftLayer_Product_Package', 'getItems').return_value = PRICING_ITEMS
+        self.set_mock('SoftLayer_Product_Package', 'getRegions').return_value = PRICING_REGIONS
+
+    def test_price_order(self):
+        result = self.ordering.price_order('PACKAGE_KEYNAME', 'DALLAS13', ['RAM_32_GB', 'DISK_1_TB'])
+
+        self.assertEqual(0.15, result['hourly'])
+        self.assertEqual(90, result['monthly'])
+        self.assertEqual(10, result['setup'])
+        self.assertEqual(['RAM_32_GB', 'DISK_1_TB'], result['items'])
+        self.assertEqual([11, 31], [price['priceId'] for price in result['prices']])
+        self.assert_called_with('SoftLayer_Product_Package', 'getRegions',
+                                mask='mask[%s]' % ordering.PRICE_GROUP_REGION_MASK)
+        self.assertEqual([], self.calls('SoftLayer_Product_Order', 'verifyOrder'))
+
+    def test_price_order_location_prices(self):
+        result = self.ordering.price_order('PACKAGE_KEYNAME', 'sao01', ['RAM_32_GB', 'DISK_1_TB'])
+
+        self.assertEqual(0.17, result['hourly'])
+        self.assertEqual(100, result['monthly'])
+        self.assertEqual([12, 31], [price['priceId'] for price in result['prices']])
+
+    def test_price_order_unknown_location(self):
+        self.assertRaises(exceptions.SoftLayerError, self.ordering.price_order,
+                          'PACKAGE_KEYNAME', 'AMSTERDAM03', ['RAM_32_GB'])
+
+    def test_price_orders(self):
+        candidates = [[ram, disk] for ram in ('RAM_32_GB', 'RAM_64_GB') for disk in ('DISK_1_TB', 'DISK_2_TB')]
+
+        hourly = self.ordering.price_orders('PACKAGE_KEYNAME', 'DALLAS13', candidates)
+        monthly = self.ordering.price_orders('PACKAGE_KEYNAME', 'DALLAS13', candidates, hourly=False, limit=2)
+
+        self.assertEqual([['RAM_32_GB', 'DISK_2_TB'], ['RAM_32_GB', 'DISK_1_TB'],
+                          ['RAM_64_GB', 'DISK_2_TB'], ['RAM_64_GB', 'DISK_1_TB']],
+                         [result['items'] for result in hourly])
+        self.assertEqual([['RAM_32_GB', 'DISK_1_TB'], ['RAM_32_GB', 'DISK_2_TB']],
+                         [result['items'] for result in monthly])
+        self.assertEqual(1, len(self.calls('SoftLayer_Product_Package', 'getItems')))
+        self.assertEqual(2, len(self.calls('SoftLayer_Product_Package', 'getRegions')))
+
+    def test_price_orders_unknown_item(self):
+        self.assertRaises(exceptions.SoftLayerError, self.ordering.price_orders,
+                          'PACKAGE_KEYNAME', 'DALLAS13', [['RAM_32_GB'], ['NOPE']])
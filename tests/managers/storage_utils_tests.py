@@ -114,6 +114,44 @@ class StorageUtilsTests(testing.TestCase):
             mask='mask[id,name,items[prices[categories],attributes]]'
         )
 
+    def test_get_package_cached(self):
+        mock = self.set_mock('SoftLayer_Product_Package', 'getAllObjects')
+        mock.return_value = [SoftLayer_Product_Package.SAAS_PACKAGE]
+
+        first = storage_utils.get_package(self.block, 'storage_as_a_service')
+        second = storage_utils.get_package(self.block, 'storage_as_a_service')
+        storage_utils.get_package(self.block, 'storage_as_a_service', refresh=True)
+
+        self.assertIs(first, second)
+        self.assertIs(first.price_index, second.price_index)
+        self.assertEqual(2, len(self.calls('SoftLayer_Product_Package', 'getAllObjects')))
+
+    def test_price_index_find(self):
+        items = [
+            {'id': 1, 'capacity': '100', 'keyName': 'SPACE_100',
+             'prices': [{'id': 11, 'locationGroupId': 503, 'categories': [{'categoryCode': 'storage_snapshot_space'}]},
+                        {'id': 12, 'locationGroupId': '', 'capacityRestrictionType': 'IOPS',
+                         'capacityRestrictionMinimum': '100', 'capacityRestrictionMaximum': '200',
+                         'categories': [{'categoryCode': 'storage_snapshot_space'}]},
+                        {'id': 13, 'locationGroupId': '', 'capacityRestrictionType': 'IOPS',
+                         'capacityRestrictionMinimum': '1', 'capacityRestrictionMaximum': '1000',
+                         'categories': [{'categoryCode': 'storage_snapshot_space'}]}]},
+            {'id': 2, 'capacity': '20', 'keyName': 'SPACE_20',
+             'prices': [{'id': 21, 'locationGroupId': '',
+                         'categories': [{'categoryCode': 'storage_snapshot_space'}]}]},
+        ]
+        index = storage_utils.StoragePriceIndex(items)
+
+        self.assertEqual({'id': 12}, index.find('storage_snapshot_space'))
+        self.assertEqual({'id': 12}, index.find('storage_snapshot_space', 'IOPS', 150, capacity=100))
+        self.assertEqual({'id': 13}, index.find('storage_snapshot_space', 'IOPS', 500, capacity=100))
+        self.assertIsNone(index.find('storage_snapshot_space', 'IOPS', 5000, capacity=100))
+        self.assertIsNone(index.find('storage_snapshot_space', 'STORAGE_TIER_LEVEL', 200, capacity=100))
+        self.assertEqual({'id': 21}, index.find('storage_snapshot_space', capacity=20))
+        self.assertEqual({'id': 21}, index.find('storage_snapshot_space',
+                                                item_filter=lambda item: item['keyName'] == 'SPACE_20'))
+        self.assertIsNone(index.find('storage_tier_level'))
+
     # ---------------------------------------------------------------------
     # Tests for get_location_id()
     # ---------------------------------------------------------------------
@@ -11,6 +11,7 @@ import SoftLayer
 from SoftLayer import exceptions
 from SoftLayer import fixtures
 from SoftLayer import testing
+from SoftLayer import utils
 
 
 class VSTests(testing.TestCase):
@@ -108,6 +109,40 @@ class VSTests(testing.TestCase):
         _id = self.vs._get_ids_from_hostname('vs-test1')
         self.assertEqual(_id, [100, 104])
 
+    def test_resolve_many_ids(self):
+        mock = self.set_mock('SoftLayer_Account', 'getVirtualGuests')
+        mock.side_effect = [
+            [{'id': 100, 'primaryIpAddress': '172.16.240.2'}],
+            [{'id': 101, 'primaryBackendIpAddress': '10.0.1.87'}],
+            [{'id': 102, 'hostname': 'vs-test1'}, {'id': 103, 'hostname': 'VS-TEST1'}],
+        ]
+
+        ids = self.vs.resolve_many_ids(['172.16.240.2', '10.0.1.87', 'vs-test1', 'nope', '104'])
+
+        self.assertEqual(list(ids.items()), [('172.16.240.2', [100]), ('10.0.1.87', [101]),
+                                             ('vs-test1', [102, 103]), ('nope', []), ('104', [104])])
+        calls = self.calls('SoftLayer_Account', 'getVirtualGuests')
+        self.assertEqual(3, len(calls))
+        self.assertEqual({'virtualGuests': {'primaryBackendIpAddress': utils.query_filter_in(['10.0.1.87'])}},
+                         calls[1].filter)
+        self.assertEqual({'virtualGuests': {'hostname': utils.query_filter_in(['vs-test1', 'nope'])}},
+                         calls[2].filter)
+
+    def test_identifier_index(self):
+        mock = self.set_mock('SoftLayer_Account', 'getVirtualGuests')
+        mock.return_value = [{'id': 100, 'hostname': 'vs-test1', 'fullyQualifiedDomainName': 'vs-test1.test.sftlyr.ws',
+                              'primaryIpAddress': '172.16.240.2', 'primaryBackendIpAddress': '10.0.1.87'}]
+        self.vs.enable_identifier_index()
+
+        self.assertEqual([100], self.vs.resolve_ids('vs-test1.test.sftlyr.ws'))
+        self.assertEqual([100], self.vs.resolve_ids('10.0.1.87'))
+        self.assertEqual({'vs-test1': [100], '172.16.240.2': [100]},
+                         dict(self.vs.resolve_many_ids(['vs-test1', '172.16.240.2'])))
+        self.assert_called_with('SoftLayer_Account', 'getVirtualGuests',
+                                mask='mask[id, hostname, fullyQualifiedDomainName, primaryIpAddress, '
+                                     'primaryBackendIpAddress]')
+        self.assertEqual(1, len(self.calls('SoftLayer_Account', 'getVirtualGuests')))
+
     def test_get_instance(self):
         result = self.vs.get_instance(100)
 
@@ -115,6 +150,45 @@ class VSTests(testing.TestCase):
         self.assert_called_with('SoftLayer_Virtual_Guest', 'getObject',
                                 identifier=100)
 
+    def test_get_instance_details(self):
+        result, extras = self.vs.get_instance_details(100)
+
+        self.assertEqual(fixtures.SoftLayer_Virtual_Guest.getObject, result)
+        self.assertEqual(len(self.calls('SoftLayer_Virtual_Guest', 'getObject')), 1)
+        call = self.calls('SoftLayer_Virtual_Guest', 'getObject')[0]
+        self.assertEqual(100, call.identifier)
+        self.assertIn('blockDevices.diskImage[capacity,units,description]', call.mask)
+        self.assertIn('dedicatedHost[id,name]', call.mask)
+        self.assertIn('bandwidthAllotmentDetail.allocation.amount', call.mask)
+        self.assertEqual([1, 4], [device['device'] for device in extras['local_disks']])
+        self.assertEqual('250', extras['bandwidth']['allotment']['amount'])
+        self.assertEqual('.448', extras['bandwidth']['usage'][0]['amountIn'])
+        self.assertEqual('test-dedicated', extras['dedicated_host']['name'])
+        self.assertEqual(fixtures.SoftLayer_Virtual_Guest.getReverseDomainRecords, extras['ptr_records'])
+        self.assert_called_with('SoftLayer_Virtual_Guest', 'getReverseDomainRecords', identifier=100)
+
+    def test_get_instance_details_extras(self):
+        result, extras = self.vs.get_instance_details(100, extras=['bandwidth'])
+
+        self.assertEqual(100, result['id'])
+        self.assertEqual(['bandwidth'], list(extras))
+        self.assertEqual([], self.calls('SoftLayer_Virtual_Guest', 'getReverseDomainRecords'))
+        call = self.calls('SoftLayer_Virtual_Guest', 'getObject')[0]
+        self.assertNotIn('diskImage', call.mask)
+        self.assertIn('dedicatedHost.id', call.mask)
+
+    def test_get_instance_details_private_only(self):
+        mock = self.set_mock('SoftLayer_Virtual_Guest', 'getObject')
+        mock.return_value = {'id': 100, 'privateNetworkOnlyFlag': True}
+
+        result, extras = self.vs.get_instance_details(100)
+
+        self.assertEqual([], extras['ptr_records'])
+        self.assertEqual(1, len(self.calls('SoftLayer_Virtual_Guest', 'getReverseDomainRecords')))
+
+    def test_get_instance_details_unknown_extra(self):
+        self.assertRaises(ValueError, self.vs.get_instance_details, 100, extras=['nope'])
+
     def test_get_create_options(self):
         results = self.vs.get_create_options()
 
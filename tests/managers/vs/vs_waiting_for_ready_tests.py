@@ -161,3 +161,20 @@ class VSWaitReadyGoTests(testing.TestCase):
         _sleep.assert_called_once()
         _dsleep.assert_called_once()
         self.assertTrue(value)
+
+    @mock.patch('time.sleep')
+    def test_wait_for_ready_many(self, _sleep):
+        guests = self.client['Account'].getVirtualGuests
+        guests.side_effect = [
+            [{'id': 1, 'provisionDate': 'aaa'}, {'id': 2}],
+            [{'id': 2, 'provisionDate': 'aaa'}],
+        ]
+
+        value = self.vs.wait_for_ready_many([1, 2], 60, delay=1)
+
+        self.assertEqual({1: True, 2: True}, value)
+        self.assertEqual(2, guests.call_count)
+        _filter = guests.call_args[1]['filter']
+        self.assertEqual([2], _filter['virtualGuests']['id']['options'][0]['value'])
+        self.assertEqual(SoftLayer.utils.READY_MASK, guests.call_args[1]['mask'])
+        _sleep.assert_called_once_with(1)
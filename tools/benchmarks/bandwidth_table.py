@@ -0,0 +1,38 @@
+"""Times the tables of `slcli vs bandwidth` for a quarter of five minute data.
+
+Usage: python tools/benchmarks/bandwidth_table.py [days]
+"""
+import datetime
+import random
+import sys
+import time
+
+from SoftLayer.CLI.virt import bandwidth
+
+TYPES = ['publicIn_net_octet', 'publicOut_net_octet', 'privateIn_net_octet', 'privateOut_net_octet', 'cpu0']
+
+
+def bandwidth_data(days, rollup=300):
+    """getBandwidthData points for every type and rollup period of days."""
+    start = datetime.datetime(2019, 1, 1)
+    data = []
+    for period in range(days * 86400 // rollup):
+        date_time = (start + datetime.timedelta(seconds=period * rollup)).strftime('%Y-%m-%dT%H:%M:%S-06:00')
+        for data_type in TYPES:
+            data.append({'dateTime': date_time, 'type': data_type, 'counter': random.randint(0, 2 ** 30)})
+    return data
+
+
+def main(days):
+    """Builds the tables once and prints how long it took."""
+    data = bandwidth_data(days)
+    start = time.time()
+    table, sum_table = bandwidth.create_bandwidth_table(data, 300)
+    elapsed = time.time() - start
+    print("%d points, %d rows in %.2fs (%d points/s)" % (len(data), len(table.rows), elapsed, len(data) / elapsed))
+    for row in sum_table.rows:
+        print(row)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 90)
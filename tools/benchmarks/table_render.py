@@ -0,0 +1,50 @@
+"""Compares the columnar table renderer against prettytable.
+
+Usage: python tools/benchmarks/table_render.py [rows]
+"""
+import copy
+import sys
+import time
+
+from SoftLayer.CLI import formatting
+
+
+def build_table(rows):
+    """Builds a table that looks like the output of `slcli vs list`."""
+    table = formatting.Table(['id', 'hostname', 'primary_ip', 'backend_ip', 'datacenter', 'action'])
+    table.sortby = 'hostname'
+    table.align['hostname'] = 'l'
+    for index in range(rows):
+        table.add_row([
+            index,
+            'host-%06d.example.com' % ((index * 7919) % rows),
+            '10.%d.%d.%d' % (index % 255, (index // 255) % 255, index % 7),
+            formatting.blank(),
+            'dal%02d' % (index % 13),
+            formatting.FormattedItem('RECLAIM', 'Reclaim wait') if index % 5 else formatting.blank(),
+        ])
+    return table
+
+
+def timed(func, *args):
+    """Returns the output of func and the seconds it took."""
+    start = time.time()
+    output = func(*args)
+    return output, time.time() - start
+
+
+def main(rows):
+    """Renders the same table with both renderers in both formats."""
+    table = build_table(rows)
+    for fmt, legacy in (('table', formatting.format_prettytable), ('raw', formatting.format_no_tty)):
+        # the prettytable path formats the cells of the table in place
+        legacy_table = copy.deepcopy(table)
+        expected, legacy_time = timed(lambda: str(legacy(legacy_table)))
+        output, fast_time = timed(formatting.render_table, table, fmt)
+        assert output == expected, "%s output differs from prettytable" % fmt
+        print("%-5s %d rows: prettytable %.2fs, columnar %.2fs (%.1fx)"
+              % (fmt, rows, legacy_time, fast_time, legacy_time / fast_time))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,64 @@
+"""Times the streaming zone file parser of `slcli dns import` on a large synthetic zone.
+
+Usage: python tools/benchmarks/zone_parse.py [records]
+"""
+import sys
+import time
+import tracemalloc
+
+from SoftLayer.CLI.dns import zone_import
+
+HEADER = """$ORIGIN example.com.
+$TTL 1h
+@ IN SOA ns1.example.com. hostmaster.example.com. (
+        2020010101 ; serial
+        1d 2h 4w 1h )
+  IN NS ns1.example.com.
+  IN NS ns2.example.com.
+"""
+
+
+def zone_lines(records):
+    """Yields the lines of a zone with records records of the usual types, without building it in memory."""
+    for line in HEADER.splitlines():
+        yield line
+    for index in range(records):
+        kind = index % 10
+        if kind < 6:
+            yield 'host-%06d 300 IN A 10.%d.%d.%d' % (index, index % 255, (index // 255) % 255, index % 250 + 1)
+        elif kind == 6:
+            yield '           IN AAAA 2001:db8::%x ; same owner as the last record' % index
+        elif kind == 7:
+            yield 'alias-%06d IN CNAME host-%06d' % (index, index - 7)
+        elif kind == 8:
+            yield 'txt-%06d IN TXT ( "v=spf1 ip4:10.0.0.0/8"\n    "include:example.net -all" )' % index
+        else:
+            yield 'mail-%06d IN MX 10 mx-%d.example.com.' % (index, index % 4)
+
+
+def parse(records):
+    """Parses a synthetic zone and returns how many records it had."""
+    parser = zone_import.ZoneFileParser()
+    lines = (part for line in zone_lines(records) for part in line.split('\n'))
+    count = sum(1 for _ in parser.parse(lines))
+    assert not parser.bad_lines, parser.bad_lines[:5]
+    return count
+
+
+def main(records):
+    """Times the parser, then parses again with tracemalloc to report the peak memory."""
+    start = time.time()
+    count = parse(records)
+    elapsed = time.time() - start
+
+    tracemalloc.start()
+    parse(records)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print("%d records in %.2fs (%d records/s), peak memory %.1f KiB"
+          % (count, elapsed, count / elapsed, peak / 1024.0))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)